@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline: latência de inferência de uma amostra (LSTM, RL, Transformer)
+
+Compara o caminho original (model.predict / tensores criados por chamada) com
+os backends do inference_runtime (compilado, TFLite, ONNX). Modelos com pesos
+aleatórios: a latência não depende do treino. Backends cujas dependências não
+estão instaladas aparecem como indisponíveis.
+
+Uso:
+    python scripts/benchmark_inference.py --iterations 500
+    python scripts/benchmark_inference.py --models lstm rl --backends compiled tflite
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import numpy as np  # noqa: E402
+
+from ml.inference_runtime import (  # noqa: E402
+    KerasInferenceRuntime, TorchInferenceRuntime, benchmark_latency
+)
+
+
+def _keras_cases(build_model, input_shape, backends, iterations):
+    model = build_model()
+    sample = np.random.default_rng(0).standard_normal(input_shape).astype(np.float32)
+    batch = sample[None, ...]
+
+    results = {'model.predict': benchmark_latency(lambda: model.predict(batch, verbose=0), iterations)}
+    for backend in backends:
+        runtime = KerasInferenceRuntime(model, input_shape, backend=backend)
+        if runtime.backend != backend:
+            results[backend] = None
+            continue
+        results[backend] = benchmark_latency(lambda: runtime.predict(sample), iterations)
+    return results
+
+
+def bench_lstm(backends, iterations):
+    from ml.lstm_predictor import LSTMPricePredictor
+    predictor = LSTMPricePredictor(data_dir=tempfile.mkdtemp())
+    shape = (predictor.lookback, predictor.n_features)
+    return _keras_cases(lambda: predictor._build_model(predictor.n_features), shape, backends, iterations)
+
+
+def bench_rl(backends, iterations):
+    from ml.rl_agent import RLTradingAgent
+    agent = RLTradingAgent(data_dir=tempfile.mkdtemp())
+    return _keras_cases(agent._build_model, (agent.state_size,), backends, iterations)
+
+
+def bench_transformer(backends, iterations):
+    import torch
+    from ml.transformer_predictor import TransformerPricePredictor, TransformerConfig
+
+    config = TransformerConfig()
+    predictor = TransformerPricePredictor(config)
+    predictor._build_model()
+    model = predictor._model.eval()
+    shape = (config.seq_length, config.n_features)
+    data = np.random.default_rng(0).standard_normal(shape).astype(np.float32)
+
+    def original():
+        # Caminho anterior: tensor e positional encoding a cada chamada
+        x = torch.FloatTensor(data).unsqueeze(0).to(predictor._device)
+        pos_enc = predictor._pos_encoder.get_encoding(config.seq_length).to(predictor._device)
+        with torch.no_grad():
+            outputs = model(x, pos_enc)
+        return torch.softmax(outputs['direction_logits'], dim=1).cpu().numpy()
+
+    results = {'eager (original)': benchmark_latency(original, iterations)}
+    pos_enc = predictor._pos_encoder.get_encoding(config.seq_length)
+    for backend in backends:
+        backend = 'torchscript' if backend == 'compiled' else backend
+        if backend == 'tflite':
+            continue
+        runtime = TorchInferenceRuntime(model, shape, constants=(pos_enc,), backend=backend,
+                                        device=predictor._device)
+        if runtime.backend != backend:
+            results[backend] = None
+            continue
+        results[backend] = benchmark_latency(lambda: runtime.predict(data), iterations)
+    return results
+
+
+BENCHMARKS = {
+    'lstm': bench_lstm,
+    'rl': bench_rl,
+    'transformer': bench_transformer,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--backends', nargs='+', default=['compiled', 'tflite', 'onnx'])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"\n{args.iterations} inferências de uma amostra por caminho")
+    print(f"{'modelo':<12} {'caminho':<18} {'p50(ms)':>9} {'p99(ms)':>9} {'média(ms)':>10}")
+    for name in args.models:
+        try:
+            results = BENCHMARKS[name](args.backends, args.iterations)
+        except Exception as e:
+            print(f"{name:<12} indisponível ({e})")
+            continue
+        for path, r in results.items():
+            if r is None:
+                print(f"{name:<12} {path:<18} {'indisponível':>30}")
+            else:
+                print(f"{name:<12} {path:<18} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['mean_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
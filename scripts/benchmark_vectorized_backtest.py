@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline: grid da SMAStrategy no backtester vetorizado
+
+Barras M5 sintéticas (~1 ano = 105k barras). Todas as combinações
+fast x slow x sl_atr x tp_atr são simuladas em lotes de colunas por
+VectorizedBacktester.run_grid, sem loop por barra.
+
+Para comparação, mede também uma única combinação no
+BacktestEngine.run (loop por barras, SMAStrategy) em um trecho dos dados e
+extrapola linearmente para o grid (limite inferior: a SMAStrategy recalcula
+as médias sobre todo o histórico a cada barra).
+
+Uso:
+    python scripts/benchmark_vectorized_backtest.py --bars 105000 --chunk 512
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import numpy as np  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from backtesting.engine import BacktestEngine, SMAStrategy  # noqa: E402
+from backtesting.vectorized import VectorizedBacktester, sma_crossover_signals  # noqa: E402
+from tests.fakes.market_data import make_bars  # noqa: E402
+
+
+def sma_signals(data, fast_period, slow_period):
+    signals = sma_crossover_signals(data, [fast_period], [slow_period])
+    return {name: values[:, 0] for name, values in signals.items() if name != 'params'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=105_000)
+    parser.add_argument('--chunk', type=int, default=512, help='Colunas por lote do run_grid')
+    parser.add_argument('--engine-bars', type=int, default=3_000, help='Barras no BacktestEngine.run de referência')
+    args = parser.parse_args()
+
+    logger.remove()
+    data = make_bars(args.bars, start_price=1900, step=0.8, spread=0.6,
+                     volume_column='tick_volume')
+
+    grid = {
+        'fast_period': list(range(5, 55, 5)),
+        'slow_period': list(range(60, 260, 20)),
+        'sl_atr': [1.0, 1.5, 2.0, 2.5, 3.0],
+        'tp_atr': [1.5, 2.0, 3.0, 4.0],
+    }
+    combos = int(np.prod([len(v) for v in grid.values()]))
+
+    bt = VectorizedBacktester()
+    start = time.perf_counter()
+    result = bt.run_grid(data, sma_signals, grid, chunk_size=args.chunk, symbol='XAUUSD')
+    grid_s = time.perf_counter() - start
+
+    engine = BacktestEngine()
+    start = time.perf_counter()
+    engine.run(SMAStrategy(10, 60), data.iloc[:args.engine_bars].copy(), symbol='XAUUSD')
+    engine_s = (time.perf_counter() - start) * args.bars / args.engine_bars
+
+    best = result.best('sharpe_ratio', min_trades=30)
+    print(f"\n{args.bars} barras M5 | {combos} combinações | {len(result.trades)} trades")
+    print(f"vetorizado: {grid_s:.2f}s ({combos / grid_s:,.0f} combinações/s)")
+    print(f"BacktestEngine.run: >= {engine_s:.1f}s por combinação -> >= {engine_s * combos / 3600:.1f}h no grid")
+    if best:
+        print("melhor sharpe: " + ", ".join(f"{k}={best[k]}" for k in grid) + f" -> {best['sharpe_ratio']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline: retreino incremental vs refit completo do XGBoost
+
+Fluxo sintético de amostras (features -> trade vencedor) com relação que
+deriva devagar. A cada rodada chegam --chunk amostras novas e os dois modos
+retreinam:
+- full: refit do zero com todo o histórico (comportamento anterior)
+- incremental: IncrementalBoostingTrainer (warm start; refit por agenda/drift)
+
+A AUC é medida no chunk seguinte, ainda não visto por nenhum dos modos.
+
+Uso:
+    python scripts/benchmark_xgb_retrain.py --initial 5000 --chunk 500 --rounds 20
+    python scripts/benchmark_xgb_retrain.py --drift 0.5 --full-refit-every 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import numpy as np  # noqa: E402
+
+from ml.incremental_boosting import (  # noqa: E402
+    XGBOOST_AVAILABLE, IncrementalBoostingTrainer, binary_auc
+)
+
+PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'auc',
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'n_estimators': 100,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'random_state': 42,
+    'verbosity': 0
+}
+
+
+def make_stream(n: int, n_features: int, drift: float, seed: int = 0):
+    """Amostras com pesos do logit girando ao longo do fluxo (drift total em radianos)"""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, n_features)).astype(np.float32)
+    w0, w1 = rng.standard_normal(n_features), rng.standard_normal(n_features)
+    angle = np.linspace(0, drift, n)[:, None]
+    weights = np.cos(angle) * w0 + np.sin(angle) * w1
+    logit = (X * weights).sum(axis=1) + 0.5 * X[:, 0] * X[:, 1]
+    y = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(np.int8)
+    return X, y
+
+
+def split_val(X, y, fraction=0.2):
+    n_val = max(1, int(len(X) * fraction))
+    return X[:-n_val], y[:-n_val], X[-n_val:], y[-n_val:]
+
+
+def run(args):
+    n_total = args.initial + args.chunk * (args.rounds + 1)
+    X, y = make_stream(n_total, args.features, args.drift)
+    trainer_config = {
+        'incremental_rounds': args.incremental_rounds,
+        'full_refit_every': args.full_refit_every
+    }
+    full = IncrementalBoostingTrainer(trainer_config)
+    inc = IncrementalBoostingTrainer(trainer_config)
+
+    # Modelo inicial igual para os dois modos
+    X_tr, y_tr, X_val, y_val = split_val(X[:args.initial], y[:args.initial])
+    model_full, _ = full.refit('m', PARAMS, X_tr, y_tr, X_val, y_val, trained_rows=args.initial)
+    model_inc, _ = inc.refit('m', PARAMS, X_tr, y_tr, X_val, y_val, trained_rows=args.initial)
+
+    rows = []
+    for r in range(args.rounds):
+        end = args.initial + args.chunk * (r + 1)
+        X_next, y_next = X[end:end + args.chunk], y[end:end + args.chunk]
+
+        # Refit completo com todo o histórico
+        start = time.perf_counter()
+        X_tr, y_tr, X_val, y_val = split_val(X[:end], y[:end])
+        model_full, _ = full.refit('m', PARAMS, X_tr, y_tr, X_val, y_val, trained_rows=end)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        # Incremental (ou refit se o trainer pedir)
+        start = time.perf_counter()
+        trained = inc.states['m'].trained_rows
+        reason = inc.refit_reason('m', model_inc, X[trained:end], y[trained:end])
+        if reason is None:
+            model_inc, _ = inc.update('m', PARAMS, model_inc, X[trained:end], y[trained:end], trained_rows=end)
+            mode = 'incremental'
+        else:
+            X_tr, y_tr, X_val, y_val = split_val(X[:end], y[:end])
+            model_inc, _ = inc.refit('m', PARAMS, X_tr, y_tr, X_val, y_val, trained_rows=end, reason=reason)
+            mode = f'refit ({reason})'
+        inc_ms = (time.perf_counter() - start) * 1000
+
+        rows.append({
+            'round': r + 1,
+            'samples': end,
+            'full_ms': full_ms,
+            'full_auc': binary_auc(y_next, model_full.predict_proba(X_next)[:, 1]),
+            'inc_ms': inc_ms,
+            'inc_auc': binary_auc(y_next, model_inc.predict_proba(X_next)[:, 1]),
+            'mode': mode
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--initial', type=int, default=5000)
+    parser.add_argument('--chunk', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--features', type=int, default=50)
+    parser.add_argument('--drift', type=float, default=0.3, help='Rotação total dos pesos (radianos)')
+    parser.add_argument('--incremental-rounds', type=int, default=20)
+    parser.add_argument('--full-refit-every', type=int, default=10)
+    args = parser.parse_args()
+
+    if not XGBOOST_AVAILABLE:
+        print("XGBoost não disponível - instale com: pip install xgboost")
+        return
+
+    rows = run(args)
+
+    print(f"\n{args.rounds} retreinos | {args.initial} amostras iniciais + {args.chunk} por rodada | "
+          f"AUC no chunk seguinte")
+    print(f"{'rodada':>6} {'amostras':>9} {'full(ms)':>9} {'full AUC':>9} {'incr(ms)':>9} {'incr AUC':>9}  modo")
+    for row in rows:
+        print(f"{row['round']:>6} {row['samples']:>9} {row['full_ms']:>9.1f} {row['full_auc']:>9.4f} "
+              f"{row['inc_ms']:>9.1f} {row['inc_auc']:>9.4f}  {row['mode']}")
+
+    full_ms = sum(r['full_ms'] for r in rows)
+    inc_ms = sum(r['inc_ms'] for r in rows)
+    print(f"\n{'total':>6} {'':>9} {full_ms:>9.1f} {np.nanmean([r['full_auc'] for r in rows]):>9.4f} "
+          f"{inc_ms:>9.1f} {np.nanmean([r['inc_auc'] for r in rows]):>9.4f}")
+    print(f"speedup do retreino: {full_ms / max(inc_ms, 1e-9):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
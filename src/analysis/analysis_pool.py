@@ -0,0 +1,172 @@
+"""
+Pool de Workers de Análise
+Pool único no processo que paraleliza a análise multi-timeframe com limite global de concorrência
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class AnalysisWorkerPool:
+    """
+    Pool de threads compartilhado por todos os TechnicalAnalyzer
+
+    - max_workers limita quantas análises (chamadas MT5 + cálculo) rodam ao mesmo
+      tempo no processo, independente de quantos executores pedem análise
+    - Pedidos excedentes aguardam na fila do pool (FIFO)
+    - Chamadas feitas de dentro de um worker rodam na própria thread (sem deadlock)
+    - Mede espera na fila e tempo de execução por timeframe
+    """
+
+    def __init__(self, max_workers: int = 4, timeout_seconds: float = 30.0):
+        """
+        Inicializa o pool
+
+        Args:
+            max_workers: Limite global de análises simultâneas
+            timeout_seconds: Tempo máximo de espera por timeframe
+        """
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'batches': 0,
+            'tasks': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'inline': 0,
+            'queue_wait_ms_total': 0.0,
+            'queue_wait_ms_max': 0.0
+        }
+        self._latency: Dict[str, Dict[str, float]] = {}
+
+    def _record(self, label: str, elapsed_ms: float, wait_ms: float = 0.0):
+        with self._lock:
+            self.stats['tasks'] += 1
+            self.stats['queue_wait_ms_total'] += wait_ms
+            self.stats['queue_wait_ms_max'] = max(self.stats['queue_wait_ms_max'], wait_ms)
+            lat = self._latency.get(label)
+            if lat is None:
+                lat = self._latency[label] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}
+            lat['count'] += 1
+            lat['total_ms'] += elapsed_ms
+            lat['max_ms'] = max(lat['max_ms'], elapsed_ms)
+            lat['last_ms'] = elapsed_ms
+
+    def _run(self, func: Callable[[str], Any], label: str, submitted_at: float) -> Tuple[Any, float]:
+        """Executa uma tarefa dentro do worker"""
+        start = time.perf_counter()
+        self._local.active = True
+        try:
+            result = func(label)
+        finally:
+            self._local.active = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(label, elapsed_ms, (start - submitted_at) * 1000)
+        return result, elapsed_ms
+
+    def map(self, func: Callable[[str], Any], labels: List[str],
+            timeout_seconds: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Executa func(label) para cada label em paralelo
+
+        Args:
+            func: Função a executar (ex: TechnicalAnalyzer.analyze_timeframe)
+            labels: Argumentos (ex: timeframes), na ordem desejada do resultado
+            timeout_seconds: Espera máxima por tarefa (None = padrão do pool)
+
+        Returns:
+            (resultados por label, latência em ms por label); labels que falharam
+            ou estouraram o timeout ficam de fora dos resultados
+        """
+        with self._lock:
+            self.stats['batches'] += 1
+
+        results: Dict[str, Any] = {}
+        latency: Dict[str, float] = {}
+
+        # Já estamos num worker: executar em linha para não esperar pela própria fila
+        if getattr(self._local, 'active', False):
+            with self._lock:
+                self.stats['inline'] += len(labels)
+            for label in labels:
+                start = time.perf_counter()
+                try:
+                    results[label] = func(label)
+                except Exception as e:
+                    logger.error(f"Erro na análise {label}: {e}")
+                    with self._lock:
+                        self.stats['errors'] += 1
+                latency[label] = (time.perf_counter() - start) * 1000
+                self._record(label, latency[label])
+            return results, latency
+
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+        now = time.perf_counter()
+        futures = [(label, self._executor.submit(self._run, func, label, now)) for label in labels]
+        deadline = now + timeout
+
+        for label, future in futures:
+            try:
+                results[label], latency[label] = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning(f"Timeout ({timeout}s) na análise {label}")
+                with self._lock:
+                    self.stats['timeouts'] += 1
+            except Exception as e:
+                logger.error(f"Erro na análise {label}: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+
+        return results, latency
+
+    def get_stats(self) -> Dict:
+        """Estatísticas do pool e latência média/máxima por timeframe"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['latency_ms'] = {
+                label: {
+                    'avg': lat['total_ms'] / lat['count'],
+                    'max': lat['max_ms'],
+                    'last': lat['last_ms']
+                }
+                for label, lat in self._latency.items()
+            }
+        stats['max_workers'] = self.max_workers
+        stats['queue_wait_ms_avg'] = (
+            stats['queue_wait_ms_total'] / stats['tasks'] if stats['tasks'] else 0.0
+        )
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Encerra o pool"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Instância compartilhada (todas as threads / símbolos)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_analysis_pool = None
+_analysis_pool_lock = threading.Lock()
+
+
+def get_analysis_pool(config: Dict = None) -> AnalysisWorkerPool:
+    """Retorna instância singleton do AnalysisWorkerPool"""
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is None:
+            pool_config = (config or {}).get('technical_analysis', {}).get('parallel', {})
+            _analysis_pool = AnalysisWorkerPool(
+                max_workers=pool_config.get('max_workers', 4),
+                timeout_seconds=pool_config.get('timeout_seconds', 30.0)
+            )
+        return _analysis_pool
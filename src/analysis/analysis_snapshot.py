@@ -0,0 +1,249 @@
+"""
+Snapshot de Análise Compartilhado por Símbolo
+Todas as estratégias de um símbolo reutilizam UMA análise multi-timeframe por barra
+"""
+
+import copy
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+# Duração de cada timeframe em segundos
+TIMEFRAME_SECONDS = {
+    'M1': 60,
+    'M5': 300,
+    'M15': 900,
+    'M30': 1800,
+    'H1': 3600,
+    'H4': 14400,
+    'D1': 86400
+}
+
+
+def current_bar_index(timeframe: str, now: Optional[float] = None) -> int:
+    """
+    Índice da barra corrente de um timeframe (muda quando a barra fecha)
+
+    Args:
+        timeframe: Timeframe (M1, M5, ...)
+        now: Timestamp epoch (None = agora)
+
+    Returns:
+        Número inteiro que identifica a barra em formação
+    """
+    now = time.time() if now is None else now
+    return int(now // TIMEFRAME_SECONDS.get(timeframe, 60))
+
+
+class FrozenDict(dict):
+    """
+    Dict imutável (continua passando em isinstance(x, dict))
+
+    Use .copy() para obter um dict mutável.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Snapshot de análise é somente leitura (use .copy())")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+    __ior__ = _readonly
+
+    def copy(self) -> Dict:
+        return thaw(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Converte recursivamente dicts/listas em FrozenDict/tuplas"""
+    if isinstance(value, dict):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Cópia mutável profunda de um snapshot congelado"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return copy.copy(value)
+
+
+@dataclass(frozen=True)
+class AnalysisSnapshot:
+    """Resultado imutável de uma análise multi-timeframe"""
+    symbol: str
+    timeframes: Tuple[str, ...]
+    version: int
+    analysis: FrozenDict
+    compute_ms: float
+    created_at: float = field(default_factory=time.time)
+
+
+class _InFlight:
+    """Cálculo em andamento (single-flight)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot: Optional[AnalysisSnapshot] = None
+        self.error: Optional[BaseException] = None
+
+
+class AnalysisSnapshotService:
+    """
+    Serviço thread-safe de snapshots de análise versionados por barra
+
+    - O primeiro executor que pedir a análise após o fechamento da barra a calcula
+    - Pedidos concorrentes aguardam o mesmo cálculo em andamento
+    - Os demais recebem o snapshot imutável em cache até a próxima barra
+    """
+
+    DEFAULT_TIMEFRAMES = ('M5', 'M15', 'M30', 'H1', 'H4')
+
+    def __init__(self, technical_analyzer, timeframes: Optional[List[str]] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Inicializa o serviço
+
+        Args:
+            technical_analyzer: TechnicalAnalyzer do símbolo
+            timeframes: Timeframes padrão da análise
+            clock: Fonte de tempo epoch (injetável para testes)
+        """
+        self.analyzer = technical_analyzer
+        self.symbol = getattr(technical_analyzer, 'symbol', None)
+        self.timeframes = tuple(timeframes or self.DEFAULT_TIMEFRAMES)
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._snapshots: Dict[Tuple[str, ...], AnalysisSnapshot] = {}
+        self._inflight: Dict[Tuple[Tuple[str, ...], int], _InFlight] = {}
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'errors': 0,
+            'compute_count': 0,
+            'compute_ms_total': 0.0,
+            'compute_ms_last': 0.0,
+            'compute_ms_max': 0.0
+        }
+
+    def _version(self, timeframes: Tuple[str, ...]) -> int:
+        """Versão = barra corrente do menor timeframe da análise"""
+        base = min(timeframes, key=lambda tf: TIMEFRAME_SECONDS.get(tf, 60))
+        return current_bar_index(base, self._clock())
+
+    def get_snapshot(self, timeframes: Optional[List[str]] = None) -> AnalysisSnapshot:
+        """
+        Obtém o snapshot da barra atual (calcula apenas uma vez por barra)
+
+        Args:
+            timeframes: Timeframes da análise (None = padrão do serviço)
+
+        Returns:
+            AnalysisSnapshot imutável
+
+        Raises:
+            Exception: Repropaga o erro do cálculo para todos os que aguardavam
+        """
+        tfs = tuple(timeframes) if timeframes else self.timeframes
+        version = self._version(tfs)
+
+        with self._lock:
+            snapshot = self._snapshots.get(tfs)
+            if snapshot is not None and snapshot.version == version:
+                self.stats['hits'] += 1
+                return snapshot
+
+            key = (tfs, version)
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = _InFlight()
+                self._inflight[key] = pending
+                self.stats['misses'] += 1
+            else:
+                self.stats['waits'] += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.snapshot
+
+        try:
+            start = time.perf_counter()
+            analysis = self.analyzer.analyze_multi_timeframe(list(tfs))
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            pending.snapshot = AnalysisSnapshot(
+                symbol=self.symbol,
+                timeframes=tfs,
+                version=version,
+                analysis=freeze(analysis),
+                compute_ms=elapsed_ms
+            )
+
+            with self._lock:
+                # Resultados vazios não ficam em cache (próximo pedido tenta de novo)
+                if analysis:
+                    self._snapshots[tfs] = pending.snapshot
+                self.stats['compute_count'] += 1
+                self.stats['compute_ms_total'] += elapsed_ms
+                self.stats['compute_ms_last'] = elapsed_ms
+                self.stats['compute_ms_max'] = max(self.stats['compute_ms_max'], elapsed_ms)
+
+            logger.debug(
+                f"📸 Snapshot {self.symbol} v{version} calculado em {elapsed_ms:.1f}ms"
+            )
+            return pending.snapshot
+
+        except BaseException as e:
+            pending.error = e
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.done.set()
+
+    def get_analysis(self, timeframes: Optional[List[str]] = None) -> FrozenDict:
+        """Atalho: retorna apenas o dict de análise (somente leitura)"""
+        return self.get_snapshot(timeframes).analysis
+
+    def invalidate(self):
+        """Descarta snapshots em cache (ex: após reconexão)"""
+        with self._lock:
+            self._snapshots.clear()
+
+    def get_stats(self) -> Dict:
+        """Contadores de hit/miss e tempo de cálculo"""
+        with self._lock:
+            stats = dict(self.stats)
+        requests = stats['hits'] + stats['misses'] + stats['waits']
+        stats['hit_rate'] = (stats['hits'] + stats['waits']) / requests if requests else 0.0
+        stats['compute_ms_avg'] = (
+            stats['compute_ms_total'] / stats['compute_count'] if stats['compute_count'] else 0.0
+        )
+        return stats
@@ -0,0 +1,153 @@
+"""
+Scanner Vetorizado de Padrões de Candlestick
+Calcula todos os padrões para a série inteira em uma única passada numpy
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+# Padrões publicados (mesmas chaves de TechnicalAnalyzer.detect_candlestick_patterns)
+PATTERN_NAMES = (
+    'doji',
+    'hammer',
+    'inverted_hammer',
+    'shooting_star',
+    'engulfing_bullish',
+    'engulfing_bearish',
+    'morning_star',
+    'evening_star',
+    'pin_bar_bullish',
+    'pin_bar_bearish',
+    'harami_bullish',
+    'harami_bearish',
+    'three_white_soldiers',
+    'three_black_crows',
+)
+
+# Barras necessárias para avaliar todos os padrões (os de 3 candles)
+MIN_BARS = 3
+
+
+def _shift(values: np.ndarray, n: int) -> np.ndarray:
+    """Desloca n barras para frente preenchendo o início com NaN (comparações = False)"""
+    shifted = np.empty_like(values)
+    shifted[:n] = np.nan
+    shifted[n:] = values[:-n]
+    return shifted
+
+
+def scan_patterns(open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                  close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Detecta todos os padrões em todas as barras
+
+    Barras sem histórico suficiente para um padrão (ex: as 2 primeiras para
+    padrões de 3 candles) retornam False.
+
+    Args:
+        open_, high, low, close: Arrays OHLC (mais antiga primeiro)
+
+    Returns:
+        Dict nome do padrão -> array booleano do mesmo tamanho da série
+    """
+    o = np.asarray(open_, dtype=np.float64)
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+
+    if len(c) == 0:
+        return {name: np.zeros(0, dtype=bool) for name in PATTERN_NAMES}
+
+    # Candle atual
+    body = np.abs(c - o)
+    upper_shadow = h - np.maximum(o, c)
+    lower_shadow = np.minimum(o, c) - l
+    candle_range = h - l
+    bullish = c > o
+    bearish = c < o
+
+    # Candles anteriores (NaN no início)
+    o1, c1 = _shift(o, 1), _shift(c, 1)
+    o2, c2 = _shift(o, 2), _shift(c, 2)
+    body1 = np.abs(c1 - o1)
+    body2 = np.abs(c2 - o2)
+    bullish1, bearish1 = c1 > o1, c1 < o1
+    bullish2, bearish2 = c2 > o2, c2 < o2
+
+    long_lower = lower_shadow > body * 2
+    long_upper = upper_shadow > body * 2
+    falling = c < c1
+    rising = c > c1
+
+    patterns = {
+        # Corpo muito pequeno em relação ao range total
+        'doji': (body < candle_range * 0.1) & (candle_range > 0),
+        # Corpo pequeno no topo, sombra inferior longa, em queda
+        'hammer': long_lower & (upper_shadow < body * 0.5) & falling,
+        'inverted_hammer': long_upper & (lower_shadow < body * 0.5) & falling,
+        # Sombra superior longa em alta
+        'shooting_star': long_upper & (lower_shadow < body * 0.5) & rising,
+        'engulfing_bullish': bearish1 & bullish & (o <= c1) & (c >= o1),
+        'engulfing_bearish': bullish1 & bearish & (o >= c1) & (c <= o1),
+        # 3 candles: forte, indecisão, reversão além da metade da 1ª
+        'morning_star': bearish2 & (body1 < body2 * 0.3) & bullish & (c > (o2 + c2) / 2),
+        'evening_star': bullish2 & (body1 < body2 * 0.3) & bearish & (c < (o2 + c2) / 2),
+        'pin_bar_bullish': long_lower & (upper_shadow < body),
+        'pin_bar_bearish': long_upper & (lower_shadow < body),
+        # Corpo atual contido no corpo da candle anterior, em direção oposta
+        'harami_bullish': bearish1 & bullish & (o >= c1) & (c <= o1) & (body < body1),
+        'harami_bearish': bullish1 & bearish & (o <= c1) & (c >= o1) & (body < body1),
+        # 3 candles na mesma direção, cada uma abrindo dentro do corpo anterior
+        'three_white_soldiers': (
+            bullish2 & bullish1 & bullish & (c1 > c2) & rising
+            & (o1 > o2) & (o1 <= c2) & (o > o1) & (o <= c1)
+            & (upper_shadow < body * 0.5)
+        ),
+        'three_black_crows': (
+            bearish2 & bearish1 & bearish & (c1 < c2) & falling
+            & (o1 < o2) & (o1 >= c2) & (o < o1) & (o >= c1)
+            & (lower_shadow < body * 0.5)
+        ),
+    }
+    return patterns
+
+
+def _ohlc_columns(df: pd.DataFrame):
+    if 'Close' in df.columns:
+        return ('Open', 'High', 'Low', 'Close')
+    return ('open', 'high', 'low', 'close')
+
+
+def candlestick_pattern_frame(df: pd.DataFrame, prefix: str = '') -> pd.DataFrame:
+    """
+    Colunas booleanas de padrões para todas as barras do DataFrame
+
+    Aceita colunas Open/High/Low/Close (TechnicalAnalyzer) ou minúsculas (MT5/backtest).
+
+    Args:
+        df: DataFrame OHLC
+        prefix: Prefixo dos nomes das colunas (ex: 'pattern_')
+
+    Returns:
+        DataFrame com uma coluna por padrão, mesmo índice de df
+    """
+    patterns = scan_patterns(*(df[col].to_numpy(dtype=np.float64) for col in _ohlc_columns(df)))
+    return pd.DataFrame({f'{prefix}{name}': values for name, values in patterns.items()}, index=df.index)
+
+
+def latest_patterns(df: pd.DataFrame) -> Dict[str, bool]:
+    """
+    Padrões da última barra (caminho ao vivo)
+
+    Avalia apenas as últimas MIN_BARS barras.
+
+    Returns:
+        Dict padrão -> bool (vazio se houver menos de MIN_BARS barras)
+    """
+    if len(df) < MIN_BARS:
+        return {}
+    tail = (df[col].to_numpy(dtype=np.float64)[-MIN_BARS:] for col in _ohlc_columns(df))
+    return {name: bool(values[-1]) for name, values in scan_patterns(*tail).items()}
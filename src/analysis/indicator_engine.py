@@ -0,0 +1,494 @@
+"""
+Motor de Indicadores Incremental (Streaming)
+Mantém o estado dos indicadores por (símbolo, timeframe) e avança em O(1) a cada barra fechada,
+reproduzindo as fórmulas da biblioteca 'ta' usadas pelo TechnicalAnalyzer
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+NAN = float('nan')
+
+
+def _div(num: float, den: float) -> float:
+    """Divisão com a mesma semântica do numpy (x/0 = ±inf, 0/0 = nan)"""
+    if den == 0:
+        if num == 0 or math.isnan(num):
+            return NAN
+        return math.copysign(math.inf, num)
+    return num / den
+
+
+class _EMAState:
+    """EMA recursiva (equivalente a ewm(adjust=False) com min_periods)"""
+
+    __slots__ = ('alpha', 'min_periods', 'value', 'count')
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.count = 0
+
+    def _next(self, x: float) -> float:
+        if self.count == 0:
+            return x
+        return self.value + self.alpha * (x - self.value)
+
+    def push(self, x: float):
+        self.value = self._next(x)
+        self.count += 1
+
+    def peek(self, x: float) -> float:
+        """Valor caso 'x' fosse a próxima observação (sem alterar o estado)"""
+        if self.count + 1 < self.min_periods:
+            return NAN
+        return self._next(x)
+
+
+class _RollingWindow:
+    """Janela deslizante com soma corrente (média O(1))"""
+
+    __slots__ = ('period', 'values', 'total', '_pushes')
+
+    # Recalcular a soma exata periodicamente para evitar deriva de ponto flutuante
+    RESYNC_EVERY = 1000
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.total = 0.0
+        self._pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.period
+
+    def push(self, x: float):
+        if self.full:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self.total = math.fsum(self.values)
+
+    def mean_with(self, x: float) -> float:
+        """Média da janela incluindo 'x' (NaN se ainda incompleta)"""
+        if len(self.values) + 1 < self.period:
+            return NAN
+        dropped = self.values[0] if self.full else 0.0
+        return (self.total - dropped + x) / self.period
+
+    def window_with(self, x: float) -> Optional[List[float]]:
+        """Conteúdo da janela incluindo 'x' (None se ainda incompleta)"""
+        if len(self.values) + 1 < self.period:
+            return None
+        window = list(self.values)
+        if self.full:
+            window = window[1:]
+        window.append(x)
+        return window
+
+
+class _WilderATRState:
+    """ATR com suavização de Wilder (semente = média dos primeiros N true ranges)"""
+
+    __slots__ = ('period', 'count', 'seed_sum', 'value')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = 0.0
+
+    def _next(self, tr: float):
+        n = self.period
+        if self.count < n - 1:
+            return self.seed_sum + tr, 0.0
+        if self.count == n - 1:
+            return self.seed_sum + tr, (self.seed_sum + tr) / n
+        return self.seed_sum, (self.value * (n - 1) + tr) / n
+
+    def push(self, tr: float):
+        self.seed_sum, self.value = self._next(tr)
+        self.count += 1
+
+    def peek(self, tr: float) -> float:
+        return self._next(tr)[1]
+
+
+class _ADXState:
+    """ADX/DI+/DI- com somas de Wilder, alinhado com ta.trend.ADXIndicator"""
+
+    __slots__ = ('period', 'count', 'trs', 'dip', 'din', 'dx_seed', 'adx')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0  # barras com diferença calculável (a partir da 2ª barra)
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.dx_seed = 0.0
+        self.adx = 0.0
+
+    def _next(self, tr: float, pos: float, neg: float):
+        n = self.period
+        k = self.count + 1  # índice da barra no histórico (barra 0 não tem diferença)
+
+        if k <= n:
+            trs, dip, din = self.trs + tr, self.dip + pos, self.din + neg
+        else:
+            trs = self.trs - self.trs / n + tr
+            dip = self.dip - self.dip / n + pos
+            din = self.din - self.din / n + neg
+
+        di_plus = 100 * dip / trs if trs != 0 else 0.0
+        di_minus = 100 * din / trs if trs != 0 else 0.0
+
+        dx_seed, adx = self.dx_seed, self.adx
+        if k >= n:
+            di_sum = di_plus + di_minus
+            dx = 100 * abs((di_plus - di_minus) / di_sum) if di_sum != 0 else 0.0
+            if k < 2 * n - 1:
+                dx_seed += dx
+            elif k == 2 * n - 1:
+                adx = (dx_seed + dx) / n
+            else:
+                adx = (adx * (n - 1) + dx) / n
+
+        # 'ta' só publica DI+/DI- a partir da barra N+1
+        if k <= n:
+            di_plus = di_minus = 0.0
+
+        return (trs, dip, din, dx_seed, adx), (adx, di_plus, di_minus)
+
+    def push(self, tr: float, pos: float, neg: float):
+        (self.trs, self.dip, self.din, self.dx_seed, self.adx), _ = self._next(tr, pos, neg)
+        self.count += 1
+
+    def peek(self, tr: float, pos: float, neg: float):
+        return self._next(tr, pos, neg)[1]
+
+
+class IndicatorStreamState:
+    """
+    Estado incremental de todos os indicadores de um (símbolo, timeframe)
+
+    push() consome uma barra fechada; peek() calcula os valores considerando a barra
+    em formação sem alterar o estado.
+    """
+
+    def __init__(self, ema_periods: Sequence[int], sma_periods: Sequence[int],
+                 rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26,
+                 macd_signal: int = 9, bb_period: int = 20, bb_std: float = 2.0,
+                 atr_period: int = 14, adx_period: int = 14,
+                 stoch_period: int = 14, stoch_smooth: int = 3):
+        self.count = 0
+        self.last_time = None
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.prev_close = NAN
+
+        self.ema = {p: _EMAState(2.0 / (p + 1), p) for p in ema_periods}
+        self.sma = {p: _RollingWindow(p) for p in sma_periods}
+
+        self.rsi_up = _EMAState(1.0 / rsi_period, rsi_period)
+        self.rsi_down = _EMAState(1.0 / rsi_period, rsi_period)
+
+        self.macd_slow_period = macd_slow
+        self.macd_fast = _EMAState(2.0 / (macd_fast + 1), macd_fast)
+        self.macd_slow = _EMAState(2.0 / (macd_slow + 1), macd_slow)
+        self.macd_signal = _EMAState(2.0 / (macd_signal + 1), macd_signal)
+
+        self.bb = _RollingWindow(bb_period)
+        self.bb_std = bb_std
+
+        self.atr = _WilderATRState(atr_period)
+        self.adx = _ADXState(adx_period)
+
+        self.stoch_high = _RollingWindow(stoch_period)
+        self.stoch_low = _RollingWindow(stoch_period)
+        self.stoch_k = _RollingWindow(stoch_smooth)
+
+    # ------------------------------------------------------------------
+    # Componentes derivados da barra anterior
+    # ------------------------------------------------------------------
+
+    def _bar_deltas(self, high: float, low: float, close: float):
+        """True range, +DM, -DM e ganhos/perdas do RSI da barra atual"""
+        if self.count == 0:
+            return high - low, 0.0, 0.0, 0.0, 0.0
+
+        pc = self.prev_close
+        tr = max(high - low, abs(high - pc), abs(low - pc))
+
+        diff_up = high - self.prev_high
+        diff_down = self.prev_low - low
+        pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        change = close - pc
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        return tr, pos, neg, gain, loss
+
+    def _stoch_k_with(self, high: float, low: float, close: float) -> float:
+        highs = self.stoch_high.window_with(high)
+        lows = self.stoch_low.window_with(low)
+        if highs is None or lows is None:
+            return NAN
+        smin = min(lows)
+        return 100 * _div(close - smin, max(highs) - smin)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def push(self, high: float, low: float, close: float):
+        """Consome uma barra FECHADA"""
+        tr, pos, neg, gain, loss = self._bar_deltas(high, low, close)
+
+        # %K calculado com a janela + barra atual, antes de avançar as janelas
+        k_value = self._stoch_k_with(high, low, close)
+
+        for state in self.ema.values():
+            state.push(close)
+        for window in self.sma.values():
+            window.push(close)
+
+        self.rsi_up.push(gain)
+        self.rsi_down.push(loss)
+
+        self.macd_fast.push(close)
+        self.macd_slow.push(close)
+        if self.macd_slow.count >= self.macd_slow_period:
+            self.macd_signal.push(self.macd_fast.value - self.macd_slow.value)
+
+        self.bb.push(close)
+        self.atr.push(tr)
+        if self.count > 0:
+            self.adx.push(tr, pos, neg)
+
+        self.stoch_high.push(high)
+        self.stoch_low.push(low)
+        self.stoch_k.push(k_value)
+
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        self.count += 1
+
+    def peek(self, high: float, low: float, close: float) -> Dict:
+        """
+        Calcula indicadores incluindo a barra em formação (sem alterar estado)
+
+        Returns:
+            Dict no mesmo formato consumido pelas estratégias
+        """
+        tr, pos, neg, gain, loss = self._bar_deltas(high, low, close)
+        bars = self.count + 1
+
+        result = {
+            'ema': {
+                f'ema_{p}': state.peek(close)
+                for p, state in self.ema.items() if bars >= p
+            },
+            'sma': {
+                f'sma_{p}': window.mean_with(close)
+                for p, window in self.sma.items() if bars >= p
+            },
+        }
+
+        # RSI
+        up = self.rsi_up.peek(gain)
+        down = self.rsi_down.peek(loss)
+        if math.isnan(down):
+            rsi = NAN
+        elif down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + up / down))
+        result['rsi'] = rsi
+
+        # MACD
+        macd_line = NAN
+        signal = NAN
+        if self.macd_slow.count + 1 >= self.macd_slow_period:
+            macd_line = self.macd_fast.peek(close) - self.macd_slow.peek(close)
+            signal = self.macd_signal.peek(macd_line)
+        result['macd'] = {
+            'macd': macd_line,
+            'signal': signal,
+            'histogram': macd_line - signal
+        }
+
+        # Bollinger (desvio populacional, ddof=0)
+        window = self.bb.window_with(close)
+        if window is None:
+            result['bollinger'] = {'upper': NAN, 'middle': NAN, 'lower': NAN}
+        else:
+            middle = math.fsum(window) / len(window)
+            std = math.sqrt(math.fsum((v - middle) ** 2 for v in window) / len(window))
+            result['bollinger'] = {
+                'upper': middle + self.bb_std * std,
+                'middle': middle,
+                'lower': middle - self.bb_std * std
+            }
+
+        # ATR
+        result['atr'] = self.atr.peek(tr)
+
+        # ADX
+        if self.count > 0:
+            adx, di_plus, di_minus = self.adx.peek(tr, pos, neg)
+        else:
+            adx, di_plus, di_minus = 0.0, 0.0, 0.0
+        result['adx'] = {'adx': adx, 'di_plus': di_plus, 'di_minus': di_minus}
+
+        # Stochastic
+        k_value = self._stoch_k_with(high, low, close)
+        k_window = self.stoch_k.window_with(k_value)
+        if k_window is None or any(math.isnan(v) for v in k_window):
+            d_value = NAN
+        else:
+            d_value = math.fsum(k_window) / len(k_window)
+        result['stochastic'] = {'k': k_value, 'd': d_value}
+
+        return result
+
+
+class IndicatorEngine:
+    """
+    Motor de indicadores incremental compartilhável entre threads
+
+    Para cada chave (símbolo, timeframe) mantém um IndicatorStreamState. A cada chamada de
+    update() apenas as barras fechadas novas são consumidas; a última barra do DataFrame
+    (em formação) é avaliada via peek().
+    """
+
+    def __init__(self, ema_periods: Sequence[int], sma_periods: Sequence[int], **params):
+        """
+        Inicializa o motor
+
+        Args:
+            ema_periods: Períodos de EMA
+            sma_periods: Períodos de SMA
+            **params: Parâmetros opcionais repassados ao IndicatorStreamState
+        """
+        self.ema_periods = list(ema_periods)
+        self.sma_periods = list(sma_periods)
+        self.params = params
+
+        self._streams: Dict[Hashable, IndicatorStreamState] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'updates': 0,
+            'bars_pushed': 0,
+            'rebuilds': 0
+        }
+
+    def _new_state(self) -> IndicatorStreamState:
+        return IndicatorStreamState(self.ema_periods, self.sma_periods, **self.params)
+
+    def update(self, key: Hashable, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        Avança o estado com as barras fechadas novas e retorna os indicadores atuais
+
+        Args:
+            key: Identificador do fluxo, ex: ('XAUUSD', 'M5')
+            df: DataFrame OHLC (colunas High/Low/Close) indexado por tempo.
+                A última linha é tratada como barra em formação.
+
+        Returns:
+            Dict com ema, sma, rsi, macd, bollinger, atr, adx, stochastic
+        """
+        if df is None or len(df) == 0:
+            return None
+
+        times = df.index
+        highs = df['High'].to_numpy(dtype=np.float64, copy=False)
+        lows = df['Low'].to_numpy(dtype=np.float64, copy=False)
+        closes = df['Close'].to_numpy(dtype=np.float64, copy=False)
+        last_closed = len(df) - 1
+
+        with self._lock:
+            state = self._streams.get(key)
+            start = 0
+
+            if state is not None and state.last_time is not None:
+                pos = times.searchsorted(state.last_time)
+                if pos < last_closed and times[pos] == state.last_time:
+                    start = int(pos) + 1
+                else:
+                    # Perdemos a continuidade (gap maior que a janela ou histórico reescrito)
+                    logger.debug(f"IndicatorEngine {key}: continuidade perdida, reconstruindo estado")
+                    state = None
+                    self.stats['rebuilds'] += 1
+
+            if state is None:
+                state = self._new_state()
+                self._streams[key] = state
+
+            for i in range(start, last_closed):
+                state.push(float(highs[i]), float(lows[i]), float(closes[i]))
+
+            if last_closed > start:
+                state.last_time = times[last_closed - 1]
+                self.stats['bars_pushed'] += last_closed - start
+
+            self.stats['updates'] += 1
+            return state.peek(float(highs[-1]), float(lows[-1]), float(closes[-1]))
+
+    def reset(self, key: Optional[Hashable] = None):
+        """Descarta o estado de uma chave (ou de todas)"""
+        with self._lock:
+            if key is None:
+                self._streams.clear()
+            else:
+                self._streams.pop(key, None)
+
+    def get_stats(self) -> Dict:
+        """Estatísticas de uso do motor"""
+        with self._lock:
+            return {**self.stats, 'streams': len(self._streams)}
+
+
+def compare_indicator_results(reference: Dict, candidate: Dict,
+                              rel_tol: float = 1e-3, abs_tol: float = 1e-6) -> Dict[str, tuple]:
+    """
+    Compara dois dicts de indicadores (ex: batch vs streaming)
+
+    Args:
+        reference: Resultado de referência (recálculo completo)
+        candidate: Resultado a validar
+        rel_tol: Tolerância relativa
+        abs_tol: Tolerância absoluta
+
+    Returns:
+        Dict {caminho: (referência, candidato)} com as divergências encontradas
+    """
+    mismatches = {}
+
+    def _walk(ref, cand, path):
+        if isinstance(ref, dict):
+            for name, value in ref.items():
+                _walk(value, cand.get(name) if isinstance(cand, dict) else None, f"{path}.{name}" if path else name)
+            return
+        if cand is None:
+            mismatches[path] = (ref, None)
+            return
+        if math.isnan(ref) and math.isnan(cand):
+            return
+        if not math.isclose(ref, cand, rel_tol=rel_tol, abs_tol=abs_tol):
+            mismatches[path] = (ref, cand)
+
+    _walk(reference, candidate, '')
+    return mismatches
@@ -0,0 +1,264 @@
+"""
+Cache de Dados de Mercado
+LRU thread-safe com orçamento em bytes, lock por chave e expiração alinhada ao fechamento da barra
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+import pandas as pd
+from loguru import logger
+
+from .analysis_snapshot import TIMEFRAME_SECONDS
+
+
+# Servidores MT5 operam com offset de horas inteiras em relação ao UTC: fronteiras de
+# barras acima de H1 (H4, D1) não coincidem com múltiplos do epoch, mas sempre caem
+# numa fronteira de hora cheia
+MAX_BOUNDARY_SECONDS = 3600
+
+
+def next_bar_due(timeframe: str, now: float) -> float:
+    """
+    Timestamp epoch em que a próxima barra do timeframe pode ter aberto
+
+    Args:
+        timeframe: Timeframe (M1, M5, ...)
+        now: Timestamp epoch atual
+
+    Returns:
+        Timestamp epoch da próxima fronteira de barra
+    """
+    step = min(TIMEFRAME_SECONDS.get(timeframe, 60), MAX_BOUNDARY_SECONDS)
+    return (int(now // step) + 1) * step
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reconstrói o DataFrame com colunas somente leitura, sem copiar os dados
+
+    Args:
+        df: DataFrame original (não deve mais ser alterado por quem o criou)
+
+    Returns:
+        DataFrame cujas colunas são views numpy não graváveis
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(copy=False)
+        view = values.view()
+        view.setflags(write=False)
+        columns[col] = view
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Tamanho aproximado do DataFrame em bytes (dados + índice)"""
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+class _CacheEntry:
+    __slots__ = ('data', 'nbytes', 'expires_at', 'loaded_at')
+
+    def __init__(self, data: pd.DataFrame, nbytes: int, expires_at: float, loaded_at: float):
+        self.data = data
+        self.nbytes = nbytes
+        self.expires_at = expires_at
+        self.loaded_at = loaded_at
+
+
+class MarketDataCache:
+    """
+    Cache de DataFrames OHLCV compartilhado entre threads
+
+    - LRU com orçamento total em bytes
+    - Lock por chave: apenas uma chamada get_rates por (símbolo, timeframe, barras)
+    - Expira quando a próxima barra do timeframe é esperada (não por TTL fixo)
+    - Retorna views somente leitura (sem cópia)
+    """
+
+    # Janela após a fronteira em que a ausência da barra nova dispara nova tentativa
+    STALE_RETRY_WINDOW = 60.0
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, retry_seconds: float = 5.0,
+                 max_age_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Inicializa o cache
+
+        Args:
+            max_bytes: Orçamento total de memória
+            retry_seconds: Se após a fronteira da barra a nova barra ainda não apareceu,
+                tenta de novo após este intervalo
+            max_age_seconds: Idade máxima opcional (atualiza a barra em formação)
+            clock: Fonte de tempo epoch (injetável para testes)
+        """
+        self.max_bytes = max_bytes
+        self.retry_seconds = retry_seconds
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'load_failures': 0,
+            'evictions': 0,
+            'stale_retries': 0
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _get_valid(self, key: Hashable, now: float) -> Optional[pd.DataFrame]:
+        """Entrada válida (chamar com self._lock)"""
+        entry = self._entries.get(key)
+        if entry is None or now >= entry.expires_at:
+            return None
+        self._entries.move_to_end(key)
+        return entry.data
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _expiry(self, key: Hashable, timeframe: str, data: pd.DataFrame, now: float) -> float:
+        """Calcula expiração alinhada à barra (chamar com self._lock)"""
+        expires_at = next_bar_due(timeframe, now)
+
+        # A fronteira da barra passou mas o servidor ainda não publicou a barra nova:
+        # tentar novamente em breve em vez de ficar uma barra inteira atrasado.
+        # Só vale para timeframes alinhados ao epoch (<= H1) e logo após a fronteira
+        # (sem barra nova por muito tempo = mercado fechado)
+        step = TIMEFRAME_SECONDS.get(timeframe, 60)
+        previous = self._entries.get(key)
+        if step <= MAX_BOUNDARY_SECONDS and previous is not None and len(previous.data) and len(data):
+            boundary = int(now // step) * step
+            if (previous.loaded_at < boundary
+                    and now - boundary < self.STALE_RETRY_WINDOW
+                    and data.index[-1] == previous.data.index[-1]):
+                expires_at = now + self.retry_seconds
+                self.stats['stale_retries'] += 1
+
+        if self.max_age_seconds:
+            expires_at = min(expires_at, now + self.max_age_seconds)
+        return expires_at
+
+    def _evict(self):
+        """Remove entradas LRU até respeitar o orçamento (chamar com self._lock)"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.nbytes
+            self.stats['evictions'] += 1
+            logger.debug(f"MarketDataCache: evict {key} ({entry.nbytes / 1024:.0f} KB)")
+
+    def get_or_load(self, key: Hashable, timeframe: str,
+                    loader: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """
+        Retorna os dados em cache ou carrega via loader (uma única vez por chave)
+
+        Args:
+            key: Chave, ex: (símbolo, timeframe, barras)
+            timeframe: Timeframe usado para calcular a expiração
+            loader: Função que busca os dados (ex: MT5Connector.get_rates)
+
+        Returns:
+            DataFrame somente leitura ou None se o loader falhar
+        """
+        with self._lock:
+            data = self._get_valid(key, self._clock())
+            if data is not None:
+                self.stats['hits'] += 1
+                return data.copy(deep=False)
+
+        with self._key_lock(key):
+            # Outra thread pode ter carregado enquanto aguardávamos o lock
+            with self._lock:
+                data = self._get_valid(key, self._clock())
+                if data is not None:
+                    self.stats['hits'] += 1
+                    return data.copy(deep=False)
+                self.stats['misses'] += 1
+
+            df = loader()
+            if df is None or len(df) == 0:
+                with self._lock:
+                    self.stats['load_failures'] += 1
+                return None
+
+            frozen = freeze_frame(df)
+            nbytes = frame_nbytes(frozen)
+
+            with self._lock:
+                now = self._clock()
+                expires_at = self._expiry(key, timeframe, frozen, now)
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._total_bytes -= previous.nbytes
+
+                self._entries[key] = _CacheEntry(frozen, nbytes, expires_at, now)
+                self._total_bytes += nbytes
+                self.stats['loads'] += 1
+                self._evict()
+
+            return frozen.copy(deep=False)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None):
+        """
+        Remove entradas do cache
+
+        Args:
+            predicate: Filtro de chaves (None = todas)
+        """
+        with self._lock:
+            keys = [k for k in self._entries if predicate is None or predicate(k)]
+            for key in keys:
+                self._total_bytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        """Remove todas as entradas"""
+        self.invalidate()
+
+    def get_stats(self) -> Dict:
+        """Estatísticas do cache"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._total_bytes
+            stats['max_bytes'] = self.max_bytes
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / requests if requests else 0.0
+        return stats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Instância compartilhada (todas as threads / símbolos)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_market_data_cache = None
+_market_data_cache_lock = threading.Lock()
+
+
+def get_market_data_cache(config: Dict = None) -> MarketDataCache:
+    """Retorna instância singleton do MarketDataCache"""
+    global _market_data_cache
+    with _market_data_cache_lock:
+        if _market_data_cache is None:
+            cache_config = (config or {}).get('technical_analysis', {}).get('data_cache', {})
+            _market_data_cache = MarketDataCache(
+                max_bytes=int(cache_config.get('max_mb', 64) * 1024 * 1024),
+                retry_seconds=cache_config.get('retry_seconds', 5.0),
+                max_age_seconds=cache_config.get('max_age_seconds')
+            )
+        return _market_data_cache
@@ -3,13 +3,19 @@ Módulo de Análise Técnica Multi-Timeframe
 Responsável por calcular indicadores técnicos e detectar padrões de candlestick
 """
 
+import time
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime
 import MetaTrader5 as mt5
 from loguru import logger
 
+from .indicator_engine import IndicatorEngine, compare_indicator_results
+from .market_data_cache import get_market_data_cache
+from .analysis_pool import get_analysis_pool
+from .candlestick_patterns import latest_patterns
+
 # Importar bibliotecas de análise técnica
 try:
     import ta
@@ -52,11 +58,26 @@ class TechnicalAnalyzer:
         self.symbol = symbol if symbol else config.get('mt5', {}).get('symbol', 'XAUUSD')
         self.ta_config = config.get('technical_analysis', {})
         
-        # Cache de dados - INCLUI SÍMBOLO na chave para evitar contaminação
-        self._cache: Dict[str, Dict] = {}
-        self._cache_timeout = timedelta(seconds=30)
-        
-        logger.info(f"TechnicalAnalyzer inicializado para {self.symbol}")
+        # Cache de dados compartilhado - INCLUI SÍMBOLO na chave para evitar contaminação
+        # Expira no fechamento da barra do timeframe (não por TTL fixo)
+        self._cache = get_market_data_cache(config)
+        
+        # ⚡ Motor incremental de indicadores (streaming | batch | validate)
+        # - streaming: avança o estado apenas com as barras novas (O(1) por barra)
+        # - batch: recalcula a janela completa a cada chamada (comportamento original)
+        # - validate: calcula os dois e registra divergências (usa o resultado batch)
+        self.ema_periods, self.sma_periods = self._get_indicator_periods()
+        self.indicator_mode = self.ta_config.get('indicator_engine', 'streaming')
+        self.validation_tolerance = self.ta_config.get('indicator_validation_tolerance', 1e-3)
+        self._indicator_engine = IndicatorEngine(self.ema_periods, self.sma_periods)
+        
+        # ⚡ Análise multi-timeframe paralela no pool global (limite de concorrência no processo)
+        parallel_config = self.ta_config.get('parallel', {})
+        self.parallel_timeframes = parallel_config.get('enabled', False)
+        self._pool = get_analysis_pool(config) if self.parallel_timeframes else None
+        self.timeframe_latency_ms: Dict[str, float] = {}
+        
+        logger.info(f"TechnicalAnalyzer inicializado para {self.symbol} (indicadores: {self.indicator_mode})")
     
     def get_market_data(self, timeframe: str, bars: int = 500) -> Optional[pd.DataFrame]:
         """
@@ -67,43 +88,33 @@ class TechnicalAnalyzer:
             bars: Número de barras
             
         Returns:
-            DataFrame com OHLCV ou None se erro
+            DataFrame com OHLCV (somente leitura) ou None se erro
         """
         try:
-            # 🔥 MULTI-SÍMBOLO: Cache inclui símbolo para evitar contaminação
-            cache_key = f"{self.symbol}_{timeframe}_{bars}"
-            if cache_key in self._cache:
-                cache_entry = self._cache[cache_key]
-                if datetime.now() - cache_entry['timestamp'] < self._cache_timeout:
-                    return cache_entry['data'].copy()
-            
             # Obter dados do MT5
             tf = self.TIMEFRAMES.get(timeframe)
             if tf is None:
                 logger.error(f"Timeframe inválido: {timeframe}")
                 return None
             
-            df = self.mt5.get_rates(self.symbol, tf, bars)
-            if df is None or len(df) == 0:
-                logger.error(f"Erro ao obter dados para {timeframe}")
-                return None
-            
-            # Renomear colunas para padrão (MT5 retorna lowercase)
-            df.rename(columns={
-                'open': 'Open',
-                'high': 'High',
-                'low': 'Low',
-                'close': 'Close',
-                'tick_volume': 'Volume'
-            }, inplace=True)
-            
-            # Atualizar cache
-            self._cache[cache_key] = {
-                'data': df.copy(),
-                'timestamp': datetime.now()
-            }
+            def load() -> Optional[pd.DataFrame]:
+                df = self.mt5.get_rates(self.symbol, tf, bars)
+                if df is None or len(df) == 0:
+                    logger.error(f"Erro ao obter dados para {timeframe}")
+                    return None
+                
+                # Renomear colunas para padrão (MT5 retorna lowercase)
+                return df.rename(columns={
+                    'open': 'Open',
+                    'high': 'High',
+                    'low': 'Low',
+                    'close': 'Close',
+                    'tick_volume': 'Volume'
+                })
             
-            return df
+            # 🔥 MULTI-SÍMBOLO: Cache inclui símbolo para evitar contaminação
+            # Retorna view somente leitura (use .copy() para alterar)
+            return self._cache.get_or_load((self.symbol, timeframe, bars), timeframe, load)
             
         except Exception as e:
             logger.error(f"Erro ao obter dados de mercado: {e}")
@@ -233,103 +244,15 @@ class TechnicalAnalyzer:
     
     def detect_candlestick_patterns(self, df: pd.DataFrame) -> Dict[str, bool]:
         """
-        Detecta padrões de candlestick
+        Detecta padrões de candlestick da última barra
+        
+        Usa o scanner vetorizado (analysis.candlestick_patterns) sobre as últimas
+        barras; para a série inteira use candlestick_pattern_frame(df).
         
         Returns:
             Dict com padrões detectados e seus valores (True/False)
         """
-        if len(df) < 3:
-            return {}
-        
-        patterns = {}
-        
-        # Última candle
-        last = df.iloc[-1]
-        prev = df.iloc[-2]
-        prev2 = df.iloc[-3] if len(df) >= 3 else None
-        
-        # Tamanho do corpo
-        last_body = abs(last['Close'] - last['Open'])
-        prev_body = abs(prev['Close'] - prev['Open'])
-        
-        # Tamanho da sombra
-        last_upper_shadow = last['High'] - max(last['Open'], last['Close'])
-        last_lower_shadow = min(last['Open'], last['Close']) - last['Low']
-        
-        # Padrão: Doji
-        # Corpo muito pequeno em relação ao range total
-        last_range = last['High'] - last['Low']
-        patterns['doji'] = last_body < (last_range * 0.1) and last_range > 0
-        
-        # Padrão: Hammer (Martelo)
-        # Corpo pequeno no topo, sombra inferior longa
-        patterns['hammer'] = (
-            last_lower_shadow > (last_body * 2) and
-            last_upper_shadow < (last_body * 0.5) and
-            last['Close'] < prev['Close']  # Em tendência de baixa
-        )
-        
-        # Padrão: Inverted Hammer (Martelo Invertido)
-        patterns['inverted_hammer'] = (
-            last_upper_shadow > (last_body * 2) and
-            last_lower_shadow < (last_body * 0.5) and
-            last['Close'] < prev['Close']
-        )
-        
-        # Padrão: Shooting Star (Estrela Cadente)
-        patterns['shooting_star'] = (
-            last_upper_shadow > (last_body * 2) and
-            last_lower_shadow < (last_body * 0.5) and
-            last['Close'] > prev['Close']  # Em tendência de alta
-        )
-        
-        # Padrão: Engulfing Bullish (Engolfo de Alta)
-        patterns['engulfing_bullish'] = (
-            prev['Close'] < prev['Open'] and  # Candle anterior de baixa
-            last['Close'] > last['Open'] and  # Candle atual de alta
-            last['Open'] <= prev['Close'] and
-            last['Close'] >= prev['Open']
-        )
-        
-        # Padrão: Engulfing Bearish (Engolfo de Baixa)
-        patterns['engulfing_bearish'] = (
-            prev['Close'] > prev['Open'] and  # Candle anterior de alta
-            last['Close'] < last['Open'] and  # Candle atual de baixa
-            last['Open'] >= prev['Close'] and
-            last['Close'] <= prev['Open']
-        )
-        
-        # Padrão: Morning Star (Estrela da Manhã) - 3 candles
-        if prev2 is not None:
-            prev2_body = abs(prev2['Close'] - prev2['Open'])
-            
-            patterns['morning_star'] = (
-                prev2['Close'] < prev2['Open'] and  # 1ª candle: baixa
-                prev_body < prev2_body * 0.3 and  # 2ª: corpo pequeno
-                last['Close'] > last['Open'] and  # 3ª: alta
-                last['Close'] > (prev2['Open'] + prev2['Close']) / 2  # Fecha acima da metade da 1ª
-            )
-            
-            # Padrão: Evening Star (Estrela da Tarde) - 3 candles
-            patterns['evening_star'] = (
-                prev2['Close'] > prev2['Open'] and  # 1ª candle: alta
-                prev_body < prev2_body * 0.3 and  # 2ª: corpo pequeno
-                last['Close'] < last['Open'] and  # 3ª: baixa
-                last['Close'] < (prev2['Open'] + prev2['Close']) / 2  # Fecha abaixo da metade da 1ª
-            )
-        
-        # Padrão: Pin Bar (Barra de Pin)
-        patterns['pin_bar_bullish'] = (
-            last_lower_shadow > (last_body * 2) and
-            last_upper_shadow < last_body
-        )
-        
-        patterns['pin_bar_bearish'] = (
-            last_upper_shadow > (last_body * 2) and
-            last_lower_shadow < last_body
-        )
-        
-        return patterns
+        return latest_patterns(df)
     
     def analyze_timeframe(self, timeframe: str, bars: int = 500) -> Optional[Dict]:
         """
@@ -348,9 +271,6 @@ class TechnicalAnalyzer:
             if df is None or len(df) < 50:
                 return None
             
-            # Configurações dos indicadores
-            indicators_config = self.ta_config.get('indicators', [])
-            
             # Calcular indicadores
             result = {
                 'timeframe': timeframe,
@@ -359,68 +279,23 @@ class TechnicalAnalyzer:
                 'current_time': df.index[-1].isoformat(),
             }
             
-            # Extrair períodos de indicadores da config (formato lista)
-            ema_periods = [9, 21, 50, 200]  # padrão
-            sma_periods = [20, 50, 100, 200]  # padrão
-            
-            if isinstance(indicators_config, list):
-                for indicator in indicators_config:
-                    if indicator.get('name') == 'EMA':
-                        ema_periods = indicator.get('periods', ema_periods)
-                    elif indicator.get('name') == 'SMA':
-                        sma_periods = indicator.get('periods', sma_periods)
-            
-            # Médias Móveis
-            result['ema'] = {}
-            for period in ema_periods:
-                if len(df) >= period:
-                    ema = self.calculate_ema(df, period)
-                    result['ema'][f'ema_{period}'] = float(ema.iloc[-1])
-            
-            result['sma'] = {}
-            for period in sma_periods:
-                if len(df) >= period:
-                    sma = self.calculate_sma(df, period)
-                    result['sma'][f'sma_{period}'] = float(sma.iloc[-1])
-            
-            # RSI
-            rsi = self.calculate_rsi(df, 14)
-            result['rsi'] = float(rsi.iloc[-1])
-            
-            # MACD
-            macd = self.calculate_macd(df)
-            result['macd'] = {
-                'macd': float(macd['macd'].iloc[-1]),
-                'signal': float(macd['signal'].iloc[-1]),
-                'histogram': float(macd['histogram'].iloc[-1])
-            }
-            
-            # Bollinger Bands
-            bb = self.calculate_bollinger_bands(df)
-            result['bollinger'] = {
-                'upper': float(bb['upper'].iloc[-1]),
-                'middle': float(bb['middle'].iloc[-1]),
-                'lower': float(bb['lower'].iloc[-1])
-            }
-            
-            # ATR
-            atr = self.calculate_atr(df)
-            result['atr'] = float(atr.iloc[-1])
+            # Indicadores (incremental, recálculo completo ou validação)
+            if self.indicator_mode == 'batch':
+                indicators = self._compute_indicators(df)
+            elif self.indicator_mode == 'validate':
+                indicators = self._compute_indicators(df)
+                streamed = self._indicator_engine.update((self.symbol, timeframe), df)
+                mismatches = compare_indicator_results(
+                    indicators, streamed, rel_tol=self.validation_tolerance
+                )
+                if mismatches:
+                    logger.warning(
+                        f"⚠️ Divergência streaming x batch em {self.symbol} {timeframe}: {mismatches}"
+                    )
+            else:
+                indicators = self._indicator_engine.update((self.symbol, timeframe), df)
             
-            # ADX
-            adx = self.calculate_adx(df)
-            result['adx'] = {
-                'adx': float(adx['adx'].iloc[-1]),
-                'di_plus': float(adx['di_plus'].iloc[-1]),
-                'di_minus': float(adx['di_minus'].iloc[-1])
-            }
-            
-            # Stochastic
-            stoch = self.calculate_stochastic(df)
-            result['stochastic'] = {
-                'k': float(stoch['k'].iloc[-1]),
-                'd': float(stoch['d'].iloc[-1])
-            }
+            result.update(indicators)
             
             # Padrões de Candlestick
             result['patterns'] = self.detect_candlestick_patterns(df)
@@ -443,6 +318,92 @@ class TechnicalAnalyzer:
             logger.error(traceback.format_exc())
             return None
     
+    def _get_indicator_periods(self) -> Tuple[List[int], List[int]]:
+        """
+        Extrai períodos de EMA/SMA da config (formato lista)
+        
+        Returns:
+            Tupla (ema_periods, sma_periods)
+        """
+        ema_periods = [9, 21, 50, 200]  # padrão
+        sma_periods = [20, 50, 100, 200]  # padrão
+        
+        indicators_config = self.ta_config.get('indicators', [])
+        if isinstance(indicators_config, list):
+            for indicator in indicators_config:
+                if indicator.get('name') == 'EMA':
+                    ema_periods = indicator.get('periods', ema_periods)
+                elif indicator.get('name') == 'SMA':
+                    sma_periods = indicator.get('periods', sma_periods)
+        
+        return list(ema_periods), list(sma_periods)
+    
+    def _compute_indicators(self, df: pd.DataFrame) -> Dict:
+        """
+        Recalcula todos os indicadores sobre a janela completa (modo batch)
+        
+        Args:
+            df: DataFrame OHLCV
+            
+        Returns:
+            Dict com o último valor de cada indicador
+        """
+        result = {}
+        
+        # Médias Móveis
+        result['ema'] = {}
+        for period in self.ema_periods:
+            if len(df) >= period:
+                ema = self.calculate_ema(df, period)
+                result['ema'][f'ema_{period}'] = float(ema.iloc[-1])
+        
+        result['sma'] = {}
+        for period in self.sma_periods:
+            if len(df) >= period:
+                sma = self.calculate_sma(df, period)
+                result['sma'][f'sma_{period}'] = float(sma.iloc[-1])
+        
+        # RSI
+        rsi = self.calculate_rsi(df, 14)
+        result['rsi'] = float(rsi.iloc[-1])
+        
+        # MACD
+        macd = self.calculate_macd(df)
+        result['macd'] = {
+            'macd': float(macd['macd'].iloc[-1]),
+            'signal': float(macd['signal'].iloc[-1]),
+            'histogram': float(macd['histogram'].iloc[-1])
+        }
+        
+        # Bollinger Bands
+        bb = self.calculate_bollinger_bands(df)
+        result['bollinger'] = {
+            'upper': float(bb['upper'].iloc[-1]),
+            'middle': float(bb['middle'].iloc[-1]),
+            'lower': float(bb['lower'].iloc[-1])
+        }
+        
+        # ATR
+        atr = self.calculate_atr(df)
+        result['atr'] = float(atr.iloc[-1])
+        
+        # ADX
+        adx = self.calculate_adx(df)
+        result['adx'] = {
+            'adx': float(adx['adx'].iloc[-1]),
+            'di_plus': float(adx['di_plus'].iloc[-1]),
+            'di_minus': float(adx['di_minus'].iloc[-1])
+        }
+        
+        # Stochastic
+        stoch = self.calculate_stochastic(df)
+        result['stochastic'] = {
+            'k': float(stoch['k'].iloc[-1]),
+            'd': float(stoch['d'].iloc[-1])
+        }
+        
+        return result
+    
     def _analyze_trend(self, df: pd.DataFrame, indicators: Dict) -> Dict:
         """
         Analisa a tendência do mercado
@@ -572,11 +533,28 @@ class TechnicalAnalyzer:
             timeframes = ['M5', 'M15', 'M30', 'H1', 'H4']
         
         results = {}
+        start = time.perf_counter()
         
-        for tf in timeframes:
-            analysis = self.analyze_timeframe(tf)
-            if analysis:
-                results[tf] = analysis
+        if self._pool is not None and len(timeframes) > 1:
+            analyses, latency = self._pool.map(self.analyze_timeframe, timeframes)
+            for tf in timeframes:
+                if analyses.get(tf):
+                    results[tf] = analyses[tf]
+        else:
+            latency = {}
+            for tf in timeframes:
+                tf_start = time.perf_counter()
+                analysis = self.analyze_timeframe(tf)
+                latency[tf] = (time.perf_counter() - tf_start) * 1000
+                if analysis:
+                    results[tf] = analysis
+        
+        self.timeframe_latency_ms = latency
+        logger.debug(
+            f"Latência por timeframe {self.symbol}: "
+            + ", ".join(f"{tf}={ms:.0f}ms" for tf, ms in latency.items())
+            + f" | total={(time.perf_counter() - start) * 1000:.0f}ms"
+        )
         
         # Adicionar consenso multi-timeframe
         if results:
@@ -698,6 +676,7 @@ class TechnicalAnalyzer:
             return None
     
     def clear_cache(self):
-        """Limpa o cache de dados"""
-        self._cache.clear()
+        """Limpa o cache de dados deste símbolo"""
+        self._cache.invalidate(lambda key: key[0] == self.symbol)
+        self._indicator_engine.reset()
         logger.debug("Cache limpo")
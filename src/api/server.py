@@ -492,9 +492,10 @@ class APIServer:
                     }
                     
                     if self.mt5:
-                        positions = self.mt5.get_open_positions()
-                        status["positions"] = len(positions)
-                        status["total_profit"] = sum(p['profit'] for p in positions)
+                        # Snapshot compartilhado: clientes não multiplicam consultas ao MT5
+                        snapshot = self.mt5.get_position_snapshot()
+                        status["positions"] = len(snapshot)
+                        status["total_profit"] = snapshot.total_profit()
                     
                     await websocket.send_json(status)
                     await asyncio.sleep(1)  # Atualizar a cada segundo
@@ -91,6 +91,13 @@ class Backtester:
         
         logger.info(f"Dados carregados: {len(rates)} candles")
         
+        # Indicadores calculados uma vez sobre a série inteira (ewm/rolling
+        # são causais: o valor na barra i é o mesmo do histórico até i)
+        indicators = {
+            name: column.to_numpy()
+            for name, column in self._indicator_columns(rates).items()
+        }
+        
         # Variáveis de simulação
         balance = initial_balance
         equity_curve = [initial_balance]
@@ -100,13 +107,10 @@ class Backtester:
         # Iterar sobre os dados
         for i in range(100, len(rates)):
             current_bar = rates.iloc[i]
-            historical_data = rates.iloc[:i+1]
             
             # Se há posição aberta, verificar saída
             if open_position:
-                exit_result = self._check_exit(
-                    open_position, current_bar, historical_data, strategy
-                )
+                exit_result = self._check_exit(open_position, current_bar)
                 
                 if exit_result:
                     trade = self._close_position(
@@ -119,7 +123,7 @@ class Backtester:
             
             # Se não há posição, verificar entrada
             if not open_position:
-                signal = self._check_entry(historical_data, strategy, symbol)
+                signal = self._check_entry(rates, i, indicators, strategy, symbol)
                 
                 if signal and signal['confidence'] >= strategy.min_confidence:
                     open_position = self._open_position(
@@ -181,15 +185,22 @@ class Backtester:
     
     def _check_entry(
         self,
-        data: pd.DataFrame,
+        rates: pd.DataFrame,
+        index: int,
+        indicators: Dict[str, np.ndarray],
         strategy,
         symbol: str
     ) -> Optional[Dict]:
-        """Verifica sinal de entrada"""
+        """
+        Verifica sinal de entrada na barra `index`
+        
+        A estratégia recebe as últimas 100 barras (view) e os indicadores
+        pré-calculados dessa barra, sem fatiar o histórico inteiro.
+        """
         try:
             analysis_data = {
-                'rates': {'M15': data.tail(100)},
-                'indicators': self._calculate_indicators(data),
+                'rates': {'M15': rates.iloc[max(0, index - 99):index + 1]},
+                'indicators': {name: values[index] for name, values in indicators.items()},
                 'symbol': symbol
             }
             
@@ -203,9 +214,7 @@ class Backtester:
     def _check_exit(
         self,
         position: Dict,
-        current_bar: pd.Series,
-        data: pd.DataFrame,
-        strategy
+        current_bar: pd.Series
     ) -> Optional[Dict]:
         """Verifica condições de saída"""
         
@@ -308,8 +317,8 @@ class Backtester:
             exit_reason=reason
         )
     
-    def _calculate_indicators(self, data: pd.DataFrame) -> Dict:
-        """Calcula indicadores básicos para backtest"""
+    def _indicator_columns(self, data: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Calcula indicadores básicos como colunas completas"""
         close = data['close']
         high = data['high']
         low = data['low']
@@ -337,13 +346,20 @@ class Backtester:
         signal = macd.ewm(span=9).mean()
         
         return {
-            'ema9': ema9.iloc[-1],
-            'ema21': ema21.iloc[-1],
-            'ema50': ema50.iloc[-1],
-            'rsi': rsi.iloc[-1],
-            'atr': atr.iloc[-1],
-            'macd': macd.iloc[-1],
-            'macd_signal': signal.iloc[-1]
+            'ema9': ema9,
+            'ema21': ema21,
+            'ema50': ema50,
+            'rsi': rsi,
+            'atr': atr,
+            'macd': macd,
+            'macd_signal': signal
+        }
+    
+    def _calculate_indicators(self, data: pd.DataFrame) -> Dict:
+        """Calcula indicadores básicos para backtest (valores da última barra)"""
+        return {
+            name: column.iloc[-1]
+            for name, column in self._indicator_columns(data).items()
         }
     
     def _calculate_metrics(
@@ -3,6 +3,8 @@ Backtesting Package - Motor de Backtesting e Otimização para Urion
 
 Inclui:
 - Engine de backtest com walk-forward analysis
+- Cursor de barras sobre colunas pré-calculadas
+- Backtest vetorizado de sinais (grids de parâmetros em lote)
 - Paper trading para simulação realista
 - Data manager para dados históricos
 - Optimizer para otimização de parâmetros
@@ -10,6 +12,8 @@ Inclui:
 from .engine import BacktestEngine, BaseStrategy, BacktestResult, Trade, Position, OrderType
 from .data_manager import DataManager, Timeframe, get_data_manager
 from .optimizer import StrategyOptimizer, OptimizationResult, get_param_space
+from .bar_cursor import BarCursor, CursorStrategy, FrameStrategyAdapter
+from .vectorized import VectorizedBacktester, VectorizedResult, sma_crossover_signals
 
 # Novos módulos robustos
 try:
@@ -48,6 +52,14 @@ __all__ = [
     'StrategyOptimizer',
     'OptimizationResult',
     'get_param_space',
+    # Cursor de barras
+    'BarCursor',
+    'CursorStrategy',
+    'FrameStrategyAdapter',
+    # Backtest vetorizado
+    'VectorizedBacktester',
+    'VectorizedResult',
+    'sma_crossover_signals',
     # Novos módulos robustos
     'RobustBacktestEngine',
     'RobustBacktestResult',
@@ -22,6 +22,10 @@ from concurrent.futures import ProcessPoolExecutor
 import json
 from pathlib import Path
 
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .bar_cursor import BarCursor, as_cursor_strategy, build_columns, strategy_name
+
 logger = logging.getLogger(__name__)
 
 
@@ -213,6 +217,37 @@ class CostCalculator:
             total=total
         )
 
+    def calculate_costs_array(
+        self,
+        symbol: str,
+        is_buy: np.ndarray,
+        volume: np.ndarray,
+        holding_days: np.ndarray,
+        is_volatile_period: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Mesmo cálculo de calculate_costs sobre arrays de trades"""
+        volatile = np.asarray(is_volatile_period, dtype=bool)
+
+        spread_pips = self.spread_pips.get(symbol, self.spread_pips['DEFAULT'])
+        spread_cost = np.where(volatile, spread_pips * 2, spread_pips) * volume * 10
+
+        commission = self.commission_per_lot.get(symbol, self.commission_per_lot['DEFAULT'])
+        commission_cost = commission * volume * 2
+
+        slippage_cost = np.where(volatile, 0.5, 0.1) * volume * 10
+
+        swap_rates = self.swap_rates.get(symbol, self.swap_rates['DEFAULT'])
+        daily_swap = np.where(is_buy, swap_rates['buy'], swap_rates['sell']) * volume
+        swap_cost = daily_swap * holding_days
+
+        return {
+            'spread': spread_cost,
+            'commission': commission_cost,
+            'slippage': slippage_cost,
+            'swap': swap_cost,
+            'total': spread_cost + commission_cost + slippage_cost + swap_cost
+        }
+
 
 class MarketRegimeDetector:
     """Detecta regime de mercado"""
@@ -256,6 +291,55 @@ class MarketRegimeDetector:
         
         return MarketRegime.RANGING
     
+    def detect_regimes(self, df: pd.DataFrame) -> List[MarketRegime]:
+        """
+        Regime de cada barra, calculado de uma vez sobre a série inteira
+
+        O valor na barra i é o mesmo de detect_regime(df.iloc[:i+1]), mas
+        sem fatiar o DataFrame a cada barra (janelas via sliding_window_view).
+        """
+        n = len(df)
+        regimes = [MarketRegime.RANGING] * n
+        if n < self.lookback:
+            return regimes
+        
+        close = df['close'].to_numpy(dtype=float)
+        windows = sliding_window_view(close, self.lookback)
+        
+        # Retornos da janela (pct_change().dropna())
+        returns = windows[:, 1:] / windows[:, :-1] - 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            volatility = np.nanstd(returns, axis=1, ddof=1) * np.sqrt(252)
+            avg_return = np.nanmean(returns, axis=1) * 252
+        
+        # Tendência (rolling(k).mean().iloc[-1] da janela; NaN se k > lookback)
+        nan = np.full(len(windows), np.nan)
+        sma_fast = windows[:, -5:].mean(axis=1) if self.lookback >= 5 else nan
+        sma_slow = windows[:, -20:].mean(axis=1) if self.lookback >= 20 else nan
+        
+        # Mesma ordem de decisão de detect_regime
+        choices = [
+            MarketRegime.CRISIS,
+            MarketRegime.HIGH_VOLATILITY,
+            MarketRegime.LOW_VOLATILITY,
+            MarketRegime.TRENDING_UP,
+            MarketRegime.TRENDING_DOWN,
+            MarketRegime.RANGING,
+        ]
+        code = np.select(
+            [
+                (volatility > 0.30) & (avg_return < -0.20),
+                volatility > 0.30,
+                volatility < 0.10,
+                sma_fast > sma_slow * 1.01,
+                sma_fast < sma_slow * 0.99,
+            ],
+            [0, 1, 2, 3, 4],
+            default=5
+        )
+        regimes[self.lookback - 1:] = [choices[c] for c in code]
+        return regimes
+    
     def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
         """Calcula ATR"""
         high = df['high']
@@ -305,8 +389,14 @@ class BacktestEngine:
         """
         Executa backtest em dados históricos
         
+        Indicadores e regimes são calculados uma vez como colunas completas;
+        a cada barra a estratégia recebe um BarCursor (índice + arrays) em vez
+        de um novo data.iloc[:i+1]. Estratégias antigas (df -> sinal) seguem
+        funcionando via FrameStrategyAdapter.
+        
         Args:
-            strategy: Função que gera sinais (recebe df, retorna 'buy', 'sell', 'hold')
+            strategy: CursorStrategy ou função que gera sinais (recebe df,
+                retorna 'buy', 'sell', 'hold')
             data: DataFrame com OHLCV
             symbol: Símbolo do ativo
             include_costs: Se deve incluir custos reais
@@ -315,26 +405,31 @@ class BacktestEngine:
             BacktestResult com métricas completas
         """
         result = BacktestResult(
-            strategy=strategy.__name__ if hasattr(strategy, '__name__') else 'Unknown',
+            strategy=strategy_name(strategy),
             symbol=symbol,
             start_date=data.index[0] if isinstance(data.index[0], datetime) else datetime.now(),
             end_date=data.index[-1] if isinstance(data.index[-1], datetime) else datetime.now()
         )
         
+        strategy = as_cursor_strategy(strategy)
+        
+        # Pré-cálculo: colunas do DataFrame, indicadores da estratégia e regimes
+        columns = build_columns(data)
+        columns.update(strategy.prepare(data) or {})
+        regimes = self.regime_detector.detect_regimes(data)
+        cursor = BarCursor(data, columns)
+        
         trades = []
         equity = [self.initial_capital]
         current_position = None
         
         for i in range(100, len(data)):  # Precisa de histórico para indicadores
-            current_data = data.iloc[:i+1]
-            current_bar = data.iloc[i]
-            
-            # Detectar regime
-            regime = self.regime_detector.detect_regime(current_data)
+            cursor.index = i
+            regime = regimes[i]
             
             # Gerar sinal
             try:
-                signal = strategy(current_data)
+                signal = strategy.on_bar(cursor)
             except Exception as e:
                 logger.warning(f"Erro ao gerar sinal: {e}")
                 signal = 'hold'
@@ -344,16 +439,16 @@ class BacktestEngine:
                 # Sem posição, verificar entrada
                 if signal in ['buy', 'sell']:
                     current_position = self._open_position(
-                        current_bar, signal, symbol, regime, equity[-1]
+                        data.iloc[i], signal, symbol, regime, equity[-1]
                     )
             else:
-                # Com posição, verificar saída
-                exit_reason = self._check_exit(current_position, current_bar, signal)
+                # Com posição, verificar saída (high/low lidos do cursor)
+                exit_reason = self._check_exit(current_position, cursor, signal)
                 
                 if exit_reason:
                     # Fechar posição
                     trade = self._close_position(
-                        current_position, current_bar, include_costs
+                        current_position, data.iloc[i], include_costs
                     )
                     trades.append(trade)
                     equity.append(equity[-1] + trade.net_profit)
@@ -414,8 +509,8 @@ class BacktestEngine:
             regime=regime
         )
     
-    def _check_exit(self, position: Trade, bar: pd.Series, signal: str) -> Optional[str]:
-        """Verifica condições de saída"""
+    def _check_exit(self, position: Trade, bar: Any, signal: str) -> Optional[str]:
+        """Verifica condições de saída (bar: Series ou BarCursor)"""
         # Stop Loss
         if position.direction == 'buy':
             if bar['low'] <= position.stop_loss:
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Bar Cursor - Visão da barra corrente sobre colunas pré-calculadas
+
+Entregar data.iloc[:i+1] à estratégia a cada barra faz o backtest crescer
+de forma quadrática com o histórico (cada barra recalcula indicadores sobre
+toda a janela). Aqui o backtest calcula as colunas uma vez e a estratégia
+recebe um cursor: índice da barra + arrays numpy. Ler um valor ou uma
+janela recente é O(1) e não copia dados.
+
+Estratégias:
+- CursorStrategy: prepare(data) calcula colunas completas, on_bar(cursor)
+  devolve 'buy', 'sell' ou 'hold'
+- FrameStrategyAdapter: mantém funcionando estratégias antigas que recebem
+  o DataFrame até a barra corrente (cursor.frame)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+
+class BarCursor:
+    """
+    Cursor sobre as colunas de um backtest
+
+    `index` é a barra corrente; valores em barras futuras nunca são expostos
+    por window()/prev(). O engine avança o cursor mudando `index`.
+    """
+
+    __slots__ = ('index', 'columns', '_data')
+
+    def __init__(self, data: pd.DataFrame, columns: Dict[str, np.ndarray], index: int = 0):
+        self._data = data
+        self.columns = columns
+        self.index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name][self.index]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        """Número de barras visíveis (como len(data.iloc[:i+1]))"""
+        return self.index + 1
+
+    def get(self, name: str, default: Any = None) -> Any:
+        column = self.columns.get(name)
+        return default if column is None else column[self.index]
+
+    def prev(self, name: str, offset: int = 1) -> Any:
+        """Valor `offset` barras atrás (None antes do início dos dados)"""
+        i = self.index - offset
+        return self.columns[name][i] if i >= 0 else None
+
+    def window(self, name: str, length: int) -> np.ndarray:
+        """Últimos `length` valores até a barra corrente (view, sem cópia)"""
+        end = self.index + 1
+        return self.columns[name][max(0, end - length):end]
+
+    @property
+    def time(self) -> Any:
+        """Rótulo do índice da barra corrente"""
+        return self._data.index[self.index]
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """DataFrame até a barra corrente (caminho lento, para adaptadores)"""
+        return self._data.iloc[:self.index + 1]
+
+
+def build_columns(data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Extrai as colunas numéricas do DataFrame como arrays contíguos"""
+    columns = {}
+    for name in data.columns:
+        series = data[name]
+        if pd.api.types.is_numeric_dtype(series):
+            columns[str(name)] = np.ascontiguousarray(series.to_numpy())
+    return columns
+
+
+class CursorStrategy(ABC):
+    """
+    Estratégia que lê o cursor em vez de um DataFrame
+
+    Subclasses calculam indicadores como colunas completas em prepare() e
+    consultam a barra corrente em on_bar(). Indicadores devem ser causais
+    (o valor na barra i só depende das barras 0..i), como ewm/rolling.
+    """
+
+    name = "CursorStrategy"
+
+    def prepare(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Colunas extras para o cursor (chamado uma vez por backtest)"""
+        return {}
+
+    @abstractmethod
+    def on_bar(self, cursor: BarCursor) -> str:
+        """Retorna 'buy', 'sell' ou 'hold' para a barra do cursor"""
+        pass
+
+
+class FrameStrategyAdapter(CursorStrategy):
+    """Adapta estratégias `strategy(df) -> sinal` ao protocolo do cursor"""
+
+    def __init__(self, func: Callable[[pd.DataFrame], str]):
+        self.func = func
+        self.name = getattr(func, '__name__', None) or getattr(func, 'name', 'Unknown')
+
+    def on_bar(self, cursor: BarCursor) -> str:
+        return self.func(cursor.frame)
+
+
+def as_cursor_strategy(strategy: Any) -> CursorStrategy:
+    """Retorna a estratégia no protocolo do cursor (adaptando callables)"""
+    if isinstance(strategy, CursorStrategy):
+        return strategy
+    if callable(strategy):
+        return FrameStrategyAdapter(strategy)
+    raise TypeError(f"Estratégia inválida: {strategy!r}")
+
+
+def strategy_name(strategy: Any) -> str:
+    """Nome exibido no resultado do backtest"""
+    if isinstance(strategy, CursorStrategy):
+        return strategy.name
+    return getattr(strategy, '__name__', None) or 'Unknown'
@@ -9,6 +9,8 @@ Features:
 - Visualização de resultados
 - Walk-forward analysis
 - Otimização de parâmetros
+- Loop por arrays numpy (OHLC/tempo extraídos uma vez, posições e equity em arrays)
+- Checkpoints de equity durante o backtest (poda de trials na otimização)
 """
 import numpy as np
 import pandas as pd
@@ -303,6 +305,14 @@ class BacktestEngine:
         self._order_counter = 0
         self._trade_counter = 0
         
+        # Posições abertas em arrays (linha k = self._positions[k])
+        self._pos_sign = np.zeros(max_positions)      # +1 BUY / -1 SELL
+        self._pos_entry = np.zeros(max_positions)
+        self._pos_volume = np.zeros(max_positions)
+        self._pos_sl = np.zeros(max_positions)
+        self._pos_tp = np.zeros(max_positions)
+        self._positions_version = 0                   # muda a cada abertura/fechamento
+        
         # Histórico
         self._equity_history: List[Tuple[datetime, float]] = []
         self._balance_history: List[Tuple[datetime, float]] = []
@@ -437,7 +447,19 @@ class BacktestEngine:
             comment=comment
         )
         
+        k = len(self._positions)
+        if k >= len(self._pos_sign):
+            # max_positions aumentado depois do __init__
+            for name in ('_pos_sign', '_pos_entry', '_pos_volume', '_pos_sl', '_pos_tp'):
+                arr = getattr(self, name)
+                setattr(self, name, np.concatenate([arr, np.zeros(max(k + 1, len(arr)))]))
         self._positions.append(position)
+        self._pos_sign[k] = 1.0 if order_type == OrderType.BUY else -1.0
+        self._pos_entry[k] = fill_price
+        self._pos_volume[k] = volume
+        self._pos_sl[k] = sl
+        self._pos_tp[k] = tp
+        self._positions_version += 1
         
         logger.debug(
             f"📈 Posição aberta | #{position.id} {symbol} {order_type.value} "
@@ -502,7 +524,14 @@ class BacktestEngine:
         )
         
         self._trades.append(trade)
-        self._positions.remove(position)
+        
+        # Remover da lista e dos arrays mantendo a ordem
+        k = self._positions.index(position)
+        n = len(self._positions)
+        del self._positions[k]
+        for arr in (self._pos_sign, self._pos_entry, self._pos_volume, self._pos_sl, self._pos_tp):
+            arr[k:n - 1] = arr[k + 1:n]
+        self._positions_version += 1
         
         emoji = "💚" if pnl > 0 else "❌"
         logger.debug(
@@ -575,7 +604,10 @@ class BacktestEngine:
         self,
         strategy: BaseStrategy,
         data: pd.DataFrame,
-        symbol: str = "EURUSD"
+        symbol: str = "EURUSD",
+        fast: bool = True,
+        on_checkpoint: Optional[Callable[[int, float], None]] = None,
+        checkpoints: int = 10
     ) -> BacktestResult:
         """
         Executa backtest com uma estratégia
@@ -584,6 +616,14 @@ class BacktestEngine:
             strategy: Estratégia a testar
             data: DataFrame com colunas [open, high, low, close, volume, time]
             symbol: Símbolo do ativo
+            fast: Loop sobre arrays numpy (False = data.iloc barra a barra;
+                mesmos trades, equity e métricas). SL/TP são lidos na abertura
+                da posição: estratégias que alteram position.sl/tp durante o
+                trade devem usar fast=False
+            on_checkpoint: Chamado como on_checkpoint(step, equity) em barras
+                igualmente espaçadas (step = 1..checkpoints). Uma exceção
+                levantada nele interrompe o backtest (ex.: optuna.TrialPruned)
+            checkpoints: Número de checkpoints ao longo dos dados
             
         Returns:
             BacktestResult com métricas
@@ -600,6 +640,68 @@ class BacktestEngine:
         
         start_time = datetime.now()
         
+        checkpoint_at = {}
+        if on_checkpoint is not None and checkpoints > 0:
+            checkpoint_at = self._checkpoint_bars(len(data), checkpoints)
+        
+        if fast:
+            equity_series = self._run_arrays(strategy, data, symbol, checkpoint_at, on_checkpoint)
+        else:
+            self._run_rows(strategy, data, symbol, checkpoint_at, on_checkpoint)
+            equity_series = None
+        
+        # Calcular resultado
+        result = self._calculate_result(data, equity_series)
+        
+        elapsed = (datetime.now() - start_time).total_seconds()
+        logger.success(
+            f"✅ Backtest concluído em {elapsed:.1f}s | "
+            f"Trades: {result.total_trades} | "
+            f"P&L: ${result.total_pnl:.2f}"
+        )
+        
+        return result
+    
+    def _enter_from_signal(self, strategy: BaseStrategy, signal: Dict, symbol: str,
+                           close: float, timestamp: datetime):
+        """Abre posição a partir do sinal da estratégia (volume pelo risco até o SL)"""
+        order_type = OrderType.BUY if signal['type'] == 'BUY' else OrderType.SELL
+        sl = signal.get('sl', 0)
+        tp = signal.get('tp', 0)
+        
+        # Calcular volume baseado em risco
+        if sl > 0:
+            pip_size = self._get_pip_size(symbol)
+            sl_pips = abs(close - sl) / pip_size
+            volume = strategy.calculate_position_size(
+                self.balance,
+                self.risk_per_trade,
+                sl_pips,
+                self.pip_value
+            )
+        else:
+            volume = 0.1  # Volume padrão
+        
+        self.open_position(
+            symbol=symbol,
+            order_type=order_type,
+            volume=volume,
+            price=close,
+            timestamp=timestamp,
+            sl=sl,
+            tp=tp,
+            comment=signal.get('comment', '')
+        )
+    
+    @staticmethod
+    def _checkpoint_bars(n_bars: int, checkpoints: int) -> Dict[int, int]:
+        """Índice da barra -> step do checkpoint (último na barra final)"""
+        return {max(n_bars * k // checkpoints - 1, 0): k for k in range(1, checkpoints + 1)}
+    
+    def _run_rows(self, strategy: BaseStrategy, data: pd.DataFrame, symbol: str,
+                  checkpoint_at: Dict[int, int] = None, on_checkpoint: Callable = None):
+        """Loop original: data.iloc por barra"""
+        checkpoint_at = checkpoint_at or {}
         for i in range(len(data)):
             bar = data.iloc[i]
             timestamp = bar['time'] if isinstance(bar['time'], datetime) else pd.to_datetime(bar['time'])
@@ -623,36 +725,13 @@ class BacktestEngine:
                 signal = strategy.should_enter(data, i)
                 
                 if signal:
-                    order_type = OrderType.BUY if signal['type'] == 'BUY' else OrderType.SELL
-                    sl = signal.get('sl', 0)
-                    tp = signal.get('tp', 0)
-                    
-                    # Calcular volume baseado em risco
-                    if sl > 0:
-                        pip_size = self._get_pip_size(symbol)
-                        sl_pips = abs(bar['close'] - sl) / pip_size
-                        volume = strategy.calculate_position_size(
-                            self.balance,
-                            self.risk_per_trade,
-                            sl_pips,
-                            self.pip_value
-                        )
-                    else:
-                        volume = 0.1  # Volume padrão
-                    
-                    self.open_position(
-                        symbol=symbol,
-                        order_type=order_type,
-                        volume=volume,
-                        price=bar['close'],
-                        timestamp=timestamp,
-                        sl=sl,
-                        tp=tp,
-                        comment=signal.get('comment', '')
-                    )
+                    self._enter_from_signal(strategy, signal, symbol, bar['close'], timestamp)
             
             # 5. Atualizar equity
             self.update_equity({symbol: bar['close']}, timestamp)
+            
+            if i in checkpoint_at:
+                on_checkpoint(checkpoint_at[i], self.equity)
         
         # Fechar posições restantes
         for position in self._positions.copy():
@@ -662,20 +741,118 @@ class BacktestEngine:
                 pd.to_datetime(data.iloc[-1]['time']),
                 "end_of_backtest"
             )
+    
+    def _run_arrays(self, strategy: BaseStrategy, data: pd.DataFrame, symbol: str,
+                    checkpoint_at: Dict[int, int] = None, on_checkpoint: Callable = None) -> pd.Series:
+        """
+        Loop sobre arrays: OHLC/tempo extraídos uma vez, SL/TP e equity
+        calculados sobre os arrays de posições abertas
         
-        # Calcular resultado
-        result = self._calculate_result(data)
+        Mesma sequência de operações do loop original (ordem das posições,
+        sorteios de slippage, somas) - resultado idêntico.
         
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.success(
-            f"✅ Backtest concluído em {elapsed:.1f}s | "
-            f"Trades: {result.total_trades} | "
-            f"P&L: ${result.total_pnl:.2f}"
-        )
+        Returns:
+            Equity curve
+        """
+        n_bars = len(data)
+        high = data['high'].to_numpy(dtype=np.float64)
+        low = data['low'].to_numpy(dtype=np.float64)
+        close = data['close'].to_numpy(dtype=np.float64)
+        times = self._bar_times(data['time'])
+        
+        equity = np.empty(n_bars)
+        balance = np.empty(n_bars)
+        pip_size = self._get_pip_size(symbol)
+        checkpoint_at = checkpoint_at or {}
+        positions = self._positions
         
-        return result
+        # Gatilhos agregados de SL/TP: a barra só precisa do teste por posição
+        # se a mínima/máxima alcançou o nível mais próximo
+        stops_for = None
+        trigger_low, trigger_high = -np.inf, np.inf
+        
+        for i in range(n_bars):
+            timestamp = times[i]
+            bar_close = float(close[i])
+            
+            # 1. Chamar on_bar da estratégia
+            strategy.on_bar(data, i)
+            
+            # 2. Verificar SL/TP das posições abertas (todas de uma vez)
+            n = len(positions)
+            if n and stops_for != self._positions_version:
+                sign, sl, tp = self._pos_sign[:n], self._pos_sl[:n], self._pos_tp[:n]
+                is_buy = sign > 0
+                low_levels = np.concatenate([sl[is_buy & (sl > 0)], tp[~is_buy & (tp > 0)]])
+                high_levels = np.concatenate([tp[is_buy & (tp > 0)], sl[~is_buy & (sl > 0)]])
+                trigger_low = low_levels.max() if len(low_levels) else -np.inf
+                trigger_high = high_levels.min() if len(high_levels) else np.inf
+                stops_for = self._positions_version
+            bar_high, bar_low = float(high[i]), float(low[i])
+            if n and (bar_low <= trigger_low or bar_high >= trigger_high):
+                sign, sl, tp = self._pos_sign[:n], self._pos_sl[:n], self._pos_tp[:n]
+                is_buy = sign > 0
+                sl_hit = (sl > 0) & np.where(is_buy, bar_low <= sl, bar_high >= sl)
+                tp_hit = (tp > 0) & np.where(is_buy, bar_high >= tp, bar_low <= tp)
+                hits = np.flatnonzero(sl_hit | tp_hit)
+                if len(hits):
+                    snapshot = positions.copy()
+                    for k in hits:
+                        position = snapshot[k]
+                        if sl_hit[k]:
+                            self.close_position(position, position.sl, timestamp, "stop_loss")
+                        else:
+                            self.close_position(position, position.tp, timestamp, "take_profit")
+            
+            # 3. Verificar saídas da estratégia
+            if positions:
+                for position in positions.copy():
+                    if strategy.should_exit(position, data, i):
+                        self.close_position(position, bar_close, timestamp, "strategy_exit")
+            
+            # 4. Verificar entradas
+            if len(positions) < self.max_positions:
+                signal = strategy.should_enter(data, i)
+                
+                if signal:
+                    self._enter_from_signal(strategy, signal, symbol, bar_close, timestamp)
+            
+            # 5. Atualizar equity (P&L não realizado sobre os arrays)
+            n = len(positions)
+            unrealized_pnl = 0
+            if n:
+                entry, volume = self._pos_entry[:n], self._pos_volume[:n]
+                pips = (bar_close - entry) * self._pos_sign[:n] / pip_size
+                pnl = pips * self.pip_value * volume
+                pnl -= (entry + bar_close) * volume * self.commission * 100000
+                for position, position_pnl in zip(positions, pnl.tolist()):
+                    position.current_price = bar_close
+                    position.unrealized_pnl = position_pnl
+                    unrealized_pnl += position_pnl
+            self.equity = self.balance + unrealized_pnl
+            equity[i] = self.equity
+            balance[i] = self.balance
+            
+            if i in checkpoint_at:
+                on_checkpoint(checkpoint_at[i], self.equity)
+        
+        # Fechar posições restantes
+        for position in positions.copy():
+            self.close_position(position, float(close[-1]), pd.to_datetime(data['time'].iloc[-1]),
+                                "end_of_backtest")
+        
+        self._equity_history = list(zip(times, equity.tolist()))
+        self._balance_history = list(zip(times, balance.tolist()))
+        return pd.Series(equity, index=times)
     
-    def _calculate_result(self, data: pd.DataFrame) -> BacktestResult:
+    @staticmethod
+    def _bar_times(column: pd.Series) -> list:
+        """Timestamps por barra como no loop original (datetime mantido, resto via pd.to_datetime)"""
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return list(column)
+        return [t if isinstance(t, datetime) else pd.to_datetime(t) for t in column]
+    
+    def _calculate_result(self, data: pd.DataFrame, equity_series: pd.Series = None) -> BacktestResult:
         """Calcula métricas do backtest"""
         
         # Básicas
@@ -695,10 +872,11 @@ class BacktestEngine:
         total_pnl = self.balance - self.initial_balance
         
         # Equity curve
-        equity_series = pd.Series(
-            [e[1] for e in self._equity_history],
-            index=[e[0] for e in self._equity_history]
-        )
+        if equity_series is None:
+            equity_series = pd.Series(
+                [e[1] for e in self._equity_history],
+                index=[e[0] for e in self._equity_history]
+            )
         
         # Drawdown
         rolling_max = equity_series.expanding().max()
@@ -7,10 +7,19 @@ Features:
 - Múltiplos algoritmos de otimização
 - Walk-forward analysis
 - Visualização de resultados
-- Pruning de trials ruins
+- Pruning de trials ruins (equity reportada em checkpoints do backtest)
+- Trials em processos (spawn) com estudo em storage compartilhado e dados
+  abertos como memmap em cada worker
 """
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import time
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Callable, Type
 from dataclasses import dataclass
@@ -26,6 +35,33 @@ except ImportError:
     logger.warning("Optuna não instalado. Instale com: pip install optuna")
 
 from .engine import BacktestEngine, BaseStrategy, BacktestResult
+from .walk_forward import load_shared_frame, share_frame
+
+
+def _make_sampler(name: str, seed: Optional[int] = None):
+    if name == "cmaes":
+        return CmaEsSampler(seed=seed)
+    return TPESampler(n_startup_trials=10, seed=seed)
+
+
+def _make_pruner(name: str):
+    if name == "median":
+        return MedianPruner()
+    return HyperbandPruner()
+
+
+def _make_storage(path: str):
+    """Storage local do Optuna: .db = SQLite, senão journal em arquivo"""
+    path = str(path)
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return f"sqlite:///{path}"
+    try:
+        from optuna.storages.journal import JournalFileBackend
+        backend = JournalFileBackend(path)
+    except ImportError:
+        # optuna < 4
+        backend = optuna.storages.JournalFileStorage(path)
+    return optuna.storages.JournalStorage(backend)
 
 
 @dataclass
@@ -98,8 +134,9 @@ class StrategyOptimizer:
         self.metric = metric
         self.direction = direction
         
-        self._study: Optional[optuna.Study] = None
+        self._study: Optional['optuna.Study'] = None
         self._best_result: Optional[BacktestResult] = None
+        self._checkpoints = 10
         
         logger.info(
             f"🔬 Optimizer inicializado | "
@@ -108,7 +145,7 @@ class StrategyOptimizer:
             f"Params: {len(param_space)}"
         )
     
-    def _sample_params(self, trial: optuna.Trial) -> Dict[str, Any]:
+    def _sample_params(self, trial: 'optuna.Trial') -> Dict[str, Any]:
         """Amostra parâmetros do espaço de busca"""
         params = {}
         
@@ -156,7 +193,7 @@ class StrategyOptimizer:
         
         return params
     
-    def _objective(self, trial: optuna.Trial) -> float:
+    def _objective(self, trial: 'optuna.Trial') -> float:
         """Função objetivo para Optuna"""
         # Amostrar parâmetros
         params = self._sample_params(trial)
@@ -165,9 +202,13 @@ class StrategyOptimizer:
             # Criar estratégia com parâmetros
             strategy = self.strategy_class(**params)
             
-            # Executar backtest
+            # Executar backtest (equity reportada nos checkpoints)
             engine = BacktestEngine(initial_balance=self.initial_balance)
-            result = engine.run(strategy, self.data, self.symbol)
+            result = engine.run(
+                strategy, self.data, self.symbol,
+                on_checkpoint=self._checkpoint_reporter(trial),
+                checkpoints=self._checkpoints
+            )
             
             # Obter métrica
             if self.metric == "sharpe":
@@ -199,10 +240,32 @@ class StrategyOptimizer:
             
             return value
             
+        except optuna.TrialPruned:
+            raise
         except Exception as e:
             logger.warning(f"Trial falhou: {e}")
             return float('-inf') if self.direction == "maximize" else float('inf')
     
+    def _checkpoint_reporter(self, trial: 'optuna.Trial') -> Optional[Callable[[int, float], None]]:
+        """
+        Callback de checkpoint do backtest: reporta o retorno da equity até a
+        barra e interrompe o trial se o pruner mandar
+        
+        Em estudos de minimização o retorno vai com sinal trocado, para que
+        equity maior continue sendo melhor para o pruner.
+        """
+        if not self._checkpoints:
+            return None
+        
+        sign = 1.0 if self.direction == "maximize" else -1.0
+        
+        def report(step: int, equity: float):
+            trial.report(sign * (equity / self.initial_balance - 1), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned(f"Podado no checkpoint {step}")
+        
+        return report
+    
     def optimize(
         self,
         n_trials: int = 100,
@@ -210,57 +273,69 @@ class StrategyOptimizer:
         n_jobs: int = 1,
         show_progress_bar: bool = True,
         sampler: str = "tpe",
-        pruner: str = "hyperband"
+        pruner: str = "hyperband",
+        backend: str = "process",
+        checkpoints: int = 10,
+        storage_path: Optional[str] = None,
+        seed: Optional[int] = None
     ) -> OptimizationResult:
         """
         Executa otimização
         
         Args:
-            n_trials: Número de trials
+            n_trials: Número de trials (total entre todos os processos)
             timeout: Timeout em segundos
-            n_jobs: Número de jobs paralelos
-            show_progress_bar: Mostrar barra de progresso
+            n_jobs: Número de jobs paralelos (-1 = todos os núcleos)
+            show_progress_bar: Mostrar barra de progresso (só no processo atual)
             sampler: 'tpe' ou 'cmaes'
             pruner: 'median' ou 'hyperband'
+            backend: 'process' (processos com storage compartilhado) ou
+                'thread' (n_jobs do Optuna; o loop do backtest fica preso ao GIL)
+            checkpoints: Checkpoints de equity por backtest para o pruner (0 = sem poda)
+            storage_path: Arquivo do storage (journal ou .db); None = temporário
+            seed: Semente do sampler (worker i usa seed + i)
             
         Returns:
             OptimizationResult
         """
         start_time = datetime.now()
+        self._checkpoints = checkpoints
         
-        # Criar sampler
-        if sampler == "cmaes":
-            optuna_sampler = CmaEsSampler()
-        else:
-            optuna_sampler = TPESampler(n_startup_trials=10)
-        
-        # Criar pruner
-        if pruner == "median":
-            optuna_pruner = MedianPruner()
-        else:
-            optuna_pruner = HyperbandPruner()
+        if n_jobs is None or n_jobs <= 0:
+            n_jobs = os.cpu_count() or 1
+        use_processes = backend == "process" and n_jobs > 1 and self._is_picklable()
         
         # Criar estudo
         study_name = f"{self.strategy_class.__name__}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        self._study = optuna.create_study(
-            study_name=study_name,
-            direction=self.direction,
-            sampler=optuna_sampler,
-            pruner=optuna_pruner
-        )
-        
         # Otimizar
-        logger.info(f"🚀 Iniciando otimização | Trials: {n_trials} | Sampler: {sampler}")
-        
-        self._study.optimize(
-            self._objective,
-            n_trials=n_trials,
-            timeout=timeout,
-            n_jobs=n_jobs,
-            show_progress_bar=show_progress_bar
+        logger.info(
+            f"🚀 Iniciando otimização | Trials: {n_trials} | Sampler: {sampler} | "
+            f"Jobs: {n_jobs} ({'processos' if use_processes else 'threads'})"
         )
         
+        if use_processes:
+            self._study = self._optimize_processes(
+                study_name, n_trials, timeout, n_jobs, sampler, pruner, storage_path, seed
+            )
+        else:
+            self._study = optuna.create_study(
+                study_name=study_name,
+                direction=self.direction,
+                sampler=_make_sampler(sampler, seed),
+                pruner=_make_pruner(pruner),
+                storage=_make_storage(storage_path) if storage_path else None,
+                load_if_exists=True
+            )
+            
+            self._study.optimize(
+                self._objective,
+                n_trials=n_trials,
+                timeout=timeout,
+                n_jobs=n_jobs,
+                show_progress_bar=show_progress_bar
+            )
+        
         elapsed = (datetime.now() - start_time).total_seconds()
         
         # Coletar resultados
@@ -291,11 +366,88 @@ class StrategyOptimizer:
         
         return result
     
+    def _is_picklable(self) -> bool:
+        """Estratégia e espaço de busca podem ir para outros processos?"""
+        try:
+            pickle.dumps((self.strategy_class, self.param_space))
+            return True
+        except Exception as e:
+            logger.warning(f"Estratégia não picklável ({e}); otimização com threads")
+            return False
+    
+    def _optimize_processes(
+        self,
+        study_name: str,
+        n_trials: int,
+        timeout: Optional[float],
+        n_jobs: int,
+        sampler: str,
+        pruner: str,
+        storage_path: Optional[str],
+        seed: Optional[int]
+    ) -> 'optuna.Study':
+        """Trials em processos sobre um estudo em storage compartilhado"""
+        work_dir = tempfile.mkdtemp(prefix='urion_optimizer_')
+        
+        try:
+            path = storage_path or os.path.join(work_dir, 'study.journal')
+            optuna.create_study(
+                study_name=study_name,
+                direction=self.direction,
+                storage=_make_storage(path),
+                load_if_exists=True
+            )
+            
+            # Dados compartilhados: gravados uma vez, memmap nos workers
+            share_frame(self.data, work_dir)
+            
+            spec = {
+                'strategy_class': self.strategy_class,
+                'param_space': self.param_space,
+                'symbol': self.symbol,
+                'initial_balance': self.initial_balance,
+                'metric': self.metric,
+                'direction': self.direction,
+                'sampler': sampler,
+                'pruner': pruner,
+                'checkpoints': self._checkpoints,
+            }
+            deadline = None if timeout is None else time.time() + timeout
+            
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [
+                    pool.submit(optimization_worker, spec, work_dir, str(path), study_name,
+                                n_trials, deadline, None if seed is None else seed + i)
+                    for i in range(n_jobs)
+                ]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Erro no worker de otimização: {e}")
+            
+            study = optuna.load_study(study_name=study_name, storage=_make_storage(path))
+            
+            if storage_path is None:
+                # Storage temporário: cópia em memória para get_importance / plots
+                memory = optuna.storages.InMemoryStorage()
+                optuna.copy_study(from_study_name=study_name, from_storage=_make_storage(path),
+                                  to_storage=memory)
+                study = optuna.load_study(study_name=study_name, storage=memory)
+            
+            return study
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
     def walk_forward_optimize(
         self,
         n_splits: int = 5,
         train_ratio: float = 0.7,
-        n_trials_per_split: int = 50
+        n_trials_per_split: int = 50,
+        n_jobs: int = 1,
+        backend: str = "process",
+        checkpoints: int = 10
     ) -> List[OptimizationResult]:
         """
         Walk-Forward Optimization
@@ -306,6 +458,7 @@ class StrategyOptimizer:
             n_splits: Número de divisões
             train_ratio: Proporção de treino
             n_trials_per_split: Trials por divisão
+            n_jobs, backend, checkpoints: Repassados a optimize() em cada divisão
             
         Returns:
             Lista de resultados por divisão
@@ -333,10 +486,16 @@ class StrategyOptimizer:
             original_data = self.data
             self.data = train_data
             
-            result = self.optimize(
-                n_trials=n_trials_per_split,
-                show_progress_bar=False
-            )
+            try:
+                result = self.optimize(
+                    n_trials=n_trials_per_split,
+                    n_jobs=n_jobs,
+                    show_progress_bar=False,
+                    backend=backend,
+                    checkpoints=checkpoints
+                )
+            finally:
+                self.data = original_data
             
             # Validar em teste
             strategy = self.strategy_class(**result.best_params)
@@ -349,7 +508,6 @@ class StrategyOptimizer:
             )
             
             results.append(result)
-            self.data = original_data
         
         return results
     
@@ -385,6 +543,40 @@ class StrategyOptimizer:
             pass
 
 
+def optimization_worker(spec: Dict[str, Any], data_dir: str, storage_path: str, study_name: str,
+                        n_trials: int, deadline: Optional[float], seed: Optional[int]) -> None:
+    """Processo de otimização: abre os dados como memmap e roda trials no estudo compartilhado"""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    
+    optimizer = StrategyOptimizer(
+        strategy_class=spec['strategy_class'],
+        param_space=spec['param_space'],
+        data=load_shared_frame(data_dir),
+        symbol=spec['symbol'],
+        initial_balance=spec['initial_balance'],
+        metric=spec['metric'],
+        direction=spec['direction']
+    )
+    optimizer._checkpoints = spec['checkpoints']
+    
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=_make_storage(storage_path),
+        sampler=_make_sampler(spec['sampler'], seed),
+        pruner=_make_pruner(spec['pruner'])
+    )
+    
+    # Para quando o total do estudo (todos os workers) chega a n_trials
+    stop_at_total = optuna.study.MaxTrialsCallback(
+        n_trials, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    )
+    timeout = None if deadline is None else max(deadline - time.time(), 0)
+    if timeout == 0:
+        return
+    study.optimize(optimizer._objective, n_trials=n_trials, timeout=timeout,
+                   callbacks=[stop_at_total], show_progress_bar=False)
+
+
 # ==================== Espaço de Parâmetros Pré-definidos ====================
 
 PARAM_SPACES = {
@@ -452,10 +644,10 @@ optimizer = StrategyOptimizer(
     metric='sharpe'
 )
 
-# Otimizar
-result = optimizer.optimize(n_trials=100)
+# Otimizar (4 processos; em scripts, dentro de if __name__ == '__main__')
+result = optimizer.optimize(n_trials=100, n_jobs=4)
 print(result.summary())
 
 # Walk-forward
-results = optimizer.walk_forward_optimize(n_splits=5)
+results = optimizer.walk_forward_optimize(n_splits=5, n_jobs=4)
 """
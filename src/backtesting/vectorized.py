@@ -0,0 +1,594 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized Backtester - Backtest de estratégias por arrays de sinais
+
+Para estratégias que se resumem a sinais de entrada/saída + SL/TP em
+múltiplos de ATR (ex.: SMAStrategy), o backtest inteiro roda em numpy:
+- Sinais em matrizes (barras x conjuntos de parâmetros): uma coluna por
+  combinação, todas simuladas na mesma chamada
+- Nada de loop por barra: a próxima entrada/saída por sinal sai de um
+  searchsorted sobre os inícios de sinal e o toque de SL/TP de uma sparse
+  table de mínimas/máximas (O(log n)), para todas as colunas de uma vez;
+  o Python só itera por trade
+- Custos (spread, comissão, slippage, swap) do CostCalculator, position
+  sizing e regime de volatilidade com as mesmas regras do BacktestEngine
+  robusto
+- Curva de equity marcada a mercado montada por somas acumuladas
+
+Modelo de execução (uma posição por coluna):
+- Entrada no fechamento da barra do sinal; compra tem prioridade se houver
+  sinal de compra e venda na mesma barra
+- SL/TP tocados pela máxima/mínima saem no próprio nível; se os dois forem
+  tocados na mesma barra, vale o SL (conservador)
+- Sinal de saída sai no fechamento da barra; toque de SL/TP tem prioridade
+- Após a saída, nova entrada só a partir da barra seguinte
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .backtest_engine import CostCalculator, MarketRegime, MarketRegimeDetector
+
+
+# Parâmetros de grid consumidos pelo backtester (não vão para signal_func)
+LEVEL_PARAMS = ('sl_atr', 'tp_atr')
+
+EXIT_REASONS = np.array(['stop_loss', 'take_profit', 'signal', 'end_of_data'])
+_SL, _TP, _SIGNAL, _END = range(4)
+
+
+@dataclass
+class VectorizedResult:
+    """Métricas por conjunto de parâmetros (uma posição por coluna)"""
+    params: List[Dict[str, Any]]
+    total_trades: np.ndarray
+    winning_trades: np.ndarray
+    win_rate: np.ndarray
+    gross_profit: np.ndarray
+    total_costs: np.ndarray
+    net_profit: np.ndarray
+    profit_factor: np.ndarray
+    max_drawdown: np.ndarray
+    sharpe_ratio: np.ndarray
+    trades: pd.DataFrame
+    equity: Optional[np.ndarray] = None  # barras x colunas
+
+    def to_frame(self) -> pd.DataFrame:
+        """Parâmetros + métricas, uma linha por coluna"""
+        metrics = pd.DataFrame({
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'win_rate': self.win_rate,
+            'gross_profit': self.gross_profit,
+            'total_costs': self.total_costs,
+            'net_profit': self.net_profit,
+            'profit_factor': self.profit_factor,
+            'max_drawdown': self.max_drawdown,
+            'sharpe_ratio': self.sharpe_ratio,
+        })
+        return pd.concat([pd.DataFrame(self.params), metrics], axis=1)
+
+    def best(self, metric: str = 'sharpe_ratio', min_trades: int = 1) -> Dict[str, Any]:
+        """Parâmetros e métricas da melhor coluna"""
+        frame = self.to_frame()
+        frame = frame[frame['total_trades'] >= min_trades]
+        if frame.empty:
+            return {}
+        return frame.loc[frame[metric].idxmax()].to_dict()
+
+
+def atr_array(data: pd.DataFrame, period: int = 14) -> np.ndarray:
+    """ATR (média simples do true range), igual ao da SMAStrategy"""
+    high_low = data['high'] - data['low']
+    high_close = abs(data['high'] - data['close'].shift())
+    low_close = abs(data['low'] - data['close'].shift())
+    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    return tr.rolling(period).mean().to_numpy(dtype=float)
+
+
+def sma_crossover_signals(
+    data: pd.DataFrame,
+    fast_periods: Sequence[int],
+    slow_periods: Sequence[int]
+) -> Dict[str, Any]:
+    """
+    Sinais da SMAStrategy para todas as combinações fast < slow
+
+    Cada média é calculada uma vez (somas acumuladas) e reaproveitada por
+    todas as combinações que a usam.
+
+    Returns:
+        Dict com long_entries, short_entries, long_exits, short_exits
+        (barras x combinações) e params
+    """
+    close = data['close'].to_numpy(dtype=float)
+    n = len(close)
+    csum = np.concatenate([[0.0], np.cumsum(close)])
+
+    smas = {}
+    for period in sorted(set(fast_periods) | set(slow_periods)):
+        sma = np.full(n, np.nan)
+        sma[period - 1:] = (csum[period:] - csum[:-period]) / period
+        smas[period] = sma
+
+    pairs = [(f, s) for f, s in itertools.product(fast_periods, slow_periods) if f < s]
+    fast = np.column_stack([smas[f] for f, _ in pairs])
+    slow = np.column_stack([smas[s] for _, s in pairs])
+
+    above = fast > slow
+    below = fast < slow
+    prev_fast = np.vstack([np.full((1, len(pairs)), np.nan), fast[:-1]])
+    prev_slow = np.vstack([np.full((1, len(pairs)), np.nan), slow[:-1]])
+
+    # Mesmo aquecimento da SMAStrategy (index >= slow_period + 1)
+    warm = np.arange(n)[:, None] >= np.array([s for _, s in pairs])[None, :] + 1
+
+    return {
+        'long_entries': above & (prev_fast <= prev_slow) & warm,
+        'short_entries': below & (prev_fast >= prev_slow) & warm,
+        'long_exits': below,
+        'short_exits': above,
+        'params': [{'fast_period': f, 'slow_period': s} for f, s in pairs],
+    }
+
+
+class _NextTrue:
+    """
+    Próximo índice verdadeiro >= pos em cada linha de uma matriz bool
+
+    Matriz em colunas x barras. Guarda só os inícios de sequências
+    verdadeiras (chaves coluna*(n+1)+barra, ordenadas); a busca é um
+    searchsorted vetorizado sobre as colunas. Sinais contínuos
+    (ex.: fast < slow) custam tão pouco quanto eventos.
+    """
+
+    def __init__(self, mask: np.ndarray):
+        mask = np.ascontiguousarray(mask)
+        n = mask.shape[1]
+        starts = np.empty(mask.shape, dtype=bool)
+        starts[:, :1] = mask[:, :1]
+        np.logical_and(mask[:, 1:], ~mask[:, :-1], out=starts[:, 1:])
+        cols, rows = np.nonzero(starts)
+
+        self.mask = mask
+        self.n = n
+        self.stride = n + 1
+        self.keys = cols.astype(np.int64) * self.stride + rows
+
+    def next(self, cols: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        """Índice do próximo verdadeiro a partir de pos (n se não houver)"""
+        inside = pos < self.n
+        here = self.mask[cols, np.minimum(pos, self.n - 1)] & inside
+        if not len(self.keys):
+            return np.where(here, pos, self.n)
+
+        base = cols.astype(np.int64) * self.stride
+        j = np.searchsorted(self.keys, base + pos)
+        candidate = self.keys[np.minimum(j, len(self.keys) - 1)]
+        found = (j < len(self.keys)) & (candidate - base < self.stride)
+        return np.where(here, pos, np.where(found, candidate - base, self.n))
+
+
+class _FirstTouch:
+    """
+    Primeiro índice >= start com valor <= limite
+
+    Sparse table de mínimos (janelas de 2^l barras): a busca desce os
+    níveis pulando blocos inteiros acima do limite, O(log n) por consulta
+    e vetorizada sobre todas as posições abertas. Tabela 0 usa a mínima
+    (SL de compra/TP de venda), tabela 1 a máxima negada.
+    """
+
+    def __init__(self, low: np.ndarray, high: np.ndarray):
+        n = len(low)
+        self.levels = max(1, n.bit_length())
+        table = np.full((2, self.levels, n + 1), -np.inf)
+        table[0, 0, :n] = low
+        table[1, 0, :n] = -high
+        for level in range(1, self.levels):
+            half = 1 << (level - 1)
+            width = n - (1 << level) + 1
+            if width <= 0:
+                break
+            table[:, level, :width] = np.minimum(
+                table[:, level - 1, :width], table[:, level - 1, half:half + width]
+            )
+        self.table = table.ravel()
+        self.row = n + 1
+
+    def first(self, which: np.ndarray, start: np.ndarray, limit: np.ndarray) -> np.ndarray:
+        base = which * (self.levels * self.row)
+        pos = start.copy()
+        for level in reversed(range(self.levels)):
+            jump = self.table.take(base + level * self.row + pos) > limit
+            pos += jump * (1 << level)
+        return pos
+
+
+class VectorizedBacktester:
+    """
+    Backtester vetorizado para estratégias de sinais + SL/TP por ATR
+
+    Usa a mesma configuração do BacktestEngine robusto (initial_capital,
+    risk.max_risk_per_trade) e seus custos/regimes.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or {}
+        self.cost_calculator = CostCalculator(self.config)
+        self.regime_detector = MarketRegimeDetector()
+
+        self.initial_capital = self.config.get('backtest', {}).get('initial_capital', 10000)
+        self.risk_per_trade = self.config.get('risk', {}).get('max_risk_per_trade', 0.02)
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        long_entries: np.ndarray,
+        short_entries: np.ndarray,
+        long_exits: Optional[np.ndarray] = None,
+        short_exits: Optional[np.ndarray] = None,
+        sl_atr: Any = 2.0,
+        tp_atr: Any = 3.0,
+        atr: Optional[np.ndarray] = None,
+        symbol: str = "XAUUSD",
+        include_costs: bool = True,
+        return_equity: bool = True,
+        params: Optional[List[Dict[str, Any]]] = None
+    ) -> VectorizedResult:
+        """
+        Simula uma ou várias colunas de sinais
+
+        Args:
+            data: DataFrame com OHLC (índice datetime ou coluna 'time')
+            long_entries/short_entries: bool (barras,) ou (barras, colunas)
+            long_exits/short_exits: saídas por sinal; se None, o sinal
+                contrário fecha a posição (como no BacktestEngine)
+            sl_atr/tp_atr: distância de SL/TP em ATRs (escalar ou por coluna)
+            atr: ATR por barra (padrão: atr_array(data, 14))
+            symbol: Símbolo para custos
+            include_costs: Se deve descontar custos do CostCalculator
+            return_equity: Se deve montar a curva de equity (barras x colunas)
+            params: Parâmetros de cada coluna (para to_frame/best)
+
+        Returns:
+            VectorizedResult com métricas por coluna
+        """
+        high = data['high'].to_numpy(dtype=float)
+        low = data['low'].to_numpy(dtype=float)
+        close = data['close'].to_numpy(dtype=float)
+        n = len(close)
+
+        # Número de colunas: sinais 2-D ou níveis de SL/TP por coluna
+        width = max(
+            [np.shape(a)[1] for a in (long_entries, short_entries, long_exits, short_exits)
+             if a is not None and np.ndim(a) == 2]
+            + [np.size(level) for level in (sl_atr, tp_atr)]
+        )
+
+        # Internamente colunas x barras (cada coluna contígua no tempo)
+        def as_matrix(values, dtype):
+            values = np.asarray(values, dtype=dtype)
+            if values.ndim == 1:
+                return np.broadcast_to(values[None, :], (width, n))
+            return values.T
+
+        longs = as_matrix(long_entries, bool)
+        shorts = as_matrix(short_entries, bool)
+        long_exit = shorts if long_exits is None else as_matrix(long_exits, bool)
+        short_exit = longs if short_exits is None else as_matrix(short_exits, bool)
+
+        atr = as_matrix(atr_array(data) if atr is None else atr, float)
+        sl_mult = np.broadcast_to(np.asarray(sl_atr, dtype=float), (width,))
+        tp_mult = np.broadcast_to(np.asarray(tp_atr, dtype=float), (width,))
+        with np.errstate(invalid='ignore'):
+            tradable = np.isfinite(atr) & (atr > 0)
+
+        times = self._bar_times(data)
+        volatile = np.array(
+            [regime == MarketRegime.HIGH_VOLATILITY for regime in self.regime_detector.detect_regimes(data)],
+            dtype=bool
+        )
+
+        # Índices de busca montados uma vez por chamada
+        entries = _NextTrue((longs | shorts) & tradable)
+        long_exit = _NextTrue(long_exit)
+        short_exit = _NextTrue(short_exit)
+        touch = _FirstTouch(low, high)
+
+        balance = np.full(width, float(self.initial_capital))
+        search_from = np.zeros(width, dtype=np.int64)
+        active = np.arange(width)
+        rounds: List[Dict[str, np.ndarray]] = []
+
+        # Cada rodada abre e fecha o próximo trade de todas as colunas ativas
+        while active.size:
+            entry = entries.next(active, search_from[active])
+            has_entry = entry < n
+            active, entry = active[has_entry], entry[has_entry]
+            if not active.size:
+                break
+
+            is_buy = longs[active, entry]
+            side = np.where(is_buy, 1.0, -1.0)
+            entry_price = close[entry]
+            sl_distance = atr[active, entry] * sl_mult[active]
+            stop_loss = entry_price - side * sl_distance
+            take_profit = entry_price + side * atr[active, entry] * tp_mult[active]
+
+            # Position sizing baseado em risco (como BacktestEngine._open_position)
+            pip_value = 10
+            volume = np.clip(balance[active] * self.risk_per_trade / (sl_distance * pip_value), 0.01, 1.0)
+
+            # Próxima saída: toque de SL/TP na mínima/máxima ou sinal de saída
+            after = entry + 1
+            sell = (~is_buy).astype(np.int64)
+            sl_index = touch.first(sell, after, side * stop_loss)
+            tp_index = touch.first(1 - sell, after, -side * take_profit)
+            signal_index = np.where(
+                is_buy, long_exit.next(active, after), short_exit.next(active, after)
+            )
+
+            exit_idx = np.minimum(np.minimum(sl_index, tp_index), signal_index)
+            at_end = exit_idx >= n
+            exit_idx = np.where(at_end, n - 1, exit_idx)
+
+            hit_sl = (sl_index == exit_idx) & ~at_end
+            hit_tp = (tp_index == exit_idx) & ~at_end & ~hit_sl
+            reason = np.select([hit_sl, hit_tp, at_end], [_SL, _TP, _END], default=_SIGNAL)
+            exit_price = np.select([hit_sl, hit_tp], [stop_loss, take_profit], default=close[exit_idx])
+
+            gross = side * (exit_price - entry_price) * volume * 100  # Simplificado
+            # Holding period em minutos inteiros (como BacktestEngine._close_position)
+            if times is not None:
+                holding = (times[exit_idx] - times[entry]) // 60_000_000_000
+            else:
+                holding = np.zeros(len(active), dtype=np.int64)
+            if include_costs:
+                costs = self.cost_calculator.calculate_costs_array(
+                    symbol, is_buy, volume, holding / (60 * 24), volatile[entry]
+                )['total']
+            else:
+                costs = np.zeros(len(active))
+            net = gross - costs
+
+            rounds.append({
+                'column': active, 'entry_index': entry, 'exit_index': exit_idx,
+                'is_buy': is_buy, 'entry_price': entry_price, 'exit_price': exit_price,
+                'stop_loss': stop_loss, 'take_profit': take_profit, 'volume': volume,
+                'gross_profit': gross, 'costs': costs, 'net_profit': net,
+                'holding_period': holding, 'reason': reason,
+            })
+
+            balance[active] += net
+            search_from[active] = exit_idx + 1
+            still = search_from[active] < n
+            active = active[still]
+
+        result = self._build_result(rounds, width, data, params)
+        if return_equity:
+            result.equity = self._equity_matrix(rounds, close, width)
+
+        logger.debug(f"Backtest vetorizado: {width} colunas, {len(result.trades)} trades, {len(rounds)} rodadas")
+        return result
+
+    def run_grid(
+        self,
+        data: pd.DataFrame,
+        signal_func: Callable[..., Dict[str, np.ndarray]],
+        param_grid: Dict[str, Sequence[Any]],
+        chunk_size: int = 512,
+        **kwargs
+    ) -> VectorizedResult:
+        """
+        Avalia todas as combinações de um grid em lotes de colunas
+
+        signal_func(data, **params) retorna dict com long_entries,
+        short_entries e opcionalmente long_exits/short_exits (arrays por
+        barra). 'sl_atr'/'tp_atr' no grid viram níveis por coluna e não são
+        passados para signal_func; sinais repetidos são calculados uma vez.
+        chunk_size limita as colunas simuladas por chamada (memória das
+        matrizes barras x colunas).
+        """
+        names = list(param_grid.keys())
+        params = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+
+        levels = {
+            name: np.array([combo.get(name, kwargs.get(name, default)) for combo in params], dtype=float)
+            for name, default in (('sl_atr', 2.0), ('tp_atr', 3.0))
+        }
+        kwargs = {k: v for k, v in kwargs.items() if k not in LEVEL_PARAMS}
+        kwargs.setdefault('return_equity', False)
+        if kwargs.get('atr') is None:
+            kwargs['atr'] = atr_array(data)
+
+        cache: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+        def signals_for(combo):
+            signal_params = {k: v for k, v in combo.items() if k not in LEVEL_PARAMS}
+            key = tuple(sorted(signal_params.items()))
+            if key not in cache:
+                cache[key] = signal_func(data, **signal_params)
+            return cache[key]
+
+        def stack(chunk, name):
+            values = [signals_for(combo).get(name) for combo in chunk]
+            if any(v is None for v in values):
+                return None
+            # Empilha colunas x barras (contíguo) e entrega a view barras x colunas
+            return np.stack(values).T
+
+        results = []
+        for start in range(0, len(params), chunk_size):
+            chunk = params[start:start + chunk_size]
+            results.append(self.run(
+                data,
+                stack(chunk, 'long_entries'),
+                stack(chunk, 'short_entries'),
+                long_exits=stack(chunk, 'long_exits'),
+                short_exits=stack(chunk, 'short_exits'),
+                sl_atr=levels['sl_atr'][start:start + chunk_size],
+                tp_atr=levels['tp_atr'][start:start + chunk_size],
+                params=chunk,
+                **kwargs
+            ))
+
+        return self._concat(results)
+
+    @staticmethod
+    def _concat(results: List[VectorizedResult]) -> VectorizedResult:
+        """Junta resultados de lotes de colunas (colunas renumeradas)"""
+        if len(results) == 1:
+            return results[0]
+
+        offsets = np.cumsum([0] + [len(r.params) for r in results[:-1]])
+        trades = []
+        for offset, r in zip(offsets, results):
+            chunk_trades = r.trades.copy()
+            chunk_trades['column'] += offset
+            trades.append(chunk_trades)
+
+        metrics = {
+            name: np.concatenate([getattr(r, name) for r in results])
+            for name in ('total_trades', 'winning_trades', 'win_rate', 'gross_profit', 'total_costs',
+                         'net_profit', 'profit_factor', 'max_drawdown', 'sharpe_ratio')
+        }
+        equity = None
+        if all(r.equity is not None for r in results):
+            equity = np.hstack([r.equity for r in results])
+
+        return VectorizedResult(
+            params=[p for r in results for p in r.params],
+            trades=pd.concat(trades, ignore_index=True),
+            equity=equity,
+            **metrics
+        )
+
+    def _bar_times(self, data: pd.DataFrame) -> Optional[np.ndarray]:
+        """Tempo de cada barra em ns desde epoch (None sem tempo)"""
+        if isinstance(data.index, pd.DatetimeIndex):
+            times = data.index
+        elif 'time' in data.columns:
+            times = pd.DatetimeIndex(pd.to_datetime(data['time']))
+        else:
+            return None
+        if times.tz is not None:
+            times = times.tz_convert(None)
+        return times.to_numpy().astype('datetime64[ns]').astype(np.int64)
+
+    def _build_result(
+        self,
+        rounds: List[Dict[str, np.ndarray]],
+        width: int,
+        data: pd.DataFrame,
+        params: Optional[List[Dict[str, Any]]]
+    ) -> VectorizedResult:
+        """Métricas por coluna a partir dos trades de cada rodada"""
+        if rounds:
+            flat = {key: np.concatenate([r[key] for r in rounds]) for key in rounds[0]}
+        else:
+            flat = {key: np.array([], dtype=float) for key in (
+                'column', 'entry_index', 'exit_index', 'is_buy', 'entry_price', 'exit_price',
+                'stop_loss', 'take_profit', 'volume', 'gross_profit', 'costs', 'net_profit',
+                'holding_period', 'reason')}
+            for key in ('column', 'entry_index', 'exit_index', 'holding_period', 'reason'):
+                flat[key] = flat[key].astype(np.int64)
+
+        col = flat['column']
+        net = flat['net_profit']
+        count = np.bincount(col, minlength=width)
+        wins = np.bincount(col, weights=(net > 0).astype(float), minlength=width)
+        win_sum = np.bincount(col, weights=np.where(net > 0, net, 0.0), minlength=width)
+        loss_sum = np.bincount(col, weights=np.where(net < 0, -net, 0.0), minlength=width)
+        net_profit = np.bincount(col, weights=net, minlength=width)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            win_rate = np.where(count > 0, wins / count, 0.0)
+            profit_factor = np.where(loss_sum > 0, win_sum / loss_sum, np.where(win_sum > 0, np.inf, 0.0))
+
+            # Sharpe por trade (mesma fórmula do BacktestEngine: std amostral)
+            returns = net / self.initial_capital
+            mean = np.where(count > 0, np.bincount(col, weights=returns, minlength=width) / count, 0.0)
+            var = np.bincount(col, weights=(returns - mean[col]) ** 2, minlength=width) / (count - 1)
+            std = np.sqrt(var)
+            sharpe = np.where((count > 1) & (std > 0), (mean * 252) / (std * np.sqrt(252)), 0.0)
+
+        # Drawdown sobre a equity trade a trade (rodada k = k-ésimo trade)
+        per_round = np.zeros((len(rounds) + 1, width))
+        for k, r in enumerate(rounds, start=1):
+            per_round[k, r['column']] = r['net_profit']
+        equity = self.initial_capital + np.cumsum(per_round, axis=0)
+        peak = np.maximum.accumulate(equity, axis=0)
+        max_drawdown = ((peak - equity) / peak).max(axis=0)
+
+        times = data.index if isinstance(data.index, pd.DatetimeIndex) else (
+            pd.to_datetime(data['time']).to_numpy() if 'time' in data.columns else None
+        )
+        trades = pd.DataFrame({
+            'column': col,
+            'entry_index': flat['entry_index'],
+            'exit_index': flat['exit_index'],
+            'direction': np.where(flat['is_buy'].astype(bool), 'buy', 'sell'),
+            'entry_price': flat['entry_price'],
+            'exit_price': flat['exit_price'],
+            'stop_loss': flat['stop_loss'],
+            'take_profit': flat['take_profit'],
+            'volume': flat['volume'],
+            'gross_profit': flat['gross_profit'],
+            'costs': flat['costs'],
+            'net_profit': net,
+            'holding_period': flat['holding_period'],
+            'exit_reason': EXIT_REASONS[flat['reason']],
+        })
+        if times is not None:
+            times = np.asarray(times)
+            trades.insert(3, 'entry_time', times[trades['entry_index'].to_numpy()])
+            trades.insert(4, 'exit_time', times[trades['exit_index'].to_numpy()])
+        trades = trades.sort_values(['column', 'entry_index'], kind='stable').reset_index(drop=True)
+
+        return VectorizedResult(
+            params=params or [{} for _ in range(width)],
+            total_trades=count,
+            winning_trades=wins.astype(np.int64),
+            win_rate=win_rate,
+            gross_profit=np.bincount(col, weights=flat['gross_profit'], minlength=width),
+            total_costs=np.bincount(col, weights=flat['costs'], minlength=width),
+            net_profit=net_profit,
+            profit_factor=profit_factor,
+            max_drawdown=max_drawdown,
+            sharpe_ratio=sharpe,
+            trades=trades
+        )
+
+    def _equity_matrix(self, rounds: List[Dict[str, np.ndarray]], close: np.ndarray, width: int) -> np.ndarray:
+        """
+        Equity marcada a mercado por barra (barras x colunas)
+
+        Cada trade contribui side*volume*100*(close - entrada) nas barras
+        [entrada, saída) e o lucro líquido a partir da saída; tudo via
+        vetores de diferenças + cumsum.
+        """
+        n = len(close)
+        slope = np.zeros((n + 1, width))
+        offset = np.zeros((n + 1, width))
+        realized = np.zeros((n + 1, width))
+
+        for r in rounds:
+            col, entry, exit_idx = r['column'], r['entry_index'], r['exit_index']
+            a = np.where(r['is_buy'], 1.0, -1.0) * r['volume'] * 100
+            b = -a * r['entry_price']
+            np.add.at(slope, (entry, col), a)
+            np.add.at(slope, (exit_idx, col), -a)
+            np.add.at(offset, (entry, col), b)
+            np.add.at(offset, (exit_idx, col), -b)
+            np.add.at(realized, (exit_idx, col), r['net_profit'])
+
+        slope = np.cumsum(slope[:n], axis=0)
+        offset = np.cumsum(offset[:n], axis=0)
+        realized = np.cumsum(realized[:n], axis=0)
+        return self.initial_capital + realized + slope * close[:, None] + offset
@@ -11,6 +11,14 @@ Conceito Walk-Forward:
 3. Valida no out-of-sample
 4. Repete movendo a janela
 5. Combina resultados para avaliar robustez
+
+Paralelismo (walk_forward.n_jobs > 1):
+- Cada (janela, bloco de combinacoes) vira uma tarefa em processos (spawn)
+- Os dados sao gravados uma vez em .npy e abertos como memmap em cada worker
+  (nada de pickle do DataFrame por tarefa)
+- A validacao out-of-sample de uma janela sai assim que o grid dela termina
+- Melhor combinacao escolhida na ordem do grid: mesmo resultado do sequencial
+- Progresso / ETA via get_progress() ou progress_callback
 """
 
 import numpy as np
@@ -21,8 +29,14 @@ from datetime import datetime, timedelta
 from enum import Enum
 from loguru import logger
 import json
+import math
+import multiprocessing
 import os
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import itertools
 
 
@@ -73,6 +87,183 @@ class WalkForwardResult:
     created_at: datetime = field(default_factory=datetime.now)
 
 
+@dataclass
+class WalkForwardProgress:
+    """Progresso de uma execucao (1 tarefa = 1 chamada de strategy_func)"""
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    windows_total: int = 0
+    windows_completed: int = 0
+    n_jobs: int = 1
+    elapsed_s: float = 0.0
+    eta_s: Optional[float] = None
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.completed_tasks / self.total_tasks if self.total_tasks else 100.0
+
+
+def trade_metrics(trades: List[Dict]) -> Dict:
+    """Calcula metricas de performance a partir de trades com 'pnl_percent'"""
+    if not trades:
+        return {}
+    
+    returns = [t.get('pnl_percent', 0) for t in trades]
+    
+    total_return = sum(returns)
+    avg_return = np.mean(returns) if returns else 0
+    std_return = np.std(returns) if len(returns) > 1 else 0
+    
+    # Sharpe (anualizado, assumindo trades diarios)
+    sharpe = (avg_return / std_return) * np.sqrt(252) if std_return > 0 else 0
+    
+    # Win rate
+    wins = [r for r in returns if r > 0]
+    win_rate = len(wins) / len(returns) if returns else 0
+    
+    # Max drawdown
+    cumulative = np.cumsum(returns)
+    peak = np.maximum.accumulate(cumulative)
+    drawdown = peak - cumulative
+    max_dd = np.max(drawdown) if len(drawdown) > 0 else 0
+    
+    # Profit factor
+    gross_profit = sum([r for r in returns if r > 0])
+    gross_loss = abs(sum([r for r in returns if r < 0]))
+    profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
+    
+    return {
+        'total_return': total_return,
+        'avg_return': avg_return,
+        'sharpe': sharpe,
+        'win_rate': win_rate,
+        'max_drawdown': max_dd,
+        'profit_factor': profit_factor,
+        'num_trades': len(trades)
+    }
+
+
+def _slice_period(data: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
+    """Barras em [start, end)"""
+    return data[(data.index >= start) & (data.index < end)]
+
+
+def _score_params(strategy_func: Callable, data: pd.DataFrame, params: Dict,
+                  min_trades: int, metric: str) -> Optional[Tuple[float, Dict]]:
+    """(score, metricas) de uma combinacao; None se invalida ou com erro"""
+    try:
+        trades = strategy_func(data, params)
+        
+        if len(trades) < min_trades:
+            return None
+        
+        metrics = trade_metrics(trades)
+        return metrics.get(metric, 0), metrics
+        
+    except Exception as e:
+        logger.debug(f"Erro testando params {params}: {e}")
+        return None
+
+
+def _select_best(scores: Dict[int, Tuple[float, Dict]]) -> Optional[int]:
+    """Indice da melhor combinacao; empate fica com a primeira do grid"""
+    best_index, best_score = None, float('-inf')
+    for index in sorted(scores):
+        if scores[index][0] > best_score:
+            best_index, best_score = index, scores[index][0]
+    return best_index
+
+
+# =============================================================================
+# DADOS COMPARTILHADOS ENTRE PROCESSOS
+# =============================================================================
+
+# DataFrame montado sobre memmaps, um por processo worker
+_SHARED_DATA: Optional[pd.DataFrame] = None
+
+
+def share_frame(data: pd.DataFrame, work_dir: str) -> None:
+    """
+    Grava o DataFrame uma vez para os workers (colunas numericas e de
+    datas em .npy)
+    
+    Colunas de outros tipos (raras em OHLCV) vao num pickle unico.
+    """
+    index = data.index
+    tz = None
+    if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+        tz = str(index.tz)
+        index = index.tz_convert('UTC').tz_localize(None)
+    np.save(os.path.join(work_dir, 'index.npy'), np.asarray(index))
+    
+    columns, others = [], []
+    for i, name in enumerate(data.columns):
+        series = data[name]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufM':
+            np.save(os.path.join(work_dir, f'col_{i}.npy'), series.to_numpy())
+            columns.append([name, f'col_{i}.npy'])
+        else:
+            columns.append([name, None])
+            others.append(name)
+    
+    if others:
+        data[others].reset_index(drop=True).to_pickle(os.path.join(work_dir, 'others.pkl'))
+    
+    with open(os.path.join(work_dir, 'frame.pkl'), 'wb') as f:
+        pickle.dump({'columns': columns, 'tz': tz, 'index_name': data.index.name}, f)
+
+
+def load_shared_frame(work_dir: str) -> pd.DataFrame:
+    """DataFrame sobre os memmaps gravados por share_frame (sem copiar colunas)"""
+    with open(os.path.join(work_dir, 'frame.pkl'), 'rb') as f:
+        meta = pickle.load(f)
+    
+    index = pd.Index(np.load(os.path.join(work_dir, 'index.npy'), mmap_mode='r'),
+                     name=meta['index_name'])
+    if meta['tz']:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    
+    others = None
+    if any(filename is None for _, filename in meta['columns']):
+        others = pd.read_pickle(os.path.join(work_dir, 'others.pkl'))
+    
+    columns = {}
+    for name, filename in meta['columns']:
+        if filename is None:
+            columns[name] = others[name].to_numpy()
+        else:
+            # view ndarray: mesma memoria do memmap
+            columns[name] = np.load(os.path.join(work_dir, filename), mmap_mode='r').view(np.ndarray)
+    
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _attach_shared_frame(work_dir: str) -> None:
+    """Initializer dos workers: abre os dados compartilhados uma vez"""
+    global _SHARED_DATA
+    _SHARED_DATA = load_shared_frame(work_dir)
+
+
+def _grid_chunk_worker(strategy_func: Callable, start: datetime, end: datetime,
+                       combos: List[Tuple[int, Dict]], min_trades: int,
+                       metric: str) -> Dict[int, Tuple[float, Dict]]:
+    """Avalia um bloco de combinacoes no in-sample de uma janela"""
+    in_sample_data = _slice_period(_SHARED_DATA, start, end)
+    scores = {}
+    for index, params in combos:
+        scored = _score_params(strategy_func, in_sample_data, params, min_trades, metric)
+        if scored is not None:
+            scores[index] = scored
+    return scores
+
+
+def _out_sample_worker(strategy_func: Callable, start: datetime, end: datetime,
+                       params: Dict) -> Dict:
+    """Valida os melhores parametros no out-of-sample de uma janela"""
+    return trade_metrics(strategy_func(_slice_period(_SHARED_DATA, start, end), params))
+
+
 class WalkForwardOptimizer:
     """
     Otimizador Walk-Forward
@@ -87,6 +278,7 @@ class WalkForwardOptimizer:
         self.num_windows = self.wf_config.get('num_windows', 5)
         self.min_trades_per_window = self.wf_config.get('min_trades', 30)
         self.optimization_metric = self.wf_config.get('metric', 'sharpe')
+        self.n_jobs = self.wf_config.get('n_jobs', 1)  # -1 = todos os nucleos
         
         # Diretorio para salvar resultados
         self.data_dir = data_dir or 'data/walk_forward'
@@ -94,6 +286,10 @@ class WalkForwardOptimizer:
         
         # Resultados
         self._results: Dict[str, WalkForwardResult] = {}
+        self._progress: Optional[WalkForwardProgress] = None
+        self._progress_callback: Optional[Callable] = None
+        self._progress_active = False
+        self._last_logged_decile = -1
         
         logger.info("WalkForwardOptimizer inicializado")
     
@@ -144,17 +340,9 @@ class WalkForwardOptimizer:
         window.status = WalkForwardStatus.RUNNING
         
         try:
-            # Filtrar dados para in-sample
-            in_sample_data = data[
-                (data.index >= window.in_sample_start) &
-                (data.index < window.in_sample_end)
-            ]
-            
-            # Filtrar dados para out-of-sample
-            out_sample_data = data[
-                (data.index >= window.out_sample_start) &
-                (data.index < window.out_sample_end)
-            ]
+            # Filtrar dados para in-sample e out-of-sample
+            in_sample_data = _slice_period(data, window.in_sample_start, window.in_sample_end)
+            out_sample_data = _slice_period(data, window.out_sample_start, window.out_sample_end)
             
             if len(in_sample_data) < 100 or len(out_sample_data) < 30:
                 logger.warning(f"Janela {window.id}: dados insuficientes")
@@ -162,47 +350,30 @@ class WalkForwardOptimizer:
                 return window
             
             # Grid search no in-sample
-            best_score = float('-inf')
-            best_params = {}
-            
-            # Gerar todas as combinacoes de parametros
             param_combinations = self._generate_param_combinations(param_grid)
+            scores = {}
             
-            for params in param_combinations:
-                try:
-                    # Executar estrategia com esses parametros
-                    trades = strategy_func(in_sample_data, params)
-                    
-                    if len(trades) < self.min_trades_per_window:
-                        continue
-                    
-                    # Calcular metrica de otimizacao
-                    metrics = self._calculate_metrics(trades)
-                    score = metrics.get(self.optimization_metric, 0)
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_params = params
-                        window.in_sample_metrics = metrics
-                        
-                except Exception as e:
-                    logger.debug(f"Erro testando params {params}: {e}")
-                    continue
+            for index, params in enumerate(param_combinations):
+                scored = _score_params(strategy_func, in_sample_data, params,
+                                       self.min_trades_per_window, self.optimization_metric)
+                if scored is not None:
+                    scores[index] = scored
+                self._advance_progress(1)
             
-            if not best_params:
+            best_index = _select_best(scores)
+            if best_index is None:
                 logger.warning(f"Janela {window.id}: nenhum parametro valido encontrado")
                 window.status = WalkForwardStatus.FAILED
                 return window
             
-            window.best_params = best_params
+            window.best_params = param_combinations[best_index]
+            window.in_sample_metrics = scores[best_index][1]
             
             # Validar no out-of-sample
-            out_trades = strategy_func(out_sample_data, best_params)
+            out_trades = strategy_func(out_sample_data, window.best_params)
             window.out_sample_metrics = self._calculate_metrics(out_trades)
             
-            window.status = WalkForwardStatus.COMPLETED
-            
-            logger.info(f"Janela {window.id} completa: IS Sharpe={window.in_sample_metrics.get('sharpe', 0):.2f}, OOS Sharpe={window.out_sample_metrics.get('sharpe', 0):.2f}")
+            self._complete_window(window)
             
         except Exception as e:
             logger.error(f"Erro na janela {window.id}: {e}")
@@ -215,9 +386,16 @@ class WalkForwardOptimizer:
                         strategy_func: Callable,
                         param_grid: Dict,
                         start_date: datetime = None,
-                        end_date: datetime = None) -> WalkForwardResult:
+                        end_date: datetime = None,
+                        n_jobs: int = None,
+                        progress_callback: Callable[[WalkForwardProgress], None] = None) -> WalkForwardResult:
         """
         Executa otimizacao walk-forward completa
+        
+        Args:
+            n_jobs: Processos (None = walk_forward.n_jobs, -1 = todos os nucleos).
+                Com n_jobs > 1, strategy_func precisa ser picklavel (funcao de modulo).
+            progress_callback: Chamado com WalkForwardProgress a cada tarefa concluida
         """
         logger.info(f"Iniciando Walk-Forward para {strategy_name}")
         
@@ -233,9 +411,25 @@ class WalkForwardOptimizer:
             windows=windows
         )
         
+        param_combinations = self._generate_param_combinations(param_grid)
+        n_jobs = self._resolve_n_jobs(n_jobs, strategy_func)
+        self._start_progress(len(windows), len(windows) * (len(param_combinations) + 1),
+                             n_jobs, progress_callback)
+        
         # Otimizar cada janela
-        for window in windows:
-            self.optimize_window(window, data, strategy_func, param_grid)
+        try:
+            if n_jobs > 1:
+                self._optimize_windows_parallel(windows, data, strategy_func, param_combinations, n_jobs)
+            else:
+                tasks_per_window = len(param_combinations) + 1
+                for number, window in enumerate(windows, 1):
+                    self.optimize_window(window, data, strategy_func, param_grid)
+                    # Fecha as tarefas puladas (dados insuficientes, erro, OOS)
+                    self._advance_progress(
+                        number * tasks_per_window - self._progress.completed_tasks, windows=1
+                    )
+        finally:
+            self._progress_active = False
         
         # Calcular metricas agregadas
         self._calculate_aggregate_metrics(result)
@@ -248,6 +442,173 @@ class WalkForwardOptimizer:
         
         return result
     
+    def _resolve_n_jobs(self, n_jobs: Optional[int], strategy_func: Callable) -> int:
+        """Numero de processos efetivo (1 se strategy_func nao for picklavel)"""
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        if n_jobs is None or n_jobs <= 0:
+            n_jobs = os.cpu_count() or 1
+        
+        if n_jobs > 1:
+            try:
+                pickle.dumps(strategy_func)
+            except Exception as e:
+                logger.warning(f"strategy_func nao picklavel ({e}); walk-forward sequencial")
+                return 1
+        
+        return n_jobs
+    
+    def _optimize_windows_parallel(self, windows: List[OptimizationWindow],
+                                   data: pd.DataFrame,
+                                   strategy_func: Callable,
+                                   param_combinations: List[Dict],
+                                   n_jobs: int):
+        """
+        Grid de todas as janelas em processos
+        
+        Tarefas = (janela, bloco de combinacoes). Quando o grid de uma janela
+        termina, a validacao out-of-sample dela entra na fila.
+        """
+        tasks_per_window = len(param_combinations) + 1
+        
+        # Janelas sem dados suficientes nao viram tarefas
+        active = []
+        for window in windows:
+            in_sample_size = int(((data.index >= window.in_sample_start) &
+                                  (data.index < window.in_sample_end)).sum())
+            out_sample_size = int(((data.index >= window.out_sample_start) &
+                                   (data.index < window.out_sample_end)).sum())
+            if in_sample_size < 100 or out_sample_size < 30:
+                logger.warning(f"Janela {window.id}: dados insuficientes")
+                window.status = WalkForwardStatus.FAILED
+                self._advance_progress(tasks_per_window, windows=1)
+            else:
+                active.append(window)
+        
+        if not active or not param_combinations:
+            for window in active:
+                logger.warning(f"Janela {window.id}: nenhum parametro valido encontrado")
+                window.status = WalkForwardStatus.FAILED
+                self._advance_progress(tasks_per_window, windows=1)
+            return
+        
+        # ~4 tarefas por processo para equilibrar a carga
+        chunk_size = max(1, math.ceil(len(active) * len(param_combinations) / (n_jobs * 4)))
+        indexed = list(enumerate(param_combinations))
+        chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+        
+        work_dir = tempfile.mkdtemp(prefix='urion_walk_forward_')
+        try:
+            # Dados compartilhados: gravados uma vez, memmap nos workers
+            share_frame(data, work_dir)
+            
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_attach_shared_frame,
+                                     initargs=(work_dir,)) as pool:
+                pending = {}
+                scores = {window.id: {} for window in active}
+                remaining = {window.id: len(chunks) for window in active}
+                
+                for window in active:
+                    window.status = WalkForwardStatus.RUNNING
+                    for chunk in chunks:
+                        future = pool.submit(_grid_chunk_worker, strategy_func,
+                                             window.in_sample_start, window.in_sample_end,
+                                             chunk, self.min_trades_per_window,
+                                             self.optimization_metric)
+                        pending[future] = ('grid', window, len(chunk))
+                
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, window, size = pending.pop(future)
+                        
+                        if kind == 'grid':
+                            try:
+                                scores[window.id].update(future.result())
+                            except Exception as e:
+                                logger.error(f"Erro no grid da janela {window.id}: {e}")
+                            self._advance_progress(size)
+                            
+                            remaining[window.id] -= 1
+                            if remaining[window.id]:
+                                continue
+                            
+                            best_index = _select_best(scores[window.id])
+                            if best_index is None:
+                                logger.warning(f"Janela {window.id}: nenhum parametro valido encontrado")
+                                window.status = WalkForwardStatus.FAILED
+                                self._advance_progress(1, windows=1)
+                                continue
+                            
+                            window.best_params = param_combinations[best_index]
+                            window.in_sample_metrics = scores[window.id][best_index][1]
+                            
+                            # Validar no out-of-sample
+                            future = pool.submit(_out_sample_worker, strategy_func,
+                                                 window.out_sample_start, window.out_sample_end,
+                                                 window.best_params)
+                            pending[future] = ('oos', window, 1)
+                        else:
+                            try:
+                                window.out_sample_metrics = future.result()
+                                self._complete_window(window)
+                            except Exception as e:
+                                logger.error(f"Erro na janela {window.id}: {e}")
+                                window.status = WalkForwardStatus.FAILED
+                            self._advance_progress(1, windows=1)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _complete_window(self, window: OptimizationWindow):
+        """Marca a janela como concluida"""
+        window.status = WalkForwardStatus.COMPLETED
+        
+        logger.info(f"Janela {window.id} completa: IS Sharpe={window.in_sample_metrics.get('sharpe', 0):.2f}, OOS Sharpe={window.out_sample_metrics.get('sharpe', 0):.2f}")
+    
+    # =========================================================================
+    # PROGRESSO
+    # =========================================================================
+    
+    def _start_progress(self, windows_total: int, total_tasks: int, n_jobs: int,
+                        callback: Optional[Callable]):
+        self._progress = WalkForwardProgress(
+            total_tasks=total_tasks, windows_total=windows_total, n_jobs=n_jobs
+        )
+        self._progress_callback = callback
+        self._progress_active = True
+        self._last_logged_decile = -1
+    
+    def _advance_progress(self, tasks: int, windows: int = 0):
+        """Soma tarefas (e janelas) concluidas, atualiza ETA e notifica"""
+        progress = self._progress
+        if not self._progress_active or (tasks <= 0 and not windows):
+            return
+        
+        progress.completed_tasks = min(progress.completed_tasks + tasks, progress.total_tasks)
+        progress.windows_completed += windows
+        progress.elapsed_s = time.time() - progress.started_at
+        remaining = progress.total_tasks - progress.completed_tasks
+        progress.eta_s = (progress.elapsed_s / progress.completed_tasks * remaining
+                          if progress.completed_tasks else None)
+        
+        decile = int(progress.percent // 10)
+        if decile > self._last_logged_decile and progress.eta_s is not None:
+            self._last_logged_decile = decile
+            logger.info(f"Walk-Forward: {progress.percent:.0f}% "
+                        f"({progress.completed_tasks}/{progress.total_tasks}), "
+                        f"ETA {progress.eta_s:.0f}s")
+        
+        if self._progress_callback is not None:
+            try:
+                self._progress_callback(progress)
+            except Exception as e:
+                logger.debug(f"Erro no progress_callback: {e}")
+    
+    def get_progress(self) -> Optional[WalkForwardProgress]:
+        """Progresso da execucao atual (ou da ultima)"""
+        return self._progress
+    
     def _generate_param_combinations(self, param_grid: Dict) -> List[Dict]:
         """Gera todas as combinacoes de parametros"""
         keys = param_grid.keys()
@@ -261,42 +622,7 @@ class WalkForwardOptimizer:
     
     def _calculate_metrics(self, trades: List[Dict]) -> Dict:
         """Calcula metricas de performance"""
-        if not trades:
-            return {}
-        
-        returns = [t.get('pnl_percent', 0) for t in trades]
-        
-        total_return = sum(returns)
-        avg_return = np.mean(returns) if returns else 0
-        std_return = np.std(returns) if len(returns) > 1 else 0
-        
-        # Sharpe (anualizado, assumindo trades diarios)
-        sharpe = (avg_return / std_return) * np.sqrt(252) if std_return > 0 else 0
-        
-        # Win rate
-        wins = [r for r in returns if r > 0]
-        win_rate = len(wins) / len(returns) if returns else 0
-        
-        # Max drawdown
-        cumulative = np.cumsum(returns)
-        peak = np.maximum.accumulate(cumulative)
-        drawdown = peak - cumulative
-        max_dd = np.max(drawdown) if len(drawdown) > 0 else 0
-        
-        # Profit factor
-        gross_profit = sum([r for r in returns if r > 0])
-        gross_loss = abs(sum([r for r in returns if r < 0]))
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-        
-        return {
-            'total_return': total_return,
-            'avg_return': avg_return,
-            'sharpe': sharpe,
-            'win_rate': win_rate,
-            'max_drawdown': max_dd,
-            'profit_factor': profit_factor,
-            'num_trades': len(trades)
-        }
+        return trade_metrics(trades)
     
     def _calculate_aggregate_metrics(self, result: WalkForwardResult):
         """Calcula metricas agregadas do walk-forward"""
@@ -0,0 +1,237 @@
+"""
+Rolling Bar Store
+Buffer circular de barras OHLCV por (símbolo, timeframe) atualizado incrementalmente
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+# Campos retornados por copy_rates_* (mesma ordem/dtypes do MetaTrader5)
+RATES_FIELDS = (
+    ('time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('tick_volume', np.uint64),
+    ('spread', np.int32),
+    ('real_volume', np.uint64),
+)
+
+# Folga somada ao "agora" em copy_rates_range: o horário do servidor tem offset
+# desconhecido (horas inteiras) em relação ao UTC
+RANGE_END_MARGIN_SECONDS = 2 * 86400
+
+
+class RollingBarStore:
+    """
+    Barras de um (símbolo, timeframe) em buffers numpy pré-alocados
+
+    - Carga inicial via copy_rates_from_pos (capacity barras)
+    - Atualizações pedem apenas as barras a partir do último timestamp armazenado
+      (copy_rates_range), re-lendo a barra em formação e anexando as novas
+    - Buffers espelhados (2 x capacity): as últimas N barras são sempre uma fatia
+      contígua, expostas como views sem cópia
+    """
+
+    def __init__(self, mt5_module, symbol: str, timeframe: int, capacity: int = 1000,
+                 clock=time.time):
+        """
+        Inicializa o store
+
+        Args:
+            mt5_module: Módulo MetaTrader5 (ou fake com a mesma API)
+            symbol: Símbolo
+            timeframe: Constante de timeframe MT5
+            capacity: Número máximo de barras mantidas
+            clock: Fonte de tempo epoch (limite superior do copy_rates_range)
+        """
+        self.mt5 = mt5_module
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self._clock = clock
+
+        self._buffers = {name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in RATES_FIELDS}
+        self._head = 0   # próxima posição de escrita em [0, capacity)
+        self._size = 0
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'updates': 0,
+            'ipc_calls': 0,
+            'bars_fetched': 0,
+            'bars_appended': 0,
+            'reloads': 0,
+            'failures': 0
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock do store (segurar enquanto usar views de view())"""
+        return self._lock
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Timestamp (epoch do servidor) da última barra armazenada"""
+        if self._size == 0:
+            return None
+        return int(self._buffers['time'][self._head + self.capacity - 1])
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _load(self, rates: np.ndarray):
+        """Substitui todo o conteúdo pelas últimas capacity barras de rates"""
+        rates = rates[-self.capacity:]
+        n = len(rates)
+        cap = self.capacity
+        for name, _ in RATES_FIELDS:
+            buf = self._buffers[name]
+            buf[:n] = rates[name]
+            buf[cap:cap + n] = rates[name]
+        self._head = n % cap
+        self._size = n
+
+    def _append(self, rates: np.ndarray):
+        """Anexa barras novas (len(rates) < capacity)"""
+        cap = self.capacity
+        positions = (self._head + np.arange(len(rates))) % cap
+        for name, _ in RATES_FIELDS:
+            buf = self._buffers[name]
+            buf[positions] = rates[name]
+            buf[positions + cap] = rates[name]
+        self._head = (self._head + len(rates)) % cap
+        self._size = min(self._size + len(rates), cap)
+
+    def _overwrite_last(self, rate):
+        """Atualiza a barra em formação com os valores mais recentes"""
+        last = (self._head - 1) % self.capacity
+        for name, _ in RATES_FIELDS:
+            buf = self._buffers[name]
+            buf[last] = rate[name]
+            buf[last + self.capacity] = rate[name]
+
+    def _fetch(self, method: str, *args) -> Optional[np.ndarray]:
+        self.stats['ipc_calls'] += 1
+        rates = getattr(self.mt5, method)(self.symbol, self.timeframe, *args)
+        if rates is None or len(rates) == 0:
+            return None
+        self.stats['bars_fetched'] += len(rates)
+        return rates
+
+    def _reload(self) -> bool:
+        rates = self._fetch('copy_rates_from_pos', 0, self.capacity)
+        if rates is None:
+            return False
+        self._load(rates)
+        self.stats['reloads'] += 1
+        return True
+
+    def update(self) -> bool:
+        """
+        Sincroniza com o terminal buscando apenas barras novas
+
+        Returns:
+            True se o store contém dados atualizados
+        """
+        with self._lock:
+            self.stats['updates'] += 1
+            last_time = self.last_time
+
+            if last_time is None:
+                ok = self._reload()
+            else:
+                date_to = max(self._clock(), last_time) + RANGE_END_MARGIN_SECONDS
+                rates = self._fetch('copy_rates_range', last_time, int(date_to))
+
+                if rates is None or int(rates['time'][0]) != last_time:
+                    # Barra armazenada sumiu do histórico do servidor (ou falha na
+                    # consulta por intervalo): recarregar tudo
+                    ok = self._reload()
+                elif len(rates) > self.capacity:
+                    self._load(rates)
+                    self.stats['bars_appended'] += len(rates) - 1
+                    ok = True
+                else:
+                    self._overwrite_last(rates[0])
+                    if len(rates) > 1:
+                        self._append(rates[1:])
+                        self.stats['bars_appended'] += len(rates) - 1
+                    ok = True
+
+            if not ok:
+                self.stats['failures'] += 1
+                logger.error(
+                    f"RollingBarStore {self.symbol}/{self.timeframe}: "
+                    f"falha ao obter barras: {self.mt5.last_error()}"
+                )
+            return ok
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def view(self, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Views somente leitura (sem cópia) das últimas barras
+
+        As views apontam para o buffer interno: são válidas até o próximo update()
+        (segure store.lock se outra thread puder atualizar o store).
+
+        Args:
+            count: Número de barras (None = todas)
+
+        Returns:
+            Dict campo -> array numpy (mais antiga primeiro)
+        """
+        with self._lock:
+            n = self._size if count is None else min(count, self._size)
+            end = self._head + self.capacity
+            views = {}
+            for name, _ in RATES_FIELDS:
+                v = self._buffers[name][end - n:end]
+                v.flags.writeable = False
+                views[name] = v
+            return views
+
+    def to_frame(self, count: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        DataFrame das últimas barras (mesmo formato de MT5Connector.get_rates)
+
+        Copia os dados: o DataFrame continua válido após novos updates.
+
+        Args:
+            count: Número de barras (None = todas)
+
+        Returns:
+            DataFrame indexado por 'time' ou None se vazio
+        """
+        with self._lock:
+            if self._size == 0:
+                return None
+            views = self.view(count)
+            index = pd.DatetimeIndex(views['time'].astype('datetime64[s]'), name='time')
+            return pd.DataFrame(
+                {name: views[name].copy() for name, _ in RATES_FIELDS[1:]},
+                index=index,
+                copy=False
+            )
+
+    def get_stats(self) -> Dict:
+        """Contadores de chamadas IPC e barras transferidas"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = self._size
+            stats['capacity'] = self.capacity
+        return stats
@@ -0,0 +1,325 @@
+"""
+Executor Scheduler
+Agendador central que despacha os ciclos das estratégias num pool limitado de workers
+(substitui uma thread dormindo por estratégia x símbolo)
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from core.watchdog import ThreadWatchdog
+from analysis.analysis_snapshot import TIMEFRAME_SECONDS
+
+
+class _Job:
+    """Estado de agendamento de um executor"""
+
+    __slots__ = ('executor', 'trigger', 'timeframe', 'next_due', 'active', 'executing',
+                 'last_heartbeat', 'runs', 'errors', 'last_duration', 'entry', 'removed')
+
+    def __init__(self, executor, trigger: str, timeframe: Optional[str]):
+        self.executor = executor
+        self.trigger = trigger
+        self.timeframe = timeframe
+        self.next_due = 0.0
+        self.active = False          # Na fila ou executando
+        self.executing = False       # Ciclo em andamento num worker
+        self.last_heartbeat = 0.0
+        self.runs = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self.entry = None            # Sequência da entrada viva no heap
+        self.removed = False         # remove() chamado (sai após o ciclo em andamento)
+
+
+class ExecutorScheduler:
+    """
+    Agendador orientado a eventos para StrategyExecutor
+
+    - Uma thread de agendamento + pool com max_workers threads para todos os executores
+    - Gatilhos: 'interval' (cycle_seconds após o fim do ciclo anterior, como o loop
+      original) ou 'bar_close' (fechamento de cada barra do timeframe da estratégia)
+    - Um executor nunca roda dois ciclos ao mesmo tempo
+    - Heartbeat no watchdog enquanto o executor aguarda (mesmo nome e intervalo do
+      loop original); durante o ciclo o próprio executor envia heartbeats
+    - Métricas: profundidade da fila, executando, atraso de agendamento (lag)
+    """
+
+    def __init__(self, max_workers: int = 4, watchdog: Optional[ThreadWatchdog] = None,
+                 heartbeat_seconds: float = 60.0, bar_close_delay_seconds: float = 2.0,
+                 bar_close_offset_seconds: float = 0.0, error_retry_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Inicializa o agendador
+
+        Args:
+            max_workers: Máximo de ciclos de estratégia simultâneos
+            watchdog: ThreadWatchdog (opcional)
+            heartbeat_seconds: Intervalo de heartbeat dos executores ociosos
+            bar_close_delay_seconds: Espera após o fechamento da barra (servidor publicar)
+            bar_close_offset_seconds: Offset das fronteiras de barra (fuso do servidor)
+            error_retry_seconds: Espera antes de repetir um ciclo que falhou
+            clock: Fonte de tempo epoch (injetável para testes)
+        """
+        self.max_workers = max_workers
+        self.watchdog = watchdog
+        self.heartbeat_seconds = heartbeat_seconds
+        self.bar_close_delay_seconds = bar_close_delay_seconds
+        self.bar_close_offset_seconds = bar_close_offset_seconds
+        self.error_retry_seconds = error_retry_seconds
+        self._clock = clock
+
+        self._jobs: List[_Job] = []
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self.stats = {
+            'dispatched': 0,
+            'completed': 0,
+            'errors': 0,
+            'queued': 0,
+            'running': 0,
+            'queue_depth_max': 0,
+            'lag_ms_total': 0.0,
+            'lag_ms_max': 0.0,
+            'lag_ms_last': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Agendamento
+    # ------------------------------------------------------------------
+
+    def next_bar_close(self, timeframe: str, now: float) -> float:
+        """Próximo fechamento de barra do timeframe (+ atraso de publicação)"""
+        step = TIMEFRAME_SECONDS.get(timeframe, 300)
+        offset = self.bar_close_offset_seconds
+        boundary = (int((now - offset) // step) + 1) * step + offset
+        return boundary + self.bar_close_delay_seconds
+
+    def _next_due(self, job: _Job, now: float) -> float:
+        if job.trigger == 'bar_close':
+            return self.next_bar_close(job.timeframe, now)
+        return now + job.executor.cycle_seconds
+
+    def _push(self, job: _Job):
+        """Agenda job (chamar com self._cond); entradas anteriores do job ficam mortas"""
+        job.entry = next(self._seq)
+        heapq.heappush(self._heap, (job.next_due, job.entry, job))
+        self._cond.notify()
+
+    def _find(self, executor) -> Optional[_Job]:
+        """Job registrado para o executor (chamar com self._cond)"""
+        for job in self._jobs:
+            if job.executor is executor:
+                return job
+        return None
+
+    def add(self, executor, trigger: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Registra um executor (registrar de novo reaproveita o job existente)
+
+        Args:
+            executor: StrategyExecutor (usa run_cycle, cycle_seconds, running e watchdog_name)
+            trigger: 'interval' ou 'bar_close' (None = executor.trigger)
+            timeframe: Timeframe do gatilho bar_close (None = executor.trigger_timeframe)
+        """
+        trigger = trigger or getattr(executor, 'trigger', 'interval')
+        timeframe = timeframe or getattr(executor, 'trigger_timeframe', 'M5')
+        if trigger not in ('interval', 'bar_close'):
+            logger.warning(f"Gatilho desconhecido '{trigger}' para {executor.watchdog_name}, usando interval")
+            trigger = 'interval'
+
+        now = self._clock()
+
+        if self.watchdog:
+            self.watchdog.register_thread(
+                executor.watchdog_name,
+                callback=lambda: logger.error(f"🚨 FREEZE DETECTADO em {executor.strategy_name}!")
+            )
+
+        with self._cond:
+            job = self._find(executor)
+            if job is None:
+                job = _Job(executor, trigger, timeframe)
+                self._jobs.append(job)
+            job.trigger = trigger
+            job.timeframe = timeframe
+            job.removed = False
+            # Primeiro ciclo imediato (como o loop original)
+            job.next_due = now
+            job.last_heartbeat = now
+            # Ciclo ainda em andamento (stop + start rápido): reagenda ao terminar
+            if not job.active:
+                self._push(job)
+
+    def remove(self, executor):
+        """
+        Remove um executor do agendamento
+
+        A entrada no heap é descartada; um ciclo em andamento termina
+        normalmente e o job sai da lista ao final dele.
+        """
+        with self._cond:
+            job = self._find(executor)
+            if job is None:
+                return
+            job.removed = True
+            job.entry = None
+            if not job.active:
+                self._jobs.remove(job)
+
+    def start(self):
+        """Inicia a thread de agendamento e o pool de workers"""
+        if self.running:
+            logger.warning("ExecutorScheduler já está rodando")
+            return
+
+        self.running = True
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='StrategyWorker')
+        if self.watchdog:
+            self.watchdog.register_thread('ExecutorScheduler')
+        self._thread = threading.Thread(target=self._loop, name='ExecutorScheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"ExecutorScheduler iniciado: {len(self._jobs)} executores, {self.max_workers} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """Para o agendamento (ciclos em andamento terminam normalmente)"""
+        if not self.running:
+            return
+
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("ExecutorScheduler parado")
+
+    def _loop(self):
+        """Thread de agendamento: despacha jobs vencidos e envia heartbeats"""
+        while True:
+            with self._cond:
+                if not self.running:
+                    return
+
+                now = self._clock()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    _, entry, job = heapq.heappop(self._heap)
+                    if entry != job.entry or job.removed:
+                        continue
+                    if job.executor.running and not job.active:
+                        job.active = True
+                        due.append(job)
+
+                self._heartbeat_idle(now)
+
+                wait = self.heartbeat_seconds
+                if self._heap:
+                    wait = min(wait, max(0.0, self._heap[0][0] - now))
+
+                for job in due:
+                    self._dispatch(job, now)
+
+                if not due:
+                    self._cond.wait(timeout=wait)
+
+    def _heartbeat_idle(self, now: float):
+        """Heartbeat dos executores aguardando (chamar com self._cond)"""
+        if not self.watchdog:
+            return
+        self.watchdog.heartbeat('ExecutorScheduler')
+        for job in self._jobs:
+            # Em execução: o próprio ciclo envia heartbeats (freeze continua detectável)
+            if job.executing or not job.executor.running:
+                continue
+            if now - job.last_heartbeat >= self.heartbeat_seconds:
+                job.last_heartbeat = now
+                self.watchdog.heartbeat(job.executor.watchdog_name)
+
+    def _dispatch(self, job: _Job, now: float):
+        """Envia job ao pool (chamar com self._cond)"""
+        scheduled = job.next_due
+        self.stats['dispatched'] += 1
+        self.stats['queued'] += 1
+        self.stats['queue_depth_max'] = max(self.stats['queue_depth_max'], self.stats['queued'])
+        self._pool.submit(self._run_job, job, scheduled)
+
+    def _run_job(self, job: _Job, scheduled: float):
+        """Executa um ciclo no worker e reagenda"""
+        start = self._clock()
+        lag_ms = max(0.0, start - scheduled) * 1000
+        with self._cond:
+            self.stats['queued'] -= 1
+            self.stats['running'] += 1
+            self.stats['lag_ms_total'] += lag_ms
+            self.stats['lag_ms_max'] = max(self.stats['lag_ms_max'], lag_ms)
+            self.stats['lag_ms_last'] = lag_ms
+            job.executing = True
+
+        ok = False
+        try:
+            ok = job.executor.run_cycle()
+        except Exception as e:
+            logger.exception(f"[{job.executor.strategy_name}] ERRO no ciclo agendado: {e}")
+        finally:
+            end = self._clock()
+            with self._cond:
+                self.stats['running'] -= 1
+                self.stats['completed'] += 1
+                job.runs += 1
+                job.last_duration = end - start
+                job.last_heartbeat = end
+                job.executing = False
+                if ok is False:
+                    job.errors += 1
+                    self.stats['errors'] += 1
+                    job.next_due = end + self.error_retry_seconds
+                else:
+                    job.next_due = self._next_due(job, end)
+                job.active = False
+                if job.removed:
+                    self._jobs.remove(job)
+                elif self.running and job.executor.running:
+                    self._push(job)
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict:
+        """Profundidade da fila, execuções e atraso de agendamento"""
+        with self._cond:
+            stats = dict(self.stats)
+            now = self._clock()
+            stats['executors'] = sum(1 for job in self._jobs if not job.removed)
+            stats['max_workers'] = self.max_workers
+            # Atraso atual: jobs vencidos que ainda não começaram
+            overdue = [now - j.next_due for j in self._jobs
+                       if j.executor.running and not j.active and j.next_due < now]
+            stats['overdue'] = len(overdue)
+            stats['overdue_ms_max'] = max(overdue) * 1000 if overdue else 0.0
+            stats['jobs'] = {
+                job.executor.watchdog_name + f"@{getattr(job.executor, 'symbol', '')}": {
+                    'trigger': job.trigger,
+                    'next_due_in': job.next_due - now,
+                    'runs': job.runs,
+                    'errors': job.errors,
+                    'last_duration_s': job.last_duration
+                }
+                for job in self._jobs if not job.removed
+            }
+        started = stats['completed'] + stats['running']
+        stats['lag_ms_avg'] = stats['lag_ms_total'] / started if started else 0.0
+        return stats
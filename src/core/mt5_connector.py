@@ -9,13 +9,19 @@ from datetime import datetime
 from typing import Optional, Dict, List, Any, Callable
 import pandas as pd
 from loguru import logger
-from .retry_handler import retry_on_error, MT5ConnectionError, MT5TradeError
+from .retry_handler import retry_on_error, MT5ConnectionError, MT5TradeError, MT5TimeoutError
+from .mt5_io import get_mt5_io_worker
+from .bar_store import RollingBarStore
+from .position_snapshot import PositionSnapshot, get_position_snapshot_service
+from .symbol_cache import SymbolInfoCache
 
 
 def with_timeout(func: Callable, timeout_seconds: float = 5.0, default=None):
     """
     Executa função com timeout para evitar travamentos do MT5
     
+    A chamada roda no worker persistente de I/O do MT5 (sem criar thread por chamada).
+    
     Args:
         func: Função a executar
         timeout_seconds: Timeout em segundos
@@ -24,25 +30,14 @@ def with_timeout(func: Callable, timeout_seconds: float = 5.0, default=None):
     Returns:
         Resultado da função ou default se timeout
     """
-    result = [default]
-    
-    def target():
-        try:
-            result[0] = func()
-        except Exception as e:
-            logger.error(f"Erro em with_timeout: {e}")
-            result[0] = default
-    
-    thread = threading.Thread(target=target)
-    thread.daemon = True
-    thread.start()
-    thread.join(timeout=timeout_seconds)
-    
-    if thread.is_alive():
-        logger.warning(f"Timeout ({timeout_seconds}s) na chamada MT5: {func.__name__ if hasattr(func, '__name__') else 'unknown'}")
+    try:
+        return get_mt5_io_worker().call(func, timeout=timeout_seconds)
+    except MT5TimeoutError as e:
+        logger.warning(str(e))
+        return default
+    except Exception as e:
+        logger.error(f"Erro em with_timeout: {e}")
         return default
-    
-    return result[0]
 
 
 class MT5Connector:
@@ -66,6 +61,59 @@ class MT5Connector:
         self.connected = False
         self.reconnect_attempts = 0
         
+        # Todas as chamadas ao terminal passam pelo worker de I/O (thread única, com prazos)
+        self.io = get_mt5_io_worker(config)
+        self.order_timeout_seconds = self.mt5_config.get('order_timeout_seconds', 30.0)
+        
+        # Buffers de barras por (símbolo, timeframe): get_rates busca só barras novas
+        self.incremental_rates = self.mt5_config.get('incremental_rates', True)
+        self.bar_store_capacity = self.mt5_config.get('bar_store_capacity', 1000)
+        self._bar_stores: Dict[tuple, RollingBarStore] = {}
+        self._bar_stores_lock = threading.Lock()
+        
+        # Contrato do símbolo (TTL longo) separado da cotação (snapshot curto)
+        cache_config = self.mt5_config.get('symbol_cache', {})
+        self.symbol_cache = SymbolInfoCache(
+            self._fetch_symbol_info,
+            self._fetch_symbol_tick,
+            static_ttl_seconds=cache_config.get('static_ttl_seconds', 3600.0),
+            quote_ttl_seconds=cache_config.get('quote_ttl_seconds', 0.25)
+        )
+        
+        # Snapshot de posições compartilhado por todos os consumidores do processo
+        self.position_snapshots = get_position_snapshot_service(config, fetch=self._fetch_positions)
+    
+    def _mt5(self, name: str, *args, **kwargs):
+        """
+        Executa mt5.<name>(*args, **kwargs) no worker de I/O do MT5
+        
+        Prazo: mt5.io_timeout_seconds (order_send: mt5.order_timeout_seconds)
+        
+        Raises:
+            MT5TimeoutError: Prazo vencido
+        """
+        timeout = self.order_timeout_seconds if name == 'order_send' else None
+        return self.io.call(getattr(mt5, name), args, kwargs, timeout=timeout, label=name)
+    
+    def _order_send(self, request: Dict[str, Any]):
+        """
+        order_send no worker de I/O; invalida o snapshot de posições mesmo em
+        timeout (a ordem pode ter sido executada no terminal)
+        """
+        try:
+            return self._mt5('order_send', request)
+        finally:
+            self.position_snapshots.invalidate()
+    
+    def _mt5_connect_call(self, name: str, *args, **kwargs):
+        """initialize/login no worker de I/O (prazo = timeout do terminal + folga)"""
+        return self.io.call(getattr(mt5, name), args, kwargs,
+                            timeout=self.timeout / 1000 + 5, label=name)
+    
+    def get_io_stats(self) -> Dict:
+        """Fila, timeouts e histogramas de latência por função MT5"""
+        return self.io.get_stats()
+        
     @retry_on_error(
         max_attempts=3,
         delay=2.0,
@@ -87,29 +135,29 @@ class MT5Connector:
             
             # Initialize MT5
             if self.path:
-                if not mt5.initialize(path=self.path, timeout=self.timeout):
-                    error = mt5.last_error()
+                if not self._mt5_connect_call('initialize', path=self.path, timeout=self.timeout):
+                    error = self._mt5('last_error')
                     logger.error(f"MT5 initialize() failed: {error}")
                     raise MT5ConnectionError(f"Initialize failed: {error}")
             else:
-                if not mt5.initialize(timeout=self.timeout):
-                    error = mt5.last_error()
+                if not self._mt5_connect_call('initialize', timeout=self.timeout):
+                    error = self._mt5('last_error')
                     logger.error(f"MT5 initialize() failed: {error}")
                     raise MT5ConnectionError(f"Initialize failed: {error}")
             
             logger.info("MT5 initialized successfully")
             
             # Login to account
-            if not mt5.login(self.login, password=self.password, server=self.server):
-                error = mt5.last_error()
+            if not self._mt5_connect_call('login', self.login, password=self.password, server=self.server):
+                error = self._mt5('last_error')
                 logger.error(f"MT5 login failed: {error}")
-                mt5.shutdown()
+                self._mt5('shutdown')
                 raise MT5ConnectionError(f"Login failed: {error}")
             
             logger.info(f"Logged in to account {self.login} on server {self.server}")
             
             # Verify connection
-            account_info = mt5.account_info()
+            account_info = self._mt5('account_info')
             if account_info is None:
                 logger.error("Failed to get account info")
                 raise MT5ConnectionError("Failed to get account info")
@@ -117,6 +165,9 @@ class MT5Connector:
             self.connected = True
             self.reconnect_attempts = 0
             
+            # Nova sessão: recarregar contratos dos símbolos
+            self.symbol_cache.invalidate_static()
+            
             logger.info(f"Account Balance: {account_info.balance} {account_info.currency}")
             logger.info(f"Account Leverage: 1:{account_info.leverage}")
             logger.info(f"Account Company: {account_info.company}")
@@ -134,7 +185,7 @@ class MT5Connector:
         """Disconnect from MetaTrader 5"""
         try:
             if self.connected:
-                mt5.shutdown()
+                self._mt5('shutdown')
                 self.connected = False
                 logger.info("Disconnected from MetaTrader 5")
         except Exception as e:
@@ -150,9 +201,12 @@ class MT5Connector:
         if not self.connected:
             return False
         
-        # Usar timeout para evitar travamentos
-        terminal_info = with_timeout(mt5.terminal_info, timeout_seconds=5.0, default=None)
-        return terminal_info is not None
+        # Prazo do worker de I/O evita travamentos
+        try:
+            return self._mt5('terminal_info') is not None
+        except Exception as e:
+            logger.warning(f"terminal_info falhou: {e}")
+            return False
     
     def reconnect(self) -> bool:
         """
@@ -185,7 +239,7 @@ class MT5Connector:
         
         # Verify connection is still active
         try:
-            account_info = mt5.account_info()
+            account_info = self._mt5('account_info')
             if account_info is None:
                 logger.warning("Connection lost, attempting reconnection...")
                 return self.reconnect()
@@ -205,9 +259,9 @@ class MT5Connector:
             return None
         
         try:
-            account_info = mt5.account_info()
+            account_info = self._mt5('account_info')
             if account_info is None:
-                logger.error(f"Failed to get account info: {mt5.last_error()}")
+                logger.error(f"Failed to get account info: {self._mt5('last_error')}")
                 return None
             
             return {
@@ -227,48 +281,54 @@ class MT5Connector:
             logger.exception(f"Error getting account info: {e}")
             return None
     
-    def get_symbol_info(self, symbol: str) -> Optional[Dict]:
+    def get_symbol_info(self, symbol: str, max_quote_age: Optional[float] = None,
+                        static_only: bool = False) -> Optional[Dict]:
         """
         Get symbol information
         
+        Campos de contrato vêm do SymbolInfoCache (symbol_info uma vez por
+        static_ttl_seconds); bid/ask/spread de um tick com idade <= max_quote_age.
+        
         Args:
             symbol: Symbol name (e.g., 'XAUUSD')
+            max_quote_age: Idade máxima da cotação em segundos (None = quote_ttl_seconds)
+            static_only: Só precisa de point/digits/volumes (não consulta tick)
             
         Returns:
             Dictionary with symbol info or None
         """
-        if not self.ensure_connection():
+        if not self.connected and not self.ensure_connection():
             return None
         
         try:
-            symbol_info = mt5.symbol_info(symbol)
-            if symbol_info is None:
-                logger.error(f"Failed to get symbol info for {symbol}: {mt5.last_error()}")
-                return None
-            
-            # Calcular spread em pips (para XAUUSD: 1 pip = 10 pontos = 0.10)
-            spread_points = symbol_info.spread
-            spread_pips = (symbol_info.ask - symbol_info.bid) / symbol_info.point / 10
-            
-            return {
-                'name': symbol_info.name,
-                'bid': symbol_info.bid,
-                'ask': symbol_info.ask,
-                'spread': spread_pips,  # ← CORRIGIDO: agora retorna em pips, não pontos
-                'spread_points': spread_points,  # ← Manter pontos para referência
-                'digits': symbol_info.digits,
-                'point': symbol_info.point,
-                'trade_contract_size': symbol_info.trade_contract_size,
-                'volume_min': symbol_info.volume_min,
-                'volume_max': symbol_info.volume_max,
-                'volume_step': symbol_info.volume_step,
-                'trade_mode': symbol_info.trade_mode,
-                'description': symbol_info.description
-            }
+            info = self.symbol_cache.get_symbol_info(symbol, max_quote_age, static_only)
+            if info is None:
+                logger.error(f"Failed to get symbol info for {symbol}")
+            return info
         except Exception as e:
             logger.exception(f"Error getting symbol info: {e}")
             return None
     
+    def _fetch_symbol_info(self, symbol: str):
+        """symbol_info no MT5 (usado pelo SymbolInfoCache)"""
+        if not self.ensure_connection():
+            return None
+        symbol_info = self._mt5('symbol_info', symbol)
+        if symbol_info is None:
+            logger.error(f"symbol_info({symbol}) falhou: {self._mt5('last_error')}")
+        return symbol_info
+    
+    def _fetch_symbol_tick(self, symbol: str):
+        """symbol_info_tick no MT5 (usado pelo SymbolInfoCache)"""
+        tick = self._mt5('symbol_info_tick', symbol)
+        if tick is None:
+            logger.error(f"symbol_info_tick({symbol}) falhou: {self._mt5('last_error')}")
+        return tick
+    
+    def get_symbol_cache_stats(self) -> Dict:
+        """Taxas de acerto do cache de símbolos (estáticos e cotação)"""
+        return self.symbol_cache.get_stats()
+    
     def get_rates(self, symbol: str, timeframe: int, count: int = 1000) -> Optional[pd.DataFrame]:
         """
         Get historical price data
@@ -298,9 +358,16 @@ class MT5Connector:
                 }
                 timeframe = timeframe_map.get(timeframe, mt5.TIMEFRAME_H1)
             
-            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+            if self.incremental_rates and count <= self.bar_store_capacity:
+                store = self._get_bar_store(symbol, timeframe)
+                with store.lock:
+                    if not store.update():
+                        return None
+                    return store.to_frame(count)
+            
+            rates = self._mt5('copy_rates_from_pos', symbol, timeframe, 0, count)
             if rates is None or len(rates) == 0:
-                logger.error(f"Failed to get rates for {symbol}: {mt5.last_error()}")
+                logger.error(f"Failed to get rates for {symbol}: {self._mt5('last_error')}")
                 return None
             
             df = pd.DataFrame(rates)
@@ -313,56 +380,88 @@ class MT5Connector:
             logger.exception(f"Error getting rates: {e}")
             return None
     
+    def _get_bar_store(self, symbol: str, timeframe: int) -> RollingBarStore:
+        """Retorna (criando se necessário) o buffer de barras do par símbolo/timeframe"""
+        key = (symbol, timeframe)
+        with self._bar_stores_lock:
+            store = self._bar_stores.get(key)
+            if store is None:
+                store = RollingBarStore(self.io.proxy(mt5), symbol, timeframe, capacity=self.bar_store_capacity)
+                self._bar_stores[key] = store
+            return store
+    
+    def get_bar_store_stats(self) -> Dict:
+        """Estatísticas dos buffers de barras (chamadas IPC, barras transferidas)"""
+        with self._bar_stores_lock:
+            stores = list(self._bar_stores.values())
+        return {f"{s.symbol}/{s.timeframe}": s.get_stats() for s in stores}
+    
+    def _fetch_positions(self) -> Optional[List[Dict]]:
+        """
+        Consulta todas as posições no MT5 (usado pelo PositionSnapshotService)
+        
+        Returns:
+            Lista de posições normalizadas ou None se falhar
+        """
+        if not self.ensure_connection():
+            return None
+        
+        # Prazo do worker de I/O evita travamentos
+        try:
+            positions = self._mt5('positions_get')
+        except Exception as e:
+            logger.warning(f"positions_get falhou: {e}")
+            return None
+        
+        if positions is None:
+            return None
+        
+        return [
+            {
+                'ticket': pos.ticket,
+                'symbol': pos.symbol,
+                'type': pos.type,  # 🔥 FIX: Manter valor inteiro (0=BUY, 1=SELL)
+                'type_str': 'BUY' if pos.type == mt5.ORDER_TYPE_BUY else 'SELL',
+                'volume': pos.volume,
+                'price_open': pos.price_open,
+                'price_current': pos.price_current,
+                'sl': pos.sl,
+                'tp': pos.tp,
+                'profit': pos.profit,
+                'magic': pos.magic,  # 🔥 FIX: Adicionar magic number!
+                'time': datetime.fromtimestamp(pos.time),
+                'comment': pos.comment
+            }
+            for pos in positions
+        ]
+    
+    def get_position_snapshot(self, max_age: Optional[float] = None) -> PositionSnapshot:
+        """
+        Snapshot imutável das posições abertas (indexado por ticket, magic e símbolo)
+        
+        Args:
+            max_age: Idade máxima aceita em segundos (None = mt5.positions_refresh_seconds)
+            
+        Returns:
+            PositionSnapshot compartilhado
+        """
+        return self.position_snapshots.get_snapshot(max_age)
+    
     def get_open_positions(self, symbol: Optional[str] = None) -> List[Dict]:
         """
         Get open positions
         
+        Lê o snapshot compartilhado (consulta o MT5 no máximo uma vez por
+        mt5.positions_refresh_seconds, para todos os consumidores).
+        
         Args:
             symbol: Filter by symbol (optional)
             
         Returns:
             List of position dictionaries
         """
-        if not self.ensure_connection():
-            return []
-        
         try:
-            # Usar timeout para evitar travamentos
-            if symbol:
-                positions = with_timeout(
-                    lambda: mt5.positions_get(symbol=symbol),
-                    timeout_seconds=5.0,
-                    default=None
-                )
-            else:
-                positions = with_timeout(
-                    mt5.positions_get,
-                    timeout_seconds=5.0,
-                    default=None
-                )
-            
-            if positions is None:
-                return []
-            
-            return [
-                {
-                    'ticket': pos.ticket,
-                    'symbol': pos.symbol,
-                    'type': pos.type,  # 🔥 FIX: Manter valor inteiro (0=BUY, 1=SELL)
-                    'type_str': 'BUY' if pos.type == mt5.ORDER_TYPE_BUY else 'SELL',
-                    'volume': pos.volume,
-                    'price_open': pos.price_open,
-                    'price_current': pos.price_current,
-                    'sl': pos.sl,
-                    'tp': pos.tp,
-                    'profit': pos.profit,
-                    'magic': pos.magic,  # 🔥 FIX: Adicionar magic number!
-                    'time': datetime.fromtimestamp(pos.time),
-                    'comment': pos.comment
-                }
-                for pos in positions
-            ]
-            
+            return self.get_position_snapshot().as_dicts(symbol)
         except Exception as e:
             logger.exception(f"Error getting positions: {e}")
             return []
@@ -401,13 +500,13 @@ class MT5Connector:
             return None
         
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._mt5('symbol_info', symbol)
             if symbol_info is None:
                 logger.error(f"Symbol {symbol} not found")
                 return None
             
             if not symbol_info.visible:
-                if not mt5.symbol_select(symbol, True):
+                if not self._mt5('symbol_select', symbol, True):
                     logger.error(f"Failed to select symbol {symbol}")
                     return None
             
@@ -443,10 +542,10 @@ class MT5Connector:
                 request["tp"] = tp
             
             # Send order
-            result = mt5.order_send(request)
+            result = self._order_send(request)
             
             if result is None:
-                logger.error(f"Order send failed: {mt5.last_error()}")
+                logger.error(f"Order send failed: {self._mt5('last_error')}")
                 return None
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
@@ -485,7 +584,7 @@ class MT5Connector:
             return False
         
         try:
-            position = mt5.positions_get(ticket=ticket)
+            position = self._mt5('positions_get', ticket=ticket)
             if not position:
                 logger.error(f"Position {ticket} not found")
                 return False
@@ -494,7 +593,7 @@ class MT5Connector:
             
             # Opposite order type
             order_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-            price = mt5.symbol_info_tick(position.symbol).bid if order_type == mt5.ORDER_TYPE_SELL else mt5.symbol_info_tick(position.symbol).ask
+            price = self._mt5('symbol_info_tick', position.symbol).bid if order_type == mt5.ORDER_TYPE_SELL else self._mt5('symbol_info_tick', position.symbol).ask
             
             request = {
                 "action": mt5.TRADE_ACTION_DEAL,
@@ -510,10 +609,10 @@ class MT5Connector:
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            result = mt5.order_send(request)
+            result = self._order_send(request)
             
             if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-                logger.error(f"Failed to close position {ticket}: {result.comment if result else mt5.last_error()}")
+                logger.error(f"Failed to close position {ticket}: {result.comment if result else self._mt5('last_error')}")
                 return False
             
             logger.info(f"Position {ticket} closed successfully")
@@ -538,7 +637,7 @@ class MT5Connector:
             return None
         
         try:
-            position = mt5.positions_get(ticket=ticket)
+            position = self._mt5('positions_get', ticket=ticket)
             if not position:
                 logger.error(f"Position {ticket} not found")
                 return None
@@ -559,9 +658,9 @@ class MT5Connector:
             # Opposite order type for closing
             order_type = (mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY 
                          else mt5.ORDER_TYPE_BUY)
-            price = (mt5.symbol_info_tick(position.symbol).bid 
+            price = (self._mt5('symbol_info_tick', position.symbol).bid 
                     if order_type == mt5.ORDER_TYPE_SELL 
-                    else mt5.symbol_info_tick(position.symbol).ask)
+                    else self._mt5('symbol_info_tick', position.symbol).ask)
             
             # 🚨 IMPORTANTE: Para fechamento parcial, NÃO incluir sl/tp
             # e usar "position" para vincular à posição original
@@ -579,10 +678,10 @@ class MT5Connector:
                 "type_filling": mt5.ORDER_FILLING_IOC,
             }
             
-            result = mt5.order_send(request)
+            result = self._order_send(request)
             
             if result is None:
-                logger.error(f"Partial close failed: {mt5.last_error()}")
+                logger.error(f"Partial close failed: {self._mt5('last_error')}")
                 return None
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
@@ -624,7 +723,7 @@ class MT5Connector:
             return False
         
         try:
-            position = mt5.positions_get(ticket=ticket)
+            position = self._mt5('positions_get', ticket=ticket)
             if not position:
                 logger.error(f"Position {ticket} not found")
                 return False
@@ -632,7 +731,7 @@ class MT5Connector:
             position = position[0]
             
             # 🔍 VALIDAÇÃO: Verificar stops_level mínimo
-            symbol_info = mt5.symbol_info(position.symbol)
+            symbol_info = self._mt5('symbol_info', position.symbol)
             if not symbol_info:
                 logger.error(f"Failed to get symbol info for {position.symbol}")
                 return False
@@ -715,10 +814,10 @@ class MT5Connector:
                 f"Stops_level: {stops_level:.1f} pips"
             )
             
-            result = mt5.order_send(request)
+            result = self._order_send(request)
             
             if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-                logger.error(f"Failed to modify position {ticket}: {result.comment if result else mt5.last_error()}")
+                logger.error(f"Failed to modify position {ticket}: {result.comment if result else self._mt5('last_error')}")
                 return False
             
             logger.info(f"Position {ticket} modified successfully")
@@ -0,0 +1,349 @@
+"""
+MT5 I/O Worker
+Thread dedicada e persistente que executa todas as chamadas ao terminal MT5
+(substitui uma thread nova por chamada em with_timeout)
+"""
+
+import bisect
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from .retry_handler import MT5TimeoutError
+
+
+# Limites superiores (ms) dos buckets do histograma de latência
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Histograma de latência com buckets fixos (percentis aproximados pelo bucket)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total_ms', 'max_ms')
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Limite superior do bucket que contém o percentil q (0-100)"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+            'buckets': {
+                (f"<={b}" if i < len(self.buckets) else f">{self.buckets[-1]}"): n
+                for i, (b, n) in enumerate(zip(self.buckets + (self.buckets[-1],), self.counts))
+                if n
+            }
+        }
+
+
+class _Request:
+    """Chamada MT5 enfileirada"""
+
+    __slots__ = ('func', 'args', 'kwargs', 'label', 'deadline', 'enqueued_at', 'started_at',
+                 'state', 'result', 'error', 'done')
+
+    def __init__(self, func: Callable, args: tuple, kwargs: dict, label: str, deadline: float):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.label = label
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.started_at = 0.0
+        self.state = 'queued'        # queued -> running -> done | cancelled
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class MT5IOWorker:
+    """
+    Executor serializado de chamadas MT5
+
+    - Uma única thread persistente é dona do terminal: chamadas de todas as
+      threads entram numa fila FIFO e são executadas em ordem
+    - Cada chamada tem prazo (deadline); quem chamou deixa de esperar no prazo
+      (MT5TimeoutError) e a chamada ainda na fila é cancelada (nunca executa)
+    - Chamada que trava no terminal: a thread presa é abandonada e substituída
+      por uma nova (vaza no máximo uma thread por travamento, não por chamada)
+    - Chamadas feitas de dentro da própria thread do worker rodam em linha
+    - Histograma de latência (execução) por função MT5 + espera na fila
+    """
+
+    def __init__(self, default_timeout: float = 5.0, name: str = 'MT5IO'):
+        """
+        Inicializa o worker (a thread inicia na primeira chamada)
+
+        Args:
+            default_timeout: Prazo padrão por chamada em segundos
+            name: Nome da thread
+        """
+        self.default_timeout = default_timeout
+        self.name = name
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._generation = 0
+        self._current: Optional[_Request] = None
+        self._closed = False
+
+        self.stats = {
+            'calls': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'cancelled': 0,
+            'inline': 0,
+            'workers_replaced': 0,
+            'queue_depth_max': 0
+        }
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._queue_wait = LatencyHistogram()
+
+    # ------------------------------------------------------------------
+    # Thread do worker
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self):
+        """Inicia a thread do worker se necessário (chamar com self._lock)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._generation += 1
+            self._thread = threading.Thread(
+                target=self._loop, args=(self._generation,),
+                name=f"{self.name}-{self._generation}", daemon=True
+            )
+            self._thread.start()
+
+    def _loop(self, generation: int):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            with self._lock:
+                if generation != self._generation:
+                    # Worker abandonado (travou): devolve a chamada ao substituto
+                    self._queue.put(request)
+                    return
+                if request.state == 'cancelled':
+                    continue
+                if time.monotonic() > request.deadline:
+                    # Prazo venceu na fila: não executa
+                    request.state = 'cancelled'
+                    self._count(request.label, 'cancelled')
+                    self.stats['cancelled'] += 1
+                    request.done.set()
+                    continue
+                request.state = 'running'
+                request.started_at = time.monotonic()
+                self._current = request
+
+            self._execute(request)
+
+            with self._lock:
+                if self._current is request:
+                    self._current = None
+                if generation != self._generation:
+                    return
+
+    def _execute(self, request: _Request):
+        try:
+            request.result = request.func(*request.args, **request.kwargs)
+        except BaseException as e:
+            request.error = e
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._record(request, end)
+                request.state = 'done'
+            request.done.set()
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def _count(self, label: str, key: str):
+        """Contador por função (chamar com self._lock)"""
+        counters = self._counters.get(label)
+        if counters is None:
+            counters = self._counters[label] = {'errors': 0, 'timeouts': 0, 'cancelled': 0}
+        counters[key] += 1
+
+    def _record(self, request: _Request, end: float):
+        """Registra latência de uma chamada executada (chamar com self._lock)"""
+        hist = self._latency.get(request.label)
+        if hist is None:
+            hist = self._latency[request.label] = LatencyHistogram()
+        hist.add((end - request.started_at) * 1000)
+        self._queue_wait.add((request.started_at - request.enqueued_at) * 1000)
+        self.stats['calls'] += 1
+        if request.error is not None:
+            self.stats['errors'] += 1
+            self._count(request.label, 'errors')
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def call(self, func: Callable, args: tuple = (), kwargs: Optional[Dict] = None,
+             timeout: Optional[float] = None, label: Optional[str] = None) -> Any:
+        """
+        Executa func(*args, **kwargs) na thread do worker
+
+        Args:
+            func: Função do MetaTrader5
+            args: Argumentos posicionais
+            kwargs: Argumentos nomeados
+            timeout: Prazo em segundos (None = default_timeout)
+            label: Nome da função nas métricas (None = func.__name__)
+
+        Returns:
+            Retorno de func (exceções de func são relançadas para quem chamou)
+
+        Raises:
+            MT5TimeoutError: Prazo vencido (na fila ou executando)
+        """
+        kwargs = kwargs or {}
+        label = label or getattr(func, '__name__', None) or 'unknown'
+        timeout = self.default_timeout if timeout is None else timeout
+
+        # Reentrância: já estamos na thread do worker
+        if threading.current_thread() is self._thread:
+            request = _Request(func, args, kwargs, label, float('inf'))
+            request.started_at = request.enqueued_at
+            with self._lock:
+                self.stats['inline'] += 1
+            self._execute(request)
+            if request.error is not None:
+                raise request.error
+            return request.result
+
+        request = _Request(func, args, kwargs, label, time.monotonic() + timeout)
+        with self._lock:
+            if self._closed:
+                raise MT5TimeoutError(f"MT5 I/O worker encerrado ({label})")
+            self._ensure_thread()
+            self._queue.put(request)
+            self.stats['queue_depth_max'] = max(self.stats['queue_depth_max'], self._queue.qsize())
+
+        if not request.done.wait(timeout):
+            with self._lock:
+                if not request.done.is_set():
+                    self.stats['timeouts'] += 1
+                    self._count(label, 'timeouts')
+                    if request.state == 'queued':
+                        request.state = 'cancelled'
+                        self.stats['cancelled'] += 1
+                        self._count(label, 'cancelled')
+                    elif request.state == 'running' and self._current is request:
+                        # Terminal travado nesta chamada: substituir a thread
+                        self.stats['workers_replaced'] += 1
+                        self._current = None
+                        self._thread = None
+                        self._ensure_thread()
+                        logger.warning(f"MT5 I/O worker travado em {label}: thread substituída")
+                    raise MT5TimeoutError(f"Timeout ({timeout}s) na chamada MT5: {label}")
+
+        if request.state == 'cancelled':
+            raise MT5TimeoutError(f"Prazo ({timeout}s) vencido na fila: {label}")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def proxy(self, module) -> 'MT5IOProxy':
+        """Objeto com a interface do módulo MetaTrader5 que executa no worker"""
+        return MT5IOProxy(self, module)
+
+    def get_stats(self) -> Dict:
+        """Contadores, profundidade da fila e histogramas de latência por função"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['queue_depth'] = self._queue.qsize()
+            stats['queue_wait_ms'] = self._queue_wait.as_dict()
+            stats['functions'] = {
+                label: {**hist.as_dict(), **self._counters.get(label, {})}
+                for label, hist in self._latency.items()
+            }
+            for label, counters in self._counters.items():
+                stats['functions'].setdefault(label, dict(counters))
+            stats['busy_ms'] = (
+                (time.monotonic() - self._current.started_at) * 1000 if self._current else 0.0
+            )
+        return stats
+
+    def shutdown(self):
+        """Encerra a thread do worker (chamadas pendentes terminam antes)"""
+        with self._lock:
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+
+
+class MT5IOProxy:
+    """
+    Fachada do módulo MetaTrader5: funções executam no MT5IOWorker,
+    constantes (TIMEFRAME_*, ORDER_TYPE_*...) são lidas direto do módulo
+    """
+
+    def __init__(self, worker: MT5IOWorker, module):
+        self._worker = worker
+        self._module = module
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._module, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._worker.call(attr, args, kwargs, label=name)
+
+        call.__name__ = name
+        return call
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Instância compartilhada (o terminal MT5 é único por processo)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_mt5_io_worker = None
+_mt5_io_worker_lock = threading.Lock()
+
+
+def get_mt5_io_worker(config: Dict = None) -> MT5IOWorker:
+    """Retorna instância singleton do MT5IOWorker"""
+    global _mt5_io_worker
+    with _mt5_io_worker_lock:
+        if _mt5_io_worker is None:
+            mt5_config = (config or {}).get('mt5', {})
+            _mt5_io_worker = MT5IOWorker(default_timeout=mt5_config.get('io_timeout_seconds', 5.0))
+        return _mt5_io_worker
@@ -33,6 +33,8 @@ try:
 except ImportError:
     mt5 = None
 
+from .position_snapshot import get_position_snapshot_service
+
 
 class PositionAction(Enum):
     """Acoes possiveis para uma posicao"""
@@ -171,7 +173,28 @@ class PositionIntelligenceManager:
                 time.sleep(5)
     
     def _get_open_positions(self) -> List[Dict]:
-        """Obtem posicoes abertas do MT5"""
+        """Obtem posicoes abertas (snapshot compartilhado ou MT5 direto)"""
+        # Snapshot compartilhado com os demais consumidores (criado pelo MT5Connector)
+        snapshots = get_position_snapshot_service()
+        if snapshots is not None:
+            return [
+                {
+                    'ticket': p['ticket'],
+                    'symbol': p['symbol'],
+                    'type': p['type_str'].lower(),
+                    'volume': p['volume'],
+                    'open_price': p['price_open'],
+                    'current_price': p['price_current'],
+                    'sl': p['sl'],
+                    'tp': p['tp'],
+                    'profit': p['profit'],
+                    'open_time': p['time'],
+                    'magic': p['magic'],
+                    'comment': p['comment']
+                }
+                for p in snapshots.get_snapshot().positions
+            ]
+        
         if not mt5:
             return []
         
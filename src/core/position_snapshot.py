@@ -0,0 +1,212 @@
+"""
+Position Snapshot Service
+Snapshot único e imutável das posições abertas, compartilhado por todos os consumidores
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class PositionSnapshot:
+    """Posições abertas num instante, indexadas por ticket, magic e símbolo"""
+    version: int
+    taken_at: float
+    positions: Tuple[Mapping, ...]
+    by_ticket: Mapping = field(repr=False)
+    by_magic: Mapping = field(repr=False)
+    by_symbol: Mapping = field(repr=False)
+
+    @classmethod
+    def build(cls, version: int, taken_at: float, positions: List[Dict]) -> 'PositionSnapshot':
+        """Cria snapshot congelado a partir das posições normalizadas do MT5Connector"""
+        frozen = tuple(MappingProxyType(dict(p)) for p in positions)
+        by_magic: Dict[int, List[Mapping]] = {}
+        by_symbol: Dict[str, List[Mapping]] = {}
+        for pos in frozen:
+            by_magic.setdefault(pos.get('magic', 0), []).append(pos)
+            by_symbol.setdefault(pos.get('symbol'), []).append(pos)
+        return cls(
+            version=version,
+            taken_at=taken_at,
+            positions=frozen,
+            by_ticket=MappingProxyType({p['ticket']: p for p in frozen}),
+            by_magic=MappingProxyType({k: tuple(v) for k, v in by_magic.items()}),
+            by_symbol=MappingProxyType({k: tuple(v) for k, v in by_symbol.items()})
+        )
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def get(self, ticket: int) -> Optional[Mapping]:
+        """Posição pelo ticket (None se fechada)"""
+        return self.by_ticket.get(ticket)
+
+    def select(self, symbol: Optional[str] = None, magic: Optional[int] = None) -> Tuple[Mapping, ...]:
+        """Posições filtradas por símbolo e/ou magic (via índices)"""
+        if symbol is None and magic is None:
+            return self.positions
+        if magic is None:
+            return self.by_symbol.get(symbol, ())
+        selected = self.by_magic.get(magic, ())
+        if symbol is not None:
+            selected = tuple(p for p in selected if p.get('symbol') == symbol)
+        return selected
+
+    def count(self, symbol: Optional[str] = None, magic: Optional[int] = None) -> int:
+        return len(self.select(symbol, magic))
+
+    def total_profit(self, symbol: Optional[str] = None) -> float:
+        return sum(p.get('profit', 0.0) for p in self.select(symbol))
+
+    def as_dicts(self, symbol: Optional[str] = None, magic: Optional[int] = None) -> List[Dict]:
+        """Cópias mutáveis (formato de MT5Connector.get_open_positions)"""
+        return [dict(p) for p in self.select(symbol, magic)]
+
+
+class PositionSnapshotService:
+    """
+    Serviço thread-safe de snapshots de posições
+
+    - Atualiza no máximo uma vez a cada refresh_seconds (chamadas MT5 escalam com a
+      taxa de atualização, não com o número de consumidores)
+    - Single-flight: leitores concorrentes aguardam a mesma consulta
+    - invalidate() força nova consulta (ex: após enviar uma ordem)
+    - Falha na consulta mantém o último snapshot válido
+    """
+
+    def __init__(self, fetch: Callable[[], Optional[List[Dict]]], refresh_seconds: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa o serviço
+
+        Args:
+            fetch: Função que consulta o MT5 e retorna posições normalizadas (None = falha)
+            refresh_seconds: Idade máxima do snapshot antes de consultar de novo
+            clock: Fonte de tempo monotônica (injetável para testes)
+        """
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+
+        self._snapshot = PositionSnapshot.build(0, float('-inf'), [])
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._dirty = True
+
+        self.stats = {
+            'reads': 0,
+            'refreshes': 0,
+            'errors': 0,
+            'invalidations': 0,
+            'refresh_ms_total': 0.0,
+            'refresh_ms_max': 0.0
+        }
+
+    def _is_fresh(self, snapshot: PositionSnapshot, max_age: float) -> bool:
+        return not self._dirty and self._clock() - snapshot.taken_at <= max_age
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> PositionSnapshot:
+        """
+        Snapshot mais recente (consulta o MT5 se estiver velho)
+
+        Args:
+            max_age: Idade máxima aceita em segundos (None = refresh_seconds)
+
+        Returns:
+            PositionSnapshot imutável
+        """
+        max_age = self.refresh_seconds if max_age is None else max_age
+
+        with self._lock:
+            self.stats['reads'] += 1
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot, max_age):
+                return snapshot
+
+        # Apenas uma thread consulta o MT5; as demais aguardam e reutilizam o resultado
+        with self._refresh_lock:
+            with self._lock:
+                snapshot = self._snapshot
+                if self._is_fresh(snapshot, max_age):
+                    return snapshot
+                self._dirty = False
+
+            start = time.perf_counter()
+            try:
+                positions = self.fetch()
+            except Exception as e:
+                logger.error(f"Erro ao consultar posições: {e}")
+                positions = None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                if positions is None:
+                    # Mantém o último snapshot; próxima leitura tenta de novo
+                    self.stats['errors'] += 1
+                    self._dirty = True
+                    return self._snapshot
+
+                self._snapshot = PositionSnapshot.build(
+                    snapshot.version + 1, self._clock(), positions
+                )
+                self.stats['refreshes'] += 1
+                self.stats['refresh_ms_total'] += elapsed_ms
+                self.stats['refresh_ms_max'] = max(self.stats['refresh_ms_max'], elapsed_ms)
+                return self._snapshot
+
+    def peek(self) -> PositionSnapshot:
+        """Último snapshot publicado, sem consultar o MT5"""
+        with self._lock:
+            return self._snapshot
+
+    def invalidate(self):
+        """Marca o snapshot como velho (próxima leitura consulta o MT5)"""
+        with self._lock:
+            self._dirty = True
+            self.stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict:
+        """Contadores de leituras e consultas ao MT5"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['version'] = self._snapshot.version
+            stats['positions'] = len(self._snapshot)
+        stats['reads_per_refresh'] = stats['reads'] / stats['refreshes'] if stats['refreshes'] else 0.0
+        stats['refresh_ms_avg'] = (
+            stats['refresh_ms_total'] / stats['refreshes'] if stats['refreshes'] else 0.0
+        )
+        return stats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Instância compartilhada (todos os conectores / consumidores do processo)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_position_snapshot_service = None
+_position_snapshot_lock = threading.Lock()
+
+
+def get_position_snapshot_service(config: Dict = None,
+                                  fetch: Callable[[], Optional[List[Dict]]] = None
+                                  ) -> Optional[PositionSnapshotService]:
+    """
+    Retorna instância singleton do PositionSnapshotService
+
+    A instância é criada pelo primeiro chamador que informar fetch (MT5Connector);
+    sem fetch, retorna a instância existente ou None.
+    """
+    global _position_snapshot_service
+    with _position_snapshot_lock:
+        if _position_snapshot_service is None and fetch is not None:
+            mt5_config = (config or {}).get('mt5', {})
+            _position_snapshot_service = PositionSnapshotService(
+                fetch,
+                refresh_seconds=mt5_config.get('positions_refresh_seconds', 1.0)
+            )
+        return _position_snapshot_service
@@ -18,6 +18,11 @@ class MT5ConnectionError(RetryableError):
     pass
 
 
+class MT5TimeoutError(MT5ConnectionError):
+    """Chamada MT5 não concluída dentro do prazo"""
+    pass
+
+
 class MT5TradeError(RetryableError):
     """Erro em operação de trade MT5"""
     pass
@@ -118,8 +118,8 @@ class RiskManager:
             # Calculate risk amount in currency
             risk_amount = balance * risk
             
-            # Get symbol info
-            symbol_info = self.mt5.get_symbol_info(symbol)
+            # Get symbol info (só campos de contrato: sem consulta de tick)
+            symbol_info = self.mt5.get_symbol_info(symbol, static_only=True)
             if not symbol_info:
                 logger.error(f"Failed to get symbol info for {symbol}")
                 return 0.0
@@ -317,7 +317,7 @@ class RiskManager:
             Stop loss price
         """
         try:
-            symbol_info = self.mt5.get_symbol_info(symbol)
+            symbol_info = self.mt5.get_symbol_info(symbol, static_only=True)
             if not symbol_info:
                 return 0.0
             
@@ -719,7 +719,7 @@ class RiskManager:
             New stop loss price or None if no update needed
         """
         try:
-            symbol_info = self.mt5.get_symbol_info(position['symbol'])
+            symbol_info = self.mt5.get_symbol_info(position['symbol'], static_only=True)
             if not symbol_info:
                 return None
             
@@ -775,7 +775,7 @@ class RiskManager:
             if not self.risk_config.get('break_even_enabled', True):
                 return False
             
-            symbol_info = self.mt5.get_symbol_info(position['symbol'])
+            symbol_info = self.mt5.get_symbol_info(position['symbol'], static_only=True)
             if not symbol_info:
                 return False
             
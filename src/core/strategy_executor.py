@@ -41,7 +41,8 @@ class StrategyExecutor:
                  market_hours=None,  # 🆕 Aceita market_hours customizado
                  market_analyzer=None,  # 🚪 PORTEIRO (opcional)
                  symbol: str = None,  # 🌍 Símbolo específico
-                 symbol_config: Dict = None):  # 🌍 Configuração do símbolo
+                 symbol_config: Dict = None,  # 🌍 Configuração do símbolo
+                 analysis_service=None):  # 📸 Snapshot de análise compartilhado
         """
         Inicializa executor de estratégia
         
@@ -60,6 +61,9 @@ class StrategyExecutor:
             market_analyzer: Porteiro de condições de mercado (opcional)
             symbol: Símbolo para operar (ex: EURUSD, XAUUSD)
             symbol_config: Configuração específica do símbolo
+            analysis_service: AnalysisSnapshotService do símbolo (opcional).
+                Se informado, a análise multi-timeframe é compartilhada entre
+                todas as estratégias do símbolo (uma por barra)
         """
         self.strategy_name = strategy_name
         self.strategy = strategy_instance
@@ -81,6 +85,7 @@ class StrategyExecutor:
             logger.info(f"[{strategy_name}] 🚪 Porteiro ativo - verificará condições de mercado")
         
         self.technical_analyzer = technical_analyzer
+        self.analysis_service = analysis_service
         self.news_analyzer = news_analyzer
         self.telegram = telegram
         
@@ -125,6 +130,9 @@ class StrategyExecutor:
         
         self.enabled = self.strategy_config.get('enabled', True)
         self.cycle_seconds = self.strategy_config.get('cycle_seconds', 300)
+        # Gatilho no ExecutorScheduler: 'interval' (cycle_seconds) ou 'bar_close' (timeframe)
+        self.trigger = self.strategy_config.get('trigger', 'interval')
+        self.trigger_timeframe = self.strategy_config.get('timeframe', 'M5')
         self.max_positions = self.strategy_config.get('max_positions', 2)
         
         # 🔄 MODO 24H: Adaptive Trading Manager
@@ -156,6 +164,7 @@ class StrategyExecutor:
         # Estado
         self.running = False
         self.thread = None
+        self.scheduler = None
         self.last_execution = None
         
         logger.info(
@@ -164,8 +173,19 @@ class StrategyExecutor:
             f"magic={self.magic_number}, min_conf={self.min_confidence:.2f}"
         )
     
-    def start(self):
-        """Inicia thread de execução"""
+    @property
+    def watchdog_name(self) -> str:
+        """Nome usado no watchdog"""
+        return f"Executor-{self.strategy_name}"
+    
+    def start(self, scheduler=None):
+        """
+        Inicia execução
+        
+        Args:
+            scheduler: ExecutorScheduler (opcional). Se informado, os ciclos são
+                despachados pelo agendador central em vez de uma thread própria
+        """
         if self.running:
             logger.warning(
                 f"[{self.strategy_name}] já está executando"
@@ -173,6 +193,16 @@ class StrategyExecutor:
             return
         
         self.running = True
+        
+        if scheduler is not None:
+            self.scheduler = scheduler
+            scheduler.add(self)
+            logger.info(
+                f"[{self.strategy_name}] Agendado ({self.trigger}"
+                f"{' ' + self.trigger_timeframe if self.trigger == 'bar_close' else f' {self.cycle_seconds}s'})"
+            )
+            return
+        
         self.thread = threading.Thread(
             target=self._run_loop,
             name=f"Executor-{self.strategy_name}",
@@ -182,20 +212,60 @@ class StrategyExecutor:
         logger.info(f"[{self.strategy_name}] Thread iniciada")
     
     def stop(self):
-        """Para thread de execução"""
+        """Para execução"""
         if not self.running:
             return
         
         logger.info(f"[{self.strategy_name}] Parando...")
         self.running = False
         
+        if self.scheduler is not None:
+            self.scheduler.remove(self)
+        
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=5)
         
         logger.success(f"[{self.strategy_name}] Parado")
     
+    def run_cycle(self) -> bool:
+        """
+        Executa uma iteração do loop (heartbeats + ciclo)
+        
+        Returns:
+            False se houve erro crítico (chamador deve aguardar antes de repetir)
+        """
+        try:
+            # Heartbeat para watchdog
+            if self.watchdog:
+                self.watchdog.heartbeat(self.watchdog_name)
+            
+            if self.enabled:
+                self._execute_cycle()
+                self.last_execution = datetime.now(timezone.utc)
+            else:
+                logger.debug(
+                    f"[{self.strategy_name}] Desabilitada"
+                )
+            
+            # 🚨 HEARTBEAT ANTES de dormir
+            if self.watchdog:
+                self.watchdog.heartbeat(self.watchdog_name)
+            return True
+            
+        except Exception as e:
+            logger.exception(
+                f"[{self.strategy_name}] ERRO CRÍTICO no loop: {e}"
+            )
+            # Tentar reconectar MT5 se houver erro
+            try:
+                if not self.mt5.ensure_connection():
+                    logger.error(f"[{self.strategy_name}] Falha ao reconectar MT5")
+            except:
+                pass
+            return False
+    
     def _run_loop(self):
-        """Loop principal de execução"""
+        """Loop principal de execução (modo thread própria)"""
         logger.info(
             f"[{self.strategy_name}] Loop iniciado "
             f"(ciclo: {self.cycle_seconds}s)"
@@ -204,7 +274,7 @@ class StrategyExecutor:
         # Registrar no watchdog se disponível
         if self.watchdog:
             self.watchdog.register_thread(
-                f"Executor-{self.strategy_name}",
+                self.watchdog_name,
                 callback=lambda: logger.error(
                     f"🚨 FREEZE DETECTADO em {self.strategy_name}!"
                 )
@@ -212,20 +282,10 @@ class StrategyExecutor:
         
         while self.running:
             try:
-                # Heartbeat para watchdog
-                if self.watchdog:
-                    self.watchdog.heartbeat(f"Executor-{self.strategy_name}")
-                
-                if self.enabled:
-                    self._execute_cycle()
-                else:
-                    logger.debug(
-                        f"[{self.strategy_name}] Desabilitada"
-                    )
-                
-                # 🚨 HEARTBEAT ANTES de dormir
-                if self.watchdog:
-                    self.watchdog.heartbeat(f"Executor-{self.strategy_name}")
+                if not self.run_cycle():
+                    # Aguardar antes de tentar novamente
+                    time.sleep(60)  # Aguardar 1 min em caso de erro
+                    continue
                 
                 # Aguardar próximo ciclo (pode ser >600s para algumas estratégias)
                 # Dividir sleep em chunks para enviar heartbeat periodicamente
@@ -239,24 +299,11 @@ class StrategyExecutor:
                     
                     # 🚨 HEARTBEAT durante o sleep (a cada 60s)
                     if sleep_remaining > 0 and self.watchdog:
-                        self.watchdog.heartbeat(f"Executor-{self.strategy_name}")
+                        self.watchdog.heartbeat(self.watchdog_name)
                 
             except KeyboardInterrupt:
                 logger.info(f"[{self.strategy_name}] Interrompido pelo usuário")
                 break
-            except Exception as e:
-                logger.exception(
-                    f"[{self.strategy_name}] ERRO CRÍTICO no loop: {e}"
-                )
-                # Tentar reconectar MT5 se houver erro
-                try:
-                    if not self.mt5.ensure_connection():
-                        logger.error(f"[{self.strategy_name}] Falha ao reconectar MT5")
-                except:
-                    pass
-                
-                # Aguardar antes de tentar novamente
-                time.sleep(60)  # Aguardar 1 min em caso de erro
     
     def _execute_cycle(self):
         """Executa um ciclo de análise e trading"""
@@ -337,7 +384,10 @@ class StrategyExecutor:
             try:
                 # Timeout de 60s para análise técnica
                 logger.info(f"[{self.strategy_name}] 📊 Iniciando análise técnica...")
-                technical = self.technical_analyzer.analyze_multi_timeframe()
+                if self.analysis_service:
+                    technical = self.analysis_service.get_analysis()
+                else:
+                    technical = self.technical_analyzer.analyze_multi_timeframe()
                 logger.info(f"[{self.strategy_name}] ✅ Análise técnica OK")
             except Exception as e:
                 logger.error(f"[{self.strategy_name}] Erro na análise técnica: {e}")
@@ -0,0 +1,233 @@
+"""
+Symbol Info Cache
+Cache de metadados de símbolos: campos de contrato (estáticos, TTL longo) separados
+da cotação (bid/ask, snapshot de vida curta)
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+
+# Campos de contrato: praticamente nunca mudam durante a sessão
+STATIC_FIELDS = (
+    'name',
+    'digits',
+    'point',
+    'trade_contract_size',
+    'volume_min',
+    'volume_max',
+    'volume_step',
+    'trade_mode',
+    'trade_stops_level',
+    'description',
+)
+
+
+class SymbolInfoCache:
+    """
+    Cache thread-safe de symbol_info / symbol_info_tick
+
+    - Estáticos (point, digits, volume_step, contract size...): symbol_info uma vez,
+      renovados após static_ttl_seconds ou invalidate_static() (reconexão)
+    - Cotação (bid/ask/spread): symbol_info_tick com idade máxima quote_ttl_seconds;
+      uma verificação pré-trade completa usa um único tick
+    - Detecção de mudança: tick com o mesmo time_msc não gera nova versão;
+      campos estáticos alterados são registrados no log
+    - Estatísticas de acerto separadas para estáticos e cotação
+    """
+
+    def __init__(self, fetch_info: Callable[[str], Any], fetch_tick: Callable[[str], Any],
+                 static_ttl_seconds: float = 3600.0, quote_ttl_seconds: float = 0.25,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa o cache
+
+        Args:
+            fetch_info: Função symbol -> objeto symbol_info do MT5 (None = falha)
+            fetch_tick: Função symbol -> objeto symbol_info_tick do MT5 (None = falha)
+            static_ttl_seconds: Validade dos campos de contrato
+            quote_ttl_seconds: Idade máxima da cotação
+            clock: Fonte de tempo monotônica (injetável para testes)
+        """
+        self.fetch_info = fetch_info
+        self.fetch_tick = fetch_tick
+        self.static_ttl_seconds = static_ttl_seconds
+        self.quote_ttl_seconds = quote_ttl_seconds
+        self._clock = clock
+
+        self._static: Dict[str, Dict] = {}       # symbol -> {'fields', 'loaded_at'}
+        self._quotes: Dict[str, Dict] = {}       # symbol -> cotação
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'static_hits': 0,
+            'static_misses': 0,
+            'static_changes': 0,
+            'quote_hits': 0,
+            'quote_misses': 0,
+            'quote_unchanged': 0,
+            'errors': 0,
+            'invalidations': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Campos estáticos
+    # ------------------------------------------------------------------
+
+    def get_static(self, symbol: str) -> Optional[Dict]:
+        """
+        Campos de contrato do símbolo
+
+        Returns:
+            Dict com STATIC_FIELDS ou None se o símbolo não existir
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._static.get(symbol)
+            if entry is not None and now - entry['loaded_at'] <= self.static_ttl_seconds:
+                self.stats['static_hits'] += 1
+                return entry['fields']
+            self.stats['static_misses'] += 1
+
+        info = self.fetch_info(symbol)
+        if info is None:
+            with self._lock:
+                self.stats['errors'] += 1
+            return entry['fields'] if entry is not None else None
+
+        fields = {name: getattr(info, name, None) for name in STATIC_FIELDS}
+        quote = self._quote_from(info, getattr(info, 'time_msc', None), now)
+
+        with self._lock:
+            if entry is not None and entry['fields'] != fields:
+                self.stats['static_changes'] += 1
+                changed = {k: (entry['fields'][k], v) for k, v in fields.items() if entry['fields'][k] != v}
+                logger.info(f"Contrato de {symbol} alterado: {changed}")
+            self._static[symbol] = {'fields': fields, 'loaded_at': now}
+            # symbol_info também traz cotação: aproveita se for mais recente
+            previous = self._quotes.get(symbol)
+            if previous is None or quote['loaded_at'] >= previous['loaded_at']:
+                quote['version'] = previous['version'] + 1 if previous is not None else 1
+                self._quotes[symbol] = quote
+        return fields
+
+    def invalidate_static(self, symbol: Optional[str] = None):
+        """Descarta campos estáticos (todos ou de um símbolo) — ex: após reconectar"""
+        with self._lock:
+            self.stats['invalidations'] += 1
+            if symbol is None:
+                self._static.clear()
+                self._quotes.clear()
+            else:
+                self._static.pop(symbol, None)
+                self._quotes.pop(symbol, None)
+
+    # ------------------------------------------------------------------
+    # Cotação
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _quote_from(source: Any, time_msc: Optional[int], now: float) -> Dict:
+        return {
+            'bid': source.bid,
+            'ask': source.ask,
+            'time_msc': time_msc,
+            'loaded_at': now,
+            'version': 0
+        }
+
+    def get_quote(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Cotação (bid/ask) com idade máxima
+
+        Args:
+            symbol: Símbolo
+            max_age: Idade máxima aceita em segundos (None = quote_ttl_seconds)
+
+        Returns:
+            Dict bid/ask/time_msc/version ou None se falhar
+        """
+        max_age = self.quote_ttl_seconds if max_age is None else max_age
+        now = self._clock()
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            if quote is not None and now - quote['loaded_at'] <= max_age:
+                self.stats['quote_hits'] += 1
+                return quote
+            self.stats['quote_misses'] += 1
+
+        tick = self.fetch_tick(symbol)
+        if tick is None:
+            with self._lock:
+                self.stats['errors'] += 1
+            return None
+
+        time_msc = getattr(tick, 'time_msc', None)
+        with self._lock:
+            previous = self._quotes.get(symbol)
+            if (previous is not None and time_msc is not None and previous['time_msc'] == time_msc
+                    and previous['bid'] == tick.bid and previous['ask'] == tick.ask):
+                # Mesmo tick: apenas renova a idade (consumidores mantêm a versão)
+                self.stats['quote_unchanged'] += 1
+                quote = dict(previous, loaded_at=now)
+            else:
+                quote = self._quote_from(tick, time_msc, now)
+                quote['version'] = previous['version'] + 1 if previous is not None else 1
+            self._quotes[symbol] = quote
+        return quote
+
+    # ------------------------------------------------------------------
+    # Visão combinada (formato de MT5Connector.get_symbol_info)
+    # ------------------------------------------------------------------
+
+    def get_symbol_info(self, symbol: str, max_quote_age: Optional[float] = None,
+                        static_only: bool = False) -> Optional[Dict]:
+        """
+        Campos estáticos + cotação no formato de MT5Connector.get_symbol_info
+
+        Args:
+            symbol: Símbolo
+            max_quote_age: Idade máxima da cotação (None = quote_ttl_seconds)
+            static_only: Não consulta tick; bid/ask/spread podem estar antigos
+
+        Returns:
+            Dict ou None se o símbolo não existir
+        """
+        static = self.get_static(symbol)
+        if static is None:
+            return None
+
+        if static_only:
+            with self._lock:
+                quote = self._quotes.get(symbol)
+        else:
+            quote = self.get_quote(symbol, max_quote_age)
+        if quote is None:
+            return None
+
+        point = static['point']
+        spread_points = (quote['ask'] - quote['bid']) / point if point else 0.0
+        return {
+            **static,
+            'bid': quote['bid'],
+            'ask': quote['ask'],
+            # Spread em pips (para XAUUSD: 1 pip = 10 pontos = 0.10)
+            'spread': spread_points / 10,
+            'spread_points': round(spread_points),
+            'quote_time_msc': quote['time_msc'],
+            'quote_version': quote['version']
+        }
+
+    def get_stats(self) -> Dict:
+        """Taxas de acerto dos campos estáticos e da cotação"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['symbols'] = len(self._static)
+        static_reads = stats['static_hits'] + stats['static_misses']
+        quote_reads = stats['quote_hits'] + stats['quote_misses']
+        stats['static_hit_rate'] = stats['static_hits'] / static_reads if static_reads else 0.0
+        stats['quote_hit_rate'] = stats['quote_hits'] / quote_reads if quote_reads else 0.0
+        return stats
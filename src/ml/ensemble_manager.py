@@ -33,6 +33,7 @@ from ml.xgboost_predictor import XGBoostSignalPredictor, PredictionResult, Signa
 from ml.lstm_predictor import LSTMPricePredictor, LSTMPrediction, PredictionDirection
 from ml.rl_agent import RLTradingAgent, AgentDecision, Action
 from ml.feature_engineering import AdvancedFeatureEngineer, FeatureSet
+from ml.inference_orchestrator import ModelInferenceOrchestrator
 
 
 class EnsembleMethod(Enum):
@@ -168,10 +169,24 @@ class EnsembleModelManager:
         'rl_agent': 0.30      # Bom em timing
     }
     
-    def __init__(self, config: dict = None):
+    def __init__(
+        self,
+        config: dict = None,
+        xgboost_predictor: XGBoostSignalPredictor = None,
+        lstm_predictor: LSTMPricePredictor = None,
+        rl_agent: RLTradingAgent = None,
+        macro_analyzer: Any = None,
+        inference: ModelInferenceOrchestrator = None
+    ):
         """
         Args:
             config: Configurações do ensemble
+            xgboost_predictor: Instância compartilhada (None = criar)
+            lstm_predictor: Instância compartilhada (None = criar)
+            rl_agent: Instância compartilhada (None = criar)
+            macro_analyzer: Analisador macro compartilhado (opcional)
+            inference: Orquestrador compartilhado - reutiliza previsões já feitas
+                no pipeline para a mesma barra (None = criar)
         """
         self.config = config or {}
         
@@ -192,9 +207,18 @@ class EnsembleModelManager:
         feature_config = self.config.get('features', {})
         
         self.feature_engineer = AdvancedFeatureEngineer(feature_config)
-        self.xgb_predictor = XGBoostSignalPredictor(xgb_config)
-        self.lstm_predictor = LSTMPricePredictor(lstm_config)
-        self.rl_agent = RLTradingAgent(rl_config)
+        self.xgb_predictor = xgboost_predictor or XGBoostSignalPredictor(xgb_config)
+        self.lstm_predictor = lstm_predictor or LSTMPricePredictor(lstm_config)
+        self.rl_agent = rl_agent or RLTradingAgent(rl_config)
+        self.macro_analyzer = macro_analyzer
+        
+        # Inferência concorrente com prazo por modelo e memo por barra
+        inference_config = self.config.get('inference', {})
+        self.inference = inference or ModelInferenceOrchestrator(
+            max_workers=inference_config.get('max_workers', 3),
+            deadlines=inference_config.get('deadlines'),
+            default_deadline=inference_config.get('default_deadline', 2.0)
+        )
         
         # Performance tracking
         self._model_performance: Dict[str, ModelPerformance] = {
@@ -222,7 +246,8 @@ class EnsembleModelManager:
         market_data: pd.DataFrame,
         current_price: float,
         account_balance: float = 10000,
-        strategy_signal: str = None  # Sinal original da estratégia
+        strategy_signal: str = None,  # Sinal original da estratégia
+        features: FeatureSet = None
     ) -> EnsembleDecision:
         """
         Obtém decisão do ensemble de modelos
@@ -234,6 +259,7 @@ class EnsembleModelManager:
             current_price: Preço atual
             account_balance: Saldo da conta
             strategy_signal: Sinal original ("buy", "sell", None)
+            features: Features já calculadas para a última barra (None = gerar)
             
         Returns:
             EnsembleDecision
@@ -242,10 +268,11 @@ class EnsembleModelManager:
         
         try:
             # 1. Gerar features
-            features = await self.feature_engineer.generate_features(
-                df=market_data,
-                symbol=symbol
-            )
+            if features is None:
+                features = await self.feature_engineer.generate_features(
+                    df=market_data,
+                    symbol=symbol
+                )
             
             # 2. Coletar votos de cada modelo
             votes = await self._collect_votes(
@@ -290,38 +317,22 @@ class EnsembleModelManager:
         current_price: float,
         account_balance: float
     ) -> List[ModelVote]:
-        """Coleta votos de todos os modelos"""
-        votes = []
-        
-        # 1. XGBoost
-        try:
-            xgb_vote = await self._get_xgb_vote(
-                symbol, strategy, features
-            )
-            if xgb_vote:
-                votes.append(xgb_vote)
-        except Exception as e:
-            logger.warning(f"Erro no XGBoost vote: {e}")
-        
-        # 2. LSTM
-        try:
-            lstm_vote = await self._get_lstm_vote(
-                symbol, market_data
-            )
-            if lstm_vote:
-                votes.append(lstm_vote)
-        except Exception as e:
-            logger.warning(f"Erro no LSTM vote: {e}")
+        """Coleta votos de todos os modelos (consultados em paralelo)"""
+        bar = ModelInferenceOrchestrator.bar_key(symbol, market_data)
+        
+        results = await asyncio.gather(
+            self._get_xgb_vote(symbol, strategy, features, bar),
+            self._get_lstm_vote(symbol, market_data, bar),
+            self._get_rl_vote(symbol, features.to_array(), current_price, account_balance, bar),
+            return_exceptions=True
+        )
         
-        # 3. RL Agent
-        try:
-            rl_vote = await self._get_rl_vote(
-                symbol, features.to_array(), current_price, account_balance
-            )
-            if rl_vote:
-                votes.append(rl_vote)
-        except Exception as e:
-            logger.warning(f"Erro no RL vote: {e}")
+        votes = []
+        for name, result in zip(('XGBoost', 'LSTM', 'RL'), results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Erro no {name} vote: {result}")
+            elif result:
+                votes.append(result)
         
         return votes
     
@@ -329,14 +340,14 @@ class EnsembleModelManager:
         self,
         symbol: str,
         strategy: str,
-        features: FeatureSet
+        features: FeatureSet,
+        bar: Tuple
     ) -> Optional[ModelVote]:
         """Obtém voto do XGBoost"""
-        prediction = await self.xgb_predictor.predict(
-            features=features.to_array(),
-            feature_names=features.feature_names,
-            symbol=symbol,
-            strategy=strategy
+        row = features.to_array()
+        prediction = await self.inference.run(
+            'xgboost', (bar, strategy, ModelInferenceOrchestrator.row_key(row)),
+            self.xgb_predictor.predict, row, features.feature_names, symbol, strategy
         )
         
         if prediction.confidence < 0.1:
@@ -383,10 +394,13 @@ class EnsembleModelManager:
     async def _get_lstm_vote(
         self,
         symbol: str,
-        market_data: pd.DataFrame
+        market_data: pd.DataFrame,
+        bar: Tuple
     ) -> Optional[ModelVote]:
         """Obtém voto do LSTM"""
-        prediction = await self.lstm_predictor.predict(symbol, market_data)
+        prediction = await self.inference.run(
+            'lstm', bar, self.lstm_predictor.predict, symbol, market_data
+        )
         
         if prediction.confidence < 0.1:
             return None
@@ -435,10 +449,14 @@ class EnsembleModelManager:
         symbol: str,
         features: np.ndarray,
         current_price: float,
-        account_balance: float
+        account_balance: float,
+        bar: Tuple
     ) -> Optional[ModelVote]:
         """Obtém voto do RL Agent"""
-        decision = await self.rl_agent.decide(
+        decision = await self.inference.run(
+            'rl_agent',
+            (bar, account_balance, self.rl_agent.position_key(symbol), ModelInferenceOrchestrator.row_key(features)),
+            self.rl_agent.decide,
             features, symbol, current_price, account_balance
         )
         
@@ -18,6 +18,7 @@ Autor: Urion Trading Bot
 Versão: 2.0
 """
 
+import math
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -56,6 +57,95 @@ class FeatureSet:
         }
 
 
+@dataclass
+class FeatureMatrix:
+    """Features de todas as barras (uma linha por barra) para treinamento"""
+    timestamps: pd.Index
+    symbol: str
+    values: np.ndarray                # (n_barras, n_features) float32
+    feature_names: List[str]
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame float32 indexado pelo tempo das barras"""
+        return pd.DataFrame(self.values, index=self.timestamps, columns=self.feature_names)
+    
+    def row(self, i: int = -1) -> Dict[str, float]:
+        """Features de uma barra (mesmo formato de FeatureSet.features)"""
+        return {name: float(v) for name, v in zip(self.feature_names, self.values[i])}
+    
+    def feature_set(self, i: int = -1) -> FeatureSet:
+        """FeatureSet de uma barra"""
+        ts = self.timestamps[i]
+        return FeatureSet(
+            timestamp=ts if isinstance(ts, datetime) else datetime.now(),
+            symbol=self.symbol,
+            features=self.row(i),
+            feature_names=self.feature_names
+        )
+
+
+# ============================================
+# COLUNAS VETORIZADAS (todas as barras de uma vez)
+# ============================================
+
+def _rolling(values: np.ndarray, window: int, func) -> np.ndarray:
+    """
+    Aplica func (ex: np.mean) em janelas móveis terminando em cada barra
+    
+    Barras sem janela completa recebem NaN. Usa sliding_window_view: mesma
+    aritmética da versão escalar (func sobre values[-window:]).
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = func(np.lib.stride_tricks.sliding_window_view(values, window), axis=-1)
+    return out
+
+
+def _lag(values: np.ndarray, k: int) -> np.ndarray:
+    """values[t - k] em cada barra (NaN no início)"""
+    out = np.full(len(values), np.nan)
+    if k < len(values):
+        out[k:] = values[:len(values) - k]
+    return out
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray, default: float = 0.0) -> np.ndarray:
+    """num / den com default onde den == 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den != 0, num / den, default)
+
+
+def _ema_column(prices: np.ndarray, period: int) -> np.ndarray:
+    """
+    EMA de todas as barras (mesma definição de _calculate_ema sobre cada prefixo)
+    
+    Semente = média dos primeiros period preços; antes disso, o próprio preço.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    out = prices.copy()
+    if len(prices) < period:
+        return out
+    seeded = prices[period - 1:].copy()
+    seeded[0] = np.mean(prices[:period])
+    out[period - 1:] = pd.Series(seeded).ewm(alpha=2 / (period + 1), adjust=False).mean().to_numpy()
+    return out
+
+
+# Períodos de EMA usados pelas features (MACD 12/26, distâncias 9/21/50/200, tendência 9/21/50)
+EMA_PERIODS = (9, 12, 21, 26, 50, 200)
+
+
+def _obv_column(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """On-Balance Volume acumulado (vetorizado)"""
+    if len(close) == 0:
+        return np.zeros(0)
+    signed = np.sign(np.diff(close)) * volume[1:]
+    return np.concatenate(([volume[0]], volume[0] + np.cumsum(signed))).astype(np.float64)
+
+
 class FeatureCategory(Enum):
     """Categorias de features"""
     PRICE_ACTION = "price_action"
@@ -193,22 +283,7 @@ class AdvancedFeatureEngineer:
         if len(df) < 200:
             logger.warning(f"DataFrame muito curto ({len(df)} barras) - algumas features podem ser incompletas")
         
-        # Garantir que temos as colunas necessárias
-        required_cols = ['open', 'high', 'low', 'close']
-        for col in required_cols:
-            if col not in df.columns:
-                # Tentar encontrar variações de case
-                for c in df.columns:
-                    if c.lower() == col:
-                        df = df.rename(columns={c: col})
-                        break
-                else:
-                    raise ValueError(f"Coluna {col} não encontrada no DataFrame")
-        
-        # Volume opcional
-        has_volume = 'volume' in df.columns or 'tick_volume' in df.columns
-        if 'tick_volume' in df.columns and 'volume' not in df.columns:
-            df['volume'] = df['tick_volume']
+        df, has_volume = self._prepare_dataframe(df)
         
         features = {}
         
@@ -271,6 +346,383 @@ class AdvancedFeatureEngineer:
             feature_names=self.FEATURE_NAMES
         )
     
+    def _prepare_dataframe(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, bool]:
+        """
+        Normaliza nomes das colunas OHLC e a coluna de volume
+        
+        Returns:
+            (DataFrame com open/high/low/close[/volume], tem volume)
+        """
+        # Garantir que temos as colunas necessárias
+        required_cols = ['open', 'high', 'low', 'close']
+        for col in required_cols:
+            if col not in df.columns:
+                # Tentar encontrar variações de case
+                for c in df.columns:
+                    if c.lower() == col:
+                        df = df.rename(columns={c: col})
+                        break
+                else:
+                    raise ValueError(f"Coluna {col} não encontrada no DataFrame")
+        
+        # Volume opcional
+        has_volume = 'volume' in df.columns or 'tick_volume' in df.columns
+        if 'tick_volume' in df.columns and 'volume' not in df.columns:
+            df = df.assign(volume=df['tick_volume'])
+        
+        return df, has_volume
+    
+    # ============================================
+    # MATRIZ DE FEATURES (TODAS AS BARRAS)
+    # ============================================
+    
+    def generate_feature_matrix(
+        self,
+        df: pd.DataFrame,
+        symbol: str = '',
+        macro_context: dict = None
+    ) -> FeatureMatrix:
+        """
+        Gera todas as features para todas as barras de uma vez (treinamento)
+        
+        Cada linha t é igual ao que generate_features retornaria para df.iloc[:t+1]
+        (mesmas regras de histórico mínimo, defaults e normalização), calculado
+        com operações vetorizadas em O(N) em vez de uma chamada por barra.
+        
+        Args:
+            df: DataFrame com OHLCV (open, high, low, close, volume)
+            symbol: Símbolo (features macro)
+            macro_context: Contexto macroeconômico opcional (constante no período)
+            
+        Returns:
+            FeatureMatrix com values float32 (n_barras, len(FEATURE_NAMES))
+        """
+        df, has_volume = self._prepare_dataframe(df)
+        n_bars = len(df)
+        
+        close = df['close'].to_numpy(dtype=np.float64)
+        open_ = df['open'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64) if has_volume else None
+        # Tamanho do histórico disponível em cada barra (len(df) na versão escalar)
+        n = np.arange(1, n_bars + 1)
+        
+        columns = self._matrix_columns(df.index, open_, high, low, close, volume, n)
+        for name, value in self._generate_macro_features(symbol, macro_context).items():
+            columns[name] = np.full(n_bars, value, dtype=np.float64)
+        
+        # Mesma normalização de _normalize_features (NaN/inf -> 0, clip ±10)
+        values = np.empty((n_bars, len(self.FEATURE_NAMES)), dtype=np.float32)
+        for j, name in enumerate(self.FEATURE_NAMES):
+            col = np.asarray(columns.get(name, np.zeros(n_bars)), dtype=np.float64)
+            col = np.where(np.isfinite(col), col, 0.0)
+            values[:, j] = np.clip(col, -10.0, 10.0)
+        
+        return FeatureMatrix(
+            timestamps=df.index,
+            symbol=symbol,
+            values=values,
+            feature_names=list(self.FEATURE_NAMES)
+        )
+    
+    def _matrix_columns(self, index: pd.Index, open_, high, low, close, volume, n,
+                        emas: Dict[int, np.ndarray] = None,
+                        obv: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        Colunas de todas as categorias exceto macro (sem normalização)
+        
+        Args:
+            index: Índice das barras (features de tempo)
+            open_, high, low, close: Arrays float64
+            volume: Array float64 ou None (sem volume)
+            n: Tamanho do histórico disponível em cada barra
+            emas: EMAs por período (EMA_PERIODS) já calculadas; None = calcular sobre close
+            obv: OBV acumulado já calculado; None = calcular sobre close/volume
+        """
+        if emas is None:
+            emas = {period: _ema_column(close, period) for period in EMA_PERIODS}
+        
+        columns: Dict[str, np.ndarray] = {}
+        columns.update(self._matrix_price_action(open_, high, low, close, n))
+        columns.update(self._matrix_technical(high, low, close, n, emas))
+        if volume is not None:
+            columns.update(self._matrix_volume(high, low, close, volume, n, obv))
+        else:
+            for name in self.FEATURE_NAMES:
+                if name.startswith(('volume_', 'obv_', 'mfi', 'vwap_')):
+                    columns[name] = np.zeros(len(close))
+        columns.update(self._matrix_volatility(high, low, close, n))
+        columns.update(self._matrix_time(index))
+        columns.update(self._matrix_structure(high, low, close, n, emas))
+        columns.update(self._matrix_momentum(high, low, close, n))
+        return columns
+    
+    def _matrix_price_action(self, open_, high, low, close, n) -> Dict[str, np.ndarray]:
+        """Colunas de Price Action (ver _generate_price_action_features)"""
+        features = {}
+        
+        for k in (1, 5, 10, 20):
+            prev = _lag(close, k)
+            features[f'returns_{k}bar'] = np.where(n >= k + 1, _safe_div(close - prev, prev), 0.0)
+        
+        range_hl = high - low
+        has_range = range_hl > 0
+        features['high_low_range'] = np.where(has_range, _safe_div(range_hl, close), 0.0)
+        features['body_size'] = np.where(has_range, _safe_div(np.abs(close - open_), range_hl), 0.0)
+        features['upper_wick'] = np.where(has_range, _safe_div(high - np.maximum(open_, close), range_hl), 0.0)
+        features['lower_wick'] = np.where(has_range, _safe_div(np.minimum(open_, close) - low, range_hl), 0.0)
+        features['close_position'] = np.where(has_range, _safe_div(close - low, range_hl), 0.5)
+        
+        prev_close = _lag(close, 1)
+        features['gap_size'] = np.where(n >= 2, _safe_div(open_ - prev_close, prev_close), 0.0)
+        
+        return features
+    
+    def _matrix_technical(self, high, low, close, n, emas) -> Dict[str, np.ndarray]:
+        """Colunas de Indicadores Técnicos (ver _generate_technical_features)"""
+        features = {}
+        
+        # RSI
+        if TALIB_AVAILABLE:
+            features['rsi_14'] = np.where(n >= 15, talib.RSI(close, timeperiod=14) / 100, 0.5)
+            features['rsi_7'] = np.where(n >= 8, talib.RSI(close, timeperiod=7) / 100, 0.5)
+        else:
+            features['rsi_14'] = self._rsi_column(close, 14) / 100
+            features['rsi_7'] = self._rsi_column(close, 7) / 100
+        
+        # MACD (manual: sinal aproximado como na versão escalar)
+        macd_line = np.where(n >= 26, emas[12] - emas[26], 0.0)
+        manual = {'macd_line': macd_line, 'macd_signal': macd_line * 0.9}
+        manual['macd_histogram'] = manual['macd_line'] - manual['macd_signal']
+        if TALIB_AVAILABLE:
+            macd, signal, hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+            lib = {'macd_line': macd, 'macd_signal': signal, 'macd_histogram': hist}
+            for name in manual:
+                manual[name] = np.where(n >= 35, lib[name], manual[name])
+        for name, value in manual.items():
+            features[name] = _safe_div(value, close)
+        
+        # EMAs e distâncias
+        for period in (9, 21, 50, 200):
+            ema = talib.EMA(close, timeperiod=period) if TALIB_AVAILABLE else emas[period]
+            features[f'ema_{period}_dist'] = np.where(n >= period, _safe_div(close - ema, close), 0.0)
+        
+        # Bollinger Bands
+        sma = _rolling(close, self.bb_period, np.mean)
+        std = _rolling(close, self.bb_period, np.std)
+        lower = sma - self.bb_std * std
+        bb_range = (sma + self.bb_std * std) - lower
+        valid = (n >= self.bb_period) & (bb_range > 0)
+        features['bb_position'] = np.where(valid, _safe_div(close - lower, bb_range) * 2 - 1, 0.0)
+        features['bb_width'] = np.where(valid, _safe_div(bb_range, sma), 0.0)
+        
+        # Stochastic (manual: %D = %K)
+        hh_14 = _rolling(high, 14, np.max)
+        ll_14 = _rolling(low, 14, np.min)
+        flat = ~(hh_14 != ll_14)
+        k = np.where((n < 14) | flat, 50.0, _safe_div(close - ll_14, hh_14 - ll_14) * 100)
+        features['stoch_k'] = k / 100
+        features['stoch_d'] = k / 100
+        if TALIB_AVAILABLE:
+            slow_k, slow_d = talib.STOCH(high, low, close, fastk_period=14, slowk_period=3, slowd_period=3)
+            features['stoch_k'] = np.where(n >= 14, np.where(np.isnan(slow_k), 0.5, slow_k / 100), features['stoch_k'])
+            features['stoch_d'] = np.where(n >= 14, np.where(np.isnan(slow_d), 0.5, slow_d / 100), features['stoch_d'])
+        
+        # ADX
+        if TALIB_AVAILABLE:
+            features['adx'] = np.where(n >= 28, talib.ADX(high, low, close, timeperiod=14) / 100, 0.0)
+            features['adx'] = np.where(n >= 14, features['adx'], self._adx_column(high, low, close) / 100)
+        else:
+            features['adx'] = self._adx_column(high, low, close) / 100
+        
+        # CCI
+        if TALIB_AVAILABLE:
+            cci = np.clip(talib.CCI(high, low, close, timeperiod=20) / 200, -1, 1)
+            features['cci'] = np.where(n >= 20, cci, 0.0)
+        else:
+            features['cci'] = np.zeros(len(close))
+        
+        return features
+    
+    def _matrix_volume(self, high, low, close, volume, n, obv=None) -> Dict[str, np.ndarray]:
+        """Colunas de Volume (ver _generate_volume_features)"""
+        features = {}
+        
+        # Volume ratio e tendência (inclinação da regressão nas últimas 10 barras)
+        vol_mean = _rolling(volume, 20, np.mean)
+        enough = n >= 20
+        features['volume_ratio'] = np.where(enough, _safe_div(volume, vol_mean, 1.0), 1.0)
+        x = np.arange(10) - 4.5
+        slope = _rolling(volume, 10, lambda w, axis: (w * x).sum(axis=axis) / 82.5)
+        vol_std = _rolling(volume, 10, np.std)
+        features['volume_trend'] = np.where(enough & (vol_std > 0), _safe_div(slope, vol_mean), 0.0)
+        
+        # OBV
+        if obv is None:
+            obv = _obv_column(close, volume)
+        obv_prev = _lag(obv, 1)
+        obv_change = np.clip(_safe_div(obv - obv_prev, np.abs(obv_prev)), -1, 1)
+        features['obv_change'] = np.where(n >= 2, obv_change, 0.0)
+        
+        # MFI
+        if TALIB_AVAILABLE:
+            mfi = np.where(n >= 14, talib.MFI(high, low, close, volume, timeperiod=14) / 100,
+                           self._mfi_column(high, low, close, volume) / 100)
+        else:
+            mfi = self._mfi_column(high, low, close, volume) / 100
+        features['mfi'] = mfi
+        
+        # VWAP distance (20 barras)
+        typical = (high + low + close) / 3
+        vol_sum = _rolling(volume, 20, np.sum)
+        tpv_sum = _rolling(typical * volume, 20, np.sum)
+        vwap = np.where(vol_sum == 0, close, _safe_div(tpv_sum, vol_sum))
+        features['vwap_dist'] = np.where(enough, _safe_div(close - vwap, close), 0.0)
+        
+        return features
+    
+    def _matrix_volatility(self, high, low, close, n) -> Dict[str, np.ndarray]:
+        """Colunas de Volatilidade (ver _generate_volatility_features)"""
+        features = {}
+        
+        # ATR normalizado
+        atr = self._atr_column(high, low, close)
+        features['atr_14'] = _safe_div(atr, close)
+        features['atr_change'] = np.zeros(len(close))
+        if TALIB_AVAILABLE:
+            lib_atr = talib.ATR(high, low, close, timeperiod=14)
+            lib_prev = _lag(lib_atr, 1)
+            features['atr_14'] = np.where(n >= 14, _safe_div(lib_atr, close), features['atr_14'])
+            features['atr_change'] = np.where(n >= 15, _safe_div(lib_atr - lib_prev, lib_prev), 0.0)
+        
+        # Volatilidade histórica (20 retornos, anualizada)
+        log_returns = np.diff(np.log(close), prepend=np.nan)
+        hist_vol = _rolling(log_returns, 20, np.std) * np.sqrt(252)
+        features['historical_vol'] = np.where(n >= 21, hist_vol, 0.0)
+        
+        # BB Squeeze (BB dentro do Keltner)
+        sma = _rolling(close, 20, np.mean)
+        std = _rolling(close, 20, np.std)
+        bb_width = _safe_div(4 * std, sma)
+        kc_width = _safe_div(4 * (features['atr_14'] * close), sma)
+        features['bb_squeeze'] = np.where((n >= 20) & (bb_width < kc_width), 1.0, 0.0)
+        
+        # Regime: vol atual vs vol de 4 janelas anteriores (19 retornos cada)
+        vol_19 = _rolling(log_returns, 19, np.std) * np.sqrt(252)
+        history = np.column_stack([
+            np.where(n >= i + 21, _lag(vol_19, i + 1), np.nan) for i in (80, 60, 40, 20)
+        ])
+        counts = np.sum(~np.isnan(history), axis=1)
+        with np.errstate(invalid='ignore'):
+            hist_mean = np.nansum(history, axis=1) / np.maximum(counts, 1)
+            hist_std = np.sqrt(np.nansum((history - hist_mean[:, None]) ** 2, axis=1) / np.maximum(counts, 1))
+            z_score = _safe_div(features['historical_vol'] - hist_mean, hist_std)
+        regime = np.where(z_score < -0.5, 0.0, np.where(z_score > 0.5, 2.0, 1.0))
+        regime = np.where((n >= 100) & (counts > 0) & (hist_std > 0), regime, 1.0)
+        features['volatility_regime'] = regime / 2.0
+        
+        return features
+    
+    def _matrix_time(self, index: pd.Index) -> Dict[str, np.ndarray]:
+        """Colunas de Tempo/Sessão (ver _generate_time_features)"""
+        if isinstance(index, pd.DatetimeIndex):
+            hour = index.hour.to_numpy()
+            weekday = index.weekday.to_numpy()
+        else:
+            now = datetime.now()
+            hour = np.full(len(index), now.hour)
+            weekday = np.full(len(index), now.weekday())
+        
+        session_quality = np.select(
+            [(hour >= 12) & (hour < 16), (hour >= 7) & (hour < 21), hour < 9],
+            [1.0, 0.8, 0.5],
+            default=0.3
+        )
+        return {
+            'hour_sin': np.sin(2 * np.pi * hour / 24),
+            'hour_cos': np.cos(2 * np.pi * hour / 24),
+            'day_of_week': weekday / 4,
+            'session_quality': session_quality,
+            'time_to_close': ((21 - hour) % 24) / 24
+        }
+    
+    def _matrix_structure(self, high, low, close, n, emas) -> Dict[str, np.ndarray]:
+        """Colunas de Estrutura de Mercado (ver _generate_structure_features)"""
+        features = {}
+        n_bars = len(close)
+        
+        # Suporte/Resistência: janela min(50, n-1) barras
+        recent_high = _rolling(high, 50, np.max)
+        recent_low = _rolling(low, 50, np.min)
+        if n_bars > 1:
+            # Menos de 51 barras: janela cresce a partir da 2ª barra
+            short = slice(1, min(n_bars, 50))
+            recent_high[short] = np.maximum.accumulate(high[1:50])[:short.stop - 1]
+            recent_low[short] = np.minimum.accumulate(low[1:50])[:short.stop - 1]
+        price_range = recent_high - recent_low
+        valid = (n >= 11) & (price_range > 0)
+        features['resistance_distance'] = np.where(valid, _safe_div(recent_high - close, price_range), 0.5)
+        features['support_distance'] = np.where(valid, _safe_div(close - recent_low, price_range), 0.5)
+        
+        # Força da tendência (EMAs 9/21/50)
+        ema_9, ema_21, ema_50 = emas[9], emas[21], emas[50]
+        trend_score = np.zeros(n_bars)
+        trend_score = trend_score + np.where(close > ema_9, 0.33, 0.0)
+        trend_score = trend_score + np.where(ema_9 > ema_21, 0.33, 0.0)
+        trend_score = trend_score + np.where(ema_21 > ema_50, 0.34, 0.0)
+        bearish = (close < ema_9) & (ema_9 < ema_21) & (ema_21 < ema_50)
+        trend = np.select(
+            [bearish, trend_score > 0.5, trend_score < 0.5],
+            [-1.0, trend_score, trend_score - 1.0],
+            default=0.0
+        )
+        features['trend_strength'] = np.where(n >= 50, trend, 0.0)
+        
+        # Higher Highs / Lower Lows nas 19 comparações anteriores à barra atual
+        higher = np.concatenate(([0.0], (high[1:] > high[:-1]).astype(np.float64)))
+        lower = np.concatenate(([0.0], (low[1:] < low[:-1]).astype(np.float64)))
+        hh_count = _lag(_rolling(higher, 19, np.sum), 1)
+        ll_count = _lag(_rolling(lower, 19, np.sum), 1)
+        features['higher_highs'] = np.where(n >= 21, hh_count / 19, 0.5)
+        features['lower_lows'] = np.where(n >= 21, ll_count / 19, 0.5)
+        
+        return features
+    
+    def _matrix_momentum(self, high, low, close, n) -> Dict[str, np.ndarray]:
+        """Colunas de Momentum (ver _generate_momentum_features)"""
+        features = {}
+        
+        prev_10 = _lag(close, 10)
+        features['momentum_10'] = np.where(n >= 11, _safe_div(close - prev_10, prev_10), 0.0)
+        
+        # Rate of Change
+        features['roc_10'] = features['momentum_10']
+        if TALIB_AVAILABLE:
+            features['roc_10'] = np.where(n >= 11, talib.ROC(close, timeperiod=10) / 100, features['roc_10'])
+        
+        # Williams %R
+        hh_14 = _rolling(high, 14, np.max)
+        ll_14 = _rolling(low, 14, np.min)
+        willr = _safe_div(hh_14 - close, hh_14 - ll_14) * -100
+        features['williams_r'] = np.where((n >= 14) & (hh_14 != ll_14), (willr + 100) / 100, 0.5)
+        if TALIB_AVAILABLE:
+            lib_willr = talib.WILLR(high, low, close, timeperiod=14)
+            features['williams_r'] = np.where(n >= 14, (lib_willr + 100) / 100, 0.5)
+        
+        # TSI simplificado: EMA(25) sobre 25 variações = média simples
+        price_change = np.diff(close, prepend=np.nan)
+        mean_change = _rolling(price_change, 25, np.mean)
+        mean_abs = _rolling(np.abs(price_change), 25, np.mean)
+        features['tsi'] = np.where(n >= 26, _safe_div(mean_change, mean_abs), 0.0)
+        
+        # Awesome Oscillator
+        mid = (high + low) / 2
+        ao = _rolling(mid, 5, np.mean) - _rolling(mid, 34, np.mean)
+        features['ao'] = np.where(n >= 34, _safe_div(ao, close), 0.0)
+        
+        return features
+    
     def _generate_price_action_features(self, df: pd.DataFrame) -> Dict[str, float]:
         """
         Features de Price Action
@@ -689,8 +1141,8 @@ class AdvancedFeatureEngineer:
         else:
             features['trend_strength'] = 0.0
         
-        # Higher Highs / Lower Lows
-        if len(high) >= 20:
+        # Higher Highs / Lower Lows (21 barras: 19 comparações antes da barra atual)
+        if len(high) >= 21:
             # Contar quantos highs consecutivos são maiores que o anterior
             hh_count = 0
             ll_count = 0
@@ -862,11 +1314,11 @@ class AdvancedFeatureEngineer:
         normalized = {}
         
         for name, value in features.items():
-            if value is None or np.isnan(value) or np.isinf(value):
+            if value is None or not math.isfinite(value):
                 normalized[name] = 0.0
             else:
                 # Clipar valores extremos
-                normalized[name] = float(np.clip(value, -10.0, 10.0))
+                normalized[name] = min(max(float(value), -10.0), 10.0)
         
         return normalized
     
@@ -894,16 +1346,10 @@ class AdvancedFeatureEngineer:
     
     def _calculate_ema(self, prices: np.ndarray, period: int) -> float:
         """Calcula EMA manualmente"""
-        if len(prices) < period:
-            return prices[-1] if len(prices) > 0 else 0
-        
-        multiplier = 2 / (period + 1)
-        ema = np.mean(prices[:period])
-        
-        for price in prices[period:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
+        if len(prices) == 0:
+            return 0
         
-        return ema
+        return _ema_column(prices, period)[-1]
     
     def _calculate_macd(self, prices: np.ndarray) -> dict:
         """Calcula MACD manualmente"""
@@ -993,18 +1439,7 @@ class AdvancedFeatureEngineer:
     
     def _calculate_obv(self, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
         """Calcula OBV"""
-        obv = np.zeros(len(close))
-        obv[0] = volume[0]
-        
-        for i in range(1, len(close)):
-            if close[i] > close[i-1]:
-                obv[i] = obv[i-1] + volume[i]
-            elif close[i] < close[i-1]:
-                obv[i] = obv[i-1] - volume[i]
-            else:
-                obv[i] = obv[i-1]
-        
-        return obv
+        return _obv_column(np.asarray(close, dtype=np.float64), np.asarray(volume, dtype=np.float64))
     
     def _calculate_mfi(
         self,
@@ -1056,6 +1491,52 @@ class AdvancedFeatureEngineer:
         
         return np.sum(typical_price * vol) / np.sum(vol)
     
+    # ============================================
+    # VERSÕES VETORIZADAS (uma coluna por indicador)
+    # ============================================
+    
+    def _rsi_column(self, prices: np.ndarray, period: int = 14) -> np.ndarray:
+        """_calculate_rsi para todas as barras"""
+        deltas = np.diff(prices, prepend=np.nan)
+        avg_gain = _rolling(np.where(deltas > 0, deltas, 0.0), period, np.mean)
+        avg_loss = _rolling(np.where(deltas < 0, -deltas, 0.0), period, np.mean)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+        return np.where(np.arange(1, len(prices) + 1) >= period + 1, rsi, 50.0)
+    
+    def _atr_column(self, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    period: int = 14) -> np.ndarray:
+        """_calculate_atr para todas as barras (média dos últimos min(period, n-1) TRs)"""
+        prev_close = _lag(close, 1)
+        tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        atr = _rolling(tr, period, np.mean)
+        # Menos de period+1 barras: média de todos os TRs disponíveis
+        short = min(len(close), period + 1)
+        if short > 1:
+            atr[1:short] = np.cumsum(tr[1:short]) / np.arange(1, short)
+        atr[:1] = 0.0
+        return atr
+    
+    def _adx_column(self, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    period: int = 14) -> np.ndarray:
+        """_calculate_adx para todas as barras"""
+        avg_range = _rolling(high - low, period, np.mean)
+        avg_price = _rolling(close, period, np.mean)
+        adx = np.minimum(100, _safe_div(avg_range, avg_price) * 1000)
+        return np.where((np.arange(1, len(close) + 1) >= period) & (avg_price != 0), adx, 25.0)
+    
+    def _mfi_column(self, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    volume: np.ndarray, period: int = 14) -> np.ndarray:
+        """_calculate_mfi para todas as barras"""
+        typical_price = (high + low + close) / 3
+        money_flow = typical_price * volume
+        rising = typical_price > _lag(typical_price, 1)
+        pos_flow = _rolling(np.where(rising, money_flow, 0.0), period, np.sum)
+        neg_flow = _rolling(np.where(rising, 0.0, money_flow), period, np.sum)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mfi = np.where(neg_flow == 0, 100.0, 100 - (100 / (1 + pos_flow / neg_flow)))
+        return np.where(np.arange(1, len(close) + 1) >= period + 1, mfi, 50.0)
+    
     def get_feature_importance_template(self) -> Dict[str, float]:
         """
         Retorna template de importância de features
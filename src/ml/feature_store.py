@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+STREAMING FEATURE STORE - URION 2.0
+===================================
+Features incrementais por (símbolo, timeframe) para inferência ao vivo
+
+Em vez de recalcular generate_features sobre o DataFrame inteiro a cada sinal,
+cada (símbolo, timeframe) mantém o estado das features e avança uma barra por vez:
+
+- Janela das últimas tail_bars barras (OHLCV): alimenta todas as features de
+  janela finita (price action, volatilidade, momentum, volume, estrutura)
+- EMAs (EMA_PERIODS) e OBV avançados em O(1) por barra fechada, com a mesma
+  definição do caminho em lote (semente = média dos primeiros period preços)
+- Barra em formação (última linha do DataFrame) calculada sobre a janela sem
+  alterar o estado; repetida sem mudança = consulta ao dicionário
+
+Custo por barra nova: O(tail_bars), independente do tamanho do histórico.
+check_consistency() compara com AdvancedFeatureEngineer.generate_features.
+
+Autor: Urion Trading Bot
+Versão: 2.0
+"""
+
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from ml.feature_engineering import (
+    AdvancedFeatureEngineer, FeatureSet, EMA_PERIODS, _ema_column, _obv_column
+)
+
+
+# Histórico mínimo para a última barra ser igual ao caminho em lote
+# (regime de volatilidade: janelas de 19 retornos até 100 barras atrás)
+MIN_TAIL_BARS = 101
+
+# Colunas do buffer de barras
+_OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _OBV = range(6)
+_EMA0 = 6
+_N_COLUMNS = _EMA0 + len(EMA_PERIODS)
+
+
+class StreamingFeatureState:
+    """
+    Estado incremental das features de um (símbolo, timeframe)
+
+    Buffer com 2 * tail_bars linhas: barras novas são escritas em sequência e,
+    quando o buffer enche, as últimas tail_bars são copiadas para o início
+    (custo amortizado O(1) por barra; a janela é sempre uma view contígua).
+    """
+
+    def __init__(self, engineer: AdvancedFeatureEngineer, symbol: str, tail_bars: int = 128):
+        """
+        Args:
+            engineer: Feature engineer (mesmas configurações do caminho em lote)
+            symbol: Símbolo (features macro)
+            tail_bars: Barras mantidas na janela (mínimo MIN_TAIL_BARS)
+        """
+        self.engineer = engineer
+        self.symbol = symbol
+        self.tail_bars = max(int(tail_bars), MIN_TAIL_BARS)
+
+        self.has_volume = False
+        self.count = 0                          # barras fechadas desde o início do histórico
+        self.last_time: Optional[pd.Timestamp] = None
+        self.tz = None
+
+        self._buf = np.zeros((2 * self.tail_bars, _N_COLUMNS))
+        self._times = np.zeros(2 * self.tail_bars, dtype='datetime64[ns]')
+        self._pos = 0                           # próxima linha livre do buffer
+        self._seed_sums = np.zeros(len(EMA_PERIODS))
+        self._obv_hist = np.zeros(0)              # OBV de cada barra fechada (numeração do estado)
+        self._obv_offset = 0.0                    # OBV antes da primeira barra do chamador
+
+        # Barra em formação: (chave da barra, features sem macro)
+        self._pending_key: Optional[Tuple] = None
+        self._pending_features: Optional[Dict[str, float]] = None
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def bootstrap(self, bars: np.ndarray, index: pd.DatetimeIndex):
+        """
+        Inicializa o estado com todas as barras fechadas (O(N) uma única vez)
+
+        Args:
+            bars: Array (N, 5) open/high/low/close/volume; a última linha é a barra em formação
+            index: Tempo das barras
+        """
+        closed = len(bars) - 1
+        close, volume = bars[:closed, _CLOSE], bars[:closed, _VOLUME]
+
+        keep = min(closed, self.tail_bars)
+        start = closed - keep
+        obv = _obv_column(close, volume)
+        block = np.zeros((keep, _N_COLUMNS))
+        block[:, _OPEN:_VOLUME + 1] = bars[start:closed]
+        block[:, _OBV] = obv[start:]
+        for j, period in enumerate(EMA_PERIODS):
+            block[:, _EMA0 + j] = _ema_column(close, period)[start:]
+            self._seed_sums[j] = close[:period].sum()
+
+        self._buf[:keep] = block
+        self._times[:keep] = index[start:closed].to_numpy(dtype='datetime64[ns]')
+        self._pos = keep
+        self._obv_hist = np.concatenate((obv, np.zeros(max(closed, 64))))
+        self._obv_offset = 0.0
+        self.tz = index.tz
+        self.count = closed
+        self.last_time = index[closed - 1]
+        self._pending_key = None
+        self._pending_features = None
+
+    def _stage(self, bar, time: np.datetime64):
+        """Escreve a barra na próxima linha do buffer (sem avançar o estado)"""
+        if self._pos == len(self._buf):
+            self._buf[:self.tail_bars] = self._buf[self._pos - self.tail_bars:self._pos]
+            self._times[:self.tail_bars] = self._times[self._pos - self.tail_bars:self._pos]
+            self._pos = self.tail_bars
+
+        row = self._buf[self._pos]
+        prev = self._buf[self._pos - 1]
+        row[_OPEN:_VOLUME + 1] = bar
+        self._times[self._pos] = time
+
+        n_new = self.count + 1
+        close = row[_CLOSE]
+        row[_OBV] = prev[_OBV] + np.sign(close - prev[_CLOSE]) * row[_VOLUME]
+        for j, period in enumerate(EMA_PERIODS):
+            if n_new < period:
+                row[_EMA0 + j] = close
+            elif n_new == period:
+                row[_EMA0 + j] = (self._seed_sums[j] + close) / period
+            else:
+                alpha = 2 / (period + 1)
+                row[_EMA0 + j] = (1 - alpha) * prev[_EMA0 + j] + alpha * close
+
+    def _commit(self, time: pd.Timestamp):
+        """Confirma a barra escrita por _stage como fechada"""
+        row = self._buf[self._pos]
+        for j, period in enumerate(EMA_PERIODS):
+            if self.count < period:
+                self._seed_sums[j] += row[_CLOSE]
+        if self.count == len(self._obv_hist):
+            self._obv_hist = np.concatenate((self._obv_hist, np.zeros(self.count)))
+        self._obv_hist[self.count] = row[_OBV]
+        self._pos += 1
+        self.count += 1
+        self.last_time = time
+
+    def _staged_features(self) -> Dict[str, float]:
+        """Features (sem macro) da barra escrita por _stage, calculadas só sobre a janela"""
+        end = self._pos + 1
+        window = self._buf[max(0, end - self.tail_bars - 1):end]
+        n = np.arange(self.count + 2 - len(window), self.count + 2)
+        emas = {period: window[:, _EMA0 + j] for j, period in enumerate(EMA_PERIODS)}
+        index = pd.DatetimeIndex(self._times[end - len(window):end])
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+
+        columns = self.engineer._matrix_columns(
+            index,
+            window[:, _OPEN], window[:, _HIGH], window[:, _LOW], window[:, _CLOSE],
+            window[:, _VOLUME] if self.has_volume else None,
+            n, emas=emas, obv=window[:, _OBV] - self._obv_offset
+        )
+        return {name: float(col[-1]) for name, col in columns.items()}
+
+    # ------------------------------------------------------------------
+    # Sincronização com o DataFrame do chamador
+    # ------------------------------------------------------------------
+
+    def update(self, bars: np.ndarray, index: pd.DatetimeIndex,
+               has_volume: bool) -> Tuple[Dict[str, float], str]:
+        """
+        Avança o estado até a última barra
+
+        Barras anteriores à última são fechadas (avançam o estado);
+        a última é a barra em formação.
+
+        Args:
+            bars: Array (N, 5) open/high/low/close/volume (volume zerado se ausente)
+            index: Tempo das barras
+            has_volume: Se o DataFrame tem volume
+
+        Returns:
+            (features sem macro da última barra, origem: 'bootstrap' | 'advance' | 'pending' | 'lookup')
+        """
+        last = len(bars) - 1
+        loc = None
+        if self.last_time is not None and has_volume == self.has_volume and index.tz == self.tz:
+            try:
+                loc = index.get_loc(self.last_time)
+            except KeyError:
+                loc = None
+            # Histórico revisado: recomeçar
+            if loc is not None and bars[loc, _CLOSE] != self._buf[self._pos - 1, _CLOSE]:
+                loc = None
+
+        # Primeira barra do chamador na numeração do estado (OBV é acumulado desde ela)
+        first = self.count - 1 - loc if loc is not None else -1
+        if loc is None or first < 0 or loc >= last or last - loc > self.tail_bars:
+            self.has_volume = has_volume
+            self.bootstrap(bars, index)
+            origin = 'bootstrap'
+        else:
+            origin = 'advance' if last - loc > 1 else 'pending'
+            self._obv_offset = self._obv_hist[first] - bars[0, _VOLUME]
+            for i in range(loc + 1, last):
+                self._stage(bars[i], index[i].to_datetime64())
+                self._commit(index[i])
+            if origin == 'advance':
+                self._pending_key = None
+
+        key = (index[last], *bars[last].tolist(), self._obv_offset)
+        if key == self._pending_key:
+            return self._pending_features, 'lookup'
+
+        self._stage(bars[last], index[last].to_datetime64())
+        self._pending_key = key
+        self._pending_features = self._staged_features()
+        return self._pending_features, origin
+
+
+class StreamingFeatureStore:
+    """
+    Features incrementais por (símbolo, timeframe)
+
+    get_features() devolve o mesmo FeatureSet de generate_features(df) para a
+    última barra de df, avançando apenas as barras novas desde a chamada anterior.
+    DataFrames sem DatetimeIndex (sem como alinhar barras) usam o caminho em lote.
+    Thread-safe: estados e contadores protegidos por um lock.
+    """
+
+    def __init__(self, engineer: AdvancedFeatureEngineer, tail_bars: int = 128,
+                 tolerance: float = 1e-4):
+        """
+        Args:
+            engineer: Feature engineer usado também pelo caminho em lote
+            tail_bars: Barras mantidas por (símbolo, timeframe)
+            tolerance: Diferença máxima aceita em check_consistency
+        """
+        self.engineer = engineer
+        self.tail_bars = tail_bars
+        self.tolerance = tolerance
+        self._states: Dict[Tuple[str, Hashable], StreamingFeatureState] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'lookups': 0,
+            'advances': 0,
+            'pending_updates': 0,
+            'bootstraps': 0,
+            'batch_fallbacks': 0,
+            'consistency_checks': 0,
+            'consistency_failures': 0
+        }
+
+    @staticmethod
+    def _ohlcv(df: pd.DataFrame) -> Tuple[np.ndarray, bool]:
+        """
+        Array (N, 5) open/high/low/close/volume com as mesmas regras de colunas
+        de _prepare_dataframe, sem copiar o DataFrame
+
+        Returns:
+            (array float64, tem volume)
+        """
+        columns = []
+        for col in ('open', 'high', 'low', 'close'):
+            if col not in df.columns:
+                match = next((c for c in df.columns if c.lower() == col), None)
+                if match is None:
+                    raise ValueError(f"Coluna {col} não encontrada no DataFrame")
+                col = match
+            columns.append(col)
+        volume = 'volume' if 'volume' in df.columns else 'tick_volume' if 'tick_volume' in df.columns else None
+
+        bars = np.zeros((len(df), 5))
+        for j, col in enumerate(columns + ([volume] if volume is not None else [])):
+            bars[:, j] = df[col].to_numpy(dtype=np.float64)
+        return bars, volume is not None
+
+    @staticmethod
+    def infer_timeframe(df: pd.DataFrame) -> Hashable:
+        """Timeframe pelo espaçamento das duas últimas barras (ex: '3600s')"""
+        if len(df) < 2:
+            return None
+        return f"{int((df.index[-1] - df.index[-2]).total_seconds())}s"
+
+    def get_features(self, df: pd.DataFrame, symbol: str, timeframe: Hashable = None,
+                     macro_context: dict = None) -> Optional[FeatureSet]:
+        """
+        Features da última barra de df
+
+        Args:
+            df: DataFrame OHLCV com DatetimeIndex (última linha = barra em formação)
+            symbol: Símbolo
+            timeframe: Timeframe dos dados (None = inferido pelo índice)
+            macro_context: Contexto macroeconômico opcional (aplicado a cada chamada)
+
+        Returns:
+            FeatureSet ou None se df não puder ser processado em streaming
+        """
+        if not isinstance(df.index, pd.DatetimeIndex) or len(df) < 2 or not df.index.is_unique:
+            with self._lock:
+                self.stats['batch_fallbacks'] += 1
+            return None
+
+        bars, has_volume = self._ohlcv(df)
+        if timeframe is None:
+            timeframe = self.infer_timeframe(df)
+
+        key = (symbol, timeframe)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = StreamingFeatureState(self.engineer, symbol, self.tail_bars)
+
+            features, origin = state.update(bars, df.index, has_volume)
+            self.stats[{'lookup': 'lookups', 'advance': 'advances',
+                        'pending': 'pending_updates', 'bootstrap': 'bootstraps'}[origin]] += 1
+
+        features = dict(features)
+        features.update(self.engineer._generate_macro_features(symbol, macro_context))
+        features = self.engineer._normalize_features(features)
+
+        return FeatureSet(
+            timestamp=df.index[-1],
+            symbol=symbol,
+            features=features,
+            feature_names=self.engineer.FEATURE_NAMES
+        )
+
+    async def check_consistency(self, df: pd.DataFrame, symbol: str, timeframe: Hashable = None,
+                                macro_context: dict = None) -> Dict:
+        """
+        Compara as features em streaming com generate_features(df) (caminho em lote)
+
+        EMAs têm memória infinita: se a janela do chamador desliza, o caminho em
+        lote recomeça a semente a cada chamada e pode divergir levemente em
+        históricos curtos. Divergência acima da tolerância descarta o estado.
+
+        Returns:
+            Dict com consistent, max_abs_diff e mismatches (nome -> (streaming, lote))
+        """
+        streamed = self.get_features(df, symbol, timeframe, macro_context)
+        if streamed is None:
+            return {'consistent': True, 'max_abs_diff': 0.0, 'mismatches': {}}
+
+        batch = await self.engineer.generate_features(df, symbol, macro_context)
+        mismatches = {}
+        max_diff = 0.0
+        for name in self.engineer.FEATURE_NAMES:
+            a = streamed.features.get(name, 0.0)
+            b = batch.features.get(name, 0.0)
+            diff = abs(a - b)
+            max_diff = max(max_diff, diff)
+            if diff > self.tolerance * max(1.0, abs(b)):
+                mismatches[name] = (a, b)
+
+        with self._lock:
+            self.stats['consistency_checks'] += 1
+            if mismatches:
+                self.stats['consistency_failures'] += 1
+        if mismatches:
+            logger.warning(
+                f"Features em streaming divergem do lote para {symbol}: {sorted(mismatches)} "
+                f"(máx {max_diff:.2e}) - estado reiniciado"
+            )
+            self.reset(symbol)
+
+        return {'consistent': not mismatches, 'max_abs_diff': max_diff, 'mismatches': mismatches}
+
+    def reset(self, symbol: Optional[str] = None):
+        """Descarta o estado (todos ou de um símbolo)"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                for key in [k for k in self._states if k[0] == symbol]:
+                    del self._states[key]
+
+    def get_stats(self) -> Dict:
+        """Contadores de consulta/avanço e taxa de consulta direta"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['streams'] = len(self._states)
+        calls = stats['lookups'] + stats['advances'] + stats['pending_updates'] + stats['bootstraps']
+        stats['lookup_rate'] = stats['lookups'] / calls if calls else 0.0
+        return stats
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+INCREMENTAL BOOSTING - URION 2.0 ELITE
+======================================
+Retreino incremental de modelos XGBoost (warm start sobre o booster existente)
+
+Antes: cada retreino refazia o modelo do zero com todo o histórico.
+Agora o retreino continua o boosting (xgb_model=) só com as amostras novas,
+e o refit completo fica para:
+- Agenda: a cada full_refit_every atualizações ou full_refit_days dias
+- Drift de features: média das amostras novas a mais de drift_feature_shift
+  desvios da média do treino completo (desvio com piso: colunas constantes no
+  treino não disparam refit a qualquer variação)
+- Drift de performance: AUC do modelo atual nas amostras novas (ainda não
+  vistas) abaixo da AUC de validação do refit menos drift_auc_drop
+
+Treino com tree_method='hist' e QuantileDMatrix: a matriz quantizada do refit
+fica em cache e serve de referência (mesmos bins) para as amostras novas.
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    xgb = None
+    XGBOOST_AVAILABLE = False
+
+# Parâmetros do XGBClassifier que não existem / têm outro nome na API nativa
+_SKLEARN_ONLY_PARAMS = ('n_estimators', 'use_label_encoder', 'early_stopping_rounds', 'importance_type')
+
+
+def binary_auc(y_true: np.ndarray, scores: np.ndarray) -> float:
+    """ROC AUC (Mann-Whitney com ranks médios em empates); nan se só há uma classe"""
+    y_true = np.asarray(y_true).astype(bool)
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float('nan')
+
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(scores, kind='mergesort')
+    sorted_scores = scores[order]
+    ranks = np.empty(len(scores))
+    # Rank médio por grupo de empate
+    boundaries = np.flatnonzero(np.diff(sorted_scores)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(scores)]))
+    ranks[order] = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+
+    return float((ranks[y_true].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def native_params(params: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Converte parâmetros do XGBClassifier para xgb.train: (params, num_boost_round)"""
+    native = {k: v for k, v in params.items() if k not in _SKLEARN_ONLY_PARAMS}
+    if 'random_state' in native:
+        native['seed'] = native.pop('random_state')
+    if 'n_jobs' in native:
+        n_jobs = native.pop('n_jobs')
+        if n_jobs is not None and n_jobs > 0:
+            native['nthread'] = n_jobs
+    native.setdefault('objective', 'binary:logistic')
+    native['tree_method'] = 'hist'
+    return native, int(params.get('n_estimators', 100))
+
+
+class BoosterClassifier:
+    """
+    Booster binário com a interface usada pelos preditores
+
+    predict_proba / predict / feature_importances_ como no XGBClassifier,
+    sobre um xgb.Booster treinado pela API nativa.
+    """
+
+    def __init__(self, booster, n_features: int):
+        self._booster = booster
+        self.n_features_in_ = n_features
+
+    def get_booster(self):
+        return self._booster
+
+    @property
+    def n_trees(self) -> int:
+        return self._booster.num_boosted_rounds()
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        p = self._booster.inplace_predict(X)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        """Ganho total por feature normalizado (importance_type='total_gain' do sklearn)"""
+        scores = self._booster.get_score(importance_type='total_gain')
+        importances = np.zeros(self.n_features_in_, dtype=np.float32)
+        for name, value in scores.items():
+            index = int(name[1:]) if name.startswith('f') and name[1:].isdigit() else None
+            if index is not None and index < self.n_features_in_:
+                importances[index] = value
+        total = importances.sum()
+        return importances / total if total > 0 else importances
+
+
+@dataclass
+class BoostingState:
+    """Estado de retreino de um modelo (salvo junto com o modelo)"""
+    trained_rows: int = 0                      # Linhas do histórico já vistas pelo modelo
+    reference_mean: Optional[np.ndarray] = None
+    reference_std: Optional[np.ndarray] = None
+    reference_auc: float = float('nan')        # AUC de validação do último refit
+    updates_since_full: int = 0
+    last_full_fit: datetime = field(default_factory=datetime.now)
+    last_mode: str = 'full'
+    last_reason: str = ''
+
+
+class IncrementalBoostingTrainer:
+    """
+    Refit completo / atualização incremental de boosters por chave de modelo
+
+    O chamador decide as linhas: refit recebe treino/validação, update recebe
+    só as amostras novas (desde state.trained_rows).
+    """
+
+    def __init__(self, config: Dict = None):
+        """
+        Args:
+            config: incremental_rounds, full_refit_every, full_refit_days,
+                drift_feature_shift, drift_auc_drop, min_drift_samples, max_bin,
+                drift_min_std, drift_min_std_rel (piso do desvio: abs + rel * |média|)
+        """
+        config = config or {}
+        self.incremental_rounds = config.get('incremental_rounds', 20)
+        self.full_refit_every = config.get('full_refit_every', 10)
+        self.full_refit_days = config.get('full_refit_days', 30)
+        self.drift_feature_shift = config.get('drift_feature_shift', 1.0)
+        self.drift_min_std = config.get('drift_min_std', 0.01)
+        self.drift_min_std_rel = config.get('drift_min_std_rel', 0.05)
+        self.drift_auc_drop = config.get('drift_auc_drop', 0.05)
+        self.min_drift_samples = config.get('min_drift_samples', 30)
+        self.max_bin = config.get('max_bin', 256)
+
+        self.states: Dict[str, BoostingState] = {}
+        # QuantileDMatrix do último refit (referência de bins), só em memória
+        self._dmatrix_cache: Dict[str, Any] = {}
+
+        self.stats = {
+            'full_refits': 0,
+            'incremental_updates': 0,
+            'refit_reasons': {},
+            'full_time_ms': 0.0,
+            'incremental_time_ms': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Decisão
+    # ------------------------------------------------------------------
+
+    def refit_reason(self, key: str, model: Any, X_new: np.ndarray,
+                     y_new: np.ndarray) -> Optional[str]:
+        """Motivo para refit completo ou None se a atualização incremental serve"""
+        state = self.states.get(key)
+        if model is None or state is None or state.reference_mean is None:
+            return 'no_model'
+        if X_new.shape[1] != len(state.reference_mean):
+            return 'features_changed'
+        if state.updates_since_full >= self.full_refit_every:
+            return 'schedule'
+        if (datetime.now() - state.last_full_fit).days >= self.full_refit_days:
+            return 'age'
+        if len(X_new) < self.min_drift_samples:
+            return None
+
+        # Drift de features (média das novas em desvios do treino; piso para colunas ~constantes)
+        scale = np.maximum(
+            state.reference_std,
+            self.drift_min_std_rel * np.abs(state.reference_mean) + self.drift_min_std
+        )
+        shift = np.abs(X_new.mean(axis=0) - state.reference_mean) / scale
+        if np.nanmax(shift) > self.drift_feature_shift:
+            return 'feature_drift'
+
+        # Drift de performance (amostras novas ainda não vistas pelo modelo)
+        auc = binary_auc(y_new, model.predict_proba(X_new)[:, 1])
+        if not np.isnan(auc) and not np.isnan(state.reference_auc):
+            if auc < state.reference_auc - self.drift_auc_drop:
+                return 'auc_drift'
+        return None
+
+    # ------------------------------------------------------------------
+    # Treino
+    # ------------------------------------------------------------------
+
+    def refit(self, key: str, params: Dict[str, Any], X_train: np.ndarray, y_train: np.ndarray,
+              X_val: np.ndarray, y_val: np.ndarray, trained_rows: int,
+              reason: str = 'no_model') -> Tuple[BoosterClassifier, BoostingState]:
+        """Treino completo com hist; guarda a matriz quantizada como referência de bins"""
+        start = time.perf_counter()
+        native, rounds = native_params(params)
+        native.setdefault('max_bin', self.max_bin)
+
+        X_train = np.asarray(X_train, dtype=np.float32)
+        dtrain = xgb.QuantileDMatrix(X_train, y_train, max_bin=native['max_bin'])
+        dval = xgb.QuantileDMatrix(np.asarray(X_val, dtype=np.float32), y_val, ref=dtrain)
+        booster = xgb.train(native, dtrain, num_boost_round=rounds,
+                            evals=[(dval, 'validation')], verbose_eval=False)
+        model = BoosterClassifier(booster, X_train.shape[1])
+
+        state = BoostingState(
+            trained_rows=trained_rows,
+            reference_mean=X_train.mean(axis=0),
+            reference_std=X_train.std(axis=0),
+            reference_auc=binary_auc(y_val, model.predict_proba(X_val)[:, 1]),
+            last_reason=reason
+        )
+        self.states[key] = state
+        self._dmatrix_cache[key] = dtrain
+
+        self.stats['full_refits'] += 1
+        self.stats['refit_reasons'][reason] = self.stats['refit_reasons'].get(reason, 0) + 1
+        self.stats['full_time_ms'] += (time.perf_counter() - start) * 1000
+        return model, state
+
+    def update(self, key: str, params: Dict[str, Any], model: Any, X_new: np.ndarray,
+               y_new: np.ndarray, trained_rows: int) -> Tuple[BoosterClassifier, BoostingState]:
+        """Continua o boosting do modelo atual com incremental_rounds árvores nas amostras novas"""
+        start = time.perf_counter()
+        native, _ = native_params(params)
+        native.setdefault('max_bin', self.max_bin)
+
+        X_new = np.asarray(X_new, dtype=np.float32)
+        ref = self._dmatrix_cache.get(key)
+        if ref is not None:
+            dnew = xgb.QuantileDMatrix(X_new, y_new, ref=ref)
+        else:
+            dnew = xgb.QuantileDMatrix(X_new, y_new, max_bin=native['max_bin'])
+        booster = xgb.train(native, dnew, num_boost_round=self.incremental_rounds,
+                            xgb_model=model.get_booster(), verbose_eval=False)
+
+        state = self.states[key]
+        state.trained_rows = trained_rows
+        state.updates_since_full += 1
+        state.last_mode = 'incremental'
+        state.last_reason = ''
+
+        self.stats['incremental_updates'] += 1
+        self.stats['incremental_time_ms'] += (time.perf_counter() - start) * 1000
+        return BoosterClassifier(booster, X_new.shape[1]), state
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'refit_reasons': dict(self.stats['refit_reasons']),
+            'models': len(self.states)
+        }
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+MODEL INFERENCE ORCHESTRATOR - URION 2.0 ELITE
+==============================================
+Execução concorrente das inferências (XGBoost, LSTM, RL) fora do event loop
+
+- predict do TensorFlow / XGBoost é bloqueante: roda num pool de threads
+  (as bibliotecas liberam o GIL; modelos não são serializáveis para processos)
+- Prazo por modelo: quem espera recebe TimeoutError e o pipeline segue sem o
+  modelo; a chamada termina no pool e, se concluir, alimenta o memo
+- Prazo absoluto por chamada em andamento: quem chega depois espera só o que
+  resta (ou falha na hora), então um modelo travado custa um prazo por sinal
+- Memo por (modelo, barra): o ensemble reutiliza o que o pipeline já calculou;
+  chamadas simultâneas com a mesma chave compartilham a mesma execução
+- Geração por modelo: resultados de chamadas iniciadas antes de invalidate()
+  (ex: retreino) não entram no memo
+- Histograma de latência por modelo
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.mt5_io import LatencyHistogram
+
+
+class ModelInferenceOrchestrator:
+    """
+    Orquestrador de inferência de modelos ML
+
+    run(model, key, func, *args) executa func no pool com o prazo do modelo e
+    guarda o resultado em memo[(model, key)] (LRU com memo_size entradas).
+    """
+
+    def __init__(self, max_workers: int = 3, deadlines: Dict[str, float] = None,
+                 default_deadline: float = 2.0, memo_size: int = 512):
+        """
+        Args:
+            max_workers: Inferências simultâneas
+            deadlines: Prazo em segundos por modelo (ex: {'lstm': 1.5})
+            default_deadline: Prazo para modelos sem entrada em deadlines
+            memo_size: Resultados mantidos no memo
+        """
+        self.max_workers = max_workers
+        self.deadlines = dict(deadlines or {})
+        self.default_deadline = default_deadline
+        self.memo_size = memo_size
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inference')
+        self._memo: 'OrderedDict[Tuple[str, Hashable], Any]' = OrderedDict()
+        # (modelo, chave) -> (execução, instante em que o prazo vence - time.monotonic)
+        self._inflight: Dict[Tuple[str, Hashable], Tuple[Future, float]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'calls': 0,
+            'memo_hits': 0,
+            'shared_inflight': 0,
+            'executed': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'expired_inflight': 0,
+            'stale_discarded': 0
+        }
+        self._latency: Dict[str, LatencyHistogram] = {}
+
+    @staticmethod
+    def bar_key(symbol: str, df: pd.DataFrame) -> Tuple:
+        """
+        Chave da barra: (símbolo, tempo da última barra, último close)
+
+        O close entra na chave para que um tick novo na barra em formação
+        não reutilize previsões feitas com o preço anterior.
+        """
+        if df is None or len(df) == 0:
+            return (symbol, None, None)
+        close = df['close'] if 'close' in df.columns else df.iloc[:, 3]
+        return (symbol, df.index[-1], float(close.iat[-1]))
+
+    @staticmethod
+    def row_key(features) -> int:
+        """
+        Hash do vetor de features da chamada
+
+        Entra na chave dos modelos que recebem features: a mesma barra com
+        features diferentes (ex: contexto macro novo) não reutiliza a previsão.
+        """
+        return hash(np.ascontiguousarray(features, dtype=np.float64).tobytes())
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _invoke(func: Callable, args: tuple, kwargs: dict) -> Any:
+        """Executa func no worker (corrotinas rodam num loop próprio da thread)"""
+        if asyncio.iscoroutinefunction(func):
+            return asyncio.run(func(*args, **kwargs))
+        return func(*args, **kwargs)
+
+    def _finished(self, memo_key: Tuple[str, Hashable], generation: int, started: float,
+                  future: Future):
+        """Callback de conclusão: latência, memo e remoção de em andamento"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if self._inflight.get(memo_key, (None,))[0] is future:
+                del self._inflight[memo_key]
+            hist = self._latency.get(memo_key[0])
+            if hist is None:
+                hist = self._latency[memo_key[0]] = LatencyHistogram()
+            hist.add(elapsed_ms)
+            if future.cancelled() or future.exception() is not None:
+                self.stats['errors'] += 1
+                return
+            if generation != self._generations.get(memo_key[0], 0):
+                # Iniciada antes de invalidate(): resultado do modelo antigo
+                self.stats['stale_discarded'] += 1
+                return
+            self._memo[memo_key] = future.result()
+            self._memo.move_to_end(memo_key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    async def run(self, model: str, key: Hashable, func: Callable, *args,
+                  deadline: Optional[float] = None, **kwargs) -> Any:
+        """
+        Resultado de func(*args, **kwargs) para (model, key), do memo ou do pool
+
+        Args:
+            model: Nome do modelo (prazo e métricas)
+            key: Chave da entrada (ex: bar_key + estratégia)
+            func: Função ou corrotina de inferência
+            deadline: Prazo em segundos (None = prazo do modelo)
+
+        Raises:
+            TimeoutError: Prazo vencido (a execução continua no pool); para uma
+                execução compartilhada, vale o prazo de quem a iniciou
+            Exception: Exceção levantada por func
+        """
+        memo_key = (model, key)
+        timeout = deadline if deadline is not None else self.deadlines.get(model, self.default_deadline)
+        with self._lock:
+            self.stats['calls'] += 1
+            if memo_key in self._memo:
+                self.stats['memo_hits'] += 1
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key]
+            now = time.monotonic()
+            submitted = memo_key not in self._inflight
+            if submitted:
+                self.stats['executed'] += 1
+                started = time.perf_counter()
+                generation = self._generations.get(model, 0)
+                future = self._executor.submit(self._invoke, func, args, kwargs)
+                expires_at = now + timeout
+                self._inflight[memo_key] = (future, expires_at)
+            else:
+                self.stats['shared_inflight'] += 1
+                future, expires_at = self._inflight[memo_key]
+                # Prazo da execução compartilhada: espera só o que resta dele
+                timeout = min(timeout, expires_at - now)
+                if timeout <= 0 and not future.done():
+                    # Quem iniciou já esperou o prazo inteiro: falha sem nova espera
+                    self.stats['expired_inflight'] += 1
+                    raise TimeoutError(f"Prazo vencido na inferência {model} (execução em andamento)")
+
+        if submitted:
+            # Fora do lock: o callback roda na hora se a chamada já terminou
+            future.add_done_callback(lambda f: self._finished(memo_key, generation, started, f))
+        elif future.done():
+            return future.result()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise TimeoutError(f"Prazo ({timeout:.3g}s) vencido na inferência {model}")
+
+    def invalidate(self, model: Optional[str] = None):
+        """
+        Descarta o memo (todos ou de um modelo) - ex: após retreinar
+
+        Chamadas em andamento do modelo deixam de ser compartilhadas e seus
+        resultados não entram no memo (geração antiga).
+        """
+        with self._lock:
+            models = {k[0] for k in self._memo} | {k[0] for k in self._inflight} | set(self._generations)
+            if model is not None:
+                models = {model}
+            for name in models:
+                self._generations[name] = self._generations.get(name, 0) + 1
+            for cache in (self._memo, self._inflight):
+                for memo_key in [k for k in cache if k[0] in models]:
+                    del cache[memo_key]
+
+    def get_stats(self) -> Dict:
+        """Contadores, taxa de acerto do memo e latência por modelo"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memo_entries'] = len(self._memo)
+            stats['inflight'] = len(self._inflight)
+            stats['models'] = {model: hist.as_dict() for model, hist in self._latency.items()}
+        stats['memo_hit_rate'] = stats['memo_hits'] / stats['calls'] if stats['calls'] else 0.0
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Encerra o pool"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+INFERENCE RUNTIME - URION 2.0 ELITE
+===================================
+Caminho de inferência de baixa latência para uma amostra (LSTM, RL, Transformer)
+
+model.predict(X, verbose=0) monta um data adapter, um loop de steps e
+callbacks a cada chamada - custo fixo alto para uma única amostra, e a
+decisão ML fica no caminho crítico do envio de ordens.
+
+- Keras: chamada compilada com tf.function (assinatura fixa, traçada uma vez)
+- PyTorch: TorchScript (trace + freeze) em inference_mode
+- Buffer de entrada pré-alocado: a amostra é copiada, sem novos arrays
+- Exportação opcional para TFLite / ONNX Runtime (CPU); se a exportação
+  falhar ou a dependência não existir, cai para o caminho compilado
+- benchmark_latency(): p50/p99 por modelo (scripts/benchmark_inference.py)
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+import io
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from core.mt5_io import LatencyHistogram
+
+try:
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+
+def _as_list(outputs: Any) -> List[Any]:
+    """Saídas do modelo como lista (modelos multi-saída retornam lista/tupla)"""
+    if isinstance(outputs, dict):
+        return list(outputs.values())
+    if isinstance(outputs, (list, tuple)):
+        return list(outputs)
+    return [outputs]
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    if hasattr(value, 'numpy'):
+        return value.numpy()
+    return np.asarray(value)
+
+
+def benchmark_latency(fn: Callable[[], Any], iterations: int = 500, warmup: int = 50) -> Dict[str, float]:
+    """
+    Latência de fn() em ms (percentis exatos)
+
+    Args:
+        fn: Chamada a medir (sem argumentos)
+        iterations: Chamadas medidas
+        warmup: Chamadas descartadas (trace, alocações, caches)
+    """
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples[i] = (time.perf_counter() - start) * 1000
+    return {
+        'iterations': iterations,
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'min_ms': float(samples.min()),
+        'max_ms': float(samples.max())
+    }
+
+
+class _RuntimeBase:
+    """Seleção de backend com fallback, lock do buffer e métricas"""
+
+    BACKENDS: Tuple[str, ...] = ()
+    FALLBACK: Tuple[str, ...] = ()
+
+    def __init__(self, name: str):
+        self.name = name
+        self.backend = None
+        self._lock = threading.Lock()
+        self._latency = LatencyHistogram()
+        self.stats = {
+            'calls': 0,
+            'batch_calls': 0,
+            'fallbacks': 0
+        }
+
+    def _select_backend(self, requested: str) -> str:
+        """Constrói o backend pedido ou o primeiro do fallback que funcionar"""
+        if requested not in self.BACKENDS:
+            raise ValueError(f"Backend inválido: {requested} (opções: {', '.join(self.BACKENDS)})")
+
+        for backend in dict.fromkeys((requested,) + self.FALLBACK):
+            try:
+                getattr(self, f'_build_{backend}')()
+                return backend
+            except Exception as e:
+                self.stats['fallbacks'] += 1
+                logger.warning(f"Inferência {self.name}: backend {backend} indisponível ({e})")
+        raise RuntimeError(f"Nenhum backend de inferência disponível para {self.name}")
+
+    def _record(self, start: float):
+        self._latency.add((time.perf_counter() - start) * 1000)
+        self.stats['calls'] += 1
+
+    def get_stats(self) -> Dict:
+        """Backend, contadores e latência das chamadas de uma amostra"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['latency'] = self._latency.as_dict()
+        stats['name'] = self.name
+        stats['backend'] = self.backend
+        return stats
+
+
+# ═══════════════════════════════════════════════════════════
+# KERAS / TENSORFLOW
+# ═══════════════════════════════════════════════════════════
+
+class KerasInferenceRuntime(_RuntimeBase):
+    """
+    Inferência de um modelo Keras
+
+    predict(sample) recebe uma amostra sem a dimensão de batch e retorna a
+    lista de saídas (uma por cabeça do modelo), cada uma com batch 1 - mesma
+    indexação de model.predict para modelos multi-saída.
+
+    Backends:
+        compiled: tf.function sobre model(x, training=False); lê as variáveis
+            do modelo, então treino e set_weights valem na hora
+        tflite / onnx: exportação dos pesos atuais (retrato); refresh() após
+            alterar os pesos
+        eager: model(x, training=False) sem compilação
+    """
+
+    BACKENDS = ('compiled', 'tflite', 'onnx', 'eager')
+    FALLBACK = ('compiled', 'eager')
+
+    def __init__(self, model: Any, input_shape: Sequence[int], backend: str = 'compiled',
+                 name: str = 'keras'):
+        """
+        Args:
+            model: Modelo Keras
+            input_shape: Formato de uma amostra (sem batch)
+            backend: compiled | tflite | onnx | eager
+            name: Nome para logs e métricas
+        """
+        super().__init__(name)
+        self.model = model
+        self.input_shape = tuple(input_shape)
+        self.requested_backend = backend
+
+        self._buffer = np.zeros((1,) + self.input_shape, dtype=np.float32)
+        self._compiled = None
+        self._single: Callable[[np.ndarray], List[np.ndarray]] = None
+        self.backend = self._select_backend(backend)
+
+    # ------------------------------------------------------------------
+    # Backends
+    # ------------------------------------------------------------------
+
+    def _build_compiled(self):
+        if not TENSORFLOW_AVAILABLE:
+            raise RuntimeError('TensorFlow não disponível')
+        model = self.model
+        spec = tf.TensorSpec((None,) + self.input_shape, tf.float32)
+        compiled = tf.function(lambda x: model(x, training=False), input_signature=[spec])
+        compiled(self._buffer)  # traça agora, fora do caminho crítico
+        self._compiled = compiled
+        self._single = self._run_compiled
+
+    def _build_tflite(self):
+        if not TENSORFLOW_AVAILABLE:
+            raise RuntimeError('TensorFlow não disponível')
+        model = self.model
+        n_outputs = len(_as_list(model.outputs)) if getattr(model, 'outputs', None) else 1
+        keys = [f'output_{i}' for i in range(n_outputs)]
+        spec = tf.TensorSpec((1,) + self.input_shape, tf.float32, name='x')
+
+        @tf.function(input_signature=[spec])
+        def serving(x):
+            return dict(zip(keys, _as_list(model(x, training=False))))
+
+        converter = tf.lite.TFLiteConverter.from_concrete_functions(
+            [serving.get_concrete_function()], model
+        )
+        # LSTM pode precisar de ops do TF além das builtins
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS
+        ]
+        interpreter = tf.lite.Interpreter(model_content=converter.convert(), num_threads=1)
+        runner = interpreter.get_signature_runner()
+
+        def run(x: np.ndarray) -> List[np.ndarray]:
+            outputs = runner(x=x)
+            return [outputs[k] for k in keys]
+
+        run(self._buffer)
+        self._single = run
+
+    def _build_onnx(self):
+        if not TENSORFLOW_AVAILABLE:
+            raise RuntimeError('TensorFlow não disponível')
+        import onnxruntime as ort
+        import tf2onnx
+
+        spec = (tf.TensorSpec((None,) + self.input_shape, tf.float32, name='x'),)
+        proto, _ = tf2onnx.convert.from_keras(self.model, input_signature=spec, opset=13)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        session = ort.InferenceSession(
+            proto.SerializeToString(), options, providers=['CPUExecutionProvider']
+        )
+        input_name = session.get_inputs()[0].name
+
+        def run(x: np.ndarray) -> List[np.ndarray]:
+            return session.run(None, {input_name: x})
+
+        run(self._buffer)
+        self._single = run
+
+    def _build_eager(self):
+        self._single = self._run_eager
+
+    def _run_compiled(self, x: np.ndarray) -> List[np.ndarray]:
+        return [y.numpy() for y in _as_list(self._compiled(x))]
+
+    def _run_eager(self, x: np.ndarray) -> List[np.ndarray]:
+        return [_to_numpy(y) for y in _as_list(self.model(x, training=False))]
+
+    # ------------------------------------------------------------------
+    # Inferência
+    # ------------------------------------------------------------------
+
+    def predict(self, sample: np.ndarray) -> List[np.ndarray]:
+        """Saídas para uma amostra (copiada para o buffer pré-alocado)"""
+        with self._lock:
+            start = time.perf_counter()
+            np.copyto(self._buffer, np.reshape(sample, self._buffer.shape), casting='same_kind')
+            outputs = self._single(self._buffer)
+            self._record(start)
+        return outputs
+
+    def predict_batch(self, batch: np.ndarray) -> List[np.ndarray]:
+        """
+        Saídas para um batch (treino do RL)
+
+        Usa sempre o caminho compilado, que acompanha os pesos durante o treino.
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            self.stats['batch_calls'] += 1
+        if self._compiled is not None:
+            return self._run_compiled(x)
+        return self._run_eager(x)
+
+    def refresh(self):
+        """Reexporta após alteração dos pesos (só necessário em tflite/onnx)"""
+        if self.backend in ('tflite', 'onnx'):
+            with self._lock:
+                self.backend = self._select_backend(self.backend)
+
+
+# ═══════════════════════════════════════════════════════════
+# PYTORCH
+# ═══════════════════════════════════════════════════════════
+
+class TorchInferenceRuntime(_RuntimeBase):
+    """
+    Inferência de um nn.Module
+
+    predict(sample) retorna as saídas como arrays numpy (dict se o módulo
+    retorna dict). Argumentos constantes (ex: positional encoding) são
+    passados uma vez e ficam no device.
+
+    Backends:
+        torchscript: torch.jit.trace + freeze (retrato dos pesos)
+        onnx: torch.onnx.export + ONNX Runtime CPU (retrato dos pesos)
+        eager: módulo original em inference_mode
+    Após treinar ou carregar pesos, criar um novo runtime.
+    """
+
+    BACKENDS = ('torchscript', 'onnx', 'eager')
+    FALLBACK = ('torchscript', 'eager')
+
+    def __init__(self, module: Any, input_shape: Sequence[int], constants: Sequence[Any] = (),
+                 backend: str = 'torchscript', device: Any = None, name: str = 'torch'):
+        """
+        Args:
+            module: Modelo PyTorch
+            input_shape: Formato de uma amostra (sem batch)
+            constants: Argumentos fixos após a entrada
+            backend: torchscript | onnx | eager
+            device: Device do modelo (None = CPU)
+            name: Nome para logs e métricas
+        """
+        import torch
+        super().__init__(name)
+        self._torch = torch
+        self.module = module.eval()
+        self.input_shape = tuple(input_shape)
+        self.device = device or torch.device('cpu')
+        self.requested_backend = backend
+
+        self._buffer = torch.zeros((1,) + self.input_shape, dtype=torch.float32, device=self.device)
+        # Em CPU o array numpy compartilha a memória do tensor
+        self._host = self._buffer.numpy() if self._buffer.device.type == 'cpu' else None
+        self._constants = tuple(c.to(self.device) for c in constants)
+        self._keys: List[str] = None
+        self._single: Callable[[], Any] = None
+
+        with torch.inference_mode():
+            probe = self.module(self._buffer, *self._constants)
+        if isinstance(probe, dict):
+            self._keys = list(probe)
+
+        self.backend = self._select_backend(backend)
+
+    def _build_torchscript(self):
+        torch = self._torch
+        with torch.no_grad():
+            traced = torch.jit.trace(self.module, (self._buffer,) + self._constants, strict=False)
+            traced = torch.jit.freeze(traced)
+        module, constants = traced, self._constants
+
+        def run():
+            with torch.inference_mode():
+                return module(self._buffer, *constants)
+
+        run()
+        self._single = run
+
+    def _build_onnx(self):
+        torch = self._torch
+        import onnxruntime as ort
+
+        input_names = ['x'] + [f'c{i}' for i in range(len(self._constants))]
+        output_names = self._keys or ['output_0']
+        stream = io.BytesIO()
+        torch.onnx.export(
+            self.module, (self._buffer,) + self._constants, stream,
+            input_names=input_names, output_names=output_names, opset_version=17
+        )
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        session = ort.InferenceSession(stream.getvalue(), options, providers=['CPUExecutionProvider'])
+        feeds = {name: c.cpu().numpy() for name, c in zip(input_names[1:], self._constants)}
+        host = self._buffer.cpu().numpy() if self._host is None else self._host
+
+        def run():
+            if self._host is None:
+                host[...] = self._buffer.cpu().numpy()
+            feeds['x'] = host
+            outputs = session.run(None, feeds)
+            return dict(zip(output_names, outputs)) if self._keys else outputs[0]
+
+        run()
+        self._single = run
+
+    def _build_eager(self):
+        torch, module, constants = self._torch, self.module, self._constants
+
+        def run():
+            with torch.inference_mode():
+                return module(self._buffer, *constants)
+
+        self._single = run
+
+    def _numpy(self, outputs: Any) -> Any:
+        if isinstance(outputs, dict):
+            return {k: _to_numpy(v.cpu()) if hasattr(v, 'cpu') else np.asarray(v)
+                    for k, v in outputs.items()}
+        return _to_numpy(outputs.cpu()) if hasattr(outputs, 'cpu') else np.asarray(outputs)
+
+    def predict(self, sample: np.ndarray) -> Any:
+        """Saídas para uma amostra (copiada para o tensor pré-alocado)"""
+        with self._lock:
+            start = time.perf_counter()
+            sample = np.reshape(sample, (1,) + self.input_shape)
+            if self._host is not None:
+                np.copyto(self._host, sample, casting='same_kind')
+            else:
+                self._buffer.copy_(self._torch.from_numpy(np.ascontiguousarray(sample, dtype=np.float32)))
+            outputs = self._numpy(self._single())
+            self._record(start)
+        return outputs
@@ -33,6 +33,9 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+from ml.inference_runtime import KerasInferenceRuntime
+from ml.sequence_dataset import SequenceDataset
+
 # TensorFlow/Keras imports
 try:
     import tensorflow as tf
@@ -62,7 +65,6 @@ except ImportError:
 
 try:
     from sklearn.preprocessing import MinMaxScaler, StandardScaler
-    from sklearn.model_selection import train_test_split
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
@@ -180,8 +182,12 @@ class LSTMPricePredictor:
         self.min_training_samples = self.config.get('min_training_samples', 1000)
         self.validation_split = self.config.get('validation_split', 0.2)
         
+        # Inferência: compiled (tf.function) | tflite | onnx | eager
+        self.inference_backend = self.config.get('inference_backend', 'compiled')
+        
         # Modelos por símbolo
         self._models: Dict[str, keras.Model] = {}
+        self._runtimes: Dict[str, KerasInferenceRuntime] = {}
         self._scalers: Dict[str, Dict[str, Any]] = {}
         self._metrics: Dict[str, ModelMetrics] = {}
         self._last_training: Dict[str, datetime] = {}
@@ -201,6 +207,17 @@ class LSTMPricePredictor:
         """Caminho do arquivo do modelo"""
         return self.data_dir / f"lstm_model_{symbol}.keras"
     
+    def _get_runtime(self, symbol: str) -> KerasInferenceRuntime:
+        """Runtime de inferência do modelo atual do símbolo (recriado se o modelo mudou)"""
+        model = self._models[symbol]
+        runtime = self._runtimes.get(symbol)
+        if runtime is None or runtime.model is not model:
+            runtime = KerasInferenceRuntime(
+                model, model.input_shape[1:], backend=self.inference_backend, name=f"lstm_{symbol}"
+            )
+            self._runtimes[symbol] = runtime
+        return runtime
+    
     def _get_scaler_path(self, symbol: str) -> Path:
         """Caminho do arquivo do scaler"""
         return self.data_dir / f"lstm_scaler_{symbol}.pkl"
@@ -418,35 +435,25 @@ class LSTMPricePredictor:
     def _create_sequences(
         self,
         features: np.ndarray,
-        targets: np.ndarray = None
-    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        targets: Dict[str, np.ndarray] = None
+    ) -> SequenceDataset:
         """
-        Cria sequências para LSTM
+        Cria sequências para LSTM (views sobre features, sem copiar janelas)
         
         Args:
-            features: Array de features (n_samples, n_features)
-            targets: Array de targets (opcional)
+            features: Array de features (n_samples, n_features), pode ser memmap
+            targets: Targets por barra {nome: array}; a janela i usa a linha
+                i + lookback (primeira barra após a janela)
             
         Returns:
-            Tuple (X_sequences, y_sequences)
+            SequenceDataset com len(features) - lookback - forecast_horizon + 1 janelas
         """
-        X = []
-        y = [] if targets is not None else None
-        
-        for i in range(len(features) - self.lookback - self.forecast_horizon + 1):
-            X.append(features[i:i + self.lookback])
-            
-            if targets is not None:
-                # Target: retorno futuro
-                y.append(targets[i + self.lookback:i + self.lookback + self.forecast_horizon])
-        
-        X = np.array(X)
-        
-        if y is not None:
-            y = np.array(y)
-            return X, y
-        
-        return X, None
+        n_windows = max(len(features) - self.lookback - self.forecast_horizon + 1, 0)
+        targets = {
+            name: values[self.lookback:self.lookback + n_windows]
+            for name, values in (targets or {}).items()
+        }
+        return SequenceDataset(features, self.lookback, n_windows=n_windows, targets=targets)
     
     def _prepare_targets(
         self,
@@ -500,6 +507,10 @@ class LSTMPricePredictor:
         """
         Treina modelo LSTM para um símbolo
         
+        A matriz de features (n_barras x n_features) é montada inteira em
+        memória (normalização global); sem cópia são só as janelas de lookback
+        e o batch em uso.
+        
         Args:
             symbol: Símbolo a treinar
             df: DataFrame com dados históricos
@@ -527,30 +538,20 @@ class LSTMPricePredictor:
             # Preparar targets
             direction_labels, magnitude, volatility = self._prepare_targets(df)
             
-            # Criar sequências
-            X, _ = self._create_sequences(features)
-            
-            # Ajustar targets para tamanho correto
-            n_samples = len(X)
-            y_direction = direction_labels[self.lookback:self.lookback + n_samples]
-            y_magnitude = magnitude[self.lookback:self.lookback + n_samples]
-            y_volatility = volatility[self.lookback:self.lookback + n_samples]
-            
-            # Split treino/validação
-            indices = np.arange(n_samples)
-            train_idx, val_idx = train_test_split(
-                indices, 
-                test_size=self.validation_split,
-                shuffle=False  # Manter ordem temporal
-            )
+            # Criar sequências (views; só o batch em uso é materializado)
+            dataset = self._create_sequences(features, {
+                'direction': direction_labels.astype(np.float32),
+                'magnitude': magnitude.astype(np.float32),
+                'volatility': volatility.astype(np.float32)
+            })
             
-            X_train, X_val = X[train_idx], X[val_idx]
-            y_dir_train, y_dir_val = y_direction[train_idx], y_direction[val_idx]
-            y_mag_train, y_mag_val = y_magnitude[train_idx], y_magnitude[val_idx]
-            y_vol_train, y_vol_val = y_volatility[train_idx], y_volatility[val_idx]
+            # Split treino/validação (ordem temporal)
+            train_set, val_set = dataset.split(self.validation_split)
+            y_dir_val = val_set.targets['direction']
+            y_mag_val = val_set.targets['magnitude']
             
             # Construir modelo
-            n_features = X.shape[2]
+            n_features = dataset.n_features
             model = self._build_model(n_features)
             
             # Callbacks
@@ -573,30 +574,17 @@ class LSTMPricePredictor:
                 )
             ]
             
-            # Treinar
+            # Treinar (embaralhado por época, como fit com arrays)
             history = model.fit(
-                X_train,
-                {
-                    'direction': y_dir_train,
-                    'magnitude': y_mag_train,
-                    'volatility': y_vol_train
-                },
-                validation_data=(
-                    X_val,
-                    {
-                        'direction': y_dir_val,
-                        'magnitude': y_mag_val,
-                        'volatility': y_vol_val
-                    }
-                ),
+                train_set.to_tf_dataset(self.batch_size, shuffle=True, seed=0),
+                validation_data=val_set.to_tf_dataset(self.batch_size),
                 epochs=self.epochs,
-                batch_size=self.batch_size,
                 callbacks=callbacks,
                 verbose=0
             )
             
             # Avaliar
-            val_predictions = model.predict(X_val, verbose=0)
+            val_predictions = model.predict(val_set.to_tf_dataset(self.batch_size), verbose=0)
             
             # Direção accuracy
             pred_direction = np.argmax(val_predictions[0], axis=1)
@@ -613,8 +601,8 @@ class LSTMPricePredictor:
                 mse=float(np.mean((val_predictions[1].flatten() - y_mag_val) ** 2)),
                 mae=float(np.mean(np.abs(val_predictions[1].flatten() - y_mag_val))),
                 directional_accuracy=directional_accuracy,
-                train_samples=len(X_train),
-                val_samples=len(X_val),
+                train_samples=len(train_set),
+                val_samples=len(val_set),
                 epochs_trained=len(history.history['loss']),
                 best_epoch=np.argmin(history.history['val_loss']) + 1,
                 training_time_seconds=training_time
@@ -680,11 +668,8 @@ class LSTMPricePredictor:
             # Preparar features
             features, _ = self._prepare_features(df, symbol)
             
-            # Criar sequência
-            X = features[-self.lookback:].reshape(1, self.lookback, -1)
-            
-            # Prever
-            predictions = self._models[symbol].predict(X, verbose=0)
+            # Prever (sequência copiada para o buffer do runtime)
+            predictions = self._get_runtime(symbol).predict(features[-self.lookback:])
             
             # Extrair resultados
             direction_probs = predictions[0][0]  # [down, neutral, up]
@@ -798,6 +783,10 @@ class LSTMPricePredictor:
         
         return stats
     
+    def get_inference_stats(self) -> Dict[str, Dict]:
+        """Backend e latência de inferência por símbolo"""
+        return {symbol: runtime.get_stats() for symbol, runtime in self._runtimes.items()}
+    
     async def get_summary(self) -> str:
         """Retorna resumo dos modelos"""
         lines = [
@@ -18,6 +18,8 @@ Versão: 2.0 ELITE
 """
 
 import asyncio
+import threading
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
@@ -27,6 +29,9 @@ from loguru import logger
 
 # Importacoes locais - Core
 from ml.feature_engineering import AdvancedFeatureEngineer, FeatureSet
+from ml.feature_store import StreamingFeatureStore
+from ml.inference_orchestrator import ModelInferenceOrchestrator
+from core.mt5_io import LatencyHistogram
 from ml.xgboost_predictor import XGBoostSignalPredictor, PredictionResult, SignalQuality
 from core.macro_context import MacroContextAnalyzer, MacroContext
 from core.strategy_degradation_detector import StrategyDegradationDetector, DegradationLevel
@@ -97,6 +102,7 @@ class SignalEnhancement:
     strategy: str
     direction: str  # 'buy' ou 'sell'
     original_confidence: float
+    account_balance: float = 10000  # Saldo da conta (estado do agente RL)
     
     # Features geradas
     features: Optional[FeatureSet] = None
@@ -134,6 +140,7 @@ class SignalEnhancement:
     
     # Metadados
     processing_time_ms: float = 0.0
+    stage_latency_ms: Dict[str, float] = field(default_factory=dict)  # Tempo por etapa
     timestamp: datetime = field(default_factory=datetime.now)
     elite_mode: bool = False  # Se usou modelos elite
     
@@ -158,7 +165,8 @@ class SignalEnhancement:
             'rl_action': self.rl_action,
             'ensemble_consensus': self.ensemble_consensus,
             'rejection_reason': self.rejection_reason,
-            'processing_time_ms': self.processing_time_ms
+            'processing_time_ms': self.processing_time_ms,
+            'stage_latency_ms': self.stage_latency_ms
         }
 
 
@@ -224,6 +232,19 @@ class MLIntegrationManager:
         
         # Inicializar modulos CORE
         self.feature_engineer = AdvancedFeatureEngineer(feature_config)
+        
+        # Features incrementais por (símbolo, timeframe) - evita recalcular o histórico a cada sinal
+        streaming_config = feature_config.get('streaming', {})
+        self.feature_store = None
+        if streaming_config.get('enabled', True):
+            self.feature_store = StreamingFeatureStore(
+                self.feature_engineer,
+                tail_bars=streaming_config.get('tail_bars', 128),
+                tolerance=streaming_config.get('tolerance', 1e-4)
+            )
+        self.consistency_check_every = streaming_config.get('consistency_check_every', 200)
+        self._feature_requests = 0
+        self._feature_requests_lock = threading.Lock()
         self.xgb_predictor = XGBoostSignalPredictor(
             config=ml_config,
             data_dir=ml_config.get('data_dir', 'data/ml')
@@ -231,6 +252,15 @@ class MLIntegrationManager:
         self.macro_analyzer = MacroContextAnalyzer(macro_config)
         self.degradation_detector = StrategyDegradationDetector(degradation_config)
         
+        # Inferência dos modelos em paralelo (prazo por modelo, memo por barra)
+        inference_config = self.config.get('ml_inference', {})
+        self.inference = ModelInferenceOrchestrator(
+            max_workers=inference_config.get('max_workers', 3),
+            deadlines=inference_config.get('deadlines'),
+            default_deadline=inference_config.get('default_deadline', 2.0),
+            memo_size=inference_config.get('memo_size', 512)
+        )
+        
         # Inicializar modulos ELITE
         self.lstm_predictor = None
         self.rl_agent = None
@@ -254,6 +284,7 @@ class MLIntegrationManager:
             'elite_decisions': 0,
             'ensemble_agreements': 0
         }
+        self._stage_latency: Dict[str, LatencyHistogram] = {}
         
         mode_str = "ELITE" if self.elite_mode else "STANDARD"
         logger.info(f"MLIntegrationManager inicializado em modo {mode_str}")
@@ -295,7 +326,8 @@ class MLIntegrationManager:
                     xgboost_predictor=self.xgb_predictor,
                     lstm_predictor=self.lstm_predictor,
                     rl_agent=self.rl_agent,
-                    macro_analyzer=self.macro_analyzer
+                    macro_analyzer=self.macro_analyzer,
+                    inference=self.inference
                 )
                 logger.info("Ensemble Manager inicializado")
             except Exception as e:
@@ -319,7 +351,8 @@ class MLIntegrationManager:
             direction: 'buy' ou 'sell'
             confidence: Confiança original (0-1)
             market_data: DataFrame com OHLCV
-            additional_context: Contexto adicional
+            additional_context: Contexto adicional (timeframe: chave das features incrementais,
+                account_balance: saldo da conta para o agente RL)
             
         Returns:
             SignalEnhancement com análise completa
@@ -331,6 +364,7 @@ class MLIntegrationManager:
             strategy=strategy,
             direction=direction,
             original_confidence=confidence,
+            account_balance=(additional_context or {}).get('account_balance', 10000),
             adjusted_confidence=confidence,
             elite_mode=self.elite_mode
         )
@@ -339,31 +373,40 @@ class MLIntegrationManager:
             # === CORE PIPELINE ===
             
             # 1. GERAR FEATURES
-            await self._generate_features(enhancement, market_data)
+            await self._timed(enhancement, 'features', self._generate_features(
+                enhancement, market_data, (additional_context or {}).get('timeframe')
+            ))
             
             # 2. OBTER CONTEXTO MACRO
-            await self._analyze_macro_context(enhancement)
+            await self._timed(enhancement, 'macro', self._analyze_macro_context(enhancement))
+            
+            # 3. MODELOS EM PARALELO (XGBoost, LSTM, RL) - etapas seguintes usam o memo
+            await self._timed(enhancement, 'models', self._run_models(enhancement, market_data))
             
-            # 3. PREVISÃO ML (XGBoost)
-            await self._predict_signal_quality(enhancement)
+            # 4. PREVISÃO ML (XGBoost)
+            await self._timed(enhancement, 'xgboost', self._predict_signal_quality(enhancement, market_data))
             
-            # 4. VERIFICAR DEGRADAÇÃO DA ESTRATÉGIA
-            await self._check_strategy_degradation(enhancement, additional_context)
+            # 5. VERIFICAR DEGRADAÇÃO DA ESTRATÉGIA
+            await self._timed(enhancement, 'degradation',
+                              self._check_strategy_degradation(enhancement, additional_context))
             
             # === ELITE PIPELINE ===
             if self.elite_mode:
-                # 5. LSTM Price Prediction
-                await self._predict_with_lstm(enhancement, market_data)
+                # 6. LSTM Price Prediction
+                await self._timed(enhancement, 'lstm', self._predict_with_lstm(enhancement, market_data))
                 
-                # 6. RL Agent Decision
-                await self._get_rl_decision(enhancement, market_data)
+                # 7. RL Agent Decision
+                await self._timed(enhancement, 'rl_agent', self._get_rl_decision(enhancement, market_data))
                 
-                # 7. ENSEMBLE Decision (combina todos)
+                # 8. ENSEMBLE Decision (combina todos, reutilizando as previsões acima)
                 if self.use_ensemble:
-                    await self._get_ensemble_decision(enhancement, market_data)
+                    await self._timed(enhancement, 'ensemble',
+                                      self._get_ensemble_decision(enhancement, market_data))
             
-            # 8. TOMAR DECISÃO FINAL
+            # 9. TOMAR DECISÃO FINAL
+            decision_start = time.perf_counter()
             self._make_final_decision(enhancement)
+            self._record_stage(enhancement, 'decision', (time.perf_counter() - decision_start) * 1000)
             
             # Estatísticas
             self._stats['signals_processed'] += 1
@@ -388,30 +431,116 @@ class MLIntegrationManager:
         enhancement.processing_time_ms = (datetime.now() - start_time).total_seconds() * 1000
         
         # Atualizar média
-        n = self._stats['signals_processed']
+        n = max(self._stats['signals_processed'], 1)
         old_avg = self._stats['avg_processing_time_ms']
         self._stats['avg_processing_time_ms'] = old_avg + (enhancement.processing_time_ms - old_avg) / n
         
         return enhancement
     
-    async def _generate_features(
+    def _record_stage(self, enhancement: SignalEnhancement, stage: str, elapsed_ms: float) -> None:
+        """Registra o tempo de uma etapa no sinal e no histograma da etapa"""
+        enhancement.stage_latency_ms[stage] = elapsed_ms
+        hist = self._stage_latency.get(stage)
+        if hist is None:
+            hist = self._stage_latency[stage] = LatencyHistogram()
+        hist.add(elapsed_ms)
+    
+    async def _timed(self, enhancement: SignalEnhancement, stage: str, coro) -> Any:
+        """Executa uma etapa do pipeline medindo o tempo"""
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self._record_stage(enhancement, stage, (time.perf_counter() - start) * 1000)
+    
+    def _model_call(
         self,
+        model: str,
         enhancement: SignalEnhancement,
         market_data: pd.DataFrame
+    ) -> Optional[Tuple[Any, Any, tuple]]:
+        """
+        (chave do memo, função, argumentos) da inferência de um modelo
+        
+        As chaves são as mesmas usadas pelo EnsembleModelManager, para que o
+        ensemble reutilize as previsões desta barra.
+        """
+        bar = ModelInferenceOrchestrator.bar_key(enhancement.symbol, market_data)
+        features = enhancement.features
+        
+        if model == 'xgboost' and features is not None:
+            row = features.to_array()
+            return ((bar, enhancement.strategy, ModelInferenceOrchestrator.row_key(row)),
+                    self.xgb_predictor.predict,
+                    (row, features.feature_names, enhancement.symbol, enhancement.strategy))
+        if model == 'lstm' and self.lstm_predictor:
+            return bar, self.lstm_predictor.predict, (enhancement.symbol, market_data)
+        if model == 'rl_agent' and self.rl_agent and features is not None:
+            # decide lê a posição do agente: um fill na mesma barra muda a chave
+            row = features.to_array()
+            balance = enhancement.account_balance
+            current_price = float(market_data['close'].iat[-1])
+            key = (bar, balance, self.rl_agent.position_key(enhancement.symbol),
+                   ModelInferenceOrchestrator.row_key(row))
+            return key, self.rl_agent.decide, (row, enhancement.symbol, current_price, balance)
+        return None
+    
+    async def _infer(self, model: str, enhancement: SignalEnhancement, market_data: pd.DataFrame) -> Any:
+        """Previsão de um modelo via orquestrador (memo, prazo, pool)"""
+        call = self._model_call(model, enhancement, market_data)
+        if call is None:
+            return None
+        key, func, args = call
+        return await self.inference.run(model, key, func, *args)
+    
+    async def _run_models(self, enhancement: SignalEnhancement, market_data: pd.DataFrame) -> None:
+        """Dispara as inferências independentes em paralelo (erros tratados em cada etapa)"""
+        models = ['xgboost'] + (['lstm', 'rl_agent'] if self.elite_mode else [])
+        await asyncio.gather(
+            *(self._infer(model, enhancement, market_data) for model in models),
+            return_exceptions=True
+        )
+    
+    async def _generate_features(
+        self,
+        enhancement: SignalEnhancement,
+        market_data: pd.DataFrame,
+        timeframe: Optional[str] = None
     ) -> None:
-        """Gera features usando Feature Engineer"""
+        """Gera features (estado incremental por símbolo/timeframe ou Feature Engineer)"""
         try:
             # Obter contexto macro para features
             macro_dict = None
             if enhancement.macro_context:
                 macro_dict = enhancement.macro_context.to_dict()
             
-            # Gerar features
-            feature_set = await self.feature_engineer.generate_features(
-                df=market_data,
-                symbol=enhancement.symbol,
-                macro_context=macro_dict
-            )
+            feature_set = None
+            if self.feature_store is not None:
+                every = self.consistency_check_every
+                with self._feature_requests_lock:
+                    self._feature_requests += 1
+                    check_now = bool(every) and self._feature_requests % every == 0
+                if check_now:
+                    # Verificação periódica contra o caminho em lote
+                    check = await self.feature_store.check_consistency(
+                        market_data, enhancement.symbol, timeframe, macro_dict
+                    )
+                    if check['consistent']:
+                        feature_set = self.feature_store.get_features(
+                            market_data, enhancement.symbol, timeframe, macro_dict
+                        )
+                else:
+                    feature_set = self.feature_store.get_features(
+                        market_data, enhancement.symbol, timeframe, macro_dict
+                    )
+            
+            # Caminho em lote (sem estado, índice sem tempo ou divergência)
+            if feature_set is None:
+                feature_set = await self.feature_engineer.generate_features(
+                    df=market_data,
+                    symbol=enhancement.symbol,
+                    macro_context=macro_dict
+                )
             
             enhancement.features = feature_set
             
@@ -456,7 +585,8 @@ class MLIntegrationManager:
     
     async def _predict_signal_quality(
         self,
-        enhancement: SignalEnhancement
+        enhancement: SignalEnhancement,
+        market_data: pd.DataFrame = None
     ) -> None:
         """Usa XGBoost para prever qualidade do sinal"""
         if not enhancement.features:
@@ -464,12 +594,7 @@ class MLIntegrationManager:
         
         try:
             # Fazer previsão
-            prediction = await self.xgb_predictor.predict(
-                features=enhancement.features.to_array(),
-                feature_names=enhancement.features.feature_names,
-                symbol=enhancement.symbol,
-                strategy=enhancement.strategy
-            )
+            prediction = await self._infer('xgboost', enhancement, market_data)
             
             enhancement.ml_prediction = prediction
             
@@ -501,7 +626,7 @@ class MLIntegrationManager:
             
             if not trades:
                 # Sem histórico, assumir OK
-                enhancement.degradation_level = DegradationLevel.NONE
+                enhancement.degradation_level = DegradationLevel.HEALTHY
                 return
             
             # Analisar degradação
@@ -513,7 +638,7 @@ class MLIntegrationManager:
             enhancement.degradation_level = analysis.level
             
             # Se degradação severa, ajustar multiplicador
-            if analysis.level == DegradationLevel.SEVERE:
+            if analysis.level == DegradationLevel.DEGRADED:
                 enhancement.adjusted_lot_multiplier *= 0.5
                 enhancement.adjusted_confidence *= 0.8
             elif analysis.level == DegradationLevel.CRITICAL:
@@ -536,24 +661,23 @@ class MLIntegrationManager:
         
         try:
             # Fazer previsão
-            prediction = await self.lstm_predictor.predict(
-                df=market_data,
-                symbol=enhancement.symbol
-            )
+            prediction = await self._infer('lstm', enhancement, market_data)
             
             if prediction:
+                # strong_up/up -> up, strong_down/down -> down
+                direction = prediction.direction.value.replace('strong_', '')
                 enhancement.lstm_prediction = prediction
-                enhancement.lstm_direction = prediction.direction
+                enhancement.lstm_direction = direction
                 enhancement.lstm_confidence = prediction.confidence
                 
                 # Verificar alinhamento com sinal
                 signal_dir = 'up' if enhancement.direction.lower() == 'buy' else 'down'
                 
-                if prediction.direction == signal_dir:
+                if direction == signal_dir:
                     # LSTM confirma - boost confiança
                     enhancement.adjusted_confidence *= 1.0 + (prediction.confidence * 0.1)
                     enhancement.adjusted_confidence = min(enhancement.adjusted_confidence, 0.95)
-                elif prediction.direction != 'neutral' and prediction.confidence > 0.6:
+                elif direction != 'neutral' and prediction.confidence > 0.6:
                     # LSTM contradiz fortemente - reduzir confiança
                     enhancement.adjusted_confidence *= 0.85
                     
@@ -570,16 +694,13 @@ class MLIntegrationManager:
             return
         
         try:
-            # Construir estado para o RL
-            state = self.rl_agent.build_state(
-                df=market_data,
-                symbol=enhancement.symbol,
-                current_position=0  # 0=sem posição
-            )
-            
-            # Obter ação do agente
-            action, confidence = await self.rl_agent.get_action(state, exploration=False)
+            # Obter ação do agente (estado montado a partir das features)
+            decision = await self._infer('rl_agent', enhancement, market_data)
+            if decision is None:
+                return
             
+            action = decision.action.value
+            confidence = decision.confidence
             enhancement.rl_action = action
             enhancement.rl_confidence = confidence
             
@@ -611,49 +732,56 @@ class MLIntegrationManager:
             return
         
         try:
-            # Construir dados do sinal
-            signal_data = {
-                'direction': enhancement.direction,
-                'confidence': enhancement.original_confidence,
-                'strategy': enhancement.strategy,
-                'features': enhancement.features
-            }
-            
-            # Obter decisão ensemble
+            # Obter decisão ensemble (previsões desta barra vêm do memo)
             decision = await self.ensemble_manager.get_ensemble_decision(
                 symbol=enhancement.symbol,
-                timeframe='M15',  # Default
-                signal_data=signal_data,
-                df=market_data
+                strategy=enhancement.strategy,
+                market_data=market_data,
+                current_price=float(market_data['close'].iat[-1]),
+                account_balance=enhancement.account_balance,
+                strategy_signal=enhancement.direction.lower(),
+                features=enhancement.features
             )
             
             if decision:
                 enhancement.ensemble_decision = decision
-                enhancement.ensemble_consensus = decision.decision_type
+                enhancement.ensemble_consensus = self._ensemble_consensus(enhancement, decision)
                 
                 # Aplicar decisão do ensemble
-                if decision.decision_type == 'strong_execute':
-                    enhancement.adjusted_confidence = decision.final_confidence
+                if enhancement.ensemble_consensus == 'strong_execute':
+                    enhancement.adjusted_confidence = decision.confidence
                     enhancement.adjusted_lot_multiplier *= 1.2
-                elif decision.decision_type == 'execute':
-                    enhancement.adjusted_confidence = decision.final_confidence
-                elif decision.decision_type == 'cautious':
-                    enhancement.adjusted_confidence = decision.final_confidence * 0.9
+                elif enhancement.ensemble_consensus == 'execute':
+                    enhancement.adjusted_confidence = decision.confidence
+                elif enhancement.ensemble_consensus == 'cautious':
+                    enhancement.adjusted_confidence = decision.confidence * 0.9
                     enhancement.adjusted_lot_multiplier *= 0.8
-                elif decision.decision_type == 'reduce':
-                    enhancement.adjusted_confidence = decision.final_confidence * 0.8
+                elif enhancement.ensemble_consensus == 'reduce':
+                    enhancement.adjusted_confidence = decision.confidence * 0.8
                     enhancement.adjusted_lot_multiplier *= 0.6
-                elif decision.decision_type == 'skip':
+                elif enhancement.ensemble_consensus == 'skip':
                     enhancement.should_execute = False
                     enhancement.rejection_reason = f"ensemble_skip:{decision.reasoning}"
                 
                 # Atualizar estatísticas se houve acordo
-                if decision.model_agreement > 0.7:
+                if decision.agreement_score > 0.7:
                     self._stats['ensemble_agreements'] += 1
                     
         except Exception as e:
             logger.warning(f"Erro na decisão Ensemble: {e}")
     
+    @staticmethod
+    def _ensemble_consensus(enhancement: SignalEnhancement, decision: Any) -> str:
+        """Consenso do ensemble em relação à direção do sinal"""
+        signal_dir = enhancement.direction.lower()
+        if decision.direction == signal_dir:
+            if decision.final_signal.value.startswith('strong_'):
+                return 'strong_execute'
+            return 'execute'
+        if decision.direction == 'hold':
+            return 'cautious'
+        return 'skip' if decision.confidence > 0.7 else 'reduce'
+    
     def _make_final_decision(self, enhancement: SignalEnhancement) -> None:
         """Toma decisão final sobre executar ou não"""
         reasons = []
@@ -691,7 +819,7 @@ class MLIntegrationManager:
                 reasons.append("macro_warn_reduced")
         
         # 3. Verificar degradação
-        if enhancement.degradation_level == DegradationLevel.SEVERE:
+        if enhancement.degradation_level == DegradationLevel.DEGRADED:
             enhancement.should_execute = False
             reasons.append("strategy_degraded_severe")
         
@@ -730,7 +858,7 @@ class MLIntegrationManager:
         # 7. Override final do Ensemble (Elite)
         if enhancement.ensemble_consensus in ['strong_execute', 'execute']:
             # Ensemble com alta confiança pode salvar trade
-            if enhancement.ensemble_decision and enhancement.ensemble_decision.model_agreement > 0.8:
+            if enhancement.ensemble_decision and enhancement.ensemble_decision.agreement_score > 0.8:
                 if len(reasons) <= 2:  # Não muitos problemas
                     enhancement.should_execute = True
                     reasons = [f"ensemble_override:{enhancement.ensemble_consensus}"]
@@ -799,6 +927,9 @@ class MLIntegrationManager:
                     'error': str(e)
                 }
         
+        # Previsões em memo são dos modelos antigos
+        self.inference.invalidate('xgboost')
+        
         return results
     
     def get_stats(self) -> Dict[str, Any]:
@@ -806,8 +937,11 @@ class MLIntegrationManager:
         return {
             'integration': self._stats.copy(),
             'xgboost': self.xgb_predictor.get_model_stats(),
+            'feature_store': self.feature_store.get_stats() if self.feature_store else {},
+            'inference': self.inference.get_stats(),
+            'stages': {stage: hist.as_dict() for stage, hist in self._stage_latency.items()},
             'degradation': {
-                'strategies_monitored': len(self.degradation_detector._strategy_performance)
+                'strategies_monitored': len(self.degradation_detector.get_all_health())
             }
         }
     
@@ -907,6 +1041,8 @@ class MLIntegrationManager:
                 results['rl_agent'] = {'error': str(e)}
                 logger.error(f"❌ Erro ao pré-treinar RL: {e}")
         
+        self.inference.invalidate()
+        
         return results
     
     async def save_models(self, directory: str = 'data/ml') -> Dict[str, bool]:
@@ -971,6 +1107,8 @@ class MLIntegrationManager:
                     results['rl_agent'] = False
                     logger.warning(f"Erro ao carregar RL Agent: {e}")
         
+        self.inference.invalidate()
+        
         return results
 
 
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+PARALLEL TUNING - URION 2.0 ELITE
+=================================
+Busca de hiperparâmetros do XGBoost com Optuna em vários processos
+
+Antes: trials sequenciais no processo do pipeline, folds do TimeSeriesSplit
+e arrays refeitos a cada trial, sem poda.
+
+- Processos (spawn) compartilham o estudo via storage local (journal ou SQLite)
+- X / y gravados uma vez em .npy e abertos como memmap em cada worker (nada
+  de pickle da matriz por processo)
+- DMatrix quantizada de cada fold montada uma vez por worker e reutilizada
+  em todos os trials
+- Accuracy média reportada fold a fold: MedianPruner corta trials ruins cedo
+- Orçamento de tempo (timeout) e número total de trials entre os workers
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from ml.incremental_boosting import native_params
+
+
+def time_series_folds(n_samples: int, n_splits: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Índices (treino, validação) com a mesma divisão do TimeSeriesSplit do sklearn"""
+    test_size = n_samples // (n_splits + 1)
+    folds = []
+    for test_start in range(n_samples - n_splits * test_size, n_samples, test_size):
+        folds.append((np.arange(test_start), np.arange(test_start, test_start + test_size)))
+    return folds
+
+
+def suggest_xgb_params(trial) -> Dict[str, Any]:
+    """Espaço de busca do XGBoost (mesmo do optimize_hyperparameters original)"""
+    return {
+        'max_depth': trial.suggest_int('max_depth', 3, 10),
+        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
+        'n_estimators': trial.suggest_int('n_estimators', 50, 300),
+        'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
+        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+        'gamma': trial.suggest_float('gamma', 0, 1),
+        'reg_alpha': trial.suggest_float('reg_alpha', 0, 1),
+        'reg_lambda': trial.suggest_float('reg_lambda', 0, 1),
+    }
+
+
+def make_storage(path: Union[str, Path]):
+    """Storage local do Optuna: .db = SQLite, senão journal em arquivo"""
+    import optuna
+
+    path = str(path)
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return f"sqlite:///{path}"
+    try:
+        from optuna.storages.journal import JournalFileBackend
+        backend = JournalFileBackend(path)
+    except ImportError:
+        # optuna < 4
+        backend = optuna.storages.JournalFileStorage(path)
+    return optuna.storages.JournalStorage(backend)
+
+
+class FoldObjective:
+    """
+    Objetivo do Optuna sobre folds temporais pré-montados
+
+    Os DMatrix de cada fold são criados uma vez; cada trial só treina.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, n_splits: int = 3, nthread: int = None):
+        import xgboost as xgb
+
+        self._xgb = xgb
+        self.nthread = nthread
+        self.folds = []
+        for train_idx, val_idx in time_series_folds(len(X), n_splits):
+            dtrain = xgb.QuantileDMatrix(np.asarray(X[train_idx], dtype=np.float32), y[train_idx])
+            dval = xgb.QuantileDMatrix(np.asarray(X[val_idx], dtype=np.float32), y[val_idx], ref=dtrain)
+            self.folds.append((dtrain, dval, np.asarray(y[val_idx])))
+
+    def __call__(self, trial) -> float:
+        import optuna
+
+        params, rounds = native_params({
+            **suggest_xgb_params(trial),
+            'objective': 'binary:logistic',
+            'verbosity': 0,
+            'n_jobs': self.nthread
+        })
+
+        scores = []
+        for step, (dtrain, dval, y_val) in enumerate(self.folds):
+            booster = self._xgb.train(params, dtrain, num_boost_round=rounds)
+            y_pred = (booster.predict(dval) > 0.5).astype(int)
+            scores.append(float(np.mean(y_pred == y_val)))
+
+            # Média parcial por fold: pruner compara com outros trials no mesmo passo
+            trial.report(float(np.mean(scores)), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
+        return float(np.mean(scores))
+
+
+def _optimize(study, objective: FoldObjective, n_trials: int, deadline: Optional[float]) -> None:
+    """Roda trials até o total do estudo chegar a n_trials ou o prazo acabar"""
+    import optuna
+
+    stop_at_total = optuna.study.MaxTrialsCallback(
+        n_trials, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    )
+    timeout = None if deadline is None else max(deadline - time.time(), 0)
+    if timeout == 0:
+        return
+    study.optimize(objective, n_trials=n_trials, timeout=timeout,
+                   callbacks=[stop_at_total], show_progress_bar=False)
+
+
+def tuning_worker(storage_path: str, study_name: str, data_dir: str, n_trials: int,
+                  n_splits: int, deadline: Optional[float], seed: int, nthread: int) -> None:
+    """Processo de tuning: abre X / y como memmap e roda trials no estudo compartilhado"""
+    import optuna
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    X = np.load(os.path.join(data_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(data_dir, 'y.npy'), mmap_mode='r')
+
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=make_storage(storage_path),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=0)
+    )
+    objective = FoldObjective(X, y, n_splits=n_splits, nthread=nthread)
+    _optimize(study, objective, n_trials, deadline)
+
+
+def tune_xgboost(X: np.ndarray, y: np.ndarray, n_trials: int = 50, n_workers: int = 1,
+                 timeout: float = None, n_splits: int = 3, storage_path: str = None,
+                 study_name: str = None, seed: int = 42) -> Dict[str, Any]:
+    """
+    Busca de hiperparâmetros do XGBoost (accuracy média em folds temporais)
+
+    Args:
+        X, y: Dados de treino
+        n_trials: Total de trials (completos + podados) entre todos os workers
+        n_workers: Processos; 1 = no próprio processo (storage em memória)
+        timeout: Orçamento de tempo total em segundos (None = sem limite)
+        n_splits: Folds do TimeSeriesSplit
+        storage_path: Arquivo do storage (journal ou .db); None = temporário
+        study_name: Nome do estudo (retoma se já existir no storage)
+        seed: Semente do sampler (worker i usa seed + i)
+
+    Returns:
+        {'best_params', 'best_value', 'n_trials', 'n_pruned', 'elapsed_s'}
+    """
+    import optuna
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    start = time.time()
+    deadline = None if timeout is None else start + timeout
+    study_name = study_name or f"xgb_tuning_{int(start)}"
+    pruner = optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=0)
+    work_dir = tempfile.mkdtemp(prefix='urion_tuning_')
+
+    try:
+        if n_workers <= 1:
+            study = optuna.create_study(
+                study_name=study_name, direction='maximize',
+                sampler=optuna.samplers.TPESampler(seed=seed), pruner=pruner,
+                storage=make_storage(storage_path) if storage_path else None,
+                load_if_exists=True
+            )
+            _optimize(study, FoldObjective(X, y, n_splits=n_splits), n_trials, deadline)
+        else:
+            storage_path = storage_path or os.path.join(work_dir, 'study.journal')
+            study = optuna.create_study(
+                study_name=study_name, direction='maximize',
+                storage=make_storage(storage_path), load_if_exists=True
+            )
+
+            # Dados compartilhados: gravados uma vez, memmap nos workers
+            np.save(os.path.join(work_dir, 'X.npy'), np.ascontiguousarray(X, dtype=np.float32))
+            np.save(os.path.join(work_dir, 'y.npy'), np.ascontiguousarray(y))
+
+            # Threads do XGBoost divididas entre os processos
+            nthread = max(1, (os.cpu_count() or 1) // n_workers)
+            with ProcessPoolExecutor(max_workers=n_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [
+                    pool.submit(tuning_worker, str(storage_path), study_name, work_dir,
+                                n_trials, n_splits, deadline, seed + i, nthread)
+                    for i in range(n_workers)
+                ]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Erro no worker de tuning: {e}")
+
+            study = optuna.load_study(study_name=study_name, storage=make_storage(storage_path))
+
+        # Ler o estudo antes de apagar o storage temporário
+        states = [t.state for t in study.trials]
+        completed = states.count(optuna.trial.TrialState.COMPLETE)
+        return {
+            'best_params': study.best_params if completed else {},
+            'best_value': study.best_value if completed else None,
+            'n_trials': len(states),
+            'n_pruned': states.count(optuna.trial.TrialState.PRUNED),
+            'elapsed_s': time.time() - start
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
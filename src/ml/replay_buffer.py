@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+PRIORITIZED REPLAY BUFFER - URION 2.0 ELITE
+===========================================
+Experience replay priorizado (Schaul et al.) sobre sum-tree/min-tree em arrays
+
+- add / sample / update_priorities em O(log n) (antes: max() e conversão da
+  deque inteira para numpy a cada chamada - O(n) com capacidade de 100k)
+- Experiências em arrays contíguos pré-alocados (state, action, reward,
+  next_state, done): o batch sai por indexação, sem list comprehension
+- Amostragem estratificada: batch dividido em faixas iguais da soma total
+- Pesos de importance sampling normalizados pela menor prioridade (min-tree)
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass
+class Experience:
+    """Experiência para replay buffer"""
+    state: np.ndarray
+    action: int
+    reward: float
+    next_state: np.ndarray
+    done: bool
+    priority: float = 1.0
+
+
+@dataclass
+class ExperienceBatch:
+    """Batch amostrado (um array por campo, primeira dimensão = batch)"""
+    states: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    next_states: np.ndarray
+    dones: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+
+class PrioritizedReplayBuffer:
+    """
+    Prioritized Experience Replay Buffer
+
+    Prioriza experiências mais importantes (maior TD error). As prioridades
+    (|td| + epsilon) ** alpha ficam nas folhas de uma árvore binária completa
+    em array: _sum[1] é a soma total e _min[1] a menor prioridade.
+    """
+
+    def __init__(self, capacity: int = 100000, alpha: float = 0.6, beta: float = 0.4,
+                 epsilon: float = 1e-6):
+        """
+        Args:
+            capacity: Tamanho máximo do buffer
+            alpha: Quanto prioridade afeta sampling (0 = uniforme, 1 = totalmente priorizado)
+            beta: Correção de bias de importance sampling
+            epsilon: Somado ao |TD error| para nenhuma experiência ficar sem chance
+        """
+        self.capacity = capacity
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = 0.001
+        self.epsilon = epsilon
+
+        # Folhas em potência de 2: descida vetorizada com profundidade fixa
+        self._depth = max(capacity - 1, 0).bit_length()
+        self._leaves = 1 << self._depth
+        self._sum = np.zeros(2 * self._leaves)
+        self._min = np.full(2 * self._leaves, np.inf)
+        self._max_priority = 1.0
+
+        # Arrays alocados na primeira experiência (formato do estado)
+        self._states: np.ndarray = None
+        self._next_states: np.ndarray = None
+        self._actions = np.zeros(capacity, dtype=np.int64)
+        self._rewards = np.zeros(capacity, dtype=np.float64)
+        self._dones = np.zeros(capacity, dtype=np.float32)
+
+        self._pos = 0
+        self._size = 0
+
+    # ------------------------------------------------------------------
+    # Árvore
+    # ------------------------------------------------------------------
+
+    def _set_priorities(self, indices: np.ndarray, values: np.ndarray) -> None:
+        """Atualiza folhas e propaga soma/mínimo até a raiz (um passo por nível)"""
+        nodes = np.asarray(indices, dtype=np.int64) + self._leaves
+        self._sum[nodes] = values
+        self._min[nodes] = values
+        for _ in range(self._depth):
+            nodes = np.unique(nodes >> 1)
+            left = nodes << 1
+            self._sum[nodes] = self._sum[left] + self._sum[left + 1]
+            self._min[nodes] = np.minimum(self._min[left], self._min[left + 1])
+
+    def _set_priority(self, index: int, value: float) -> None:
+        """Atualiza uma folha (add): caminho escalar, sem overhead de arrays"""
+        node = index + self._leaves
+        tree_sum, tree_min = self._sum, self._min
+        tree_sum[node] = value
+        tree_min[node] = value
+        node >>= 1
+        while node:
+            left = node << 1
+            tree_sum[node] = tree_sum[left] + tree_sum[left + 1]
+            tree_min[node] = min(tree_min[left], tree_min[left + 1])
+            node >>= 1
+
+    def _retrieve(self, values: np.ndarray) -> np.ndarray:
+        """Índices cujas somas prefixadas contêm os valores (descida vetorizada)"""
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self._depth):
+            left = nodes << 1
+            left_sum = self._sum[left]
+            go_right = values >= left_sum
+            values = values - np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        # Arredondamento pode cair em folha vazia à direita
+        return np.minimum(nodes - self._leaves, self._size - 1)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def add_transition(self, state: np.ndarray, action: int, reward: float,
+                       next_state: np.ndarray, done: bool) -> None:
+        """Adiciona experiência com a maior prioridade já vista"""
+        if self._states is None:
+            shape = (self.capacity,) + np.shape(state)
+            self._states = np.zeros(shape, dtype=np.float32)
+            self._next_states = np.zeros(shape, dtype=np.float32)
+
+        pos = self._pos
+        self._states[pos] = state
+        self._next_states[pos] = next_state
+        self._actions[pos] = action
+        self._rewards[pos] = reward
+        self._dones[pos] = done
+        self._set_priority(pos, self._max_priority ** self.alpha)
+
+        self._pos = (pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def add(self, experience: Experience) -> None:
+        """Adiciona experiência ao buffer"""
+        self.add_transition(experience.state, experience.action, experience.reward,
+                            experience.next_state, experience.done)
+
+    def sample(self, batch_size: int) -> Tuple[ExperienceBatch, np.ndarray, np.ndarray]:
+        """
+        Amostra batch priorizado
+
+        Returns:
+            Tuple (batch, indices, weights)
+        """
+        batch_size = min(batch_size, self._size)
+        total = self._sum[1]
+
+        # Um valor por faixa da soma total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * segment
+        indices = self._retrieve(values)
+
+        # Importance sampling: (N * P(i)) ** -beta / max_j (N * P(j)) ** -beta
+        probabilities = self._sum[indices + self._leaves] / total
+        min_probability = self._min[1] / total
+        weights = (probabilities / min_probability) ** (-self.beta)
+
+        # Incrementar beta
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        batch = ExperienceBatch(
+            states=self._states[indices],
+            actions=self._actions[indices],
+            rewards=self._rewards[indices],
+            next_states=self._next_states[indices],
+            dones=self._dones[indices]
+        )
+        return batch, indices, weights
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        """Atualiza prioridades baseado em TD errors"""
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self._max_priority = max(self._max_priority, float(priorities.max()))
+        self._set_priorities(indices, priorities ** self.alpha)
+
+    def __len__(self) -> int:
+        return self._size
@@ -29,10 +29,12 @@ Versão: 2.0 Elite
 """
 
 import asyncio
+import multiprocessing
+import os
 import pickle
 import json
 import random
-from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, field
@@ -42,6 +44,10 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+from ml.inference_runtime import KerasInferenceRuntime
+from ml.replay_buffer import Experience, ExperienceBatch, PrioritizedReplayBuffer
+from ml.rl_offline import simple_feature_matrix, train_episode_worker
+
 try:
     import tensorflow as tf
     from tensorflow import keras
@@ -70,17 +76,6 @@ class Position(Enum):
     SHORT = 2
 
 
-@dataclass
-class Experience:
-    """Experiência para replay buffer"""
-    state: np.ndarray
-    action: int
-    reward: float
-    next_state: np.ndarray
-    done: bool
-    priority: float = 1.0
-
-
 @dataclass
 class AgentDecision:
     """Decisão do agente"""
@@ -126,73 +121,6 @@ class TrainingStats:
         }
 
 
-class PrioritizedReplayBuffer:
-    """
-    Prioritized Experience Replay Buffer
-    
-    Prioriza experiências mais importantes (maior TD error)
-    """
-    
-    def __init__(self, capacity: int = 100000, alpha: float = 0.6, beta: float = 0.4):
-        """
-        Args:
-            capacity: Tamanho máximo do buffer
-            alpha: Quanto prioridade afeta sampling (0 = uniforme, 1 = totalmente priorizado)
-            beta: Correção de bias de importance sampling
-        """
-        self.capacity = capacity
-        self.alpha = alpha
-        self.beta = beta
-        self.beta_increment = 0.001
-        
-        self.buffer = deque(maxlen=capacity)
-        self.priorities = deque(maxlen=capacity)
-    
-    def add(self, experience: Experience) -> None:
-        """Adiciona experiência ao buffer"""
-        max_priority = max(self.priorities) if self.priorities else 1.0
-        self.buffer.append(experience)
-        self.priorities.append(max_priority)
-    
-    def sample(self, batch_size: int) -> Tuple[List[Experience], np.ndarray, np.ndarray]:
-        """
-        Amostra batch de experiências
-        
-        Returns:
-            Tuple (experiences, indices, weights)
-        """
-        if len(self.buffer) < batch_size:
-            batch_size = len(self.buffer)
-        
-        # Calcular probabilidades
-        priorities = np.array(self.priorities)
-        probabilities = priorities ** self.alpha
-        probabilities /= probabilities.sum()
-        
-        # Amostrar
-        indices = np.random.choice(len(self.buffer), batch_size, replace=False, p=probabilities)
-        
-        # Importance sampling weights
-        total = len(self.buffer)
-        weights = (total * probabilities[indices]) ** (-self.beta)
-        weights /= weights.max()
-        
-        # Incrementar beta
-        self.beta = min(1.0, self.beta + self.beta_increment)
-        
-        experiences = [self.buffer[i] for i in indices]
-        
-        return experiences, indices, weights
-    
-    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
-        """Atualiza prioridades baseado em TD errors"""
-        for idx, td_error in zip(indices, td_errors):
-            self.priorities[idx] = abs(td_error) + 1e-6
-    
-    def __len__(self) -> int:
-        return len(self.buffer)
-
-
 class RLTradingAgent:
     """
     Agente de Trading com Deep Reinforcement Learning
@@ -233,6 +161,10 @@ class RLTradingAgent:
         self.hidden_layers = self.config.get('hidden_layers', [256, 128, 64])
         self.dropout_rate = self.config.get('dropout_rate', 0.2)
         
+        # Treino offline: treina a cada N barras, utd_ratio updates por barra
+        self.offline_train_every = self.config.get('offline_train_every', 1)
+        self.offline_utd_ratio = self.config.get('offline_utd_ratio', 1.0)
+        
         # Replay Buffer
         self.buffer_size = self.config.get('buffer_size', 100000)
         self.replay_buffer = PrioritizedReplayBuffer(capacity=self.buffer_size)
@@ -240,6 +172,8 @@ class RLTradingAgent:
         # Modelos
         self._models: Dict[str, keras.Model] = {}
         self._target_models: Dict[str, keras.Model] = {}
+        self._runtimes: Dict[Tuple[str, bool], KerasInferenceRuntime] = {}
+        self._dqn_forward: Dict[str, Tuple[Any, Any, Any]] = {}
         self._training_stats: Dict[str, TrainingStats] = {}
         
         # Estado do agente
@@ -273,19 +207,7 @@ class RLTradingAgent:
                 symbol = model_file.stem.replace("rl_model_", "")
                 
                 try:
-                    self._models[symbol] = load_model(model_file)
-                    
-                    target_path = self._get_target_model_path(symbol)
-                    if target_path.exists():
-                        self._target_models[symbol] = load_model(target_path)
-                    else:
-                        self._target_models[symbol] = clone_model(self._models[symbol])
-                        self._target_models[symbol].set_weights(self._models[symbol].get_weights())
-                    
-                    self._position[symbol] = Position.FLAT
-                    self._entry_price[symbol] = 0.0
-                    self._steps_since_update[symbol] = 0
-                    
+                    self._load_symbol(symbol)
                     logger.info(f"📦 RL Agent carregado: {symbol}")
                     
                 except Exception as e:
@@ -294,6 +216,21 @@ class RLTradingAgent:
         except Exception as e:
             logger.error(f"Erro ao carregar modelos RL: {e}")
     
+    def _load_symbol(self, symbol: str) -> None:
+        """Carrega modelo e target salvos de um símbolo"""
+        self._models[symbol] = load_model(self._get_model_path(symbol))
+        
+        target_path = self._get_target_model_path(symbol)
+        if target_path.exists():
+            self._target_models[symbol] = load_model(target_path)
+        else:
+            self._target_models[symbol] = clone_model(self._models[symbol])
+            self._target_models[symbol].set_weights(self._models[symbol].get_weights())
+        
+        self._position[symbol] = Position.FLAT
+        self._entry_price[symbol] = 0.0
+        self._steps_since_update[symbol] = 0
+    
     def _build_model(self) -> keras.Model:
         """
         Constrói rede neural DQN
@@ -340,6 +277,26 @@ class RLTradingAgent:
         
         return self._models[symbol]
     
+    def _get_runtime(self, symbol: str, target: bool = False) -> KerasInferenceRuntime:
+        """
+        Runtime compilado (tf.function) do modelo principal ou do target
+        
+        O agente treina online: o caminho compilado lê as variáveis do modelo,
+        então train_on_batch/set_weights valem sem reexportar.
+        """
+        self._get_or_create_model(symbol)
+        model = self._target_models[symbol] if target else self._models[symbol]
+        runtime = self._runtimes.get((symbol, target))
+        if runtime is None or runtime.model is not model:
+            name = f"rl_{'target' if target else 'model'}_{symbol}"
+            runtime = KerasInferenceRuntime(model, (self.state_size,), backend='compiled', name=name)
+            self._runtimes[(symbol, target)] = runtime
+        return runtime
+    
+    def get_inference_stats(self) -> Dict[str, Dict]:
+        """Backend e latência de inferência por modelo"""
+        return {runtime.name: runtime.get_stats() for runtime in self._runtimes.values()}
+    
     def prepare_state(
         self,
         features: np.ndarray,
@@ -362,38 +319,10 @@ class RLTradingAgent:
         # Features de mercado (primeiras N)
         market_features = features[:self.state_size - 10]  # Reservar 10 para estado
         
-        # Features de estado da posição
-        position = self._position.get(symbol, Position.FLAT)
-        entry_price = self._entry_price.get(symbol, 0.0)
-        
-        # One-hot da posição
-        position_features = np.zeros(3)
-        position_features[position.value] = 1.0
-        
-        # P&L não realizado
-        if position == Position.LONG and entry_price > 0:
-            unrealized_pnl = (current_price - entry_price) / entry_price
-        elif position == Position.SHORT and entry_price > 0:
-            unrealized_pnl = (entry_price - current_price) / entry_price
-        else:
-            unrealized_pnl = 0.0
-        
-        # Tempo na posição (normalizado)
-        time_in_position = min(self._steps_since_update.get(symbol, 0) / 100, 1.0)
-        
-        # Combinar estado
-        state_features = np.array([
-            unrealized_pnl,
-            time_in_position,
-            account_balance / 10000,  # Normalizado
-            0.0  # Placeholder
-        ])
-        
         # Concatenar
         full_state = np.concatenate([
             market_features[:self.state_size - 7],
-            position_features,
-            state_features
+            self._position_features(symbol, current_price, account_balance)
         ])
         
         # Garantir tamanho correto
@@ -404,6 +333,35 @@ class RLTradingAgent:
         
         return full_state
     
+    def position_key(self, symbol: str) -> Tuple[int, float, int]:
+        """Estado de posição lido por decide (posição, preço de entrada, passos) - chave do memo"""
+        return (
+            self._position.get(symbol, Position.FLAT).value,
+            self._entry_price.get(symbol, 0.0),
+            self._steps_since_update.get(symbol, 0)
+        )
+    
+    def _position_features(self, symbol: str, current_price: float, account_balance: float) -> np.ndarray:
+        """One-hot da posição + P&L não realizado, tempo na posição, saldo e placeholder"""
+        position = self._position.get(symbol, Position.FLAT)
+        entry_price = self._entry_price.get(symbol, 0.0)
+        
+        # One-hot da posição
+        position_features = np.zeros(7)
+        position_features[position.value] = 1.0
+        
+        # P&L não realizado
+        if position == Position.LONG and entry_price > 0:
+            position_features[3] = (current_price - entry_price) / entry_price
+        elif position == Position.SHORT and entry_price > 0:
+            position_features[3] = (entry_price - current_price) / entry_price
+        
+        # Tempo na posição (normalizado)
+        position_features[4] = min(self._steps_since_update.get(symbol, 0) / 100, 1.0)
+        position_features[5] = account_balance / 10000  # Normalizado
+        
+        return position_features
+    
     def get_action(
         self,
         state: np.ndarray,
@@ -424,15 +382,14 @@ class RLTradingAgent:
         if not TENSORFLOW_AVAILABLE:
             return Action.HOLD, np.zeros(self.action_size)
         
-        model = self._get_or_create_model(symbol)
+        runtime = self._get_runtime(symbol)
         
         # Epsilon-greedy
         if training and random.random() < self.epsilon:
             action = Action(random.randint(0, self.action_size - 1))
             q_values = np.zeros(self.action_size)
         else:
-            state_input = state.reshape(1, -1)
-            q_values = model.predict(state_input, verbose=0)[0]
+            q_values = runtime.predict(state)[0][0]
             action = Action(np.argmax(q_values))
         
         return action, q_values
@@ -629,14 +586,31 @@ class RLTradingAgent:
         done: bool
     ) -> None:
         """Armazena experiência no replay buffer"""
-        experience = Experience(
-            state=state,
-            action=action,
-            reward=reward,
-            next_state=next_state,
-            done=done
-        )
-        self.replay_buffer.add(experience)
+        self.replay_buffer.add_transition(state, action, reward, next_state, done)
+    
+    def _get_dqn_forward(self, symbol: str) -> Any:
+        """
+        tf.function com os três forwards do passo DQN
+        
+        Modelo principal em [states; next_states] (um batch só) e target em
+        next_states. Retorna (Q(states), Q(next_states), Q_target(next_states)).
+        """
+        model = self._get_or_create_model(symbol)
+        target_model = self._target_models[symbol]
+        cached = self._dqn_forward.get(symbol)
+        if cached is not None and cached[0] is model and cached[1] is target_model:
+            return cached[2]
+        
+        spec = tf.TensorSpec((None, self.state_size), tf.float32)
+        
+        @tf.function(input_signature=[spec, spec])
+        def forward(states, next_states):
+            n = tf.shape(states)[0]
+            q = model(tf.concat([states, next_states], axis=0), training=False)
+            return q[:n], q[n:], target_model(next_states, training=False)
+        
+        self._dqn_forward[symbol] = (model, target_model, forward)
+        return forward
     
     def train_step(self, symbol: str) -> float:
         """
@@ -652,30 +626,26 @@ class RLTradingAgent:
             return 0.0
         
         model = self._get_or_create_model(symbol)
-        target_model = self._target_models[symbol]
         
         # Amostrar batch
-        experiences, indices, weights = self.replay_buffer.sample(self.batch_size)
+        batch, indices, weights = self.replay_buffer.sample(self.batch_size)
+        states, actions, rewards = batch.states, batch.actions, batch.rewards
+        next_states, dones = batch.next_states, batch.dones
         
-        # Preparar batch
-        states = np.array([e.state for e in experiences])
-        actions = np.array([e.action for e in experiences])
-        rewards = np.array([e.reward for e in experiences])
-        next_states = np.array([e.next_state for e in experiences])
-        dones = np.array([e.done for e in experiences])
+        # Q atual, Q do próximo estado e Q do target numa única chamada compilada
+        current_q, next_q_values, target_q_values = (
+            t.numpy() for t in self._get_dqn_forward(symbol)(states, next_states)
+        )
         
         # Double DQN: usar modelo principal para selecionar ação, target para avaliar
-        next_q_values = model.predict(next_states, verbose=0)
         next_actions = np.argmax(next_q_values, axis=1)
-        
-        target_q_values = target_model.predict(next_states, verbose=0)
         target_q = target_q_values[np.arange(len(next_actions)), next_actions]
         
         # Calcular targets
         targets = rewards + self.gamma * target_q * (1 - dones)
         
-        # Q-values atuais
-        current_q = model.predict(states, verbose=0)
+        # Q-values atuais (cópia gravável: recebe os targets)
+        current_q = np.array(current_q)
         
         # TD errors para prioridade
         td_errors = targets - current_q[np.arange(len(actions)), actions]
@@ -783,6 +753,150 @@ class RLTradingAgent:
             'epsilon': self.epsilon
         }
     
+    async def train_episode_offline(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        train_every: int = None,
+        utd_ratio: float = None
+    ) -> Dict[str, float]:
+        """
+        Treina um episódio com estados pré-calculados (mesmas métricas de train_episode)
+        
+        As features de mercado de todas as barras saem de uma passada vetorizada;
+        por barra só entram o estado da posição, a ação e a recompensa. O treino
+        roda a cada train_every barras com utd_ratio updates por barra coletada
+        (1 e 1.0 = mesmo cronograma de train_episode).
+        
+        Args:
+            symbol: Símbolo
+            df: DataFrame com dados históricos
+            train_every: Barras coletadas entre rodadas de treino
+            utd_ratio: Updates de gradiente por barra coletada
+            
+        Returns:
+            Dict com métricas do episódio
+        """
+        if not TENSORFLOW_AVAILABLE:
+            return {}
+        
+        train_every = max(int(train_every or self.offline_train_every), 1)
+        utd_ratio = self.offline_utd_ratio if utd_ratio is None else utd_ratio
+        
+        # Reset posição
+        self._position[symbol] = Position.FLAT
+        self._entry_price[symbol] = 0.0
+        
+        close = df['close'].to_numpy(dtype=np.float64)
+        n = len(close)
+        
+        # Layout de prepare_state: mercado | posição (7) | zeros
+        market = simple_feature_matrix(close, self.state_size - 7)[:, :self.state_size - 10]
+        m = market.shape[1]
+        state = np.zeros(self.state_size, dtype=np.float32)
+        next_state = np.zeros(self.state_size, dtype=np.float32)
+        
+        rewards = np.zeros(max(n - 51, 0))
+        trades = 0
+        wins = 0
+        since_train = 0
+        updates_due = 0.0
+        
+        for step, i in enumerate(range(50, n - 1)):
+            state[:m] = market[i]
+            state[m:m + 7] = self._position_features(symbol, close[i], 10000)
+            
+            # Selecionar ação e calcular recompensa
+            action, _ = self.get_action(state, symbol, training=True)
+            reward = self.calculate_reward(action, symbol, close[i], close[i + 1])
+            rewards[step] = reward
+            
+            # Próximo estado (posição já atualizada pela ação)
+            next_state[:m] = market[i + 1]
+            next_state[m:m + 7] = self._position_features(symbol, close[i + 1], 10000)
+            
+            done = (i == n - 2)
+            self.replay_buffer.add_transition(state, action.value, reward, next_state, done)
+            
+            # Estatísticas
+            if action == Action.CLOSE:
+                trades += 1
+                if reward > 0:
+                    wins += 1
+            
+            # Treinar
+            since_train += 1
+            if since_train == train_every or done:
+                if len(self.replay_buffer) >= self.batch_size:
+                    updates_due += utd_ratio * since_train
+                since_train = 0
+                while updates_due >= 1:
+                    self.train_step(symbol)
+                    updates_due -= 1
+        
+        # Calcular métricas
+        sharpe = np.mean(rewards) / (np.std(rewards) + 1e-8) * np.sqrt(252)
+        
+        return {
+            'total_reward': float(rewards.sum()),
+            'trades': trades,
+            'win_rate': wins / max(trades, 1),
+            'sharpe': sharpe,
+            'epsilon': self.epsilon
+        }
+    
+    async def train_episodes_parallel(
+        self,
+        episodes: Dict[str, pd.DataFrame],
+        max_workers: int = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Treina episódios de vários símbolos em processos paralelos
+        
+        Cada processo (spawn: TensorFlow não é fork-safe) cria um agente sobre
+        data_dir, parte dos pesos salvos do símbolo e salva o resultado, que é
+        recarregado aqui. Cada processo usa o próprio replay buffer; o epsilon
+        final é o menor entre os episódios.
+        
+        Args:
+            episodes: {símbolo: DataFrame}
+            max_workers: Processos (padrão: um por símbolo até o nº de CPUs)
+            
+        Returns:
+            {símbolo: métricas do episódio (ou {'error': ...})}
+        """
+        if not TENSORFLOW_AVAILABLE or not episodes:
+            return {}
+        
+        # Processos partem dos pesos atuais
+        for symbol in episodes:
+            self.save_model(symbol)
+        
+        max_workers = max_workers or min(len(episodes), os.cpu_count() or 1)
+        results: Dict[str, Dict[str, float]] = {}
+        
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {
+                symbol: asyncio.wrap_future(pool.submit(
+                    train_episode_worker, self.config, str(self.data_dir), symbol, df, self.epsilon
+                ))
+                for symbol, df in episodes.items()
+            }
+            for symbol, future in futures.items():
+                try:
+                    results[symbol] = await future
+                    self._load_symbol(symbol)
+                except Exception as e:
+                    logger.error(f"Erro no episódio paralelo {symbol}: {e}")
+                    results[symbol] = {'error': str(e)}
+        
+        epsilons = [r['epsilon'] for r in results.values() if 'epsilon' in r]
+        if epsilons:
+            self.epsilon = min(epsilons)
+        
+        return results
+    
     def _simple_features(self, df: pd.DataFrame) -> np.ndarray:
         """Gera features simples para treinamento"""
         close = df['close'].values
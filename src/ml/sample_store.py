@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+SAMPLE STORE - URION 2.0 ELITE
+==============================
+Armazenamento append-only de amostras de treino (features + resultado do trade)
+
+Antes: pd.concat do DataFrame inteiro a cada amostra e reescrita do parquet
+completo a cada 50 - os dois quadráticos no tamanho do histórico.
+
+- Memória: colunas numpy pré-alocadas que dobram de capacidade (append O(1)
+  amortizado); features já em float32, prontas para o treino sem cópia
+- Disco: segmentos imutáveis com as linhas [inicio, fim) de cada flush
+- Compactação: ao gravar um segmento do tamanho do anterior os dois viram um
+  (contador binário) - O(log n) arquivos e cada linha regravada O(log n) vezes
+- Carga: lê os poucos segmentos e concatena uma vez
+
+Segmentos em parquet (pyarrow/fastparquet); sem engine, .npz.
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+import importlib.util
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+PARQUET_AVAILABLE = any(
+    importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet')
+)
+
+# Colunas além das features (mesmos nomes do parquet antigo)
+META_COLUMNS = ('target', 'profit_pips', 'timestamp')
+
+SEGMENT_PATTERN = re.compile(r'^(\d+)_(\d+)\.(parquet|npz)$')
+
+# Temporário de _write_segment (sobra de gravação interrompida)
+TMP_SEGMENT_PATTERN = re.compile(r'^\.(\d+)_(\d+)\.tmp$')
+
+
+class SampleStore:
+    """
+    Amostras de treino de um modelo em colunas numpy + segmentos em disco
+
+    Linha i: features[i] (float32), target[i] (0/1), profit_pips[i] e
+    timestamp[i] (datetime64[ns]). Cada segmento <inicio>_<fim>.<ext> guarda as
+    linhas [inicio, fim); os segmentos cobrem [0, flushed) sem sobreposição.
+    """
+
+    def __init__(self, directory: Union[str, Path], feature_names: List[str] = None,
+                 segment_size: int = 50, initial_capacity: int = 256,
+                 segment_format: str = None):
+        """
+        Args:
+            directory: Diretório dos segmentos (um por modelo)
+            feature_names: Nomes das features (None = lidos dos segmentos)
+            segment_size: Amostras pendentes que disparam um flush
+            initial_capacity: Capacidade inicial das colunas
+            segment_format: 'parquet' ou 'npz' (None = parquet se houver engine)
+        """
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.segment_format = segment_format or ('parquet' if PARQUET_AVAILABLE else 'npz')
+
+        self.feature_names: List[str] = list(feature_names or [])
+        self._capacity = initial_capacity
+        self._features: Optional[np.ndarray] = None
+        self._target = np.zeros(initial_capacity, dtype=np.int8)
+        self._profit = np.zeros(initial_capacity, dtype=np.float32)
+        self._timestamp = np.zeros(initial_capacity, dtype='datetime64[ns]')
+        self._size = 0
+
+        # Segmentos em disco: (inicio, fim, caminho), em ordem
+        self._segments: List[Tuple[int, int, Path]] = []
+        self._flushed = 0
+
+        self.stats = {
+            'appends': 0,
+            'flushes': 0,
+            'compactions': 0,
+            'rows_written': 0,
+            'segments_loaded': 0
+        }
+
+        if self.feature_names:
+            self._allocate(len(self.feature_names))
+        self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+    @property
+    def pending(self) -> int:
+        """Amostras ainda não gravadas em disco"""
+        return self._size - self._flushed
+
+    # ------------------------------------------------------------------
+    # Colunas em memória
+    # ------------------------------------------------------------------
+
+    def _allocate(self, n_features: int) -> None:
+        self._features = np.zeros((self._capacity, n_features), dtype=np.float32)
+
+    def _reserve(self, n: int) -> None:
+        """Garante capacidade para n linhas (dobra até caber)"""
+        if n <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < n:
+            capacity *= 2
+        size = self._size
+        features = np.zeros((capacity, self.n_features), dtype=np.float32)
+        features[:size] = self._features[:size]
+        self._features = features
+        for name in ('_target', '_profit', '_timestamp'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:size] = old[:size]
+            setattr(self, name, new)
+        self._capacity = capacity
+
+    def append(self, features: np.ndarray, target: int, profit_pips: float = 0.0,
+               timestamp: datetime = None) -> None:
+        """Adiciona uma amostra; grava segmento quando há segment_size pendentes"""
+        row = np.asarray(features, dtype=np.float32).ravel()
+        if self._features is None:
+            if not self.feature_names:
+                self.feature_names = [f'f{i}' for i in range(len(row))]
+            self._allocate(len(self.feature_names))
+        if len(row) != self.n_features:
+            raise ValueError(f"Amostra com {len(row)} features, store com {self.n_features}")
+
+        self._reserve(self._size + 1)
+        i = self._size
+        self._features[i] = row
+        self._target[i] = target
+        self._profit[i] = profit_pips
+        self._timestamp[i] = np.datetime64(timestamp or datetime.now(), 'ns')
+        self._size += 1
+        self.stats['appends'] += 1
+
+        if self.pending >= self.segment_size:
+            self.flush()
+
+    @property
+    def features(self) -> np.ndarray:
+        """Matriz (n, n_features) float32 - view, sem cópia"""
+        if self._features is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._features[:self._size]
+
+    @property
+    def targets(self) -> np.ndarray:
+        return self._target[:self._size]
+
+    @property
+    def profit_pips(self) -> np.ndarray:
+        return self._profit[:self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamp[:self._size]
+
+    def to_frame(self, start: int = 0, stop: int = None) -> pd.DataFrame:
+        """Linhas [start, stop) no layout do parquet antigo (features + target/profit_pips/timestamp)"""
+        stop = self._size if stop is None else stop
+        frame = pd.DataFrame(self._features[start:stop], columns=self.feature_names)
+        frame['target'] = self._target[start:stop]
+        frame['profit_pips'] = self._profit[start:stop]
+        frame['timestamp'] = self._timestamp[start:stop]
+        return frame
+
+    # ------------------------------------------------------------------
+    # Segmentos
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, start: int, stop: int) -> Path:
+        return self.directory / f"{start:012d}_{stop:012d}.{self.segment_format}"
+
+    def _write_segment(self, start: int, stop: int) -> Path:
+        """Grava linhas [start, stop) em arquivo temporário e renomeia (atômico)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._segment_path(start, stop)
+        tmp = path.with_name(f".{path.stem}.tmp")
+
+        if self.segment_format == 'parquet':
+            self.to_frame(start, stop).to_parquet(tmp)
+        else:
+            with open(tmp, 'wb') as f:
+                np.savez(
+                    f,
+                    feature_names=np.array(self.feature_names),
+                    features=self._features[start:stop],
+                    target=self._target[start:stop],
+                    profit_pips=self._profit[start:stop],
+                    timestamp=self._timestamp[start:stop]
+                )
+        os.replace(tmp, path)
+        self.stats['rows_written'] += stop - start
+        return path
+
+    def flush(self) -> None:
+        """Grava amostras pendentes como novo segmento e compacta"""
+        if self.pending <= 0:
+            return
+        start, stop = self._flushed, self._size
+        path = self._write_segment(start, stop)
+        self._segments.append((start, stop, path))
+        self._flushed = stop
+        self.stats['flushes'] += 1
+        self._compact()
+
+    def _compact(self) -> None:
+        """Junta o último segmento ao anterior enquanto forem de tamanho >= (contador binário)"""
+        while len(self._segments) >= 2:
+            prev_start, prev_stop, prev_path = self._segments[-2]
+            last_start, last_stop, last_path = self._segments[-1]
+            if last_stop - last_start < prev_stop - prev_start:
+                break
+            # Dados estão em memória: grava a faixa unida sem reler os arquivos
+            path = self._write_segment(prev_start, last_stop)
+            for old in (prev_path, last_path):
+                if old != path:
+                    old.unlink(missing_ok=True)
+            self._segments[-2:] = [(prev_start, last_stop, path)]
+            self.stats['compactions'] += 1
+
+    def _read_segment(self, path: Path) -> Dict[str, np.ndarray]:
+        if path.suffix == '.parquet':
+            return self._columns_from_frame(pd.read_parquet(path))
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    def _columns_from_frame(self, frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        feature_cols = [c for c in frame.columns if c not in META_COLUMNS]
+        return {
+            'feature_names': np.array(feature_cols),
+            'features': frame[feature_cols].to_numpy(dtype=np.float32),
+            'target': frame['target'].to_numpy(dtype=np.int8),
+            'profit_pips': frame['profit_pips'].to_numpy(dtype=np.float32),
+            'timestamp': pd.to_datetime(frame['timestamp']).to_numpy(dtype='datetime64[ns]')
+        }
+
+    def _load(self) -> None:
+        """Carrega segmentos contíguos a partir de 0 (descarta sobras de gravação/compactação interrompida)"""
+        if not self.directory.exists():
+            return
+
+        found = []
+        for path in self.directory.iterdir():
+            match = SEGMENT_PATTERN.match(path.name)
+            if match:
+                found.append((int(match.group(1)), int(match.group(2)), path))
+            elif TMP_SEGMENT_PATTERN.match(path.name):
+                # Nunca renomeado: o segmento original (ou os unidos) continua em disco
+                path.unlink(missing_ok=True)
+
+        # Compactação interrompida deixa o segmento unido e os originais: ficar com o maior
+        found.sort(key=lambda s: (s[0], -s[1]))
+        segments, position = [], 0
+        for start, stop, path in found:
+            if start == position and stop > start:
+                segments.append((start, stop, path))
+                position = stop
+            elif stop <= position:
+                path.unlink(missing_ok=True)
+        if not segments:
+            return
+
+        chunks = [self._read_segment(path) for _, _, path in segments]
+        names = [str(n) for n in chunks[0]['feature_names']]
+        if self.feature_names and names != self.feature_names:
+            logger.warning(f"Features do store {self.directory.name} diferem das informadas - usando as do disco")
+        self.feature_names = names
+
+        self._capacity = max(self._capacity, position)
+        self._allocate(self.n_features)
+        self._target = np.zeros(self._capacity, dtype=np.int8)
+        self._profit = np.zeros(self._capacity, dtype=np.float32)
+        self._timestamp = np.zeros(self._capacity, dtype='datetime64[ns]')
+        for (start, stop, _), chunk in zip(segments, chunks):
+            self._features[start:stop] = chunk['features']
+            self._target[start:stop] = chunk['target']
+            self._profit[start:stop] = chunk['profit_pips']
+            self._timestamp[start:stop] = chunk['timestamp']
+
+        self._size = self._flushed = position
+        self._segments = segments
+        self.stats['segments_loaded'] = len(segments)
+
+    def import_frame(self, frame: pd.DataFrame) -> None:
+        """Importa DataFrame no layout antigo (um parquet por modelo) e grava como segmento"""
+        columns = self._columns_from_frame(frame)
+        if self._features is None:
+            self.feature_names = [str(n) for n in columns['feature_names']]
+            self._allocate(self.n_features)
+        n = len(frame)
+        self._reserve(self._size + n)
+        start = self._size
+        self._features[start:start + n] = columns['features']
+        self._target[start:start + n] = columns['target']
+        self._profit[start:start + n] = columns['profit_pips']
+        self._timestamp[start:start + n] = columns['timestamp']
+        self._size += n
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'samples': self._size,
+            'pending': self.pending,
+            'segments': len(self._segments),
+            'capacity': self._capacity,
+            'format': self.segment_format
+        }
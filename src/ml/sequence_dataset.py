@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+SEQUENCE DATASET - URION 2.0 ELITE
+==================================
+Janelas deslizantes sem cópia para treino de LSTM / Transformer
+
+np.array([features[i:i + lookback] for i in ...]) copia cada janela:
+lookback x n_amostras x n_features em memória (60x para lookback 60).
+Aqui as janelas são uma view (sliding_window_view) sobre a matriz de
+features - só o batch em uso é materializado.
+
+- Funciona sobre np.memmap (arquivos .npy): histórico M1 de vários anos
+  treina com RAM limitada ao batch
+- Normalização (mean/std) aplicada por batch, sem cópia normalizada da série
+- Geradores de batch para o loop PyTorch e tf.data.Dataset para model.fit
+
+Autor: Urion Trading Bot
+Versão: 2.0 Elite
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+Targets = Dict[str, np.ndarray]
+
+
+def create_feature_file(path: Union[str, Path], n_rows: int, n_features: int,
+                        dtype=np.float32) -> np.memmap:
+    """
+    Cria arquivo .npy mapeado em memória para preencher em blocos
+
+    Ex: escrever features de cada mês em file[start:end], depois flush().
+    """
+    return np.lib.format.open_memmap(str(path), mode='w+', dtype=dtype, shape=(n_rows, n_features))
+
+
+def save_feature_file(path: Union[str, Path], features: np.ndarray, dtype=np.float32) -> np.memmap:
+    """Grava features em .npy e retorna o arquivo reaberto como memmap (somente leitura)"""
+    out = create_feature_file(path, features.shape[0], features.shape[1], dtype)
+    out[:] = features
+    out.flush()
+    del out
+    return np.load(str(path), mmap_mode='r')
+
+
+class SequenceDataset:
+    """
+    Janelas (lookback, n_features) sobre uma matriz de features
+
+    Janela i = features[start + i : start + i + lookback]; targets[name][i]
+    é o alvo da janela i. Fatias do dataset (split, subset) são views.
+    """
+
+    def __init__(self, features: np.ndarray, lookback: int, n_windows: int = None,
+                 targets: Targets = None, mean: np.ndarray = None, std: np.ndarray = None,
+                 dtype=np.float32, _start: int = 0):
+        """
+        Args:
+            features: Matriz (n_barras, n_features) - array ou memmap
+            lookback: Barras por janela
+            n_windows: Número de janelas (None = todas que cabem)
+            targets: Alvos por janela {nome: array (n_windows, ...)}
+            mean, std: Normalização aplicada a cada batch
+            dtype: Tipo dos batches materializados
+        """
+        if features.ndim != 2:
+            raise ValueError(f"features deve ser 2D (n_barras, n_features), recebido {features.shape}")
+        self.features = features
+        self.lookback = lookback
+        self.mean = None if mean is None else np.asarray(mean, dtype=dtype)
+        self.std = None if std is None else np.asarray(std, dtype=dtype)
+        self.dtype = dtype
+
+        available = max(len(features) - _start - lookback + 1, 0)
+        self.n_windows = available if n_windows is None else min(n_windows, available)
+        self._start = _start
+
+        self.targets: Targets = {}
+        for name, values in (targets or {}).items():
+            if len(values) < self.n_windows:
+                raise ValueError(f"Target {name} com {len(values)} linhas para {self.n_windows} janelas")
+            self.targets[name] = values[:self.n_windows]
+
+        # (janelas, n_features, lookback) -> (janelas, lookback, n_features), ainda view
+        if self.n_windows:
+            windows = sliding_window_view(features[_start:_start + self.n_windows + lookback - 1], lookback, axis=0)
+            self.windows = windows.transpose(0, 2, 1)
+        else:
+            self.windows = np.empty((0, lookback, features.shape[1]), dtype=features.dtype)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], lookback: int, **kwargs) -> 'SequenceDataset':
+        """Dataset sobre arquivo .npy mapeado em memória (lido sob demanda)"""
+        return cls(np.load(str(path), mmap_mode='r'), lookback, **kwargs)
+
+    def __len__(self) -> int:
+        return self.n_windows
+
+    @property
+    def n_features(self) -> int:
+        return self.features.shape[1]
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return (self.n_windows, self.lookback, self.n_features)
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def subset(self, start: int, stop: int) -> 'SequenceDataset':
+        """Janelas [start, stop) como novo dataset (view, sem cópia)"""
+        start, stop, _ = slice(start, stop).indices(self.n_windows)
+        stop = max(stop, start)
+        return SequenceDataset(
+            self.features, self.lookback, n_windows=stop - start,
+            targets={name: values[start:stop] for name, values in self.targets.items()},
+            mean=self.mean, std=self.std, dtype=self.dtype, _start=self._start + start
+        )
+
+    def split(self, validation_fraction: float) -> Tuple['SequenceDataset', 'SequenceDataset']:
+        """Treino / validação em ordem temporal (validação = ceil(fração * n) janelas finais)"""
+        n_val = int(np.ceil(validation_fraction * self.n_windows))
+        n_train = self.n_windows - n_val
+        return self.subset(0, n_train), self.subset(n_train, self.n_windows)
+
+    # ------------------------------------------------------------------
+    # Materialização por batch
+    # ------------------------------------------------------------------
+
+    def batch(self, index: Union[slice, np.ndarray]) -> np.ndarray:
+        """Janelas selecionadas como array contíguo (única cópia, do tamanho do batch)"""
+        # Fatia é view: copiar antes de normalizar; índice já gera cópia
+        out = self.windows[index].astype(self.dtype, copy=isinstance(index, slice))
+        if self.mean is not None:
+            out -= self.mean
+        if self.std is not None:
+            out /= self.std
+        return out
+
+    def target_batch(self, index: Union[slice, np.ndarray]) -> Targets:
+        return {name: values[index] for name, values in self.targets.items()}
+
+    def batches(self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None,
+                drop_last: bool = False) -> Iterator[Tuple[np.ndarray, Targets]]:
+        """
+        Gera (X, targets) por batch
+
+        Com shuffle a ordem das janelas é embaralhada; cada batch é ordenado
+        para leituras mais sequenciais no memmap.
+        """
+        n = self.n_windows
+        order = np.random.default_rng(seed).permutation(n) if shuffle else None
+        stop = n - n % batch_size if drop_last else n
+        for start in range(0, stop, batch_size):
+            end = min(start + batch_size, n)
+            index = np.sort(order[start:end]) if shuffle else slice(start, end)
+            yield self.batch(index), self.target_batch(index)
+
+    def to_array(self) -> np.ndarray:
+        """Todas as janelas materializadas (só para datasets pequenos)"""
+        return self.batch(slice(None))
+
+    def to_tf_dataset(self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None):
+        """tf.data.Dataset de (X, {target: y}) gerado por batch (model.fit / predict)"""
+        import tensorflow as tf
+
+        x_spec = tf.TensorSpec((None, self.lookback, self.n_features), tf.as_dtype(self.dtype))
+        y_spec = {
+            name: tf.TensorSpec((None,) + values.shape[1:], tf.as_dtype(values.dtype))
+            for name, values in self.targets.items()
+        }
+        epoch = [0]
+
+        def generate():
+            # Nova permutação por época
+            epoch[0] += 1
+            batch_seed = None if seed is None else seed + epoch[0]
+            for X, y in self.batches(batch_size, shuffle=shuffle, seed=batch_seed):
+                yield (X, y) if y_spec else X
+
+        signature = (x_spec, y_spec) if y_spec else x_spec
+        dataset = tf.data.Dataset.from_generator(generate, output_signature=signature)
+        return dataset.prefetch(tf.data.AUTOTUNE)
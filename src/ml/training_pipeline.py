@@ -11,6 +11,7 @@ Funcionalidades:
 - Hyperparameter optimization com Optuna
 - Model versioning
 - A/B testing de modelos
+- Retreino incremental (warm start do booster) com refit por agenda/drift
 """
 
 import numpy as np
@@ -27,6 +28,9 @@ import json
 from pathlib import Path
 import hashlib
 
+from ml.incremental_boosting import IncrementalBoostingTrainer
+from ml.parallel_tuning import tune_xgboost
+
 # Lazy loading globals
 optuna = None
 xgb = None
@@ -139,6 +143,7 @@ class TrainingConfig:
     n_trials: int = 50  # Optuna trials
     early_stopping_rounds: int = 10
     min_trades_for_retraining: int = 100
+    incremental: bool = True  # Continuar boosting do modelo ativo com as linhas novas
 
 
 class MLTrainingPipeline:
@@ -165,6 +170,12 @@ class MLTrainingPipeline:
         self._model_versions: Dict[str, ModelVersion] = {}
         self._scaler: Optional[Any] = None
         
+        # Retreino incremental: linhas ja vistas pelo modelo ativo (indice do df)
+        self._boosting = IncrementalBoostingTrainer(self.ml_config)
+        self._trained_until: Optional[Any] = None
+        self._trained_features: List[str] = []
+        self._last_tuning: Dict = {}
+        
         # Threading
         self._training_thread = None
         self._running = False
@@ -189,14 +200,21 @@ class MLTrainingPipeline:
     
     def prepare_features(self, df: pd.DataFrame, feature_columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
         """Prepara features para treinamento"""
+        X, y, _ = self._prepare_features_with_index(df, feature_columns)
+        return X, y
+    
+    def _prepare_features_with_index(self, df: pd.DataFrame,
+                                     feature_columns: List[str]) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+        """Features, target e indice do df das linhas usadas"""
         if not is_sklearn_available():
             logger.error("sklearn nao disponivel")
-            return np.array([]), np.array([])
+            return np.array([]), np.array([]), pd.Index([])
         
         # Remover NaNs
         df_clean = df.dropna(subset=feature_columns)
         
         X = df_clean[feature_columns].values
+        index = df_clean.index
         
         # Target: 1 se preco subiu, 0 se caiu
         if 'target' in df_clean.columns:
@@ -205,42 +223,29 @@ class MLTrainingPipeline:
             # Criar target baseado em movimento de preco
             y = (df_clean['close'].shift(-1) > df_clean['close']).astype(int).values[:-1]
             X = X[:-1]
+            index = index[:-1]
         
-        return X, y
+        return X, y, index
     
-    def train_xgboost(self, X_train: np.ndarray, y_train: np.ndarray,
-                     X_val: np.ndarray, y_val: np.ndarray,
-                     hyperparams: Dict = None) -> Tuple[Any, ModelMetrics]:
-        """Treina modelo XGBoost"""
-        if not is_xgboost_available():
-            logger.error("XGBoost nao disponivel")
-            return None, None
-        
+    def _xgb_params(self, hyperparams: Dict = None) -> Dict:
+        """Parametros do XGBoost (padrao + hyperparametros otimizados)"""
         default_params = {
             'max_depth': 6,
             'learning_rate': 0.1,
             'n_estimators': 100,
             'objective': 'binary:logistic',
             'eval_metric': 'logloss',
+            'tree_method': 'hist',
             'use_label_encoder': False,
             'verbosity': 0
         }
-        
-        params = {**default_params, **(hyperparams or {})}
-        
-        model = xgb.XGBClassifier(**params)
-        
-        # Treinar com early stopping
-        model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            verbose=False
-        )
-        
-        # Avaliar
+        return {**default_params, **(hyperparams or {})}
+    
+    def _evaluate(self, model: Any, X_val: np.ndarray, y_val: np.ndarray) -> ModelMetrics:
+        """Metricas de classificacao no conjunto de validacao"""
         y_pred = model.predict(X_val)
         
-        metrics = ModelMetrics(
+        return ModelMetrics(
             accuracy=accuracy_score(y_val, y_pred),
             precision=precision_score(y_val, y_pred, zero_division=0),
             recall=recall_score(y_val, y_pred, zero_division=0),
@@ -251,60 +256,69 @@ class MLTrainingPipeline:
             total_trades=len(y_val),
             validation_date=datetime.now()
         )
+    
+    def train_xgboost(self, X_train: np.ndarray, y_train: np.ndarray,
+                     X_val: np.ndarray, y_val: np.ndarray,
+                     hyperparams: Dict = None) -> Tuple[Any, ModelMetrics]:
+        """Treina modelo XGBoost"""
+        if not is_xgboost_available():
+            logger.error("XGBoost nao disponivel")
+            return None, None
+        
+        model = xgb.XGBClassifier(**self._xgb_params(hyperparams))
         
-        return model, metrics
+        # Treinar com early stopping
+        model.fit(
+            X_train, y_train,
+            eval_set=[(X_val, y_val)],
+            verbose=False
+        )
+        
+        return model, self._evaluate(model, X_val, y_val)
     
     def optimize_hyperparameters(self, X: np.ndarray, y: np.ndarray,
-                                model_type: ModelType, n_trials: int = 50) -> Dict:
-        """Otimiza hyperparametros usando Optuna"""
+                                model_type: ModelType, n_trials: int = 50,
+                                n_workers: int = None, timeout: float = None) -> Dict:
+        """
+        Otimiza hyperparametros usando Optuna
+        
+        Folds temporais pre-montados, poda por fold (MedianPruner) e, com
+        n_workers > 1, processos compartilhando o estudo (storage em arquivo)
+        e os dados (memmap).
+        
+        Args:
+            n_workers: Processos (padrao: ml_training.tuning_workers, 1)
+            timeout: Orcamento em segundos (padrao: ml_training.tuning_timeout_s)
+        """
         if not is_optuna_available():
             logger.warning("Optuna nao disponivel, usando parametros padrao")
             return {}
         
-        if not is_sklearn_available():
+        if model_type != ModelType.XGBOOST or not is_xgboost_available():
             return {}
         
-        def objective(trial):
-            # Split temporal
-            tscv = TimeSeriesSplit(n_splits=3)
-            scores = []
-            
-            for train_idx, val_idx in tscv.split(X):
-                X_train, X_val = X[train_idx], X[val_idx]
-                y_train, y_val = y[train_idx], y[val_idx]
-                
-                if model_type == ModelType.XGBOOST and is_xgboost_available():
-                    params = {
-                        'max_depth': trial.suggest_int('max_depth', 3, 10),
-                        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
-                        'n_estimators': trial.suggest_int('n_estimators', 50, 300),
-                        'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
-                        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-                        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-                        'gamma': trial.suggest_float('gamma', 0, 1),
-                        'reg_alpha': trial.suggest_float('reg_alpha', 0, 1),
-                        'reg_lambda': trial.suggest_float('reg_lambda', 0, 1),
-                    }
-                    
-                    model = xgb.XGBClassifier(**params, objective='binary:logistic', 
-                                            use_label_encoder=False, verbosity=0)
-                    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
-                    y_pred = model.predict(X_val)
-                    score = accuracy_score(y_val, y_pred)
-                else:
-                    score = 0.5
-                
-                scores.append(score)
-            
-            return np.mean(scores)
-        
-        # Executar otimizacao
-        study = optuna.create_study(direction='maximize')
-        study.optimize(objective, n_trials=n_trials, show_progress_bar=False)
+        n_workers = n_workers or self.ml_config.get('tuning_workers', 1)
+        timeout = timeout if timeout is not None else self.ml_config.get('tuning_timeout_s')
+        storage_path = self.ml_config.get('tuning_storage')
+        
+        result = tune_xgboost(
+            X, y,
+            n_trials=n_trials,
+            n_workers=n_workers,
+            timeout=timeout,
+            n_splits=3,
+            storage_path=storage_path
+        )
+        self._last_tuning = result
         
-        logger.info(f"Melhor accuracy: {study.best_value:.4f}")
+        if result['best_value'] is not None:
+            logger.info(
+                f"Melhor accuracy: {result['best_value']:.4f} | "
+                f"{result['n_trials']} trials ({result['n_pruned']} podados) | "
+                f"{n_workers} worker(s) | {result['elapsed_s']:.1f}s"
+            )
         
-        return study.best_params
+        return result['best_params']
     
     def walk_forward_validation(self, df: pd.DataFrame, feature_columns: List[str],
                                n_splits: int = 5) -> List[ModelMetrics]:
@@ -343,14 +357,24 @@ class MLTrainingPipeline:
         return results
     
     def train_model(self, df: pd.DataFrame, config: TrainingConfig,
-                   optimize: bool = True) -> Optional[ModelVersion]:
+                   optimize: bool = True, full_refit: bool = False) -> Optional[ModelVersion]:
         """
         Treina um novo modelo
+        
+        Com config.incremental e um XGBoost ativo com as mesmas features,
+        continua o boosting só com as linhas do df posteriores às já vistas;
+        refit completo (com Optuna) quando o trainer detecta agenda/drift ou
+        full_refit=True.
         """
         self.status = TrainingStatus.TRAINING
         
         try:
-            X, y = self.prepare_features(df, config.features)
+            if config.model_type == ModelType.XGBOOST and config.incremental and not full_refit:
+                version = self._train_incremental(df, config)
+                if version is not None:
+                    return version
+            
+            X, y, index = self._prepare_features_with_index(df, config.features)
             
             if len(X) < 100:
                 logger.error(f"Dados insuficientes: {len(X)} amostras")
@@ -363,14 +387,14 @@ class MLTrainingPipeline:
             y_train, y_val = y[:split_idx], y[split_idx:]
             
             # Normalizar
-            if SKLEARN_AVAILABLE:
+            if is_sklearn_available():
                 self._scaler = StandardScaler()
                 X_train = self._scaler.fit_transform(X_train)
                 X_val = self._scaler.transform(X_val)
             
             # Otimizar hyperparametros
             hyperparams = {}
-            if optimize and OPTUNA_AVAILABLE:
+            if optimize and is_optuna_available():
                 self.status = TrainingStatus.OPTIMIZING
                 hyperparams = self.optimize_hyperparameters(
                     X_train, y_train,
@@ -382,78 +406,135 @@ class MLTrainingPipeline:
             self.status = TrainingStatus.TRAINING
             
             if config.model_type == ModelType.XGBOOST:
-                model, metrics = self.train_xgboost(
-                    X_train, y_train,
-                    X_val, y_val,
-                    hyperparams
+                if not is_xgboost_available():
+                    logger.error("XGBoost nao disponivel")
+                    self.status = TrainingStatus.FAILED
+                    return None
+                # hist + matriz quantizada em cache (referencia para updates incrementais)
+                model, _ = self._boosting.refit(
+                    'pipeline', self._xgb_params(hyperparams),
+                    X_train, y_train, X_val, y_val,
+                    trained_rows=len(X), reason='full_refit' if full_refit else 'no_model'
                 )
+                metrics = self._evaluate(model, X_val, y_val)
+                self._trained_until = index[-1]
+                self._trained_features = list(config.features)
             else:
                 logger.error(f"Tipo de modelo nao suportado: {config.model_type}")
                 self.status = TrainingStatus.FAILED
                 return None
             
-            if model is None:
-                self.status = TrainingStatus.FAILED
-                return None
-            
-            # Validar
-            self.status = TrainingStatus.VALIDATING
-            
-            if metrics.accuracy < self.min_accuracy_threshold:
-                logger.warning(f"Accuracy {metrics.accuracy:.4f} abaixo do threshold {self.min_accuracy_threshold}")
-            
-            # Criar versao
-            version_hash = hashlib.md5(str(datetime.now()).encode()).hexdigest()[:8]
-            version_id = f"{config.model_type.value}_{version_hash}"
-            
-            # Feature importance
-            feature_importance = {}
-            if hasattr(model, 'feature_importances_'):
-                for i, importance in enumerate(model.feature_importances_):
-                    if i < len(config.features):
-                        feature_importance[config.features[i]] = float(importance)
-            
-            # Salvar modelo
-            model_path = self.models_dir / f"{version_id}.pkl"
-            with open(model_path, 'wb') as f:
-                pickle.dump({
-                    'model': model,
-                    'scaler': self._scaler,
-                    'features': config.features,
-                    'hyperparams': hyperparams
-                }, f)
-            
-            version = ModelVersion(
-                version=version_id,
-                model_type=config.model_type,
-                created_at=datetime.now(),
-                metrics=metrics,
-                hyperparameters=hyperparams,
-                feature_importance=feature_importance,
-                is_active=True,
-                file_path=str(model_path)
-            )
-            
-            # Registrar versao
-            with self._lock:
-                # Desativar versao anterior
-                for v in self._model_versions.values():
-                    v.is_active = False
-                
-                self._model_versions[version_id] = version
-                self._current_model = model
-            
-            self.status = TrainingStatus.COMPLETED
-            
-            logger.info(f"Modelo treinado: {version_id}, Accuracy: {metrics.accuracy:.4f}")
-            
-            return version
+            return self._register_version(model, metrics, config, hyperparams)
             
         except Exception as e:
             logger.error(f"Erro no treinamento: {e}")
             self.status = TrainingStatus.FAILED
             return None
     
+    def _train_incremental(self, df: pd.DataFrame, config: TrainingConfig) -> Optional[ModelVersion]:
+        """
+        Atualizacao incremental do XGBoost ativo
+        
+        Retorna None quando precisa de refit completo (sem modelo, features
+        diferentes, agenda ou drift) ou nao ha linhas novas suficientes.
+        """
+        if (self._current_model is None or self._trained_until is None
+                or self._trained_features != list(config.features) or not is_xgboost_available()):
+            return None
+        
+        try:
+            new_df = df[df.index > self._trained_until]
+        except TypeError:
+            return None  # Indice nao comparavel com o ultimo treino
+        
+        X_new, y_new, index = self._prepare_features_with_index(new_df, config.features)
+        if len(X_new) < 10:
+            return None
+        if self._scaler is not None:
+            X_new = self._scaler.transform(X_new)
+        
+        reason = self._boosting.refit_reason('pipeline', self._current_model, X_new, y_new)
+        if reason is not None:
+            logger.info(f"Refit completo necessario: {reason}")
+            return None
+        
+        # Validacao = final das linhas novas (entra no proximo update)
+        split_idx = int(len(X_new) * (1 - config.validation_split))
+        X_train, X_val = X_new[:split_idx], X_new[split_idx:]
+        y_train, y_val = y_new[:split_idx], y_new[split_idx:]
+        
+        active = next((v for v in self._model_versions.values() if v.is_active), None)
+        hyperparams = active.hyperparameters if active else {}
+        
+        state = self._boosting.states['pipeline']
+        model, _ = self._boosting.update(
+            'pipeline', self._xgb_params(hyperparams), self._current_model,
+            X_train, y_train, trained_rows=state.trained_rows + split_idx
+        )
+        self._trained_until = index[split_idx - 1]
+        
+        metrics = self._evaluate(model, X_val, y_val)
+        logger.info(f"Update incremental: {split_idx} linhas, {self._boosting.incremental_rounds} arvores")
+        return self._register_version(model, metrics, config, hyperparams)
+    
+    def _register_version(self, model: Any, metrics: ModelMetrics, config: TrainingConfig,
+                          hyperparams: Dict) -> ModelVersion:
+        """Valida, salva e ativa nova versao do modelo"""
+        # Validar
+        self.status = TrainingStatus.VALIDATING
+        
+        if metrics.accuracy < self.min_accuracy_threshold:
+            logger.warning(f"Accuracy {metrics.accuracy:.4f} abaixo do threshold {self.min_accuracy_threshold}")
+        
+        # Criar versao
+        version_hash = hashlib.md5(str(datetime.now()).encode()).hexdigest()[:8]
+        version_id = f"{config.model_type.value}_{version_hash}"
+        
+        # Feature importance
+        feature_importance = {}
+        if hasattr(model, 'feature_importances_'):
+            for i, importance in enumerate(model.feature_importances_):
+                if i < len(config.features):
+                    feature_importance[config.features[i]] = float(importance)
+        
+        # Salvar modelo
+        model_path = self.models_dir / f"{version_id}.pkl"
+        with open(model_path, 'wb') as f:
+            pickle.dump({
+                'model': model,
+                'scaler': self._scaler,
+                'features': config.features,
+                'hyperparams': hyperparams,
+                'boosting_state': self._boosting.states.get('pipeline'),
+                'trained_until': self._trained_until
+            }, f)
+        
+        version = ModelVersion(
+            version=version_id,
+            model_type=config.model_type,
+            created_at=datetime.now(),
+            metrics=metrics,
+            hyperparameters=hyperparams,
+            feature_importance=feature_importance,
+            is_active=True,
+            file_path=str(model_path)
+        )
+        
+        # Registrar versao
+        with self._lock:
+            # Desativar versao anterior
+            for v in self._model_versions.values():
+                v.is_active = False
+            
+            self._model_versions[version_id] = version
+            self._current_model = model
+        
+        self.status = TrainingStatus.COMPLETED
+        
+        logger.info(f"Modelo treinado: {version_id}, Accuracy: {metrics.accuracy:.4f}")
+        
+        return version
+    
     def load_model(self, version_id: str) -> bool:
         """Carrega um modelo especifico"""
         try:
@@ -469,6 +550,14 @@ class MLTrainingPipeline:
             self._current_model = data['model']
             self._scaler = data['scaler']
             
+            # Estado incremental da versao (sem estado: proximo treino e refit completo)
+            self._trained_until = data.get('trained_until')
+            self._trained_features = list(data.get('features', []))
+            self._boosting.states.pop('pipeline', None)
+            self._boosting._dmatrix_cache.pop('pipeline', None)
+            if data.get('boosting_state') is not None:
+                self._boosting.states['pipeline'] = data['boosting_state']
+
             # Atualizar status ativo
             with self._lock:
                 for v in self._model_versions.values():
@@ -568,7 +657,9 @@ class MLTrainingPipeline:
             'active_version': active_version.version if active_version else None,
             'status': self.status.value,
             'versions': versions,
-            'trade_history_size': len(self._trade_history)
+            'trade_history_size': len(self._trade_history),
+            'boosting': self._boosting.get_stats(),
+            'last_tuning': self._last_tuning
         }
 
 
@@ -24,6 +24,9 @@ import pickle
 from pathlib import Path
 import json
 
+from ml.inference_runtime import TorchInferenceRuntime
+from ml.sequence_dataset import SequenceDataset
+
 # Lazy loading
 torch = None
 nn = None
@@ -83,6 +86,9 @@ class TransformerConfig:
     learning_rate: float = 0.001
     epochs: int = 100
     early_stopping_patience: int = 10
+    
+    # Inferência: torchscript | onnx | eager
+    inference_backend: str = 'torchscript'
 
 
 class PositionalEncoding:
@@ -144,6 +150,7 @@ class TransformerPricePredictor:
         self._optimizer = None
         self._criterion = None
         self._device = None
+        self._runtime: Optional[TorchInferenceRuntime] = None
         
         # Normalizadores
         self._feature_mean = None
@@ -182,6 +189,7 @@ class TransformerPricePredictor:
             # Construir modelo como módulo customizado
             self._model = self._create_transformer_model()
             self._model = self._model.to(self._device)
+            self._runtime = None
             
             # Optimizer e Loss
             self._optimizer = torch.optim.Adam(
@@ -293,18 +301,25 @@ class TransformerPricePredictor:
     
     def prepare_data(self, 
                      ohlcv_data: np.ndarray,
-                     create_labels: bool = True) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+                     create_labels: bool = True) -> Tuple[Optional[SequenceDataset], Optional[Dict]]:
         """
         Prepara dados para treinamento/inferência
         
+        As janelas são views sobre ohlcv_data (pode ser memmap) e a
+        normalização é aplicada por batch: nada do tamanho
+        seq_length x n_amostras é alocado.
+        
         Args:
             ohlcv_data: Array com [open, high, low, close, volume]
             create_labels: Se True, cria labels para treinamento
             
         Returns:
-            (X, y) se create_labels, senão (X, None)
+            (dataset, y) se create_labels, senão (dataset, None)
         """
-        if len(ohlcv_data) < self.config.seq_length + self.config.forecast_horizon:
+        seq_length = self.config.seq_length
+        horizon = self.config.forecast_horizon
+        
+        if len(ohlcv_data) < seq_length + horizon:
             logger.warning("Dados insuficientes para preparação")
             return None, None
         
@@ -314,56 +329,39 @@ class TransformerPricePredictor:
             self._feature_std = np.std(ohlcv_data, axis=0)
             self._feature_std[self._feature_std == 0] = 1  # Evitar divisão por zero
         
-        normalized = (ohlcv_data - self._feature_mean) / self._feature_std
-        
-        # Criar sequências
-        X = []
-        y_direction = []
-        y_magnitude = []
-        y_volatility = []
-        
-        for i in range(len(normalized) - self.config.seq_length - self.config.forecast_horizon + 1):
-            # Sequência de entrada
-            seq = normalized[i:i + self.config.seq_length]
-            X.append(seq)
-            
-            if create_labels:
-                # Labels futuras
-                future_start = i + self.config.seq_length
-                future_end = future_start + self.config.forecast_horizon
-                future = ohlcv_data[future_start:future_end, 3]  # Close prices
-                current = ohlcv_data[future_start - 1, 3]
-                
-                # Direção
-                total_change = (future[-1] - current) / current * 100
-                if total_change > 0.1:
-                    direction = 0  # UP
-                elif total_change < -0.1:
-                    direction = 1  # DOWN
-                else:
-                    direction = 2  # NEUTRAL
-                
-                # Magnitude (retornos)
-                returns = np.diff(future, prepend=current) / current * 100
-                
-                # Volatilidade
-                volatility = np.std(returns)
-                
-                y_direction.append(direction)
-                y_magnitude.append(returns)
-                y_volatility.append([volatility] * self.config.forecast_horizon)
-        
-        X = np.array(X)
+        n_windows = len(ohlcv_data) - seq_length - horizon + 1
+        y = None
         
         if create_labels:
+            # Janela i: preços futuros close[i+seq : i+seq+horizon], atual close[i+seq-1]
+            close = np.asarray(ohlcv_data[:, 3], dtype=np.float64)
+            current = close[seq_length - 1:seq_length - 1 + n_windows]
+            steps = np.lib.stride_tricks.sliding_window_view(np.diff(close), horizon)
+            
+            # Magnitude (retornos de cada passo sobre o preço atual)
+            returns = steps[seq_length - 1:seq_length - 1 + n_windows] / current[:, None] * 100
+            
+            # Direção
+            total_change = (close[seq_length + horizon - 1:seq_length + horizon - 1 + n_windows]
+                            - current) / current * 100
+            direction = np.full(n_windows, 2)  # NEUTRAL
+            direction[total_change > 0.1] = 0  # UP
+            direction[total_change < -0.1] = 1  # DOWN
+            
+            # Volatilidade
+            volatility = np.repeat(returns.std(axis=1)[:, None], horizon, axis=1)
+            
             y = {
-                'direction': np.array(y_direction),
-                'magnitude': np.array(y_magnitude),
-                'volatility': np.array(y_volatility)
+                'direction': direction,
+                'magnitude': returns,
+                'volatility': volatility
             }
-            return X, y
         
-        return X, None
+        dataset = SequenceDataset(
+            ohlcv_data, seq_length, n_windows=n_windows,
+            mean=self._feature_mean, std=self._feature_std
+        )
+        return dataset, y
     
     def train(self, 
               ohlcv_data: np.ndarray,
@@ -388,22 +386,24 @@ class TransformerPricePredictor:
         logger.info("Iniciando treinamento do Transformer...")
         
         # Preparar dados
-        X, y = self.prepare_data(ohlcv_data, create_labels=True)
+        dataset, y = self.prepare_data(ohlcv_data, create_labels=True)
         
-        if X is None:
+        if dataset is None:
             return {'error': 'Dados insuficientes'}
         
-        # Split train/val
-        split_idx = int(len(X) * (1 - validation_split))
-        
-        X_train = torch.FloatTensor(X[:split_idx]).to(self._device)
-        X_val = torch.FloatTensor(X[split_idx:]).to(self._device)
-        
-        y_train_dir = torch.LongTensor(y['direction'][:split_idx]).to(self._device)
-        y_train_mag = torch.FloatTensor(y['magnitude'][:split_idx]).to(self._device)
+        # Split train/val (views; batches materializados sob demanda)
+        split_idx = int(len(dataset) * (1 - validation_split))
+        dataset.targets = {
+            'direction': y['direction'].astype(np.int64),
+            'magnitude': y['magnitude'].astype(np.float32)
+        }
+        train_set = dataset.subset(0, split_idx)
+        val_set = dataset.subset(split_idx, len(dataset))
         
-        y_val_dir = torch.LongTensor(y['direction'][split_idx:]).to(self._device)
-        y_val_mag = torch.FloatTensor(y['magnitude'][split_idx:]).to(self._device)
+        def to_device(X, targets):
+            return (torch.from_numpy(X).to(self._device),
+                    torch.from_numpy(targets['direction']).to(self._device),
+                    torch.from_numpy(targets['magnitude']).to(self._device))
         
         # Positional encoding
         pos_enc = self._pos_encoder.get_encoding(self.config.seq_length)
@@ -421,16 +421,11 @@ class TransformerPricePredictor:
             self._model.train()
             
             # Mini-batches
-            n_batches = len(X_train) // self.config.batch_size
+            n_batches = 0
             epoch_loss = 0
             
-            for i in range(n_batches):
-                start = i * self.config.batch_size
-                end = start + self.config.batch_size
-                
-                batch_x = X_train[start:end]
-                batch_y_dir = y_train_dir[start:end]
-                batch_y_mag = y_train_mag[start:end]
+            for X, targets in train_set.batches(self.config.batch_size, drop_last=True):
+                batch_x, batch_y_dir, batch_y_mag = to_device(X, targets)
                 
                 self._optimizer.zero_grad()
                 
@@ -447,24 +442,33 @@ class TransformerPricePredictor:
                 self._optimizer.step()
                 
                 epoch_loss += loss.item()
+                n_batches += 1
             
             avg_train_loss = epoch_loss / max(n_batches, 1)
             
             # Validação
             self._model.eval()
+            val_loss_sum = 0.0
+            correct = 0
             with torch.no_grad():
-                val_outputs = self._model(X_val, pos_enc)
-                
-                val_loss_dir = criterion_ce(val_outputs['direction_logits'], y_val_dir)
-                val_loss_mag = criterion_mse(val_outputs['magnitude'], y_val_mag)
-                val_loss = val_loss_dir + 0.5 * val_loss_mag
-                
-                # Accuracy da direção
-                predictions = torch.argmax(val_outputs['direction_logits'], dim=1)
-                accuracy = (predictions == y_val_dir).float().mean().item()
+                for X, targets in val_set.batches(self.config.batch_size):
+                    batch_x, batch_y_dir, batch_y_mag = to_device(X, targets)
+                    val_outputs = self._model(batch_x, pos_enc)
+                    
+                    val_loss_dir = criterion_ce(val_outputs['direction_logits'], batch_y_dir)
+                    val_loss_mag = criterion_mse(val_outputs['magnitude'], batch_y_mag)
+                    val_loss_sum += (val_loss_dir + 0.5 * val_loss_mag).item() * len(X)
+                    
+                    # Accuracy da direção
+                    predictions = torch.argmax(val_outputs['direction_logits'], dim=1)
+                    correct += (predictions == batch_y_dir).sum().item()
+            
+            # Médias ponderadas pelo tamanho dos batches
+            val_loss = val_loss_sum / max(len(val_set), 1)
+            accuracy = correct / max(len(val_set), 1)
             
             history['train_loss'].append(avg_train_loss)
-            history['val_loss'].append(val_loss.item())
+            history['val_loss'].append(val_loss)
             history['val_accuracy'].append(accuracy)
             
             # Early stopping
@@ -484,12 +488,13 @@ class TransformerPricePredictor:
                 logger.info(
                     f"Epoch {epoch + 1}/{self.config.epochs} | "
                     f"Train Loss: {avg_train_loss:.4f} | "
-                    f"Val Loss: {val_loss.item():.4f} | "
+                    f"Val Loss: {val_loss:.4f} | "
                     f"Val Acc: {accuracy:.2%}"
                 )
         
-        # Carregar melhor modelo
+        # Carregar melhor modelo (descarta o runtime com os pesos anteriores)
         self._load_checkpoint('best')
+        self._runtime = None
         self._is_trained = True
         self._training_history = history
         
@@ -537,28 +542,20 @@ class TransformerPricePredictor:
             if self._feature_mean is not None:
                 data = (data - self._feature_mean) / self._feature_std
             
-            # Converter para tensor
-            x = torch.FloatTensor(data).unsqueeze(0).to(self._device)
-            
-            # Positional encoding
-            pos_enc = self._pos_encoder.get_encoding(self.config.seq_length)
-            pos_enc = pos_enc.to(self._device)
-            
-            # Inferência
-            self._model.eval()
-            with torch.no_grad():
-                outputs = self._model(x, pos_enc)
+            # Inferência (entrada copiada para o tensor pré-alocado do runtime)
+            outputs = self._get_runtime().predict(data)
             
             # Processar outputs
-            direction_probs = torch.softmax(outputs['direction_logits'], dim=1)
-            direction_probs = direction_probs.cpu().numpy()[0]
+            logits = outputs['direction_logits'][0]
+            direction_probs = np.exp(logits - logits.max())
+            direction_probs /= direction_probs.sum()
             
             predicted_direction_idx = np.argmax(direction_probs)
             direction_map = {0: 'UP', 1: 'DOWN', 2: 'NEUTRAL'}
             predicted_direction = direction_map[predicted_direction_idx]
             
-            magnitude = outputs['magnitude'].cpu().numpy()[0]
-            volatility = outputs['volatility'].cpu().numpy()[0]
+            magnitude = outputs['magnitude'][0]
+            volatility = outputs['volatility'][0]
             
             # Desnormalizar magnitude (era em % de retorno)
             current_price = ohlcv_data[-1, 3]  # Último close
@@ -592,6 +589,20 @@ class TransformerPricePredictor:
             logger.error(f"Erro na previsão: {e}")
             return {'error': str(e)}
     
+    def _get_runtime(self) -> TorchInferenceRuntime:
+        """Runtime de inferência (traçado uma vez por conjunto de pesos)"""
+        if self._runtime is None:
+            pos_enc = self._pos_encoder.get_encoding(self.config.seq_length)
+            self._runtime = TorchInferenceRuntime(
+                self._model,
+                (self.config.seq_length, self.config.n_features),
+                constants=(pos_enc,),
+                backend=self.config.inference_backend,
+                device=self._device,
+                name='transformer'
+            )
+        return self._runtime
+    
     def get_attention_weights(self, ohlcv_data: np.ndarray) -> Optional[np.ndarray]:
         """
         Retorna attention weights para interpretabilidade
@@ -635,6 +646,7 @@ class TransformerPricePredictor:
             checkpoint = torch.load(path, map_location=self._device)
             
             self._model.load_state_dict(checkpoint['model_state_dict'])
+            self._runtime = None
             self._optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
             self._feature_mean = checkpoint.get('feature_mean')
             self._feature_std = checkpoint.get('feature_std')
@@ -666,7 +678,8 @@ class TransformerPricePredictor:
             'training_history_length': len(self._training_history),
             'model_params': sum(
                 p.numel() for p in self._model.parameters()
-            ) if self._model else 0
+            ) if self._model else 0,
+            'inference': self._runtime.get_stats() if self._runtime else None
         }
 
 
@@ -27,6 +27,9 @@ import pandas as pd
 from loguru import logger
 from pathlib import Path
 
+from ml.incremental_boosting import IncrementalBoostingTrainer, binary_auc
+from ml.sample_store import SampleStore
+
 try:
     import xgboost as xgb
     XGBOOST_AVAILABLE = True
@@ -38,7 +41,7 @@ try:
     from sklearn.model_selection import train_test_split, cross_val_score
     from sklearn.metrics import (
         accuracy_score, precision_score, recall_score, 
-        f1_score, roc_auc_score, classification_report
+        f1_score, classification_report
     )
     SKLEARN_AVAILABLE = True
 except ImportError:
@@ -87,6 +90,7 @@ class TrainingMetrics:
     test_samples: int
     feature_importance: Dict[str, float]
     training_date: datetime = field(default_factory=datetime.now)
+    training_mode: str = 'full'  # full / incremental
     
     def to_dict(self) -> dict:
         return {
@@ -97,6 +101,7 @@ class TrainingMetrics:
             'roc_auc': self.roc_auc,
             'train_samples': self.train_samples,
             'test_samples': self.test_samples,
+            'training_mode': self.training_mode,
             'training_date': self.training_date.isoformat()
         }
 
@@ -139,6 +144,13 @@ class XGBoostSignalPredictor:
         self.min_training_samples = self.config.get('min_training_samples', 100)
         self.retrain_interval_days = self.config.get('retrain_interval_days', 7)
         self.min_prediction_confidence = self.config.get('min_prediction_confidence', 0.6)
+        self.training_segment_size = self.config.get('training_segment_size', 50)
+        
+        # Retreino: 'incremental' continua o boosting com as amostras novas
+        # (refit completo por agenda/drift); 'full' sempre refaz do zero
+        self.retrain_mode = self.config.get('retrain_mode', 'incremental')
+        self.incremental_min_samples = self.config.get('incremental_min_samples', 50)
+        self._boosting = IncrementalBoostingTrainer(self.config)
         
         # XGBoost parameters
         self.xgb_params = {
@@ -152,6 +164,7 @@ class XGBoostSignalPredictor:
             'colsample_bytree': self.config.get('colsample_bytree', 0.8),
             'random_state': 42,
             'n_jobs': -1,
+            'tree_method': 'hist',
             'verbosity': 0
         }
         
@@ -161,8 +174,8 @@ class XGBoostSignalPredictor:
         self._training_metrics: Dict[str, TrainingMetrics] = {}
         self._last_training: Dict[str, datetime] = {}
         
-        # Dados de treinamento
-        self._training_data: Dict[str, pd.DataFrame] = {}
+        # Dados de treinamento (append-only, abertos sob demanda)
+        self._training_data: Dict[str, SampleStore] = {}
         
         # Carregar modelos existentes
         self._load_models()
@@ -185,9 +198,34 @@ class XGBoostSignalPredictor:
         return self.data_dir / f"xgb_model_{model_key}.pkl"
     
     def _get_data_path(self, model_key: str) -> Path:
-        """Caminho do arquivo de dados de treinamento"""
+        """Diretório dos segmentos de dados de treinamento"""
+        return self.data_dir / f"training_data_{model_key}"
+    
+    def _get_legacy_data_path(self, model_key: str) -> Path:
+        """Arquivo único de dados de treinamento (formato antigo)"""
         return self.data_dir / f"training_data_{model_key}.parquet"
     
+    def _get_store(self, model_key: str, feature_names: List[str] = None) -> SampleStore:
+        """Store de amostras do modelo (carrega segmentos do disco na primeira vez)"""
+        store = self._training_data.get(model_key)
+        if store is None:
+            store = SampleStore(
+                self._get_data_path(model_key),
+                feature_names=feature_names,
+                segment_size=self.training_segment_size
+            )
+            # Migrar parquet único do formato antigo
+            legacy_path = self._get_legacy_data_path(model_key)
+            if len(store) == 0 and legacy_path.exists():
+                try:
+                    store.import_frame(pd.read_parquet(legacy_path))
+                    legacy_path.unlink()
+                    logger.info(f"📊 Dados migrados para segmentos: {model_key} ({len(store)} amostras)")
+                except Exception as e:
+                    logger.error(f"Erro ao migrar dados de {model_key}: {e}")
+            self._training_data[model_key] = store
+        return store
+    
     def _load_models(self) -> None:
         """Carrega modelos salvos"""
         try:
@@ -203,6 +241,8 @@ class XGBoostSignalPredictor:
                             'training_date', 
                             datetime.now() - timedelta(days=30)
                         )
+                        if data.get('boosting_state') is not None:
+                            self._boosting.states[model_key] = data['boosting_state']
                         
                     logger.info(f"📦 Modelo carregado: {model_key}")
                 except Exception as e:
@@ -228,7 +268,8 @@ class XGBoostSignalPredictor:
             data = {
                 'model': self._models[model_key],
                 'metrics': self._training_metrics.get(model_key),
-                'training_date': self._last_training.get(model_key, datetime.now())
+                'training_date': self._last_training.get(model_key, datetime.now()),
+                'boosting_state': self._boosting.states.get(model_key)
             }
             
             with open(model_path, 'wb') as f:
@@ -420,26 +461,20 @@ class XGBoostSignalPredictor:
         if not self._feature_names:
             self._feature_names = feature_names
         
-        # Criar ou atualizar DataFrame
-        if model_key not in self._training_data:
-            self._training_data[model_key] = pd.DataFrame(
-                columns=feature_names + ['target', 'profit_pips', 'timestamp']
+        # Adicionar amostra (segmento gravado a cada training_segment_size)
+        store = self._get_store(model_key, feature_names)
+        try:
+            store.append(
+                features,
+                target=1 if was_profitable else 0,
+                profit_pips=profit_pips,
+                timestamp=datetime.now()
             )
-        
-        # Adicionar amostra
-        sample = dict(zip(feature_names, features.flatten()))
-        sample['target'] = 1 if was_profitable else 0
-        sample['profit_pips'] = profit_pips
-        sample['timestamp'] = datetime.now()
-        
-        self._training_data[model_key] = pd.concat([
-            self._training_data[model_key],
-            pd.DataFrame([sample])
-        ], ignore_index=True)
-        
-        # Salvar dados periodicamente
-        if len(self._training_data[model_key]) % 50 == 0:
-            await self._save_training_data(model_key)
+        except ValueError as e:
+            logger.warning(f"Amostra ignorada para {model_key}: {e}")
+            return
+        except OSError as e:
+            logger.error(f"Erro ao salvar dados: {e}")
         
         # Verificar se precisa retreinar
         await self._check_retrain(model_key)
@@ -450,8 +485,7 @@ class XGBoostSignalPredictor:
             return
         
         try:
-            data_path = self._get_data_path(model_key)
-            self._training_data[model_key].to_parquet(data_path)
+            self._training_data[model_key].flush()
             logger.debug(f"📊 Dados salvos: {model_key} ({len(self._training_data[model_key])} amostras)")
         except Exception as e:
             logger.error(f"Erro ao salvar dados: {e}")
@@ -466,6 +500,7 @@ class XGBoostSignalPredictor:
         
         # Condições para retreinar
         needs_retrain = False
+        full_refit = False
         
         # 1. Modelo não existe e temos amostras suficientes
         if model_key not in self._models and n_samples >= self.min_training_samples:
@@ -477,22 +512,36 @@ class XGBoostSignalPredictor:
             days_since = (datetime.now() - last_train).days
             if days_since >= self.retrain_interval_days and n_samples >= self.min_training_samples:
                 needs_retrain = True
+                full_refit = True
                 logger.info(f"🔄 Retreinamento agendado: {model_key} ({days_since} dias)")
         
+        # 3. Modo incremental: amostras novas suficientes desde o último treino
+        if not needs_retrain and model_key in self._models and self.retrain_mode == 'incremental':
+            state = self._boosting.states.get(model_key)
+            trained_rows = state.trained_rows if state else 0
+            if n_samples - trained_rows >= self.incremental_min_samples:
+                needs_retrain = True
+        
         if needs_retrain:
-            await self.train_model(model_key)
+            await self.train_model(model_key, full_refit=full_refit)
     
     async def train_model(
         self,
         model_key: str,
-        force: bool = False
+        force: bool = False,
+        full_refit: bool = False
     ) -> Optional[TrainingMetrics]:
         """
         Treina ou retreina modelo
         
+        Com retrain_mode='incremental' e modelo existente, continua o boosting
+        só com as amostras novas; refit completo quando o trainer indica
+        (agenda, idade, drift) ou full_refit=True.
+        
         Args:
             model_key: Chave do modelo
             force: Forçar treinamento mesmo com poucas amostras
+            full_refit: Ignorar modo incremental e refazer do zero
             
         Returns:
             TrainingMetrics ou None se falhar
@@ -510,36 +559,54 @@ class XGBoostSignalPredictor:
                 return None
         
         try:
-            # Preparar features e target
-            feature_cols = [c for c in data.columns if c not in ['target', 'profit_pips', 'timestamp']]
-            
-            X = data[feature_cols].values
-            y = data['target'].values
-            
-            # Verificar balanceamento
-            pos_ratio = np.mean(y)
-            logger.info(f"📊 Balanceamento: {pos_ratio:.1%} positivo, {1-pos_ratio:.1%} negativo")
-            
-            # Split treino/teste
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-            
-            # Ajustar peso para classes desbalanceadas
-            scale_pos_weight = (1 - pos_ratio) / pos_ratio if pos_ratio > 0 else 1
-            
-            params = self.xgb_params.copy()
-            params['scale_pos_weight'] = scale_pos_weight
-            
-            # Treinar modelo
-            model = xgb.XGBClassifier(**params)
-            
-            # Early stopping
-            model.fit(
-                X_train, y_train,
-                eval_set=[(X_test, y_test)],
-                verbose=False
-            )
+            # Preparar features e target (float32 direto das colunas do store)
+            feature_cols = data.feature_names
+            
+            X = data.features
+            y = data.targets
+            n_rows = len(data)
+            
+            # Incremental ou refit completo
+            model = self._models.get(model_key)
+            state = self._boosting.states.get(model_key)
+            trained_rows = state.trained_rows if state else 0
+            X_new, y_new = X[trained_rows:], y[trained_rows:]
+            
+            if full_refit or self.retrain_mode != 'incremental':
+                reason = 'requested'
+            else:
+                reason = self._boosting.refit_reason(model_key, model, X_new, y_new)
+            
+            if reason is None:
+                if len(X_new) < 2:
+                    return self._training_metrics.get(model_key)
+                
+                # Holdout = final das amostras novas (entra no próximo update)
+                n_test = max(1, int(len(X_new) * 0.2))
+                X_train, y_train = X_new[:-n_test], y_new[:-n_test]
+                X_test, y_test = X_new[-n_test:], y_new[-n_test:]
+                
+                params = self._boosting_params(y_train)
+                model, _ = self._boosting.update(
+                    model_key, params, model, X_train, y_train, trained_rows=n_rows - n_test
+                )
+                training_mode = 'incremental'
+            else:
+                # Verificar balanceamento
+                pos_ratio = np.mean(y)
+                logger.info(f"📊 Balanceamento: {pos_ratio:.1%} positivo, {1-pos_ratio:.1%} negativo")
+                
+                # Split treino/teste
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=0.2, random_state=42, stratify=y
+                )
+                
+                params = self._boosting_params(y_train)
+                model, _ = self._boosting.refit(
+                    model_key, params, X_train, y_train, X_test, y_test,
+                    trained_rows=n_rows, reason=reason
+                )
+                training_mode = 'full'
             
             # Avaliar
             y_pred = model.predict(X_test)
@@ -550,13 +617,14 @@ class XGBoostSignalPredictor:
                 precision=float(precision_score(y_test, y_pred, zero_division=0)),
                 recall=float(recall_score(y_test, y_pred, zero_division=0)),
                 f1_score=float(f1_score(y_test, y_pred, zero_division=0)),
-                roc_auc=float(roc_auc_score(y_test, y_prob)),
+                roc_auc=binary_auc(y_test, y_prob),
                 train_samples=len(X_train),
                 test_samples=len(X_test),
                 feature_importance=dict(zip(
                     feature_cols,
                     [float(x) for x in model.feature_importances_]
-                ))
+                )),
+                training_mode=training_mode
             )
             
             # Salvar modelo
@@ -565,8 +633,9 @@ class XGBoostSignalPredictor:
             self._last_training[model_key] = datetime.now()
             self._save_model(model_key)
             
+            mode_label = 'incremental' if training_mode == 'incremental' else f'completo ({reason})'
             logger.success(f"""
-✅ Modelo treinado: {model_key}
+✅ Modelo treinado: {model_key} [{mode_label}]
    Accuracy: {metrics.accuracy:.2%}
    Precision: {metrics.precision:.2%}
    Recall: {metrics.recall:.2%}
@@ -582,21 +651,18 @@ class XGBoostSignalPredictor:
             traceback.print_exc()
             return None
     
-    async def _load_training_data(self, model_key: str) -> Optional[pd.DataFrame]:
-        """Carrega dados de treinamento do disco"""
+    def _boosting_params(self, y_train: np.ndarray) -> Dict[str, Any]:
+        """Parâmetros do XGBoost com peso para classes desbalanceadas"""
+        pos_ratio = float(np.mean(y_train)) if len(y_train) else 0.0
+        params = self.xgb_params.copy()
+        params['scale_pos_weight'] = (1 - pos_ratio) / pos_ratio if pos_ratio > 0 else 1
+        return params
+    
+    async def _load_training_data(self, model_key: str) -> Optional[SampleStore]:
+        """Carrega dados de treinamento (memória ou segmentos em disco)"""
         try:
-            # Primeiro verificar memória
-            if model_key in self._training_data and len(self._training_data[model_key]) > 0:
-                return self._training_data[model_key]
-            
-            # Carregar do disco
-            data_path = self._get_data_path(model_key)
-            if data_path.exists():
-                data = pd.read_parquet(data_path)
-                self._training_data[model_key] = data
-                return data
-            
-            return None
+            store = self._get_store(model_key)
+            return store if len(store) > 0 else None
             
         except Exception as e:
             logger.error(f"Erro ao carregar dados: {e}")
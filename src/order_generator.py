@@ -13,7 +13,10 @@ from core.config_manager import ConfigManager
 from core.risk_manager import RiskManager
 from core.strategy_executor import StrategyExecutor
 from core.watchdog import ThreadWatchdog
+from core.executor_scheduler import ExecutorScheduler
 from analysis.technical_analyzer import TechnicalAnalyzer
+from analysis.analysis_snapshot import AnalysisSnapshotService
+from analysis.analysis_pool import get_analysis_pool
 from analysis.news_analyzer import NewsAnalyzer
 from strategies.strategy_manager import StrategyManager
 
@@ -63,6 +66,18 @@ class OrderGenerator:
         # Watchdog para monitoramento de threads
         self.watchdog = ThreadWatchdog(timeout_seconds=600)  # 10 min
         
+        # ⏱️ Agendador central: ciclos das estratégias num pool limitado de workers
+        # (None = uma thread por executor, modo original)
+        scheduler_config = self.config.get('order_generator', {}).get('scheduler', {})
+        self.scheduler = None
+        if scheduler_config.get('enabled', False):
+            self.scheduler = ExecutorScheduler(
+                max_workers=scheduler_config.get('max_workers', 4),
+                watchdog=self.watchdog,
+                bar_close_delay_seconds=scheduler_config.get('bar_close_delay_seconds', 2.0),
+                bar_close_offset_seconds=scheduler_config.get('bar_close_offset_seconds', 0.0)
+            )
+        
         # 🔥 INSTÂNCIAS POR SÍMBOLO (evita contaminação de cache/dados)
         self.analyzers_by_symbol: Dict[str, Dict] = {}
         self.strategies_by_symbol: Dict[str, StrategyManager] = {}
@@ -86,9 +101,12 @@ class OrderGenerator:
         """
         if symbol not in self.analyzers_by_symbol:
             logger.info(f"🔧 Criando analyzers dedicados para {symbol}")
+            technical = TechnicalAnalyzer(self.mt5, self.config, symbol=symbol)
             self.analyzers_by_symbol[symbol] = {
-                'technical': TechnicalAnalyzer(self.mt5, self.config, symbol=symbol),
-                'news': NewsAnalyzer(self.config)
+                'technical': technical,
+                'news': NewsAnalyzer(self.config),
+                # 📸 Uma análise multi-timeframe por barra, compartilhada pelos executors
+                'snapshots': AnalysisSnapshotService(technical)
             }
         return self.analyzers_by_symbol[symbol]
     
@@ -138,6 +156,7 @@ class OrderGenerator:
                         risk_manager=self.risk_manager,
                         technical_analyzer=analyzers['technical'],  # Analyzer do símbolo
                         news_analyzer=analyzers['news'],  # News do símbolo
+                        analysis_service=analyzers['snapshots'],  # Snapshot compartilhado
                         telegram=self.telegram,
                         watchdog=self.watchdog,
                         symbol=symbol,
@@ -168,7 +187,9 @@ class OrderGenerator:
         
         # Iniciar cada executor
         for executor in self.executors:
-            executor.start()
+            executor.start(scheduler=self.scheduler)
+        if self.scheduler:
+            self.scheduler.start()
         
         logger.success(
             f"✅ OrderGenerator iniciado! "
@@ -197,6 +218,8 @@ class OrderGenerator:
         # Parar cada executor
         for executor in self.executors:
             executor.stop()
+        if self.scheduler:
+            self.scheduler.stop()
         
         logger.success("OrderGenerator parado")
     
@@ -208,6 +231,14 @@ class OrderGenerator:
         
         logger.info(f"Running: {self.running}")
         logger.info(f"Executors ativos: {len(self.executors)}")
+        if self.scheduler:
+            sched = self.scheduler.get_stats()
+            logger.info(
+                f"⏱️ Scheduler: {sched['max_workers']} workers, fila={sched['queued']} "
+                f"(máx {sched['queue_depth_max']}), executando={sched['running']}, "
+                f"lag médio {sched['lag_ms_avg']:.0f}ms (máx {sched['lag_ms_max']:.0f}ms), "
+                f"atrasados={sched['overdue']}"
+            )
         
         # Agrupar por símbolo
         by_symbol = {}
@@ -219,6 +250,14 @@ class OrderGenerator:
         
         for symbol, executors in by_symbol.items():
             logger.info(f"\n  🌍 {symbol}:")
+            snapshots = self.analyzers_by_symbol.get(symbol, {}).get('snapshots')
+            if snapshots:
+                stats = snapshots.get_stats()
+                logger.info(
+                    f"    📸 Snapshots: hits={stats['hits']} waits={stats['waits']} "
+                    f"misses={stats['misses']} (hit rate {stats['hit_rate']:.0%}, "
+                    f"cálculo médio {stats['compute_ms_avg']:.0f}ms)"
+                )
             for executor in executors:
                 status = "🟢" if executor.running else "🔴"
                 logger.info(
@@ -227,4 +266,15 @@ class OrderGenerator:
                     f"Magic: {executor.magic_number}"
                 )
         
+        if self.config.get('technical_analysis', {}).get('parallel', {}).get('enabled', False):
+            pool_stats = get_analysis_pool(self.config).get_stats()
+            latency = ", ".join(
+                f"{tf}={lat['avg']:.0f}ms" for tf, lat in pool_stats['latency_ms'].items()
+            )
+            logger.info(
+                f"\n  ⚡ Pool de análise: {pool_stats['max_workers']} workers, "
+                f"espera média {pool_stats['queue_wait_ms_avg']:.0f}ms, "
+                f"timeouts={pool_stats['timeouts']} | {latency}"
+            )
+        
         logger.info("=" * 80)
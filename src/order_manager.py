@@ -311,10 +311,16 @@ class OrderManager:
             logger.error(f"Erro ao obter posições: {e}")
             return []
     
-    def update_monitored_positions(self):
-        """Atualiza lista de posições monitoradas"""
+    def update_monitored_positions(self, current_positions: Optional[List[Dict]] = None):
+        """
+        Atualiza lista de posições monitoradas
         
-        current_positions = self.get_open_positions()
+        Args:
+            current_positions: Posições já obtidas no ciclo (None = consultar)
+        """
+        
+        if current_positions is None:
+            current_positions = self.get_open_positions()
         current_tickets = {pos['ticket'] for pos in current_positions}
         
         # 🔒 THREAD SAFETY: Proteger acesso ao estado compartilhado
@@ -1855,7 +1861,13 @@ class OrderManager:
                 logger.success(f"[news_trading] #{ticket} → ENCERRADO | +1.5R alcançado")
     
     def _get_symbol_point(self, symbol: str) -> float:
-        """Retorna o valor do ponto para o símbolo"""
+        """Retorna o valor do pip para o símbolo (contrato em cache, sem consulta de tick)"""
+        symbol_info = self.mt5.get_symbol_info(symbol, static_only=True)
+        if isinstance(symbol_info, dict) and symbol_info.get('point'):
+            # 3/5 dígitos: 1 pip = 10 pontos (EURUSD, USDJPY); 2/4 dígitos: 1 pip = 1 ponto (XAUUSD)
+            point = symbol_info['point']
+            return point * 10 if symbol_info.get('digits') in (3, 5) else point
+        
         if 'JPY' in symbol:
             return 0.01
         elif 'XAU' in symbol:
@@ -1877,32 +1889,15 @@ class OrderManager:
         current_sl = position['sl']
         symbol = position.get('symbol', 'XAUUSD')
         
-        # Calcular novo SL com point correto
-        point = self._get_symbol_point(symbol)
+        # Calcular novo SL com o pip do símbolo (XAUUSD: 0.01, EURUSD: 0.0001)
+        price_diff = distance_pips * self._get_symbol_point(symbol)
         
         if position_type == 'BUY':
-            new_sl = current_price - (distance_pips * point * 10) # pips * point * 10 (se point for 0.00001) ou ajustar conforme mt5
-            # Simplificando: assumindo distance_pips já em pips padrão (10 points)
-            # Se distance_pips = 20 (200 points)
-            # XAUUSD (digits=2): point=0.01. 20 pips = 2.00 price diff
-            # EURUSD (digits=5): point=0.00001. 20 pips = 0.00200 price diff
-            
-            # Melhor usar mt5.symbol_info(symbol).point se possível, mas aqui vamos aproximar
-            if 'JPY' in symbol or 'XAU' in symbol:
-                price_diff = distance_pips * 0.01 # 1 pip = 0.01
-            else:
-                price_diff = distance_pips * 0.0001 # 1 pip = 0.0001
-                
             new_sl = current_price - price_diff
             
             if new_sl > current_sl:  # Só move se melhorar
                 self.modify_position(ticket, new_sl)
         else:  # SELL
-            if 'JPY' in symbol or 'XAU' in symbol:
-                price_diff = distance_pips * 0.01
-            else:
-                price_diff = distance_pips * 0.0001
-                
             new_sl = current_price + price_diff
             
             if new_sl < current_sl:  # Só move se melhorar
@@ -2064,9 +2059,14 @@ class OrderManager:
             self.last_market_close_check = datetime.now()
             return
         
+        # Obter posições atuais (um único snapshot para todo o ciclo)
+        logger.debug("🔍 Obtendo posições atuais do MT5...")
+        current_positions = self.get_open_positions()
+        logger.debug(f"📊 Posições atuais no MT5: {len(current_positions)}")
+        
         # Atualizar lista de posições
         logger.debug("🔍 Atualizando lista de posições monitoradas...")
-        self.update_monitored_positions()
+        self.update_monitored_positions(current_positions)
         
         logger.debug(f"📊 Posições monitoradas: {len(self.monitored_positions)}")
         
@@ -2074,11 +2074,6 @@ class OrderManager:
             logger.debug("⚠️  Nenhuma posição para monitorar")
             return  # Nenhuma posição para monitorar
         
-        # Obter posições atuais
-        logger.debug("🔍 Obtendo posições atuais do MT5...")
-        current_positions = self.get_open_positions()
-        logger.debug(f"📊 Posições atuais no MT5: {len(current_positions)}")
-        
         # Gerenciar cada posição COM SISTEMA DE ESTADOS
         for position in current_positions:
             try:
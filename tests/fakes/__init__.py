@@ -0,0 +1,6 @@
+"""Dublês de dependências externas para testes e benchmarks offline"""
+
+from .fake_mt5 import FakeMT5, install_fake_mt5
+from .market_data import make_ohlcv
+
+__all__ = ['FakeMT5', 'install_fake_mt5', 'make_ohlcv']
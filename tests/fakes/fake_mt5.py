@@ -0,0 +1,401 @@
+"""
+Fake MetaTrader5 - Terminal simulado para testes e benchmarks offline
+
+Reproduz o subconjunto da API do pacote MetaTrader5 usado pelo Urion
+(copy_rates_*, symbol_info*, positions_get, account_info, order_send...)
+sobre um mercado sintético determinístico. Conta as chamadas por função
+para medir a carga de IPC sem um terminal real.
+
+Uso:
+    from tests.fakes.fake_mt5 import install_fake_mt5
+    fake = install_fake_mt5()          # antes de importar core.mt5_connector
+    fake.advance(300)                  # avança o relógio do mercado em 5 min
+    print(fake.calls['copy_rates_from_pos'])
+"""
+
+import sys
+import time
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<u8'),
+    ('spread', '<i4'),
+    ('real_volume', '<u8'),
+])
+
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'bid', 'ask', 'spread', 'digits', 'point', 'trade_contract_size',
+    'volume_min', 'volume_max', 'volume_step', 'trade_mode', 'description',
+    'visible', 'trade_stops_level', 'trade_tick_value', 'trade_tick_size'
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc'])
+AccountInfo = namedtuple('AccountInfo', [
+    'login', 'balance', 'equity', 'margin', 'margin_free', 'margin_level',
+    'profit', 'currency', 'leverage', 'server', 'company'
+])
+TerminalInfo = namedtuple('TerminalInfo', ['connected', 'trade_allowed', 'build'])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'symbol', 'type', 'volume', 'price_open', 'price_current',
+    'sl', 'tp', 'profit', 'magic', 'time', 'comment', 'identifier'
+])
+OrderSendResult = namedtuple('OrderSendResult', ['retcode', 'order', 'deal', 'price', 'volume', 'comment'])
+
+
+# Especificação dos símbolos simulados
+DEFAULT_SYMBOLS = {
+    'XAUUSD': {'price': 2000.0, 'vol': 0.8, 'digits': 2, 'point': 0.01, 'contract': 100, 'spread': 20},
+    'EURUSD': {'price': 1.08, 'vol': 0.0002, 'digits': 5, 'point': 0.00001, 'contract': 100000, 'spread': 10},
+    'GBPUSD': {'price': 1.26, 'vol': 0.00025, 'digits': 5, 'point': 0.00001, 'contract': 100000, 'spread': 12},
+    'USDJPY': {'price': 150.0, 'vol': 0.03, 'digits': 3, 'point': 0.001, 'contract': 100000, 'spread': 10},
+    'US30': {'price': 38000.0, 'vol': 15.0, 'digits': 1, 'point': 0.1, 'contract': 1, 'spread': 20},
+}
+
+
+class FakeMT5:
+    """Terminal MetaTrader5 simulado (mercado de passeio aleatório em M1)"""
+
+    # Constantes com os mesmos valores do pacote oficial
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_SLTP = 6
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+
+    TIMEFRAME_MINUTES = {1: 1, 5: 5, 15: 15, 30: 30, 16385: 60, 16388: 240, 16408: 1440}
+
+    def __init__(self, start_time: Optional[float] = None, history_minutes: int = 60 * 24 * 30,
+                 seed: int = 42, latency: float = 0.0, symbols: Optional[Dict] = None):
+        """
+        Inicializa o terminal simulado
+
+        Args:
+            start_time: Epoch inicial do mercado (alinhado ao minuto)
+            history_minutes: Minutos de histórico disponíveis antes de start_time
+            seed: Semente do gerador de preços
+            latency: Atraso artificial (s) por chamada, simula o IPC do terminal
+            symbols: Especificação dos símbolos (padrão: DEFAULT_SYMBOLS)
+        """
+        start_time = start_time if start_time is not None else 1_704_067_200  # 2024-01-01
+        self.now = float(int(start_time) // 60 * 60)
+        self.origin = int(self.now) - history_minutes * 60
+        self.latency = latency
+        self.symbols = dict(symbols or DEFAULT_SYMBOLS)
+        self.calls = Counter()
+        self.bars_sent = 0
+
+        self._seed = seed
+        self._paths: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._positions: Dict[int, Dict] = {}
+        self._next_ticket = 1000
+        self._balance = 10000.0
+        self._last_error = (1, 'Success')
+
+    # ------------------------------------------------------------------
+    # Controle da simulação
+    # ------------------------------------------------------------------
+
+    def _call(self, name: str):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def advance(self, seconds: float):
+        """Avança o relógio do mercado"""
+        self.now += seconds
+
+    def reset_calls(self):
+        self.calls.clear()
+        self.bars_sent = 0
+
+    def _send(self, rates: np.ndarray) -> Optional[np.ndarray]:
+        """Contabiliza as barras transferidas (None se vazio, como o terminal)"""
+        if len(rates) == 0:
+            return None
+        self.bars_sent += len(rates)
+        return rates
+
+    def _path(self, symbol: str, minutes: int) -> np.ndarray:
+        """Preços M1 (fechamento de cada minuto) desde a origem, gerados sob demanda"""
+        with self._lock:
+            path = self._paths.get(symbol)
+            if path is None or len(path) < minutes:
+                spec = self.symbols[symbol]
+                size = max(minutes, 1) + 60 * 24 * 7
+                rng = np.random.default_rng([self._seed, sum(map(ord, symbol))])
+                steps = rng.normal(0.0, spec['vol'], size)
+                path = spec['price'] + np.cumsum(steps)
+                path = np.maximum(path, spec['price'] * 0.1)
+                self._paths[symbol] = path
+            return path
+
+    def _current_minute(self) -> int:
+        return int(self.now - self.origin) // 60
+
+    def _price(self, symbol: str) -> float:
+        minute = self._current_minute()
+        return float(self._path(symbol, minute + 1)[minute])
+
+    def _bars(self, symbol: str, timeframe: int, first: int = 0) -> np.ndarray:
+        """Barras do timeframe a partir do índice first até a barra em formação (inclusive)"""
+        tf_min = self.TIMEFRAME_MINUTES[timeframe]
+        current = self._current_minute()
+        path = self._path(symbol, current + 1)
+
+        n_total = current // tf_min + 1
+        first = min(max(first, 0), n_total)
+        n_bars = n_total - first
+        base = first * tf_min
+
+        padded = np.full(n_bars * tf_min, np.nan)
+        segment = path[base:current + 1]
+        padded[:len(segment)] = segment
+        grid = padded.reshape(n_bars, tf_min)
+
+        opens = np.empty(n_bars)
+        if n_bars:
+            opens[0] = path[base - 1] if base > 0 else path[0]
+            opens[1:] = grid[:-1, -1]
+
+        bar_idx = np.arange(first, n_total)
+        rates = np.empty(n_bars, dtype=RATES_DTYPE)
+        rates['time'] = self.origin + bar_idx * tf_min * 60
+        rates['open'] = opens
+        rates['high'] = np.fmax(np.nanmax(grid, axis=1), opens) if n_bars else opens
+        rates['low'] = np.fmin(np.nanmin(grid, axis=1), opens) if n_bars else opens
+        last_idx = np.minimum(bar_idx * tf_min + tf_min - 1, current) - bar_idx * tf_min
+        rates['close'] = grid[np.arange(n_bars), last_idx]
+        rates['tick_volume'] = (last_idx + 1) * 7
+        rates['spread'] = self.symbols[symbol]['spread']
+        rates['real_volume'] = 0
+        return rates
+
+    def _bar_index(self, timeframe: int, epoch: int) -> int:
+        """Índice (desde a origem) da barra que contém epoch"""
+        return (epoch - self.origin) // (self.TIMEFRAME_MINUTES[timeframe] * 60)
+
+    # ------------------------------------------------------------------
+    # Conexão / conta
+    # ------------------------------------------------------------------
+
+    def initialize(self, *args, **kwargs) -> bool:
+        self._call('initialize')
+        return True
+
+    def login(self, *args, **kwargs) -> bool:
+        self._call('login')
+        return True
+
+    def shutdown(self):
+        self._call('shutdown')
+
+    def last_error(self):
+        return self._last_error
+
+    def terminal_info(self):
+        self._call('terminal_info')
+        return TerminalInfo(connected=True, trade_allowed=True, build=4000)
+
+    def account_info(self):
+        self._call('account_info')
+        profit = sum(self._position_profit(p) for p in self._positions.values())
+        return AccountInfo(
+            login=12345, balance=self._balance, equity=self._balance + profit,
+            margin=0.0, margin_free=self._balance + profit, margin_level=0.0,
+            profit=profit, currency='USD', leverage=100, server='Fake-Server',
+            company='Fake Broker'
+        )
+
+    # ------------------------------------------------------------------
+    # Dados de mercado
+    # ------------------------------------------------------------------
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self._call('copy_rates_from_pos')
+        if symbol not in self.symbols:
+            return None
+        n_total = self._current_minute() // self.TIMEFRAME_MINUTES[timeframe] + 1
+        rates = self._bars(symbol, timeframe, n_total - start_pos - count)
+        end = len(rates) - start_pos
+        if end <= 0:
+            return None
+        return self._send(rates[:end])
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        self._call('copy_rates_from')
+        if symbol not in self.symbols:
+            return None
+        last = self._bar_index(timeframe, self._epoch(date_from))
+        rates = self._bars(symbol, timeframe, last - count + 1)
+        end = np.searchsorted(rates['time'], self._epoch(date_from), side='right')
+        return self._send(rates[max(0, end - count):end])
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        self._call('copy_rates_range')
+        if symbol not in self.symbols:
+            return None
+        date_from, date_to = self._epoch(date_from), self._epoch(date_to)
+        rates = self._bars(symbol, timeframe, self._bar_index(timeframe, date_from))
+        mask = (rates['time'] >= date_from) & (rates['time'] <= date_to)
+        return self._send(rates[mask])
+
+    @staticmethod
+    def _epoch(value) -> int:
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return int(value.timestamp())
+        return int(value)
+
+    def symbol_info_tick(self, symbol):
+        self._call('symbol_info_tick')
+        if symbol not in self.symbols:
+            return None
+        spec = self.symbols[symbol]
+        bid = round(self._price(symbol), spec['digits'])
+        ask = round(bid + spec['spread'] * spec['point'], spec['digits'])
+        return Tick(time=int(self.now), bid=bid, ask=ask, last=bid, volume=0,
+                    time_msc=int(self.now * 1000))
+
+    def symbol_info(self, symbol):
+        self._call('symbol_info')
+        if symbol not in self.symbols:
+            return None
+        spec = self.symbols[symbol]
+        bid = round(self._price(symbol), spec['digits'])
+        ask = round(bid + spec['spread'] * spec['point'], spec['digits'])
+        return SymbolInfo(
+            name=symbol, bid=bid, ask=ask, spread=spec['spread'], digits=spec['digits'],
+            point=spec['point'], trade_contract_size=spec['contract'], volume_min=0.01,
+            volume_max=100.0, volume_step=0.01, trade_mode=4, description=f'Fake {symbol}',
+            visible=True, trade_stops_level=0, trade_tick_value=1.0,
+            trade_tick_size=spec['point']
+        )
+
+    def symbol_select(self, symbol, enable=True) -> bool:
+        self._call('symbol_select')
+        return symbol in self.symbols
+
+    # ------------------------------------------------------------------
+    # Posições / ordens
+    # ------------------------------------------------------------------
+
+    def _position_profit(self, pos: Dict) -> float:
+        price = self._price(pos['symbol'])
+        direction = 1 if pos['type'] == self.ORDER_TYPE_BUY else -1
+        contract = self.symbols[pos['symbol']]['contract']
+        return (price - pos['price_open']) * direction * pos['volume'] * contract
+
+    def _as_position(self, pos: Dict) -> TradePosition:
+        return TradePosition(
+            ticket=pos['ticket'], symbol=pos['symbol'], type=pos['type'],
+            volume=pos['volume'], price_open=pos['price_open'],
+            price_current=self._price(pos['symbol']), sl=pos['sl'], tp=pos['tp'],
+            profit=self._position_profit(pos), magic=pos['magic'], time=pos['time'],
+            comment=pos['comment'], identifier=pos['ticket']
+        )
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        self._call('positions_get')
+        positions = list(self._positions.values())
+        if ticket is not None:
+            positions = [p for p in positions if p['ticket'] == ticket]
+        if symbol is not None:
+            positions = [p for p in positions if p['symbol'] == symbol]
+        return tuple(self._as_position(p) for p in positions)
+
+    def positions_total(self) -> int:
+        self._call('positions_total')
+        return len(self._positions)
+
+    def open_position(self, symbol: str, order_type: int, volume: float, magic: int = 0,
+                      sl: float = 0.0, tp: float = 0.0, comment: str = '') -> int:
+        """Atalho de simulação: abre posição sem passar por order_send"""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._positions[ticket] = {
+            'ticket': ticket, 'symbol': symbol, 'type': order_type, 'volume': volume,
+            'price_open': self._price(symbol), 'sl': sl, 'tp': tp, 'magic': magic,
+            'time': int(self.now), 'comment': comment
+        }
+        return ticket
+
+    def order_send(self, request: Dict):
+        self._call('order_send')
+        action = request.get('action')
+        price = request.get('price', 0.0)
+
+        if action == self.TRADE_ACTION_SLTP:
+            pos = self._positions.get(request.get('position'))
+            if pos is None:
+                return OrderSendResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, 'Position not found')
+            pos['sl'] = request.get('sl', pos['sl'])
+            pos['tp'] = request.get('tp', pos['tp'])
+            return OrderSendResult(self.TRADE_RETCODE_DONE, pos['ticket'], 0, price, pos['volume'], 'Done')
+
+        if action == self.TRADE_ACTION_DEAL:
+            position_ticket = request.get('position')
+            if position_ticket:
+                pos = self._positions.get(position_ticket)
+                if pos is None:
+                    return OrderSendResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, 'Position not found')
+                volume = request.get('volume', pos['volume'])
+                ratio = min(volume / pos['volume'], 1.0)
+                self._balance += self._position_profit(pos) * ratio
+                pos['volume'] = round(pos['volume'] - volume, 2)
+                if pos['volume'] <= 0:
+                    del self._positions[position_ticket]
+                return OrderSendResult(self.TRADE_RETCODE_DONE, position_ticket, position_ticket,
+                                       self._price(request['symbol']), volume, 'Done')
+
+            ticket = self.open_position(
+                request['symbol'], request['type'], request['volume'],
+                magic=request.get('magic', 0), sl=request.get('sl', 0.0),
+                tp=request.get('tp', 0.0), comment=request.get('comment', '')
+            )
+            return OrderSendResult(self.TRADE_RETCODE_DONE, ticket, ticket,
+                                   self._positions[ticket]['price_open'], request['volume'], 'Done')
+
+        return OrderSendResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, 'Unsupported action')
+
+    def history_deals_get(self, *args, **kwargs):
+        self._call('history_deals_get')
+        return ()
+
+    def history_orders_get(self, *args, **kwargs):
+        self._call('history_orders_get')
+        return ()
+
+
+def install_fake_mt5(**kwargs) -> FakeMT5:
+    """
+    Registra um FakeMT5 como módulo 'MetaTrader5'
+
+    Deve ser chamado ANTES de importar módulos que fazem 'import MetaTrader5'.
+    """
+    fake = FakeMT5(**kwargs)
+    sys.modules['MetaTrader5'] = fake
+    return fake
@@ -0,0 +1,77 @@
+"""
+Dados de mercado sintéticos para testes e benchmarks
+
+make_ohlcv gera barras OHLCV horárias determinísticas (passeio aleatório
+com semente), com o mesmo formato de copy_rates_* convertido em DataFrame.
+make_bars gera as barras dos backtests (open = close anterior, preço, passo,
+spread e frequência configuráveis). make_regime_bars alterna segmentos de
+volatilidade e tendência (vários regimes de mercado).
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(n: int = 320, seed: int = 1, volume: bool = True) -> pd.DataFrame:
+    """Barras OHLCV horárias a partir de 2024-01-01 (tick_volume opcional)"""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.standard_normal(n) * 5)
+    open_ = close + rng.standard_normal(n) * 3
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + rng.random(n) * 10,
+        'low': np.minimum(open_, close) - rng.random(n) * 10,
+        'close': close,
+    }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+    if volume:
+        df['tick_volume'] = rng.integers(1000, 10000, n)
+    return df
+
+
+def make_bars(n: int = 2000, seed: int = 0, freq: str = '5min', start_price: float = 1.10,
+              step: float = 0.0004, spread: float = 0.0006,
+              volume_column: Optional[str] = 'volume',
+              time_column: Optional[str] = 'time') -> pd.DataFrame:
+    """
+    Barras de backtest: passeio aleatório aditivo a partir de start_price
+
+    Args:
+        step: Desvio do passo do close por barra
+        spread: Escala de high/low em torno do close
+        volume_column: Nome da coluna de volume (None = sem volume)
+        time_column: Coluna com os tempos (None = DatetimeIndex)
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price + np.cumsum(rng.standard_normal(n) * step)
+    half_range = np.abs(rng.standard_normal(n)) * spread
+    times = pd.date_range('2024-01-01', periods=n, freq=freq)
+
+    columns = {
+        'open': np.r_[close[0], close[:-1]],
+        'high': close + half_range,
+        'low': close - half_range,
+        'close': close,
+    }
+    if volume_column is not None:
+        columns[volume_column] = rng.integers(100, 1000, n)
+    if time_column is None:
+        return pd.DataFrame(columns, index=times)
+    return pd.DataFrame({time_column: times, **columns})
+
+
+def make_regime_bars(n: int = 900, seed: int = 0) -> pd.DataFrame:
+    """Barras horárias com segmentos de volatilidade e tendência diferentes (vários regimes)"""
+    rng = np.random.default_rng(seed)
+    vol = np.repeat([0.003, 0.012, 0.03, 0.008], n // 4 + 1)[:n]
+    drift = np.repeat([0.002, -0.001, -0.004, 0.0], n // 4 + 1)[:n]
+    close = 100 * np.exp(np.cumsum(drift + rng.standard_normal(n) * vol))
+    half_range = np.abs(rng.standard_normal(n)) * close * vol / 2
+    return pd.DataFrame({
+        'open': np.r_[close[0], close[:-1]],
+        'high': close + half_range,
+        'low': close - half_range,
+        'close': close,
+        'volume': rng.integers(100, 1000, n)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='1h'))
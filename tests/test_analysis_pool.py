@@ -0,0 +1,100 @@
+"""
+Testes para o AnalysisWorkerPool
+Cobertura: paralelismo, limite global de concorrência, ordem, timeout, latência
+"""
+
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analysis.analysis_pool import AnalysisWorkerPool
+
+
+TIMEFRAMES = ['M5', 'M15', 'M30', 'H1', 'H4']
+
+
+@pytest.fixture
+def pool():
+    pool = AnalysisWorkerPool(max_workers=3, timeout_seconds=5)
+    yield pool
+    pool.shutdown()
+
+
+class TestAnalysisWorkerPool:
+    """Testes para AnalysisWorkerPool"""
+
+    def test_runs_timeframes_in_parallel(self, pool):
+        """5 timeframes de 50ms em 3 workers levam ~2 rodadas, não 5"""
+        start = time.perf_counter()
+        results, latency = pool.map(lambda tf: time.sleep(0.05) or tf.lower(), TIMEFRAMES)
+        elapsed = time.perf_counter() - start
+
+        assert list(results) == TIMEFRAMES
+        assert results['H4'] == 'h4'
+        assert set(latency) == set(TIMEFRAMES)
+        assert all(ms >= 45 for ms in latency.values())
+        assert elapsed < 0.2
+
+    def test_global_concurrency_cap(self, pool):
+        """Muitos chamadores simultâneos nunca passam de max_workers tarefas ativas"""
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def task(tf):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return tf
+
+        callers = [threading.Thread(target=pool.map, args=(task, TIMEFRAMES)) for _ in range(10)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join(timeout=10)
+
+        assert peak[0] == 3
+        assert pool.get_stats()['tasks'] == 50
+
+    def test_errors_and_timeouts_are_skipped(self, pool):
+        """Timeframe com erro ou lento fica fora do resultado"""
+        def task(tf):
+            if tf == 'M15':
+                raise RuntimeError('falha')
+            if tf == 'H4':
+                time.sleep(0.5)
+            return tf
+
+        results, _ = pool.map(task, TIMEFRAMES, timeout_seconds=0.2)
+
+        assert list(results) == ['M5', 'M30', 'H1']
+        stats = pool.get_stats()
+        assert stats['errors'] == 1
+        assert stats['timeouts'] == 1
+
+    def test_nested_call_runs_inline(self):
+        """map() chamado de dentro de um worker não bloqueia o pool"""
+        pool = AnalysisWorkerPool(max_workers=1, timeout_seconds=2)
+        try:
+            results, _ = pool.map(lambda tf: pool.map(str.lower, ['A', 'B'])[0], ['outer'])
+            assert results['outer'] == {'A': 'a', 'B': 'b'}
+            assert pool.get_stats()['inline'] == 2
+        finally:
+            pool.shutdown()
+
+    def test_latency_stats_per_timeframe(self, pool):
+        """get_stats agrega latência por timeframe"""
+        pool.map(lambda tf: tf, ['M5', 'H1'])
+        pool.map(lambda tf: tf, ['M5'])
+
+        stats = pool.get_stats()
+        assert set(stats['latency_ms']) == {'M5', 'H1'}
+        assert stats['batches'] == 2
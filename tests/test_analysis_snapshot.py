@@ -0,0 +1,133 @@
+"""
+Testes para o AnalysisSnapshotService
+Cobertura: cache por barra, single-flight, imutabilidade, contadores
+"""
+
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analysis.analysis_snapshot import AnalysisSnapshotService, FrozenDict, freeze
+
+
+class FakeClock:
+    """Relógio controlável"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = Mock()
+    analyzer.symbol = 'XAUUSD'
+    analyzer.analyze_multi_timeframe.side_effect = lambda tfs: {
+        tf: {'rsi': 50.0, 'trend': {'signals': ['x']}} for tf in tfs
+    }
+    return analyzer
+
+
+class TestAnalysisSnapshotService:
+    """Testes para AnalysisSnapshotService"""
+
+    def test_reuses_snapshot_within_bar(self, analyzer):
+        """Mesma barra = mesmo snapshot, sem recálculo"""
+        clock = FakeClock()
+        service = AnalysisSnapshotService(analyzer, clock=clock)
+
+        first = service.get_snapshot()
+        clock.now += 10
+        second = service.get_snapshot()
+
+        assert first is second
+        assert analyzer.analyze_multi_timeframe.call_count == 1
+        assert service.get_stats()['hits'] == 1
+        assert service.get_stats()['misses'] == 1
+
+    def test_recomputes_on_new_bar(self, analyzer):
+        """Fechamento da barra do menor timeframe gera nova versão"""
+        clock = FakeClock()
+        service = AnalysisSnapshotService(analyzer, timeframes=['M5', 'H1'], clock=clock)
+
+        first = service.get_snapshot()
+        clock.now += 300
+        second = service.get_snapshot()
+
+        assert second.version == first.version + 1
+        assert analyzer.analyze_multi_timeframe.call_count == 2
+
+    def test_concurrent_requests_share_single_computation(self, analyzer):
+        """Pedidos concorrentes aguardam o mesmo cálculo"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_analysis(tfs):
+            started.set()
+            release.wait(timeout=5)
+            return {'M5': {'rsi': 40.0}}
+
+        analyzer.analyze_multi_timeframe.side_effect = slow_analysis
+        service = AnalysisSnapshotService(analyzer, clock=FakeClock())
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.get_snapshot()))
+                   for _ in range(6)]
+        threads[0].start()
+        started.wait(timeout=5)
+        for t in threads[1:]:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert analyzer.analyze_multi_timeframe.call_count == 1
+        assert len(results) == 6
+        assert all(r is results[0] for r in results)
+        assert service.get_stats()['waits'] + service.get_stats()['hits'] == 5
+
+    def test_error_propagates_and_is_not_cached(self, analyzer):
+        """Erro no cálculo é repassado e o próximo pedido tenta novamente"""
+        analyzer.analyze_multi_timeframe.side_effect = [RuntimeError('MT5 off'), {'M5': {}}]
+        service = AnalysisSnapshotService(analyzer, clock=FakeClock())
+
+        with pytest.raises(RuntimeError):
+            service.get_snapshot()
+
+        assert service.get_snapshot().analysis == {'M5': {}}
+        assert service.get_stats()['errors'] == 1
+
+    def test_snapshot_is_read_only(self, analyzer):
+        """Snapshot não pode ser alterado pelas estratégias"""
+        service = AnalysisSnapshotService(analyzer, clock=FakeClock())
+        analysis = service.get_analysis()
+
+        assert isinstance(analysis, dict)
+        assert isinstance(analysis['M5'], dict)
+        with pytest.raises(TypeError):
+            analysis['M5']['rsi'] = 10
+        with pytest.raises(TypeError):
+            analysis.pop('M5')
+
+        mutable = analysis.copy()
+        mutable['M5']['rsi'] = 10
+        mutable['M5']['trend']['signals'].append('y')
+        assert analysis['M5']['rsi'] == 50.0
+
+
+def test_freeze_converts_lists_to_tuples():
+    """freeze() congela estruturas aninhadas"""
+    frozen = freeze({'a': [1, {'b': 2}]})
+
+    assert isinstance(frozen, FrozenDict)
+    assert frozen['a'][0] == 1
+    assert isinstance(frozen['a'][1], FrozenDict)
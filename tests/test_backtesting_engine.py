@@ -0,0 +1,154 @@
+"""
+Testes para o BacktestEngine (backtesting.engine)
+Loop sobre arrays vs loop original com data.iloc barra a barra
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backtesting.engine import BacktestEngine, BaseStrategy, OrderType, SMAStrategy
+from tests.fakes.market_data import make_bars
+
+
+class SignalStrategy(BaseStrategy):
+    """Sinais pré-sorteados: entradas com SL/TP e saídas por sinal"""
+
+    def __init__(self, n, seed=1, use_sl=True):
+        super().__init__("Signals")
+        rng = np.random.default_rng(seed)
+        self.entries = rng.choice([0, 1, -1], size=n, p=[0.9, 0.05, 0.05])
+        self.exits = rng.random(n) < 0.03
+        self.use_sl = use_sl
+
+    def on_bar(self, data, index):
+        pass
+
+    def should_enter(self, data, index):
+        side = self.entries[index]
+        if side == 0:
+            return None
+        price = data['close'].iat[index]
+        if not self.use_sl:
+            return {'type': 'BUY' if side > 0 else 'SELL'}
+        return {
+            'type': 'BUY' if side > 0 else 'SELL',
+            'sl': price - side * 0.0015,
+            'tp': price + side * 0.0025,
+            'comment': 'sig'
+        }
+
+    def should_exit(self, position, data, index):
+        # Usa o P&L não realizado atualizado pelo engine
+        return bool(self.exits[index]) or position.unrealized_pnl < -150
+
+
+def run_both(make_strategy, data, **engine_kwargs):
+    results = []
+    for fast in (False, True):
+        np.random.seed(7)  # slippage
+        engine = BacktestEngine(**engine_kwargs)
+        result = engine.run(make_strategy(), data.copy(), symbol='EURUSD', fast=fast)
+        results.append((engine, result))
+    return results
+
+
+def assert_same(legacy, fast):
+    (engine_a, a), (engine_b, b) = legacy, fast
+    assert a.total_trades > 0
+    assert a.trades == b.trades
+    pd.testing.assert_series_equal(a.equity_curve, b.equity_curve)
+    pd.testing.assert_series_equal(a.drawdown_curve, b.drawdown_curve)
+    assert a.to_dict() == b.to_dict()
+    assert engine_a._balance_history == engine_b._balance_history
+    assert engine_a.balance == engine_b.balance
+
+
+class TestArrayFastPath:
+    """Loop sobre arrays idêntico ao loop original"""
+
+    def test_signal_strategy_identical(self):
+        """Várias posições, SL/TP, saídas e slippage aleatório"""
+        data = make_bars(3000)
+        legacy, fast = run_both(lambda: SignalStrategy(len(data)), data, max_positions=3)
+
+        assert_same(legacy, fast)
+        reasons = {t.exit_reason for t in fast[1].trades}
+        assert {'stop_loss', 'take_profit', 'strategy_exit'} <= reasons
+
+    def test_without_sl_tp(self):
+        """Volume padrão sem SL; posições fechadas no fim do backtest"""
+        data = make_bars(800, seed=3)
+        legacy, fast = run_both(lambda: SignalStrategy(len(data), use_sl=False), data, max_positions=5)
+
+        assert_same(legacy, fast)
+        assert fast[1].trades[-1].exit_reason == 'end_of_backtest'
+
+    def test_sma_strategy_identical(self):
+        """Estratégia de exemplo do módulo"""
+        data = make_bars(400, seed=5, freq='1h')
+        legacy, fast = run_both(lambda: SMAStrategy(fast_period=5, slow_period=12), data)
+
+        assert_same(legacy, fast)
+
+    def test_string_times(self):
+        """Coluna time como texto: mesmos timestamps do pd.to_datetime por barra"""
+        data = make_bars(500, seed=2)
+        data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        legacy, fast = run_both(lambda: SignalStrategy(len(data)), data)
+
+        assert_same(legacy, fast)
+        assert isinstance(fast[1].trades[0].entry_time, pd.Timestamp)
+
+    def test_position_arrays_follow_list(self):
+        """Arrays de posições na mesma ordem da lista após fechamentos no meio"""
+        engine = BacktestEngine(slippage_pips=0, max_positions=4)
+        ts = pd.Timestamp('2024-01-01')
+        positions = [
+            engine.open_position('EURUSD', OrderType.BUY if i % 2 == 0 else OrderType.SELL,
+                                 0.1 * (i + 1), 1.1, ts, sl=1.0 + i, tp=2.0 + i)
+            for i in range(4)
+        ]
+        engine.close_position(positions[1], 1.1, ts)
+
+        assert list(engine._pos_volume[:3]) == pytest.approx([0.1, 0.3, 0.4])
+        assert list(engine._pos_sign[:3]) == [1, 1, -1]
+        assert list(engine._pos_sl[:3]) == [1.0, 3.0, 4.0]
+
+
+class TestCheckpoints:
+    """Equity reportada em checkpoints durante o backtest"""
+
+    @pytest.mark.parametrize('fast', [True, False])
+    def test_equity_at_evenly_spaced_bars(self, fast):
+        data = make_bars(1000)
+        reports = []
+
+        np.random.seed(7)
+        result = BacktestEngine(max_positions=3).run(
+            SignalStrategy(len(data)), data, fast=fast,
+            on_checkpoint=lambda step, equity: reports.append((step, equity)), checkpoints=4
+        )
+
+        assert [step for step, _ in reports] == [1, 2, 3, 4]
+        expected = result.equity_curve.iloc[[249, 499, 749, 999]].tolist()
+        assert [equity for _, equity in reports] == expected
+
+    def test_exception_stops_backtest(self):
+        data = make_bars(1000)
+        seen = []
+
+        def stop(step, equity):
+            seen.append(step)
+            if step == 2:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            BacktestEngine().run(SignalStrategy(len(data)), data, on_checkpoint=stop)
+
+        assert seen == [1, 2]
@@ -0,0 +1,185 @@
+"""
+Testes para o cursor de barras dos backtests
+Pré-cálculo + varredura vs fatiamento data.iloc[:i+1] a cada barra
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backtesting.bar_cursor import BarCursor, CursorStrategy, FrameStrategyAdapter, build_columns
+from backtesting.backtest_engine import BacktestEngine, MarketRegime, MarketRegimeDetector
+from backtest.backtester import Backtester
+from tests.fakes.market_data import make_regime_bars
+
+
+def ma_strategy(data):
+    """Estratégia antiga: recebe o DataFrame até a barra corrente"""
+    ma_fast = data['close'].rolling(10).mean().iloc[-1]
+    ma_slow = data['close'].rolling(30).mean().iloc[-1]
+    if ma_fast > ma_slow * 1.001:
+        return 'buy'
+    elif ma_fast < ma_slow * 0.999:
+        return 'sell'
+    return 'hold'
+
+
+class MACursorStrategy(CursorStrategy):
+    """Mesma regra de ma_strategy com médias pré-calculadas"""
+
+    name = "ma_cursor"
+
+    def prepare(self, data):
+        return {
+            'ma_fast': data['close'].rolling(10).mean().to_numpy(),
+            'ma_slow': data['close'].rolling(30).mean().to_numpy(),
+        }
+
+    def on_bar(self, cursor):
+        ma_fast, ma_slow = cursor['ma_fast'], cursor['ma_slow']
+        if ma_fast > ma_slow * 1.001:
+            return 'buy'
+        elif ma_fast < ma_slow * 0.999:
+            return 'sell'
+        return 'hold'
+
+
+def legacy_run(engine, strategy, data, symbol="XAUUSD"):
+    """Loop original de run_backtest (fatia o DataFrame a cada barra)"""
+    trades, equity, position = [], [engine.initial_capital], None
+    for i in range(100, len(data)):
+        current_data = data.iloc[:i+1]
+        bar = data.iloc[i]
+        regime = engine.regime_detector.detect_regime(current_data)
+        signal = strategy(current_data)
+        if position is None:
+            if signal in ['buy', 'sell']:
+                position = engine._open_position(bar, signal, symbol, regime, equity[-1])
+        elif engine._check_exit(position, bar, signal):
+            trade = engine._close_position(position, bar, True)
+            trades.append(trade)
+            equity.append(equity[-1] + trade.net_profit)
+            position = None
+    if position:
+        trade = engine._close_position(position, data.iloc[-1], True)
+        trades.append(trade)
+        equity.append(equity[-1] + trade.net_profit)
+    return trades, equity
+
+
+class TestBarCursor:
+    """Acesso à barra corrente e janelas sem cópia"""
+
+    def test_values_and_windows(self):
+        data = make_regime_bars(50)
+        cursor = BarCursor(data, build_columns(data), index=20)
+
+        assert cursor['close'] == data['close'].iat[20]
+        assert cursor.prev('close', 3) == data['close'].iat[17]
+        assert cursor.prev('close', 21) is None
+        assert cursor.get('atr') is None
+        assert len(cursor) == 21
+        assert cursor.time == data.index[20]
+
+        window = cursor.window('close', 5)
+        np.testing.assert_array_equal(window, data['close'].to_numpy()[16:21])
+        assert np.shares_memory(window, cursor.columns['close'])
+        assert len(cursor.window('close', 100)) == 21
+        pd.testing.assert_frame_equal(cursor.frame, data.iloc[:21])
+
+
+class TestPrecomputedScan:
+    """Resultados iguais ao loop que fatia o histórico"""
+
+    def test_regimes_match_per_bar_detection(self):
+        data = make_regime_bars(600)
+        detector = MarketRegimeDetector()
+        regimes = detector.detect_regimes(data)
+
+        expected = [detector.detect_regime(data.iloc[:i+1]) for i in range(len(data))]
+        assert regimes == expected
+        assert len(set(regimes)) >= 4
+
+    def test_short_data_is_ranging(self):
+        regimes = MarketRegimeDetector().detect_regimes(make_regime_bars(10))
+        assert regimes == [MarketRegime.RANGING] * 10
+
+    def test_callable_strategy_matches_legacy_loop(self):
+        data = make_regime_bars(700)
+        engine = BacktestEngine()
+
+        trades, equity = legacy_run(engine, ma_strategy, data)
+        result = engine.run_backtest(ma_strategy, data)
+
+        assert result.strategy == 'ma_strategy'
+        assert len(trades) > 5
+        assert result.trades == trades
+        assert result.equity_curve == equity
+
+    def test_cursor_strategy_matches_callable(self):
+        data = make_regime_bars(700, seed=3)
+        engine = BacktestEngine()
+
+        expected = engine.run_backtest(ma_strategy, data)
+        result = engine.run_backtest(MACursorStrategy(), data)
+
+        assert result.strategy == 'ma_cursor'
+        assert result.trades == expected.trades
+        assert result.equity_curve == expected.equity_curve
+
+    def test_adapter_sees_history_up_to_bar(self):
+        data = make_regime_bars(200)
+        seen = []
+
+        def recorder(df):
+            seen.append((len(df), df.index[-1]))
+            return 'hold'
+
+        adapter = FrameStrategyAdapter(recorder)
+        assert adapter.name == 'recorder'
+        BacktestEngine().run_backtest(recorder, data)
+
+        assert seen == [(i + 1, data.index[i]) for i in range(100, len(data))]
+
+    def test_incomplete_strategy_fails_on_instantiation(self):
+        class NoSignal(CursorStrategy):
+            name = 'no_signal'
+
+        with pytest.raises(TypeError):
+            NoSignal()
+
+
+class TestBacktesterIndicators:
+    """Backtester: indicadores pré-calculados iguais aos recalculados por barra"""
+
+    def test_analysis_data_matches_sliced_history(self):
+        data = make_regime_bars(400).reset_index(names='time')
+        mt5 = MagicMock()
+        mt5.get_rates.return_value = data
+
+        backtester = Backtester(mt5, {})
+        calls = []
+        strategy = MagicMock()
+        strategy.name = 'recorder'
+        strategy.min_confidence = 1.0
+        strategy.analyze.side_effect = lambda analysis: calls.append(analysis) or None
+
+        start, end = data['time'].iloc[0], data['time'].iloc[-1]
+        result = backtester.run(strategy, 'EURUSD', start, end, timeframe='H1')
+
+        assert result.total_trades == 0
+        assert len(calls) == len(data) - 100
+        for i, analysis in zip(range(100, len(data)), calls):
+            history = data.iloc[:i+1]
+            expected = backtester._calculate_indicators(history)
+            assert analysis['indicators'].keys() == expected.keys()
+            for name, value in expected.items():
+                assert analysis['indicators'][name] == pytest.approx(value, nan_ok=True, rel=0, abs=0)
+            pd.testing.assert_frame_equal(analysis['rates']['M15'], history.tail(100))
@@ -0,0 +1,109 @@
+"""
+Testes para o RollingBarStore
+Compara a atualização incremental com o download completo (copy_rates_from_pos)
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.bar_store import RollingBarStore
+from tests.fakes.fake_mt5 import FakeMT5
+
+
+def legacy_frame(fake, symbol, timeframe, count):
+    """Mesmo caminho do MT5Connector.get_rates sem o store"""
+    df = pd.DataFrame(fake.copy_rates_from_pos(symbol, timeframe, 0, count))
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    df.set_index('time', inplace=True)
+    return df
+
+
+@pytest.fixture
+def fake():
+    return FakeMT5(history_minutes=60 * 24 * 5)
+
+
+class TestRollingBarStore:
+    """Testes para RollingBarStore"""
+
+    def test_matches_full_download(self, fake):
+        """Frame incremental é idêntico ao download completo a cada ciclo"""
+        store = RollingBarStore(fake, 'XAUUSD', fake.TIMEFRAME_M5, capacity=300, clock=lambda: fake.now)
+
+        for _ in range(40):
+            assert store.update()
+            expected = legacy_frame(fake, 'XAUUSD', fake.TIMEFRAME_M5, 200)
+            pd.testing.assert_frame_equal(store.to_frame(200), expected)
+            fake.advance(97)
+
+    def test_fetches_only_new_bars(self, fake):
+        """Após a carga inicial cada update transfere só a barra em formação + novas"""
+        store = RollingBarStore(fake, 'XAUUSD', fake.TIMEFRAME_M1, capacity=500, clock=lambda: fake.now)
+        store.update()
+        fake.reset_calls()
+
+        for _ in range(10):
+            fake.advance(120)
+            store.update()
+
+        assert fake.calls['copy_rates_range'] == 10
+        assert fake.calls['copy_rates_from_pos'] == 0
+        assert fake.bars_sent == 10 * 3
+        assert store.get_stats()['bars_appended'] == 20
+
+    def test_wraparound_keeps_views_contiguous(self, fake):
+        """Após várias voltas do buffer, a view continua ordenada e sem cópia"""
+        store = RollingBarStore(fake, 'EURUSD', fake.TIMEFRAME_M1, capacity=50, clock=lambda: fake.now)
+
+        for _ in range(30):
+            store.update()
+            fake.advance(180)
+        store.update()
+
+        view = store.view()
+        assert len(view['time']) == 50
+        assert np.all(np.diff(view['time']) == 60)
+        assert not view['close'].flags.writeable
+        assert np.shares_memory(view['close'], store._buffers['close'])
+        np.testing.assert_array_equal(
+            view['close'], fake.copy_rates_from_pos('EURUSD', fake.TIMEFRAME_M1, 0, 50)['close']
+        )
+
+    def test_large_gap_reloads(self, fake):
+        """Gap maior que a capacidade mantém apenas as barras mais recentes"""
+        store = RollingBarStore(fake, 'XAUUSD', fake.TIMEFRAME_M1, capacity=100, clock=lambda: fake.now)
+        store.update()
+        fake.advance(60 * 500)
+        store.update()
+
+        pd.testing.assert_frame_equal(
+            store.to_frame(), legacy_frame(fake, 'XAUUSD', fake.TIMEFRAME_M1, 100)
+        )
+
+    def test_frame_survives_later_updates(self, fake):
+        """to_frame copia os dados: DataFrames antigos não mudam"""
+        store = RollingBarStore(fake, 'XAUUSD', fake.TIMEFRAME_M1, capacity=20, clock=lambda: fake.now)
+        store.update()
+        frame = store.to_frame()
+        snapshot = frame.copy()
+
+        for _ in range(25):
+            fake.advance(60)
+            store.update()
+
+        pd.testing.assert_frame_equal(frame, snapshot)
+
+
+def test_unknown_symbol_fails(fake):
+    """Símbolo inexistente retorna False sem levantar"""
+    store = RollingBarStore(fake, 'NOPE', fake.TIMEFRAME_M1, capacity=10)
+
+    assert store.update() is False
+    assert store.to_frame() is None
+    assert store.get_stats()['failures'] == 1
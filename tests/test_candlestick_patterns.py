@@ -0,0 +1,108 @@
+"""
+Testes para o scanner vetorizado de padrões de candlestick
+Compara com a detecção escalar original (última barra) em todas as posições
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analysis.candlestick_patterns import (
+    PATTERN_NAMES, candlestick_pattern_frame, latest_patterns, scan_patterns
+)
+
+
+def scalar_patterns(df):
+    """Implementação escalar original (TechnicalAnalyzer.detect_candlestick_patterns)"""
+    last, prev, prev2 = df.iloc[-1], df.iloc[-2], df.iloc[-3]
+    last_body = abs(last['Close'] - last['Open'])
+    prev_body = abs(prev['Close'] - prev['Open'])
+    prev2_body = abs(prev2['Close'] - prev2['Open'])
+    upper = last['High'] - max(last['Open'], last['Close'])
+    lower = min(last['Open'], last['Close']) - last['Low']
+    rng = last['High'] - last['Low']
+    return {
+        'doji': last_body < (rng * 0.1) and rng > 0,
+        'hammer': lower > last_body * 2 and upper < last_body * 0.5 and last['Close'] < prev['Close'],
+        'inverted_hammer': upper > last_body * 2 and lower < last_body * 0.5 and last['Close'] < prev['Close'],
+        'shooting_star': upper > last_body * 2 and lower < last_body * 0.5 and last['Close'] > prev['Close'],
+        'engulfing_bullish': (prev['Close'] < prev['Open'] and last['Close'] > last['Open']
+                              and last['Open'] <= prev['Close'] and last['Close'] >= prev['Open']),
+        'engulfing_bearish': (prev['Close'] > prev['Open'] and last['Close'] < last['Open']
+                              and last['Open'] >= prev['Close'] and last['Close'] <= prev['Open']),
+        'morning_star': (prev2['Close'] < prev2['Open'] and prev_body < prev2_body * 0.3
+                         and last['Close'] > last['Open']
+                         and last['Close'] > (prev2['Open'] + prev2['Close']) / 2),
+        'evening_star': (prev2['Close'] > prev2['Open'] and prev_body < prev2_body * 0.3
+                         and last['Close'] < last['Open']
+                         and last['Close'] < (prev2['Open'] + prev2['Close']) / 2),
+        'pin_bar_bullish': lower > last_body * 2 and upper < last_body,
+        'pin_bar_bearish': upper > last_body * 2 and lower < last_body,
+    }
+
+
+@pytest.fixture
+def ohlc():
+    """Série com corpos pequenos e sombras longas frequentes (muitos padrões)"""
+    rng = np.random.default_rng(7)
+    n = 400
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 1, n) * rng.choice([0.05, 1.0], n)
+    high = np.maximum(open_, close) + rng.exponential(0.8, n)
+    low = np.minimum(open_, close) - rng.exponential(0.8, n)
+    index = pd.date_range('2024-01-01', periods=n, freq='5min')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close}, index=index)
+
+
+class TestCandlestickPatterns:
+    """Testes para o scanner vetorizado"""
+
+    def test_matches_scalar_detection_on_every_bar(self, ohlc):
+        """Cada barra da série vetorizada = detecção escalar com a série cortada ali"""
+        frame = candlestick_pattern_frame(ohlc)
+
+        for end in range(3, len(ohlc) + 1):
+            expected = scalar_patterns(ohlc.iloc[:end])
+            row = frame.iloc[end - 1]
+            for name, value in expected.items():
+                assert bool(row[name]) == bool(value), (name, end)
+
+        assert frame[list(scalar_patterns(ohlc).keys())].to_numpy().any(axis=0).all()
+
+    def test_latest_patterns_is_last_row(self, ohlc):
+        """Caminho ao vivo = última linha do scan completo"""
+        frame = candlestick_pattern_frame(ohlc)
+        latest = latest_patterns(ohlc)
+
+        assert set(latest) == set(PATTERN_NAMES)
+        assert latest == {name: bool(frame[name].iloc[-1]) for name in PATTERN_NAMES}
+        assert latest_patterns(ohlc.iloc[:2]) == {}
+
+    def test_first_bars_without_history_are_false(self, ohlc):
+        """Padrões de 2/3 candles não disparam sem histórico"""
+        frame = candlestick_pattern_frame(ohlc.iloc[:2])
+
+        assert not frame[['engulfing_bullish', 'engulfing_bearish', 'hammer']].iloc[0].any()
+        assert not frame[['morning_star', 'evening_star', 'three_white_soldiers']].to_numpy().any()
+
+    def test_three_white_soldiers_and_black_crows(self):
+        """Sequências clássicas de 3 candles"""
+        up = scan_patterns([10, 11, 12], [11.6, 12.6, 13.6], [9.9, 10.9, 11.9], [11.5, 12.5, 13.5])
+        down = scan_patterns([13.5, 12.5, 11.5], [13.6, 12.6, 11.6], [11.9, 10.9, 9.9], [12, 11, 10])
+
+        assert up['three_white_soldiers'][-1]
+        assert not up['three_black_crows'][-1]
+        assert down['three_black_crows'][-1]
+
+    def test_lowercase_columns(self, ohlc):
+        """Aceita colunas minúsculas (formato MT5/backtest) e prefixo"""
+        lower = ohlc.rename(columns=str.lower)
+        frame = candlestick_pattern_frame(lower, prefix='pattern_')
+
+        assert list(frame.columns) == [f'pattern_{name}' for name in PATTERN_NAMES]
+        assert frame.dtypes.eq(bool).all()
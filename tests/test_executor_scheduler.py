@@ -0,0 +1,207 @@
+"""
+Testes para o ExecutorScheduler
+Cobertura: gatilhos interval/bar_close, limite de workers, heartbeats, métricas
+"""
+
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.executor_scheduler import ExecutorScheduler
+from core.watchdog import ThreadWatchdog
+
+
+class FakeExecutor:
+    """Executor mínimo com a interface usada pelo agendador"""
+
+    def __init__(self, name, cycle_seconds=0.05, duration=0.0, result=True,
+                 trigger='interval', timeframe='M5'):
+        self.strategy_name = name
+        self.symbol = 'XAUUSD'
+        self.cycle_seconds = cycle_seconds
+        self.trigger = trigger
+        self.trigger_timeframe = timeframe
+        self.running = True
+        self.duration = duration
+        self.result = result
+        self.runs = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def watchdog_name(self):
+        return f"Executor-{self.strategy_name}"
+
+    def start(self, scheduler):
+        """Como StrategyExecutor.start(scheduler=...)"""
+        self.running = True
+        scheduler.add(self)
+
+    def stop(self, scheduler):
+        """Como StrategyExecutor.stop() com agendador"""
+        self.running = False
+        scheduler.remove(self)
+
+    def run_cycle(self):
+        with self._lock:
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        self.runs.append(time.time())
+        time.sleep(self.duration)
+        with self._lock:
+            self.concurrent -= 1
+        return self.result
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = ExecutorScheduler(max_workers=2, heartbeat_seconds=0.05)
+    yield scheduler
+    scheduler.stop()
+
+
+class TestExecutorScheduler:
+    """Testes para ExecutorScheduler"""
+
+    def test_interval_trigger_repeats_cycles(self, scheduler):
+        """Ciclo imediato e repetição a cada cycle_seconds após o fim"""
+        executor = FakeExecutor('trend', cycle_seconds=0.05)
+        scheduler.add(executor)
+        scheduler.start()
+        time.sleep(0.3)
+
+        assert 3 <= len(executor.runs) <= 7
+        assert executor.max_concurrent == 1
+
+    def test_bounded_worker_pool(self, scheduler):
+        """Muitos executores nunca passam de max_workers ciclos simultâneos"""
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+        executors = [FakeExecutor(f's{i}', cycle_seconds=0.01) for i in range(8)]
+
+        for ex in executors:
+            original = ex.run_cycle
+
+            def tracked(original=original):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+                return original()
+
+            ex.run_cycle = tracked
+            scheduler.add(ex)
+
+        scheduler.start()
+        time.sleep(0.3)
+
+        assert peak[0] == 2
+        assert all(ex.runs for ex in executors)
+        stats = scheduler.get_stats()
+        assert stats['queue_depth_max'] >= 6
+        assert stats['lag_ms_max'] > 0
+
+    def test_bar_close_trigger(self):
+        """Gatilho bar_close agenda para a próxima fronteira + atraso"""
+        scheduler = ExecutorScheduler(bar_close_delay_seconds=2)
+
+        assert scheduler.next_bar_close('M5', 1_699_999_900) == 1_699_999_800 + 300 + 2
+        assert scheduler.next_bar_close('H1', 3600 * 10) == 3600 * 11 + 2
+
+        offset = ExecutorScheduler(bar_close_delay_seconds=0, bar_close_offset_seconds=7200)
+        assert offset.next_bar_close('H4', 0) == 7200
+
+    def test_failed_cycle_is_retried_later(self, scheduler):
+        """Ciclo com erro reagenda após error_retry_seconds"""
+        scheduler.error_retry_seconds = 10
+        executor = FakeExecutor('broken', cycle_seconds=0.01, result=False)
+        scheduler.add(executor)
+        scheduler.start()
+        time.sleep(0.15)
+
+        assert len(executor.runs) == 1
+        assert scheduler.get_stats()['errors'] == 1
+
+    def test_stopped_executor_is_not_dispatched(self, scheduler):
+        """executor.running = False remove o executor do agendamento"""
+        executor = FakeExecutor('stopped', cycle_seconds=0.02)
+        scheduler.add(executor)
+        scheduler.start()
+        time.sleep(0.05)
+        executor.running = False
+        runs = len(executor.runs)
+        time.sleep(0.1)
+
+        assert len(executor.runs) <= runs + 1
+
+    def test_stop_start_drops_old_schedule(self, scheduler):
+        """stop() + start() não deixa a entrada antiga do heap disparar outro ciclo"""
+        executor = FakeExecutor('restart', cycle_seconds=0.4)
+        scheduler.add(executor)
+        scheduler.start()
+        time.sleep(0.2)
+
+        executor.stop(scheduler)
+        executor.start(scheduler)
+        time.sleep(0.3)
+
+        # Ciclo inicial + ciclo imediato do novo start; a entrada antiga venceria em 0.4s
+        assert len(executor.runs) == 2
+        assert scheduler.get_stats()['executors'] == 1
+
+    def test_stop_start_during_cycle_never_overlaps(self, scheduler):
+        """Reinício com ciclo em andamento: um job só, nunca dois ciclos simultâneos"""
+        executor = FakeExecutor('busy', cycle_seconds=0.05, duration=0.05)
+        scheduler.add(executor)
+        scheduler.start()
+        time.sleep(0.02)
+
+        for _ in range(3):
+            executor.stop(scheduler)
+            executor.start(scheduler)
+        time.sleep(0.3)
+
+        assert executor.max_concurrent == 1
+        assert 2 <= len(executor.runs) <= 5
+        stats = scheduler.get_stats()
+        assert stats['executors'] == 1
+        assert len(stats['jobs']) == 1
+
+    def test_removed_executor_is_not_dispatched(self, scheduler):
+        """remove() tira o executor da fila e das métricas"""
+        executor = FakeExecutor('removed', cycle_seconds=0.02)
+        scheduler.add(executor)
+        scheduler.start()
+        time.sleep(0.05)
+        scheduler.remove(executor)
+        runs = len(executor.runs)
+        time.sleep(0.1)
+
+        assert len(executor.runs) <= runs + 1
+        assert scheduler.get_stats()['executors'] == 0
+
+    def test_idle_executors_keep_watchdog_heartbeat(self):
+        """Executor aguardando o próximo ciclo continua enviando heartbeat"""
+        watchdog = ThreadWatchdog(timeout_seconds=300)
+        scheduler = ExecutorScheduler(max_workers=1, watchdog=watchdog, heartbeat_seconds=0.05)
+        executor = FakeExecutor('slow_cycle', cycle_seconds=60)
+        scheduler.add(executor)
+        scheduler.start()
+        try:
+            time.sleep(0.05)
+            first = watchdog.threads['Executor-slow_cycle']
+            time.sleep(0.2)
+            assert watchdog.threads['Executor-slow_cycle'] > first
+            assert 'ExecutorScheduler' in watchdog.threads
+            assert len(executor.runs) == 1
+        finally:
+            scheduler.stop()
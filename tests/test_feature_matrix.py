@@ -0,0 +1,80 @@
+"""
+Testes para AdvancedFeatureEngineer.generate_feature_matrix
+Matriz vetorizada (todas as barras) vs generate_features (última barra)
+"""
+
+import asyncio
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.feature_engineering import AdvancedFeatureEngineer
+from tests.fakes.market_data import make_ohlcv
+
+
+def live_features(engineer, df):
+    return asyncio.run(engineer.generate_features(df, 'XAUUSD')).features
+
+
+@pytest.fixture
+def engineer():
+    return AdvancedFeatureEngineer()
+
+
+class TestFeatureMatrix:
+    """Testes para generate_feature_matrix"""
+
+    def test_shape_and_dtype(self, engineer):
+        """Uma linha float32 por barra, colunas em FEATURE_NAMES"""
+        df = make_ohlcv()
+        matrix = engineer.generate_feature_matrix(df, 'XAUUSD')
+
+        assert matrix.values.shape == (len(df), len(AdvancedFeatureEngineer.FEATURE_NAMES))
+        assert matrix.values.dtype == np.float32
+        assert matrix.feature_names == AdvancedFeatureEngineer.FEATURE_NAMES
+        assert matrix.to_frame().index.equals(df.index)
+
+    def test_last_row_matches_live(self, engineer):
+        """Última linha igual a generate_features"""
+        df = make_ohlcv()
+        matrix = engineer.generate_feature_matrix(df, 'XAUUSD')
+        live = live_features(engineer, df)
+
+        for name, value in matrix.row().items():
+            assert value == pytest.approx(live[name], rel=1e-5, abs=1e-6), name
+
+    @pytest.mark.parametrize('bars', [1, 2, 12, 20, 21, 26, 35, 51, 100, 101, 199, 250])
+    def test_every_row_matches_prefix(self, engineer, bars):
+        """Linha t = generate_features(df[:t+1]), inclusive no aquecimento"""
+        df = make_ohlcv(seed=7)
+        matrix = engineer.generate_feature_matrix(df, 'XAUUSD')
+        live = live_features(engineer, df.iloc[:bars])
+
+        for name, value in matrix.row(bars - 1).items():
+            assert value == pytest.approx(live[name], rel=1e-5, abs=1e-6), name
+
+    def test_without_volume(self, engineer):
+        """Sem coluna de volume as features de volume são zero"""
+        df = make_ohlcv(volume=False)
+        matrix = engineer.generate_feature_matrix(df, 'XAUUSD')
+        row = matrix.row()
+
+        assert row['volume_ratio'] == 0.0
+        assert row['mfi'] == 0.0
+        assert row == pytest.approx(live_features(engineer, df), rel=1e-5, abs=1e-6)
+
+    def test_macro_context_broadcast(self, engineer):
+        """Contexto macro aplicado a todas as barras"""
+        df = make_ohlcv(n=50)
+        matrix = engineer.generate_feature_matrix(
+            df, 'XAUUSD', macro_context={'dxy_trend': 'bearish', 'biases': {'XAUUSD': 0.3}}
+        )
+        frame = matrix.to_frame()
+
+        assert (frame['dxy_trend'] == -0.5).all()
+        assert np.allclose(frame['macro_bias'], 0.3)
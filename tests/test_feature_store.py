@@ -0,0 +1,160 @@
+"""
+Testes para o StreamingFeatureStore
+Features incrementais por (símbolo, timeframe) vs generate_features (lote)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.feature_engineering import AdvancedFeatureEngineer
+from ml.feature_store import StreamingFeatureStore
+from tests.fakes.market_data import make_ohlcv
+
+
+def batch_features(engineer, df):
+    return asyncio.run(engineer.generate_features(df, 'XAUUSD')).features
+
+
+def assert_matches_batch(store, engineer, df, timeframe='H1'):
+    streamed = store.get_features(df, 'XAUUSD', timeframe).features
+    assert streamed == pytest.approx(batch_features(engineer, df), rel=1e-6, abs=1e-9)
+
+
+@pytest.fixture
+def engineer():
+    return AdvancedFeatureEngineer()
+
+
+@pytest.fixture
+def store(engineer):
+    return StreamingFeatureStore(engineer, tail_bars=128)
+
+
+class TestStreamingFeatureStore:
+    """Testes para StreamingFeatureStore"""
+
+    def test_growing_history_matches_batch(self, store, engineer):
+        """Barra a barra (inclusive aquecimento e EMA 200) igual ao caminho em lote"""
+        df = make_ohlcv(n=420, seed=3)
+
+        for end in range(2, 420, 7):
+            assert_matches_batch(store, engineer, df.iloc[:end])
+
+        stats = store.get_stats()
+        assert stats['bootstraps'] == 1
+        assert stats['advances'] > 0
+
+    def test_sliding_window_matches_batch(self, store, engineer):
+        """Janela deslizante de 1000 barras (como copy_rates_from_pos) continua consistente"""
+        df = make_ohlcv(n=1400, seed=4)
+
+        for start in range(0, 400, 7):
+            result = asyncio.run(store.check_consistency(df.iloc[start:start + 1000], 'XAUUSD', 'H1'))
+            assert result['consistent'], result['mismatches']
+
+        assert store.get_stats()['bootstraps'] == 1
+
+    def test_repeated_bar_is_lookup(self, store, engineer, monkeypatch):
+        """Mesma barra em formação: consulta sem recálculo"""
+        df = make_ohlcv(n=300)
+        first = store.get_features(df, 'XAUUSD', 'H1')
+
+        def fail(*args, **kwargs):
+            raise AssertionError('recalculou')
+        monkeypatch.setattr(engineer, '_matrix_columns', fail)
+
+        again = store.get_features(df, 'XAUUSD', 'H1')
+
+        assert again.features == first.features
+        assert store.get_stats()['lookups'] == 1
+
+    def test_forming_bar_update(self, store, engineer):
+        """Tick novo na barra em formação recalcula só a última linha"""
+        df = make_ohlcv(n=300)
+        store.get_features(df, 'XAUUSD', 'H1')
+
+        ticked = df.copy()
+        ticked.iloc[-1, ticked.columns.get_loc('close')] += 3.0
+        ticked.iloc[-1, ticked.columns.get_loc('high')] += 3.0
+        assert_matches_batch(store, engineer, ticked)
+        assert store.get_stats()['pending_updates'] == 1
+
+    def test_revised_history_bootstraps(self, store, engineer):
+        """Barra fechada alterada (histórico revisado) reinicia o estado"""
+        df = make_ohlcv(n=300)
+        store.get_features(df.iloc[:-5], 'XAUUSD', 'H1')
+
+        revised = df.copy()
+        revised.iloc[-7, revised.columns.get_loc('close')] += 1.0
+        assert_matches_batch(store, engineer, revised)
+        assert store.get_stats()['bootstraps'] == 2
+
+    def test_streams_per_symbol_and_timeframe(self, store):
+        """Estado separado por (símbolo, timeframe)"""
+        df = make_ohlcv(n=150)
+        store.get_features(df, 'XAUUSD', 'H1')
+        store.get_features(df, 'XAUUSD', 'M15')
+        store.get_features(df, 'EURUSD', 'H1')
+
+        assert store.get_stats()['streams'] == 3
+        store.reset('XAUUSD')
+        assert store.get_stats()['streams'] == 1
+
+    def test_non_datetime_index_falls_back(self, store):
+        """Índice sem tempo não permite alinhar barras: caminho em lote"""
+        df = make_ohlcv(n=150).reset_index(drop=True)
+
+        assert store.get_features(df, 'XAUUSD', 'H1') is None
+        assert store.get_stats()['batch_fallbacks'] == 1
+
+    def test_consistency_check_detects_divergence(self, store):
+        """Estado corrompido é detectado e descartado"""
+        df = make_ohlcv(n=300)
+        store.get_features(df.iloc[:-1], 'XAUUSD', 'H1')
+        state = store._states[('XAUUSD', 'H1')]
+        state._buf[:state._pos, 6:] *= 1.01      # EMAs erradas
+
+        result = asyncio.run(store.check_consistency(df, 'XAUUSD', 'H1'))
+
+        assert not result['consistent']
+        assert 'ema_9_dist' in result['mismatches']
+        assert store.get_stats()['consistency_failures'] == 1
+        assert store.get_stats()['streams'] == 0
+
+    def test_macro_context_applied_per_call(self, store, engineer):
+        """Features macro vêm do contexto da chamada, não do estado"""
+        df = make_ohlcv(n=150)
+        store.get_features(df, 'XAUUSD', 'H1')
+
+        features = store.get_features(
+            df, 'XAUUSD', 'H1', macro_context={'dxy_trend': 'bearish', 'biases': {'XAUUSD': 0.3}}
+        ).features
+
+        assert features['dxy_trend'] == -0.5
+        assert features['macro_bias'] == pytest.approx(0.3)
+        assert store.get_stats()['lookups'] == 1
+
+    def test_concurrent_calls_share_state_safely(self, store, engineer):
+        """Chamadas de várias threads: features corretas e nenhum contador perdido"""
+        df = make_ohlcv(n=400, seed=5)
+        windows = [df.iloc[:end] for end in range(300, 400, 5)]
+        calls = [(window, symbol) for window in windows for symbol in ('XAUUSD', 'EURUSD')] * 3
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda c: store.get_features(c[0], c[1], 'H1'), calls))
+
+        for (window, symbol), result in zip(calls, results):
+            if symbol == 'XAUUSD':
+                assert result.features == pytest.approx(batch_features(engineer, window), rel=1e-6, abs=1e-9)
+
+        stats = store.get_stats()
+        assert stats['streams'] == 2
+        assert stats['lookups'] + stats['advances'] + stats['pending_updates'] + stats['bootstraps'] == len(calls)
@@ -0,0 +1,190 @@
+"""
+Testes para o retreino incremental do XGBoost
+AUC, conversão de parâmetros e decisão incremental vs refit completo
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.incremental_boosting import (
+    BoostingState, IncrementalBoostingTrainer, binary_auc, native_params
+)
+
+
+def pairwise_auc(y, scores):
+    """P(score positivo > score negativo), empates valem 0.5"""
+    pos, neg = scores[y == 1], scores[y == 0]
+    diff = pos[:, None] - neg[None, :]
+    return ((diff > 0).sum() + 0.5 * (diff == 0).sum()) / diff.size
+
+
+class FixedModel:
+    """Modelo com probabilidade = primeira feature"""
+
+    def predict_proba(self, X):
+        p = np.clip(X[:, 0], 0, 1)
+        return np.column_stack([1 - p, p])
+
+
+def trainer_with_state(**config):
+    trainer = IncrementalBoostingTrainer(config)
+    trainer.states['m'] = BoostingState(
+        trained_rows=100,
+        reference_mean=np.zeros(3),
+        reference_std=np.ones(3),
+        reference_auc=0.8
+    )
+    return trainer
+
+
+def informative_samples(n, seed=0, shift=0.0):
+    """Primeira feature separa as classes (AUC ~1 para FixedModel)"""
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, n)
+    X = rng.standard_normal((n, 3)) * 0.3 + shift
+    X[:, 0] = np.where(y == 1, 0.7, 0.3) + rng.standard_normal(n) * 0.05
+    X[:, 0] -= 0.5
+    return X, y
+
+
+class TestBinaryAuc:
+    """Testes para binary_auc"""
+
+    def test_matches_pairwise(self):
+        """Igual à definição por pares, inclusive com empates"""
+        rng = np.random.default_rng(3)
+        y = rng.integers(0, 2, 300)
+        scores = np.round(rng.random(300) + y * 0.3, 1)
+
+        assert binary_auc(y, scores) == pytest.approx(pairwise_auc(y, scores))
+
+    def test_extremes(self):
+        """Separação perfeita = 1, invertida = 0, uma classe = nan"""
+        y = np.array([0, 0, 1, 1])
+        assert binary_auc(y, np.array([0.1, 0.2, 0.8, 0.9])) == 1.0
+        assert binary_auc(y, np.array([0.9, 0.8, 0.2, 0.1])) == 0.0
+        assert np.isnan(binary_auc(np.ones(4), np.random.random(4)))
+
+
+class TestNativeParams:
+    """Testes para native_params"""
+
+    def test_sklearn_params_converted(self):
+        """n_estimators vira rounds; parâmetros do sklearn saem; hist forçado"""
+        params, rounds = native_params({
+            'n_estimators': 150, 'random_state': 42, 'n_jobs': -1,
+            'use_label_encoder': False, 'max_depth': 4, 'tree_method': 'exact'
+        })
+
+        assert rounds == 150
+        assert params == {'seed': 42, 'max_depth': 4, 'tree_method': 'hist', 'objective': 'binary:logistic'}
+
+    def test_positive_n_jobs(self):
+        params, _ = native_params({'n_jobs': 4})
+        assert params['nthread'] == 4
+
+
+class TestRefitReason:
+    """Decisão incremental vs refit completo"""
+
+    def test_incremental_when_stable(self):
+        """Mesma distribuição e AUC mantida: atualização incremental"""
+        trainer = trainer_with_state()
+        X, y = informative_samples(200)
+        X[:, 0] += 0.5
+        trainer.states['m'].reference_mean = X.mean(axis=0)
+
+        assert trainer.refit_reason('m', FixedModel(), X, y) is None
+
+    def test_no_model(self):
+        trainer = IncrementalBoostingTrainer()
+        X, y = informative_samples(50)
+
+        assert trainer.refit_reason('m', FixedModel(), X, y) == 'no_model'
+        assert trainer_with_state().refit_reason('m', None, X, y) == 'no_model'
+
+    def test_features_changed(self):
+        trainer = trainer_with_state()
+
+        assert trainer.refit_reason('m', FixedModel(), np.zeros((50, 4)), np.zeros(50)) == 'features_changed'
+
+    def test_schedule_and_age(self):
+        """Refit após full_refit_every updates ou full_refit_days dias"""
+        X, y = informative_samples(50)
+
+        trainer = trainer_with_state(full_refit_every=3)
+        trainer.states['m'].updates_since_full = 3
+        assert trainer.refit_reason('m', FixedModel(), X, y) == 'schedule'
+
+        trainer = trainer_with_state(full_refit_days=7)
+        trainer.states['m'].last_full_fit = datetime.now() - timedelta(days=8)
+        assert trainer.refit_reason('m', FixedModel(), X, y) == 'age'
+
+    def test_feature_drift(self):
+        """Média das amostras novas deslocada além do limite"""
+        trainer = trainer_with_state(drift_feature_shift=1.0)
+        X, y = informative_samples(200, shift=2.0)
+
+        assert trainer.refit_reason('m', FixedModel(), X, y) == 'feature_drift'
+
+    def test_constant_column_small_change_is_not_drift(self):
+        """Coluna constante no treino (std 0) com variação mínima: sem refit"""
+        trainer = trainer_with_state()
+        X, y = informative_samples(200)
+        X[:, 0] += 0.5
+        X[:, 2] = 1.0 + np.random.default_rng(1).standard_normal(200) * 1e-4
+        state = trainer.states['m']
+        state.reference_mean = X.mean(axis=0)
+        state.reference_mean[2] = 1.0
+        state.reference_std = np.array([1.0, 1.0, 0.0])
+
+        assert trainer.refit_reason('m', FixedModel(), X, y) is None
+
+        # Mudança real na coluna ainda é drift
+        X[:, 2] = 2.0
+        assert trainer.refit_reason('m', FixedModel(), X, y) == 'feature_drift'
+
+    def test_auc_drift(self):
+        """Modelo atual perde AUC nas amostras novas"""
+        trainer = trainer_with_state(drift_auc_drop=0.05, drift_feature_shift=10)
+        X, y = informative_samples(200)
+        X[:, 0] = 1 - (X[:, 0] + 0.5)  # relação invertida
+
+        assert trainer.refit_reason('m', FixedModel(), X, y) == 'auc_drift'
+
+    def test_few_samples_skip_drift_checks(self):
+        """Poucas amostras novas: sem teste de drift"""
+        trainer = trainer_with_state(min_drift_samples=30)
+        X, y = informative_samples(10, shift=5.0)
+
+        assert trainer.refit_reason('m', FixedModel(), X, y) is None
+
+
+class TestIncrementalTraining:
+    """Treino real (requer xgboost)"""
+
+    def test_update_adds_trees(self):
+        """Update continua o booster do refit com incremental_rounds árvores"""
+        pytest.importorskip('xgboost')
+        rng = np.random.default_rng(0)
+        X = rng.standard_normal((1200, 5)).astype(np.float32)
+        y = (X[:, 0] + rng.standard_normal(1200) * 0.5 > 0).astype(int)
+        trainer = IncrementalBoostingTrainer({'incremental_rounds': 7})
+        params = {'n_estimators': 30, 'max_depth': 3, 'verbosity': 0}
+
+        model, state = trainer.refit('m', params, X[:800], y[:800], X[800:1000], y[800:1000], trained_rows=1000)
+        assert model.n_trees == 30
+        assert state.reference_auc > 0.8
+
+        model, state = trainer.update('m', params, model, X[1000:], y[1000:], trained_rows=1200)
+        assert model.n_trees == 37
+        assert state.updates_since_full == 1
+        assert model.predict_proba(X[:5]).shape == (5, 2)
+        assert model.feature_importances_.argmax() == 0
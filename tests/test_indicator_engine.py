@@ -0,0 +1,148 @@
+"""
+Testes para o Motor de Indicadores Incremental
+Compara o modo streaming com o recálculo completo da biblioteca 'ta'
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+ta = pytest.importorskip('ta')
+from ta.trend import EMAIndicator, SMAIndicator, MACD, ADXIndicator
+from ta.momentum import RSIIndicator, StochasticOscillator
+from ta.volatility import BollingerBands, AverageTrueRange
+
+from analysis.indicator_engine import IndicatorEngine, compare_indicator_results
+
+
+EMA_PERIODS = [9, 21, 50, 200]
+SMA_PERIODS = [20, 50, 100, 200]
+
+
+@pytest.fixture
+def ohlc():
+    """Série OHLC sintética de 900 barras M5"""
+    rng = np.random.default_rng(42)
+    n = 900
+    close = 2000 + np.cumsum(rng.normal(0, 2, n))
+    open_ = close + rng.normal(0, 1, n)
+    high = np.maximum(open_, close) + rng.random(n) * 2
+    low = np.minimum(open_, close) - rng.random(n) * 2
+    index = pd.date_range('2024-01-01', periods=n, freq='5min')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close}, index=index)
+
+
+def batch_indicators(df):
+    """Recálculo completo (mesmo caminho do TechnicalAnalyzer em modo batch)"""
+    macd = MACD(close=df['Close'])
+    bb = BollingerBands(close=df['Close'], window=20, window_dev=2.0)
+    adx = ADXIndicator(high=df['High'], low=df['Low'], close=df['Close'], window=14)
+    stoch = StochasticOscillator(high=df['High'], low=df['Low'], close=df['Close'],
+                                 window=14, smooth_window=3)
+    return {
+        'ema': {f'ema_{p}': float(EMAIndicator(df['Close'], p).ema_indicator().iloc[-1])
+                for p in EMA_PERIODS if len(df) >= p},
+        'sma': {f'sma_{p}': float(SMAIndicator(df['Close'], p).sma_indicator().iloc[-1])
+                for p in SMA_PERIODS if len(df) >= p},
+        'rsi': float(RSIIndicator(df['Close'], 14).rsi().iloc[-1]),
+        'macd': {
+            'macd': float(macd.macd().iloc[-1]),
+            'signal': float(macd.macd_signal().iloc[-1]),
+            'histogram': float(macd.macd_diff().iloc[-1])
+        },
+        'bollinger': {
+            'upper': float(bb.bollinger_hband().iloc[-1]),
+            'middle': float(bb.bollinger_mavg().iloc[-1]),
+            'lower': float(bb.bollinger_lband().iloc[-1])
+        },
+        'atr': float(AverageTrueRange(df['High'], df['Low'], df['Close'], 14).average_true_range().iloc[-1]),
+        'adx': {
+            'adx': float(adx.adx().iloc[-1]),
+            'di_plus': float(adx.adx_pos().iloc[-1]),
+            'di_minus': float(adx.adx_neg().iloc[-1])
+        },
+        'stochastic': {
+            'k': float(stoch.stoch().iloc[-1]),
+            'd': float(stoch.stoch_signal().iloc[-1])
+        }
+    }
+
+
+class TestIndicatorEngine:
+    """Testes para IndicatorEngine"""
+
+    def test_first_update_matches_batch(self, ohlc):
+        """Primeira chamada (aquecimento) reproduz exatamente o recálculo completo"""
+        engine = IndicatorEngine(EMA_PERIODS, SMA_PERIODS)
+        df = ohlc.iloc[:500]
+
+        result = engine.update(('XAUUSD', 'M5'), df)
+
+        assert compare_indicator_results(batch_indicators(df), result, rel_tol=1e-9) == {}
+
+    def test_short_history(self, ohlc):
+        """Com poucas barras, apenas as médias disponíveis são publicadas"""
+        engine = IndicatorEngine(EMA_PERIODS, SMA_PERIODS)
+        df = ohlc.iloc[:60]
+
+        result = engine.update(('XAUUSD', 'M5'), df)
+
+        assert set(result['ema']) == {'ema_9', 'ema_21', 'ema_50'}
+        assert set(result['sma']) == {'sma_20', 'sma_50'}
+        assert compare_indicator_results(batch_indicators(df), result, rel_tol=1e-9) == {}
+
+    def test_sliding_window_stays_within_tolerance(self, ohlc):
+        """Janela deslizante: streaming acompanha o batch dentro da tolerância"""
+        engine = IndicatorEngine(EMA_PERIODS, SMA_PERIODS)
+
+        for end in range(500, 900, 37):
+            df = ohlc.iloc[end - 500:end]
+            result = engine.update(('XAUUSD', 'M5'), df)
+            assert compare_indicator_results(batch_indicators(df), result) == {}
+
+    def test_only_new_bars_are_pushed(self, ohlc):
+        """Barras já consumidas não são reprocessadas"""
+        engine = IndicatorEngine(EMA_PERIODS, SMA_PERIODS)
+
+        engine.update('k', ohlc.iloc[:500])
+        engine.update('k', ohlc.iloc[:500])
+        engine.update('k', ohlc.iloc[2:502])
+
+        stats = engine.get_stats()
+        assert stats['bars_pushed'] == 499 + 2
+        assert stats['rebuilds'] == 0
+
+    def test_gap_triggers_rebuild(self, ohlc):
+        """Gap maior que a janela reconstrói o estado"""
+        engine = IndicatorEngine(EMA_PERIODS, SMA_PERIODS)
+
+        engine.update('k', ohlc.iloc[:200])
+        df = ohlc.iloc[400:900]
+        result = engine.update('k', df)
+
+        assert engine.get_stats()['rebuilds'] == 1
+        assert compare_indicator_results(batch_indicators(df), result, rel_tol=1e-9) == {}
+
+    def test_streams_are_independent(self, ohlc):
+        """Cada (símbolo, timeframe) mantém estado próprio"""
+        engine = IndicatorEngine(EMA_PERIODS, SMA_PERIODS)
+
+        a = engine.update(('XAUUSD', 'M5'), ohlc.iloc[:500])
+        engine.update(('EURUSD', 'M5'), ohlc.iloc[300:800])
+        b = engine.update(('XAUUSD', 'M5'), ohlc.iloc[:500])
+
+        assert a == b
+        assert engine.get_stats()['streams'] == 2
+
+
+def test_compare_indicator_results_reports_mismatch():
+    """compare_indicator_results aponta o caminho divergente"""
+    ref = {'rsi': 50.0, 'macd': {'macd': 1.0, 'signal': float('nan')}}
+    cand = {'rsi': 50.0, 'macd': {'macd': 1.5, 'signal': float('nan')}}
+
+    assert compare_indicator_results(ref, cand) == {'macd.macd': (1.0, 1.5)}
@@ -0,0 +1,308 @@
+"""
+Testes para o ModelInferenceOrchestrator
+Inferência concorrente com prazo por modelo e memo por barra
+"""
+
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.inference_orchestrator import ModelInferenceOrchestrator
+from tests.fakes.market_data import make_ohlcv
+
+
+class CountingModel:
+    def __init__(self, delay: float = 0.0, result='ok'):
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def predict(self, *args):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return (self.result, args)
+
+
+@pytest.fixture
+def orchestrator():
+    orch = ModelInferenceOrchestrator(max_workers=3, default_deadline=2.0)
+    yield orch
+    orch.shutdown(wait=True)
+
+
+class TestModelInferenceOrchestrator:
+    """Testes para ModelInferenceOrchestrator"""
+
+    def test_memo_hit(self, orchestrator):
+        """Mesma (modelo, barra) não executa de novo"""
+        model = CountingModel()
+
+        async def scenario():
+            first = await orchestrator.run('xgboost', 'bar', model.predict, 1)
+            second = await orchestrator.run('xgboost', 'bar', model.predict, 1)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert first == second == ('ok', (1,))
+        assert model.calls == 1
+        stats = orchestrator.get_stats()
+        assert stats['memo_hits'] == 1
+        assert stats['memo_hit_rate'] == pytest.approx(0.5)
+        assert stats['models']['xgboost']['count'] == 1
+
+    def test_concurrent_same_key_shares_execution(self, orchestrator):
+        """Pipeline e ensemble pedindo a mesma previsão ao mesmo tempo: uma execução"""
+        model = CountingModel(delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(
+                orchestrator.run('lstm', 'bar', model.predict),
+                orchestrator.run('lstm', 'bar', model.predict)
+            )
+
+        results = asyncio.run(scenario())
+
+        assert results[0] == results[1]
+        assert model.calls == 1
+        assert orchestrator.get_stats()['shared_inflight'] == 1
+
+    def test_models_run_concurrently(self, orchestrator):
+        """Tempo total ~ modelo mais lento, não a soma"""
+        models = [CountingModel(delay=0.2) for _ in range(3)]
+
+        async def scenario():
+            return await asyncio.gather(*(
+                orchestrator.run(name, 'bar', model.predict)
+                for name, model in zip(('xgboost', 'lstm', 'rl_agent'), models)
+            ))
+
+        start = time.perf_counter()
+        asyncio.run(scenario())
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.45
+        assert all(model.calls == 1 for model in models)
+
+    def test_deadline_then_memo(self, orchestrator):
+        """Prazo vencido levanta TimeoutError; resultado tardio alimenta o memo"""
+        model = CountingModel(delay=0.2)
+
+        async def scenario():
+            with pytest.raises(TimeoutError):
+                await orchestrator.run('lstm', 'bar', model.predict, deadline=0.01)
+            await asyncio.sleep(0.3)
+            return await orchestrator.run('lstm', 'bar', model.predict, deadline=0.01)
+
+        assert asyncio.run(scenario()) == ('ok', ())
+        assert model.calls == 1
+        assert orchestrator.get_stats()['timeouts'] == 1
+
+    def test_shared_call_keeps_first_deadline(self, orchestrator):
+        """Chamadas seguidas numa chave travada: um prazo no total, não um por chamada"""
+        model = CountingModel(delay=1.0)
+
+        async def scenario():
+            for _ in range(3):
+                with pytest.raises(TimeoutError):
+                    await orchestrator.run('xgboost', 'bar', model.predict, deadline=0.2)
+
+        start = time.perf_counter()
+        asyncio.run(scenario())
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.35
+        assert model.calls == 1
+        stats = orchestrator.get_stats()
+        assert stats['timeouts'] == 1
+        assert stats['expired_inflight'] == 2
+
+    def test_per_model_deadline(self):
+        """Prazo configurado por modelo"""
+        orch = ModelInferenceOrchestrator(deadlines={'lstm': 0.01}, default_deadline=2.0)
+        model = CountingModel(delay=0.1)
+
+        async def scenario():
+            await orch.run('xgboost', 'bar', model.predict)
+            with pytest.raises(TimeoutError):
+                await orch.run('lstm', 'bar', model.predict)
+
+        asyncio.run(scenario())
+        orch.shutdown(wait=True)
+
+    def test_coroutine_function(self, orchestrator):
+        """Previsões async (interface dos modelos) rodam no worker"""
+        async def predict(value):
+            await asyncio.sleep(0)
+            return value * 2
+
+        assert asyncio.run(orchestrator.run('rl_agent', 'bar', predict, 21)) == 42
+
+    def test_exception_not_memoized(self, orchestrator):
+        """Erro do modelo propaga e não entra no memo"""
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise ValueError('modelo quebrado')
+
+        async def scenario():
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await orchestrator.run('xgboost', 'bar', broken)
+
+        asyncio.run(scenario())
+
+        assert len(calls) == 2
+        assert orchestrator.get_stats()['errors'] == 2
+
+    def test_invalidate_per_model(self, orchestrator):
+        """Retreino descarta só o memo do modelo"""
+        xgb, lstm = CountingModel(), CountingModel()
+
+        async def scenario():
+            await orchestrator.run('xgboost', 'bar', xgb.predict)
+            await orchestrator.run('lstm', 'bar', lstm.predict)
+            orchestrator.invalidate('xgboost')
+            await orchestrator.run('xgboost', 'bar', xgb.predict)
+            await orchestrator.run('lstm', 'bar', lstm.predict)
+
+        asyncio.run(scenario())
+
+        assert xgb.calls == 2
+        assert lstm.calls == 1
+
+    def test_invalidate_during_call_discards_stale_result(self, orchestrator):
+        """Chamada iniciada antes do retreino não alimenta o memo nem é compartilhada"""
+        old, new = CountingModel(delay=0.1, result='old'), CountingModel(result='new')
+
+        async def scenario():
+            pending = asyncio.ensure_future(orchestrator.run('xgboost', 'bar', old.predict))
+            await asyncio.sleep(0.02)
+            orchestrator.invalidate('xgboost')
+            after = await orchestrator.run('xgboost', 'bar', new.predict)
+            before = await pending
+            await asyncio.sleep(0.05)
+            again = await orchestrator.run('xgboost', 'bar', new.predict)
+            return before, after, again
+
+        before, after, again = asyncio.run(scenario())
+
+        assert before == ('old', ())
+        assert after == again == ('new', ())
+        assert new.calls == 1
+        assert orchestrator.get_stats()['stale_discarded'] == 1
+
+    def test_invalidate_all_discards_inflight(self, orchestrator):
+        """invalidate() sem modelo também descarta chamadas em andamento"""
+        model = CountingModel(delay=0.1)
+
+        async def scenario():
+            pending = asyncio.ensure_future(orchestrator.run('lstm', 'bar', model.predict))
+            await asyncio.sleep(0.02)
+            orchestrator.invalidate()
+            await pending
+
+        asyncio.run(scenario())
+
+        stats = orchestrator.get_stats()
+        assert stats['memo_entries'] == 0
+        assert stats['stale_discarded'] == 1
+
+    def test_row_key_separates_feature_vectors(self, orchestrator):
+        """Mesma barra com features diferentes não reutiliza a previsão"""
+        model = CountingModel()
+        rows = [np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 3.5])]
+
+        async def scenario():
+            return [
+                await orchestrator.run('xgboost', ('bar', 'trend', ModelInferenceOrchestrator.row_key(row)),
+                                       model.predict, float(row.sum()))
+                for row in rows + [rows[0].copy()]
+            ]
+
+        results = asyncio.run(scenario())
+
+        assert [r[1] for r in results] == [(6.0,), (6.5,), (6.0,)]
+        assert model.calls == 2
+        assert ModelInferenceOrchestrator.row_key([1, 2, 3]) == ModelInferenceOrchestrator.row_key(rows[0])
+
+    def test_bar_key_changes_with_tick(self):
+        """Tick novo na barra em formação muda a chave"""
+        df = make_ohlcv(n=50)
+        ticked = df.copy()
+        ticked.iloc[-1, ticked.columns.get_loc('close')] += 1.0
+
+        key = ModelInferenceOrchestrator.bar_key('XAUUSD', df)
+
+        assert key == ModelInferenceOrchestrator.bar_key('XAUUSD', df.copy())
+        assert key != ModelInferenceOrchestrator.bar_key('XAUUSD', ticked)
+        assert key != ModelInferenceOrchestrator.bar_key('EURUSD', df)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    from ml.ml_integration import MLIntegrationManager
+
+    config = {
+        'xgboost_predictor': {'data_dir': str(tmp_path / 'xgb')},
+        'macro_context': {'enabled': False},
+        'ml_inference': {'deadlines': {'xgboost': 0.5}},
+        'elite': {
+            'lstm': {'data_dir': str(tmp_path / 'lstm')},
+            'rl_agent': {'data_dir': str(tmp_path / 'rl')}
+        }
+    }
+    manager = MLIntegrationManager(config, elite_mode=True)
+    yield manager
+    manager.inference.shutdown(wait=False)
+
+
+class TestEnhanceSignalInference:
+    """Orquestrador usado pelo pipeline (pré-busca, etapas e votos do ensemble)"""
+
+    def test_stuck_model_costs_one_deadline(self, manager):
+        """XGBoost travado: pré-busca, etapa e voto somam um prazo, não três"""
+        def stuck(*args):
+            time.sleep(3.0)
+
+        manager.xgb_predictor.predict = stuck
+
+        start = time.perf_counter()
+        asyncio.run(manager.enhance_signal('XAUUSD', 'trend', 'buy', 0.7, make_ohlcv(n=300)))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 1.0
+        stats = manager.inference.get_stats()
+        assert stats['timeouts'] == 1
+
+    def test_rl_key_follows_position_and_balance(self, manager):
+        """Fill na mesma barra ou saldo diferente: nova decisão do agente RL"""
+        pytest.importorskip('tensorflow')
+        from ml.ml_integration import SignalEnhancement
+        from ml.rl_agent import Position
+
+        df = make_ohlcv(n=300)
+        enhancement = SignalEnhancement('XAUUSD', 'trend', 'buy', 0.7, account_balance=25000)
+        asyncio.run(manager._generate_features(enhancement, df))
+
+        key, _, args = manager._model_call('rl_agent', enhancement, df)
+        assert args[-1] == 25000
+
+        manager.rl_agent._position['XAUUSD'] = Position.LONG
+        manager.rl_agent._entry_price['XAUUSD'] = float(df['close'].iat[-1])
+        filled_key = manager._model_call('rl_agent', enhancement, df)[0]
+
+        enhancement.account_balance = 30000
+        funded_key = manager._model_call('rl_agent', enhancement, df)[0]
+
+        assert len({key, filled_key, funded_key}) == 3
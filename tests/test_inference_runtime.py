@@ -0,0 +1,159 @@
+"""
+Testes para o inference_runtime
+Inferência de uma amostra com buffer pré-alocado e backends com fallback
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.inference_runtime import KerasInferenceRuntime, TENSORFLOW_AVAILABLE, benchmark_latency
+
+
+class FakeKerasModel:
+    """Modelo com duas saídas: soma por amostra e média por amostra"""
+
+    def __init__(self):
+        self.inputs_seen = []
+
+    def __call__(self, x, training=False):
+        assert training is False
+        self.inputs_seen.append(x)
+        flat = x.reshape(len(x), -1)
+        return [flat.sum(axis=1, keepdims=True), flat.mean(axis=1, keepdims=True)]
+
+
+class TestKerasInferenceRuntime:
+    """Testes para KerasInferenceRuntime"""
+
+    def test_outputs_match_model(self):
+        """Lista de saídas com batch 1, como model.predict multi-saída"""
+        model = FakeKerasModel()
+        runtime = KerasInferenceRuntime(model, (4, 3), backend='eager')
+        sample = np.arange(12, dtype=np.float64).reshape(4, 3)
+
+        outputs = runtime.predict(sample)
+
+        assert len(outputs) == 2
+        assert outputs[0].shape == (1, 1)
+        assert outputs[0][0][0] == pytest.approx(66.0)
+        assert outputs[1][0][0] == pytest.approx(5.5)
+
+    def test_buffer_is_reused(self):
+        """Cada amostra é copiada para o mesmo buffer float32"""
+        model = FakeKerasModel()
+        runtime = KerasInferenceRuntime(model, (5,), backend='eager')
+
+        runtime.predict(np.ones(5))
+        runtime.predict(np.full(5, 2.0))
+
+        first, second = model.inputs_seen
+        assert first is second
+        assert first.dtype == np.float32
+        assert first.shape == (1, 5)
+        assert np.all(second == 2.0)
+
+    def test_flat_sample_reshaped(self):
+        """Amostra achatada é aceita se o tamanho bate"""
+        runtime = KerasInferenceRuntime(FakeKerasModel(), (2, 3), backend='eager')
+
+        assert runtime.predict(np.ones(6))[0][0][0] == pytest.approx(6.0)
+        with pytest.raises(ValueError):
+            runtime.predict(np.ones(5))
+
+    def test_predict_batch(self):
+        """Batch (treino do RL) não passa pelo buffer de uma amostra"""
+        runtime = KerasInferenceRuntime(FakeKerasModel(), (3,), backend='eager')
+        batch = np.arange(12).reshape(4, 3)
+
+        sums = runtime.predict_batch(batch)[0]
+
+        assert sums[:, 0].tolist() == [3, 12, 21, 30]
+        assert runtime.get_stats()['batch_calls'] == 1
+
+    @pytest.mark.skipif(TENSORFLOW_AVAILABLE, reason='fallback só ocorre sem TensorFlow')
+    def test_falls_back_to_eager_without_tensorflow(self):
+        """Backend pedido indisponível cai para o próximo que funciona"""
+        runtime = KerasInferenceRuntime(FakeKerasModel(), (3,), backend='tflite')
+
+        assert runtime.backend == 'eager'
+        assert runtime.get_stats()['fallbacks'] == 2
+
+    def test_invalid_backend(self):
+        """Backend desconhecido é erro de configuração"""
+        with pytest.raises(ValueError):
+            KerasInferenceRuntime(FakeKerasModel(), (3,), backend='tensorrt')
+
+    def test_latency_stats(self):
+        """Latência registrada por chamada"""
+        runtime = KerasInferenceRuntime(FakeKerasModel(), (3,), backend='eager', name='lstm_XAUUSD')
+        for _ in range(10):
+            runtime.predict(np.zeros(3))
+
+        stats = runtime.get_stats()
+        assert stats['name'] == 'lstm_XAUUSD'
+        assert stats['calls'] == 10
+        assert stats['latency']['count'] == 10
+
+    def test_compiled_matches_predict(self):
+        """tf.function retorna o mesmo que model.predict"""
+        tf = pytest.importorskip('tensorflow')
+        inputs = tf.keras.Input(shape=(6,))
+        hidden = tf.keras.layers.Dense(8, activation='relu')(inputs)
+        model = tf.keras.Model(inputs, [tf.keras.layers.Dense(3)(hidden), tf.keras.layers.Dense(1)(hidden)])
+        sample = np.random.default_rng(0).standard_normal(6).astype(np.float32)
+
+        runtime = KerasInferenceRuntime(model, (6,), backend='compiled')
+        expected = model.predict(sample[None], verbose=0)
+
+        assert runtime.backend == 'compiled'
+        for got, want in zip(runtime.predict(sample), expected):
+            np.testing.assert_allclose(got, want, rtol=1e-5, atol=1e-6)
+
+
+class TestTorchInferenceRuntime:
+    """Testes para TorchInferenceRuntime"""
+
+    def test_torchscript_matches_eager(self):
+        """Trace congelado retorna o mesmo que o módulo original"""
+        torch = pytest.importorskip('torch')
+        from ml.inference_runtime import TorchInferenceRuntime
+
+        class Model(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.linear = torch.nn.Linear(5, 3)
+
+            def forward(self, x, bias):
+                out = self.linear(x + bias)[:, -1, :]
+                return {'logits': out, 'scale': torch.abs(out)}
+
+        model = Model()
+        bias = torch.randn(10, 5)
+        sample = np.random.default_rng(0).standard_normal((10, 5)).astype(np.float32)
+
+        runtime = TorchInferenceRuntime(model, (10, 5), constants=(bias,), backend='torchscript')
+        with torch.no_grad():
+            expected = model(torch.from_numpy(sample)[None], bias)
+
+        outputs = runtime.predict(sample)
+        assert runtime.backend == 'torchscript'
+        np.testing.assert_allclose(outputs['logits'], expected['logits'].numpy(), rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(outputs['scale'], expected['scale'].numpy(), rtol=1e-5, atol=1e-6)
+
+
+class TestBenchmarkLatency:
+    """Testes para benchmark_latency"""
+
+    def test_percentiles(self):
+        """Percentis ordenados e número de chamadas (aquecimento incluso)"""
+        calls = []
+        result = benchmark_latency(lambda: calls.append(1), iterations=50, warmup=5)
+
+        assert len(calls) == 55
+        assert result['iterations'] == 50
+        assert 0 <= result['min_ms'] <= result['p50_ms'] <= result['p99_ms'] <= result['max_ms']
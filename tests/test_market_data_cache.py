@@ -0,0 +1,140 @@
+"""
+Testes para o MarketDataCache
+Cobertura: lock por chave, expiração por barra, orçamento em bytes, views somente leitura
+"""
+
+import threading
+import time
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analysis.market_data_cache import MarketDataCache, next_bar_due
+
+
+BAR_START = 1_700_000_100.0  # múltiplo de 300s (início de barra M5)
+
+
+class FakeClock:
+    """Relógio controlável"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLoader:
+    """Loader que conta as chamadas a get_rates"""
+
+    def __init__(self, bars=500, delay=0.0):
+        self.calls = 0
+        self.bars = bars
+        self.delay = delay
+        self.last_bar = pd.Timestamp('2024-01-01')
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        index = pd.date_range(end=self.last_bar, periods=self.bars, freq='5min')
+        return pd.DataFrame({
+            'Open': np.linspace(1, 2, self.bars),
+            'Close': np.linspace(1, 2, self.bars),
+            'Volume': np.arange(self.bars)
+        }, index=index)
+
+
+class TestMarketDataCache:
+    """Testes para MarketDataCache"""
+
+    def test_concurrent_requests_load_once(self):
+        """Várias threads pedindo a mesma chave geram uma única chamada get_rates"""
+        cache = MarketDataCache(clock=FakeClock(BAR_START + 10))
+        loader = CountingLoader(delay=0.05)
+
+        threads = [threading.Thread(target=cache.get_or_load, args=(('XAUUSD', 'M5', 500), 'M5', loader))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert loader.calls == 1
+        assert cache.get_stats()['hits'] == 7
+
+    def test_expires_on_next_bar(self):
+        """Cache vale até a próxima barra do timeframe"""
+        clock = FakeClock(BAR_START + 10)
+        cache = MarketDataCache(clock=clock)
+        loader = CountingLoader()
+
+        cache.get_or_load('k', 'M5', loader)
+        clock.now = BAR_START + 299
+        cache.get_or_load('k', 'M5', loader)
+        assert loader.calls == 1
+
+        loader.last_bar += pd.Timedelta(minutes=5)
+        clock.now = BAR_START + 301
+        cache.get_or_load('k', 'M5', loader)
+        assert loader.calls == 2
+
+    def test_retries_when_new_bar_not_published(self):
+        """Se a barra nova ainda não apareceu, tenta de novo em poucos segundos"""
+        clock = FakeClock(BAR_START + 10)
+        cache = MarketDataCache(retry_seconds=5, clock=clock)
+        loader = CountingLoader()
+
+        cache.get_or_load('k', 'M5', loader)
+        clock.now = BAR_START + 300.5
+        cache.get_or_load('k', 'M5', loader)
+        assert cache.get_stats()['stale_retries'] == 1
+
+        clock.now += 6
+        cache.get_or_load('k', 'M5', loader)
+        assert loader.calls == 3
+
+    def test_byte_budget_evicts_lru(self):
+        """Orçamento em bytes remove as entradas menos usadas"""
+        loader = CountingLoader()
+        entry_bytes = int(loader().memory_usage(index=True).sum())
+        cache = MarketDataCache(max_bytes=int(entry_bytes * 2.5), clock=FakeClock(BAR_START))
+
+        cache.get_or_load('a', 'M5', loader)
+        cache.get_or_load('b', 'M5', loader)
+        cache.get_or_load('a', 'M5', loader)  # 'a' passa a ser a mais recente
+        cache.get_or_load('c', 'M5', loader)
+
+        stats = cache.get_stats()
+        assert stats['entries'] == 2
+        assert stats['bytes'] <= stats['max_bytes']
+        calls = loader.calls
+        cache.get_or_load('a', 'M5', loader)
+        assert loader.calls == calls
+
+    def test_returns_read_only_views(self):
+        """Alterações do chamador não contaminam o cache"""
+        cache = MarketDataCache(clock=FakeClock(BAR_START))
+        loader = CountingLoader()
+
+        df = cache.get_or_load('k', 'M5', loader)
+        df['extra'] = 1
+        try:
+            df.iloc[0, 0] = 999.0
+        except ValueError:
+            pass  # pandas sem copy-on-write: escrita bloqueada
+
+        cached = cache.get_or_load('k', 'M5', loader)
+        assert 'extra' not in cached.columns
+        assert cached.iloc[0, 0] == 1.0
+
+
+def test_next_bar_due_caps_boundary_at_one_hour():
+    """H4/D1 usam fronteiras de hora cheia (offset do servidor MT5)"""
+    assert next_bar_due('M5', BAR_START + 1) == BAR_START + 300
+    assert next_bar_due('H4', 7200.5) == 10800
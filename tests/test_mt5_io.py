@@ -0,0 +1,131 @@
+"""
+Testes para o MT5IOWorker
+Thread única e persistente para chamadas MT5, com prazos e histogramas de latência
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.mt5_io import MT5IOWorker, LatencyHistogram
+from core.retry_handler import MT5TimeoutError
+from tests.fakes.fake_mt5 import FakeMT5
+
+
+@pytest.fixture
+def worker():
+    w = MT5IOWorker(default_timeout=2.0)
+    yield w
+    w.shutdown()
+
+
+class TestMT5IOWorker:
+    """Testes para MT5IOWorker"""
+
+    def test_calls_run_on_single_persistent_thread(self, worker):
+        """Chamadas de várias threads rodam serializadas numa única thread"""
+        idents = []
+        active = []
+        overlap = []
+
+        def probe():
+            active.append(1)
+            overlap.append(len(active))
+            idents.append(threading.get_ident())
+            time.sleep(0.001)
+            active.pop()
+
+        threads_before = threading.active_count()
+        callers = [
+            threading.Thread(target=lambda: [worker.call(probe) for _ in range(10)])
+            for _ in range(8)
+        ]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+
+        assert len(idents) == 80
+        assert len(set(idents)) == 1
+        assert max(overlap) == 1
+        # Apenas a thread do worker foi criada
+        assert threading.active_count() <= threads_before + 1
+
+    def test_exceptions_propagate(self, worker):
+        """Exceções da função chegam a quem chamou e contam como erro"""
+        def boom():
+            raise ValueError('falhou')
+
+        with pytest.raises(ValueError):
+            worker.call(boom)
+        assert worker.get_stats()['functions']['boom']['errors'] == 1
+
+    def test_queued_request_cancelled_after_deadline(self, worker):
+        """Chamada que vence o prazo na fila nunca é executada"""
+        release = threading.Event()
+        executed = []
+
+        blocker = threading.Thread(target=lambda: worker.call(release.wait, (5,), timeout=5))
+        blocker.start()
+        time.sleep(0.05)
+
+        with pytest.raises(MT5TimeoutError):
+            worker.call(lambda: executed.append(1), timeout=0.05, label='late')
+
+        release.set()
+        blocker.join()
+        assert worker.call(lambda: 'ok') == 'ok'
+        assert executed == []
+
+        stats = worker.get_stats()
+        assert stats['functions']['late']['cancelled'] == 1
+        assert stats['functions']['late']['timeouts'] == 1
+
+    def test_hung_call_replaces_worker(self, worker):
+        """Chamada travada: quem chamou recebe timeout e o worker é substituído"""
+        release = threading.Event()
+
+        with pytest.raises(MT5TimeoutError):
+            worker.call(release.wait, (5,), timeout=0.05, label='hang')
+
+        assert worker.call(lambda: 42, timeout=1.0) == 42
+        assert worker.get_stats()['workers_replaced'] == 1
+        release.set()
+
+    def test_reentrant_call_runs_inline(self, worker):
+        """Chamada feita dentro do worker não espera pela própria fila"""
+        result = worker.call(lambda: worker.call(lambda: 'inner', timeout=0.1))
+
+        assert result == 'inner'
+        assert worker.get_stats()['inline'] == 1
+
+    def test_proxy_routes_functions_and_keeps_constants(self, worker):
+        """Proxy executa funções no worker e lê constantes direto do módulo"""
+        fake = FakeMT5(history_minutes=60 * 24)
+        proxy = worker.proxy(fake)
+
+        assert proxy.TIMEFRAME_M5 == fake.TIMEFRAME_M5
+        rates = proxy.copy_rates_from_pos('XAUUSD', proxy.TIMEFRAME_M1, 0, 10)
+
+        assert len(rates) == 10
+        assert worker.get_stats()['functions']['copy_rates_from_pos']['count'] == 1
+
+
+def test_latency_histogram_percentiles():
+    """Percentis aproximados pelo limite superior do bucket"""
+    hist = LatencyHistogram()
+    for _ in range(98):
+        hist.add(0.8)
+    hist.add(30.0)
+    hist.add(30.0)
+
+    stats = hist.as_dict()
+    assert stats['count'] == 100
+    assert stats['p50_ms'] == 1
+    assert stats['p99_ms'] == 50
+    assert stats['max_ms'] == 30.0
@@ -0,0 +1,122 @@
+"""
+Testes para o StrategyOptimizer
+Checkpoints de equity para o pruner e trials em processos
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+optuna = pytest.importorskip('optuna')
+
+from backtesting.engine import BaseStrategy
+from backtesting.optimizer import StrategyOptimizer
+from tests.fakes.market_data import make_bars
+
+
+PARAM_SPACE = {'lookback': (2, 40), 'threshold': (0.0, 0.004)}
+
+
+class MomentumStrategy(BaseStrategy):
+    """Momentum simples (classe de módulo: picklável para os workers)"""
+
+    def __init__(self, lookback=10, threshold=0.001):
+        super().__init__("Momentum")
+        self.lookback = lookback
+        self.threshold = threshold
+        self._momentum = None
+
+    def on_bar(self, data, index):
+        if self._momentum is None:
+            self._momentum = data['close'].pct_change(self.lookback).to_numpy()
+
+    def should_enter(self, data, index):
+        momentum = self._momentum[index]
+        if not abs(momentum) > self.threshold:
+            return None
+        side = 1 if momentum > 0 else -1
+        price = data['close'].iat[index]
+        return {
+            'type': 'BUY' if side > 0 else 'SELL',
+            'sl': price - side * 0.0015,
+            'tp': price + side * 0.0025,
+        }
+
+    def should_exit(self, position, data, index):
+        return False
+
+
+def make_optimizer(data=None, **kwargs):
+    return StrategyOptimizer(MomentumStrategy, PARAM_SPACE, make_bars(1500) if data is None else data,
+                             metric='pnl', **kwargs)
+
+
+class TestCheckpointPruning:
+    """Equity intermediária chega ao pruner"""
+
+    def test_trials_report_equity(self):
+        optimizer = make_optimizer()
+        optimizer.optimize(n_trials=6, n_jobs=1, pruner='median', checkpoints=5,
+                           show_progress_bar=False, seed=0)
+
+        for trial in optimizer._study.trials:
+            assert set(trial.intermediate_values) <= {1, 2, 3, 4, 5}
+            assert trial.intermediate_values
+        complete = [t for t in optimizer._study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+        final = complete[0].intermediate_values[5]
+        assert final == pytest.approx(complete[0].user_attrs['total_pnl'] / 10000, abs=0.05)
+
+    def test_hyperband_prunes_bad_trials(self):
+        optimizer = make_optimizer()
+        result = optimizer.optimize(n_trials=40, n_jobs=1, checkpoints=10,
+                                    show_progress_bar=False, seed=0)
+
+        states = [t['state'] for t in result.all_trials]
+        assert 'PRUNED' in states
+        assert result.n_trials == 40
+
+    def test_without_checkpoints(self):
+        optimizer = make_optimizer()
+        optimizer.optimize(n_trials=3, n_jobs=1, checkpoints=0, show_progress_bar=False)
+
+        assert all(not t.intermediate_values for t in optimizer._study.trials)
+
+
+class TestProcessOptimization:
+    """Workers em processos somam trials no mesmo estudo"""
+
+    def test_processes_share_study(self, tmp_path):
+        storage = tmp_path / 'study.journal'
+        optimizer = make_optimizer()
+        result = optimizer.optimize(n_trials=8, n_jobs=2, storage_path=str(storage), seed=0)
+
+        assert 8 <= result.n_trials <= 9
+        assert storage.exists()
+        assert 2 <= result.best_params['lookback'] <= 40
+        assert any(t['state'] == 'COMPLETE' for t in result.all_trials)
+
+    def test_temporary_storage_copied_to_memory(self):
+        optimizer = make_optimizer()
+        result = optimizer.optimize(n_trials=4, n_jobs=2, seed=1)
+
+        assert isinstance(optimizer._study._storage, optuna.storages.InMemoryStorage)
+        assert len(optimizer._study.trials) == result.n_trials
+
+    def test_local_class_falls_back_to_threads(self):
+        class LocalStrategy(MomentumStrategy):
+            pass
+
+        optimizer = StrategyOptimizer(LocalStrategy, PARAM_SPACE, make_bars(600), metric='pnl')
+        result = optimizer.optimize(n_trials=3, n_jobs=2, show_progress_bar=False)
+
+        assert result.n_trials == 3
+
+    def test_walk_forward_in_processes(self):
+        optimizer = make_optimizer(make_bars(3000))
+        results = optimizer.walk_forward_optimize(n_splits=2, n_trials_per_split=4, n_jobs=2)
+
+        assert len(results) == 2
+        assert len(optimizer.data) == 3000
@@ -0,0 +1,91 @@
+"""
+Testes para o tuning paralelo do XGBoost
+Folds temporais pré-montados e estudo compartilhado entre processos
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.parallel_tuning import time_series_folds
+
+
+def make_dataset(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, 6)).astype(np.float32)
+    y = (X[:, 0] - X[:, 1] + rng.standard_normal(n) * 0.5 > 0).astype(int)
+    return X, y
+
+
+class TestTimeSeriesFolds:
+    """Testes para time_series_folds"""
+
+    def test_expanding_window(self):
+        """Treino = tudo antes da validação; validações consecutivas do mesmo tamanho"""
+        folds = time_series_folds(10, 3)
+
+        assert [(list(tr), list(va)) for tr, va in folds] == [
+            ([0, 1, 2, 3], [4, 5]),
+            ([0, 1, 2, 3, 4, 5], [6, 7]),
+            ([0, 1, 2, 3, 4, 5, 6, 7], [8, 9]),
+        ]
+
+    def test_matches_sklearn(self):
+        """Mesma divisão do TimeSeriesSplit"""
+        model_selection = pytest.importorskip('sklearn.model_selection')
+
+        for n, splits in [(100, 3), (257, 5), (31, 2)]:
+            expected = list(model_selection.TimeSeriesSplit(n_splits=splits).split(np.zeros(n)))
+            folds = time_series_folds(n, splits)
+            assert len(folds) == len(expected)
+            for (tr, va), (etr, eva) in zip(folds, expected):
+                np.testing.assert_array_equal(tr, etr)
+                np.testing.assert_array_equal(va, eva)
+
+
+class TestTuneXGBoost:
+    """Busca real (requer optuna e xgboost)"""
+
+    def test_in_process_with_pruning(self):
+        """Estudo no processo respeita n_trials e retorna parâmetros do espaço de busca"""
+        pytest.importorskip('optuna')
+        pytest.importorskip('xgboost')
+        from ml.parallel_tuning import tune_xgboost
+
+        X, y = make_dataset()
+        result = tune_xgboost(X, y, n_trials=8, n_workers=1)
+
+        assert result['n_trials'] == 8
+        assert 3 <= result['best_params']['max_depth'] <= 10
+        assert result['best_value'] > 0.6
+
+    def test_workers_share_study(self, tmp_path):
+        """Workers em processos separados somam trials no mesmo storage"""
+        pytest.importorskip('optuna')
+        pytest.importorskip('xgboost')
+        from ml.parallel_tuning import tune_xgboost
+
+        X, y = make_dataset()
+        storage = tmp_path / 'study.journal'
+        result = tune_xgboost(X, y, n_trials=6, n_workers=2, storage_path=str(storage),
+                              study_name='shared')
+
+        assert 6 <= result['n_trials'] <= 8
+        assert storage.exists()
+        assert result['best_params']
+
+    def test_timeout_budget(self):
+        """Orçamento de tempo encerra a busca antes de n_trials"""
+        pytest.importorskip('optuna')
+        pytest.importorskip('xgboost')
+        from ml.parallel_tuning import tune_xgboost
+
+        X, y = make_dataset(n=3000)
+        result = tune_xgboost(X, y, n_trials=10_000, n_workers=1, timeout=1.0)
+
+        assert result['n_trials'] < 10_000
+        assert result['elapsed_s'] < 30
@@ -0,0 +1,206 @@
+"""
+Testes para o PositionSnapshotService
+Snapshot único de posições compartilhado pelos consumidores
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.mt5_io import MT5IOWorker
+from core.position_snapshot import PositionSnapshot, PositionSnapshotService
+from tests.fakes.fake_mt5 import FakeMT5
+
+
+POSITIONS = [
+    {'ticket': 1, 'symbol': 'XAUUSD', 'type': 0, 'magic': 100, 'profit': 10.0},
+    {'ticket': 2, 'symbol': 'XAUUSD', 'type': 1, 'magic': 200, 'profit': -4.0},
+    {'ticket': 3, 'symbol': 'EURUSD', 'type': 0, 'magic': 100, 'profit': 2.5},
+]
+
+
+class LateReplyMT5(FakeMT5):
+    """order_send executa no terminal, mas a resposta chega depois do prazo"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.reply_delay = 0.0
+
+    def order_send(self, request):
+        result = super().order_send(request)
+        time.sleep(self.reply_delay)
+        return result
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingFetch:
+    """fetch que conta as consultas ao 'MT5'"""
+
+    def __init__(self, positions=None, delay=0.0):
+        self.positions = positions if positions is not None else list(POSITIONS)
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            return None
+        return [dict(p) for p in self.positions]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestPositionSnapshot:
+    """Testes para PositionSnapshot"""
+
+    def test_indices(self):
+        """Índices por ticket, magic e símbolo"""
+        snap = PositionSnapshot.build(1, 0.0, POSITIONS)
+
+        assert len(snap) == 3
+        assert snap.get(2)['magic'] == 200
+        assert snap.get(99) is None
+        assert [p['ticket'] for p in snap.select(symbol='XAUUSD')] == [1, 2]
+        assert [p['ticket'] for p in snap.select(magic=100)] == [1, 3]
+        assert [p['ticket'] for p in snap.select(symbol='EURUSD', magic=100)] == [3]
+        assert snap.count(symbol='GBPUSD') == 0
+        assert snap.total_profit() == pytest.approx(8.5)
+        assert snap.total_profit('XAUUSD') == pytest.approx(6.0)
+
+    def test_immutable(self):
+        """Posições do snapshot não podem ser alteradas; as_dicts devolve cópias"""
+        snap = PositionSnapshot.build(1, 0.0, POSITIONS)
+
+        with pytest.raises(TypeError):
+            snap.positions[0]['profit'] = 0.0
+
+        copies = snap.as_dicts('XAUUSD')
+        copies[0]['profit'] = 0.0
+        assert snap.get(1)['profit'] == 10.0
+
+
+class TestPositionSnapshotService:
+    """Testes para PositionSnapshotService"""
+
+    def test_reads_within_window_share_one_fetch(self, clock):
+        """Vários consumidores na mesma janela geram uma única consulta"""
+        fetch = CountingFetch()
+        service = PositionSnapshotService(fetch, refresh_seconds=1.0, clock=clock)
+
+        snapshots = [service.get_snapshot() for _ in range(50)]
+        assert fetch.calls == 1
+        assert all(s is snapshots[0] for s in snapshots)
+
+        clock.now += 1.5
+        assert service.get_snapshot().version == 2
+        assert fetch.calls == 2
+
+        stats = service.get_stats()
+        assert stats['reads'] == 51
+        assert stats['refreshes'] == 2
+
+    def test_invalidate_forces_refresh(self, clock):
+        """invalidate (ex: após order_send) força nova consulta"""
+        fetch = CountingFetch()
+        service = PositionSnapshotService(fetch, clock=clock)
+        service.get_snapshot()
+
+        fetch.positions = fetch.positions[:1]
+        service.invalidate()
+        snap = service.get_snapshot()
+
+        assert fetch.calls == 2
+        assert len(snap) == 1
+
+    def test_failure_keeps_last_snapshot(self, clock):
+        """Falha na consulta mantém o último snapshot e tenta de novo na próxima leitura"""
+        fetch = CountingFetch()
+        service = PositionSnapshotService(fetch, clock=clock)
+        first = service.get_snapshot()
+
+        fetch.fail = True
+        clock.now += 5
+        assert service.get_snapshot() is first
+        assert service.get_snapshot() is first
+        assert fetch.calls == 3
+        assert service.get_stats()['errors'] == 2
+
+        fetch.fail = False
+        assert service.get_snapshot().version == first.version + 1
+
+    def test_concurrent_readers_single_flight(self):
+        """Leitores concorrentes aguardam a mesma consulta"""
+        fetch = CountingFetch(delay=0.05)
+        service = PositionSnapshotService(fetch, refresh_seconds=10.0)
+        results = []
+
+        def read():
+            results.append(service.get_snapshot())
+
+        threads = [threading.Thread(target=read) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fetch.calls == 1
+        assert len({id(s) for s in results}) == 1
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    """MT5Connector sobre o terminal simulado, com worker e snapshot próprios"""
+    fake = LateReplyMT5(history_minutes=60)
+    if 'MetaTrader5' not in sys.modules:
+        monkeypatch.setitem(sys.modules, 'MetaTrader5', fake)
+    from core import mt5_connector
+    monkeypatch.setattr(mt5_connector, 'mt5', fake)
+
+    conn = mt5_connector.MT5Connector({'mt5': {'login': 1, 'order_timeout_seconds': 0.05}})
+    conn.io = MT5IOWorker(default_timeout=1.0)
+    conn.position_snapshots = PositionSnapshotService(conn._fetch_positions, refresh_seconds=60.0)
+    conn.ensure_connection = lambda: True
+    yield conn, fake
+    conn.io.shutdown()
+
+
+class TestOrderTimeoutInvalidates:
+    """order_send com timeout também invalida o snapshot de posições"""
+
+    def test_timed_out_order_refreshes_snapshot(self, connector):
+        conn, fake = connector
+        assert len(conn.get_position_snapshot()) == 0
+
+        fake.reply_delay = 0.3
+        assert conn.place_order('XAUUSD', 'BUY', 0.1) is None
+
+        # A ordem foi executada no terminal: o próximo leitor consulta de novo
+        assert len(conn.get_position_snapshot()) == 1
+
+    def test_timed_out_close_refreshes_snapshot(self, connector):
+        conn, fake = connector
+        ticket = fake.open_position('XAUUSD', fake.ORDER_TYPE_BUY, 0.1)
+        assert len(conn.get_position_snapshot()) == 1
+
+        fake.reply_delay = 0.3
+        assert conn.close_position(ticket) is False
+
+        assert len(conn.get_position_snapshot()) == 0
@@ -0,0 +1,115 @@
+"""
+Testes para o PrioritizedReplayBuffer
+Sum-tree/min-tree em arrays e experiências em arrays contíguos
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.replay_buffer import Experience, PrioritizedReplayBuffer
+
+
+def fill(buffer, n, state_size=4):
+    for i in range(n):
+        state = np.full(state_size, i, dtype=np.float32)
+        buffer.add_transition(state, i % 4, float(i), state + 1, i % 10 == 9)
+
+
+class TestPrioritizedReplayBuffer:
+    """Testes para PrioritizedReplayBuffer"""
+
+    def test_tree_sums_match_priorities(self):
+        """Raiz da sum-tree/min-tree = soma/mínimo das folhas"""
+        buffer = PrioritizedReplayBuffer(capacity=100, alpha=0.6)
+        fill(buffer, 100)
+        rng = np.random.default_rng(0)
+        td = rng.standard_normal(100) * 5
+        buffer.update_priorities(np.arange(100), td)
+
+        expected = (np.abs(td) + buffer.epsilon) ** 0.6
+        assert buffer._sum[1] == pytest.approx(expected.sum())
+        assert buffer._min[1] == pytest.approx(expected.min())
+
+    def test_ring_overwrites_oldest(self):
+        """Capacidade cheia sobrescreve a experiência mais antiga"""
+        buffer = PrioritizedReplayBuffer(capacity=8)
+        fill(buffer, 11)
+
+        assert len(buffer) == 8
+        assert sorted(buffer._rewards.tolist()) == [3, 4, 5, 6, 7, 8, 9, 10]
+
+    def test_batch_arrays(self):
+        """Batch vem em arrays alinhados pelo índice amostrado"""
+        buffer = PrioritizedReplayBuffer(capacity=64)
+        fill(buffer, 50, state_size=6)
+
+        batch, indices, weights = buffer.sample(16)
+
+        assert batch.states.shape == (16, 6)
+        assert batch.states.dtype == np.float32
+        assert len(batch) == len(indices) == len(weights) == 16
+        assert np.all(batch.rewards == indices)
+        assert np.all(batch.states[:, 0] == indices)
+        assert np.all(batch.next_states == batch.states + 1)
+        assert np.all(batch.actions == indices % 4)
+        assert np.all(batch.dones == (indices % 10 == 9))
+
+    def test_sampling_follows_priorities(self):
+        """Frequência de amostragem proporcional a prioridade ** alpha"""
+        np.random.seed(1)
+        buffer = PrioritizedReplayBuffer(capacity=4, alpha=1.0)
+        fill(buffer, 4)
+        buffer.update_priorities(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+
+        counts = np.zeros(4)
+        for _ in range(2000):
+            _, indices, _ = buffer.sample(4)
+            np.add.at(counts, indices, 1)
+
+        assert counts / counts.sum() == pytest.approx([0.1, 0.2, 0.3, 0.4], abs=0.02)
+
+    def test_importance_weights(self):
+        """Pesos = (P(i) / P_min) ** -beta; a menor prioridade tem peso 1"""
+        buffer = PrioritizedReplayBuffer(capacity=4, alpha=1.0, beta=0.5)
+        fill(buffer, 4)
+        buffer.update_priorities(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+
+        _, indices, weights = buffer.sample(4)
+
+        priorities = indices + 1 + buffer.epsilon
+        expected = (priorities / (1 + buffer.epsilon)) ** -0.5
+        assert weights == pytest.approx(expected)
+        assert buffer.beta == pytest.approx(0.501)
+
+    def test_new_experience_gets_max_priority(self):
+        """Experiência nova entra com a maior prioridade já vista"""
+        buffer = PrioritizedReplayBuffer(capacity=8, alpha=1.0)
+        fill(buffer, 2)
+        buffer.update_priorities(np.array([0, 1]), np.array([0.5, 7.0]))
+        fill(buffer, 1)
+
+        assert buffer._sum[buffer._leaves + 2] == pytest.approx(7.0 + buffer.epsilon)
+
+    def test_add_experience(self):
+        """add(Experience) continua aceito"""
+        buffer = PrioritizedReplayBuffer(capacity=4)
+        buffer.add(Experience(state=np.ones(3), action=2, reward=1.5, next_state=np.zeros(3), done=True))
+
+        batch, _, _ = buffer.sample(1)
+        assert batch.actions[0] == 2
+        assert batch.rewards[0] == 1.5
+        assert batch.dones[0] == 1.0
+
+    def test_non_power_of_two_capacity(self):
+        """Folhas além da capacidade nunca são amostradas"""
+        buffer = PrioritizedReplayBuffer(capacity=5)
+        fill(buffer, 3)
+
+        for _ in range(200):
+            _, indices, _ = buffer.sample(3)
+            assert indices.max() < 3
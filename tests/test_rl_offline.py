@@ -0,0 +1,150 @@
+"""
+Testes para o treino offline do RL
+Features simples de todas as barras numa passada vs cálculo barra a barra;
+episódio offline e paralelo com as mesmas métricas de train_episode
+"""
+
+import asyncio
+import random
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.rl_offline import simple_feature_matrix
+from tests.fakes.market_data import make_ohlcv
+
+
+def reference_features(close: np.ndarray, n_features: int) -> np.ndarray:
+    """Cálculo barra a barra de RLTradingAgent._simple_features"""
+    features = []
+    for period in [1, 2, 5, 10, 20]:
+        features.append((close[-1] - close[-period - 1]) / close[-period - 1] if len(close) > period else 0)
+    if len(close) > 20:
+        features.append((close[-1] - np.mean(close[-20:])) / (np.std(close[-20:]) + 1e-8))
+    else:
+        features.append(0)
+    if len(close) > 14:
+        delta = np.diff(close[-15:])
+        gain = np.mean(delta[delta > 0]) if len(delta[delta > 0]) > 0 else 0
+        loss = -np.mean(delta[delta < 0]) if len(delta[delta < 0]) > 0 else 0
+        features.append((100 - (100 / (1 + gain / (loss + 1e-8)))) / 100)
+    else:
+        features.append(0.5)
+    if len(close) > 20:
+        features.append(np.std(np.diff(close[-20:])) / np.mean(close[-20:]))
+    else:
+        features.append(0)
+    while len(features) < n_features:
+        features.append(0)
+    return np.array(features[:n_features])
+
+
+class TestSimpleFeatureMatrix:
+    """Testes para simple_feature_matrix"""
+
+    @pytest.mark.parametrize('n_features', [53, 8, 5])
+    def test_every_row_matches_reference(self, n_features):
+        """Linha i = features da janela df.iloc[max(0, i-100):i+1]"""
+        close = make_ohlcv(n=260, seed=5)['close'].to_numpy()
+        matrix = simple_feature_matrix(close, n_features)
+
+        assert matrix.shape == (260, n_features)
+        for i in range(260):
+            expected = reference_features(close[max(0, i - 100):i + 1], n_features)
+            np.testing.assert_allclose(matrix[i], expected, rtol=1e-9, atol=1e-12, err_msg=f"barra {i}")
+
+    def test_monotonic_series_rsi(self):
+        """Só altas: RSI 1; só baixas: RSI 0 (sem divisão por zero)"""
+        up = simple_feature_matrix(np.arange(1.0, 40.0), 8)
+        down = simple_feature_matrix(np.arange(40.0, 1.0, -1), 8)
+
+        assert up[20:, 6] == pytest.approx(1.0)
+        assert down[20:, 6] == pytest.approx(0.0, abs=1e-6)
+        assert np.all(up[:14, 6] == 0.5)
+
+    def test_short_series(self):
+        """Série menor que os lookbacks: só aquecimento"""
+        matrix = simple_feature_matrix(np.array([100.0, 101.0, 102.0]), 10)
+
+        assert matrix.shape == (3, 10)
+        assert matrix[2, 0] == pytest.approx(1 / 101)
+        assert matrix[2, 1] == pytest.approx(0.02)
+        assert np.all(matrix[:, 2:6] == 0)
+
+    def test_matches_agent_simple_features(self, tmp_path):
+        """Mesmo resultado do método do agente"""
+        pytest.importorskip('tensorflow')
+        from ml.rl_agent import RLTradingAgent
+
+        agent = RLTradingAgent({'state_size': 60}, data_dir=str(tmp_path))
+        df = make_ohlcv(n=200, seed=2)
+        matrix = simple_feature_matrix(df['close'].to_numpy(), agent.state_size - 7)
+
+        for i in range(50, 199):
+            expected = agent._simple_features(df.iloc[max(0, i - 100):i + 1])
+            np.testing.assert_allclose(matrix[i], expected, rtol=1e-9, atol=1e-12)
+
+
+# Rede pequena e epsilon fixo em 1: ações dependem só da semente, não dos pesos
+AGENT_CONFIG = {
+    'state_size': 20,
+    'hidden_layers': [16],
+    'batch_size': 16,
+    'buffer_size': 2000,
+    'epsilon': 1.0,
+    'epsilon_min': 1.0
+}
+
+
+def run_seeded(coroutine_factory, seed=11):
+    random.seed(seed)
+    np.random.seed(seed)
+    return asyncio.run(coroutine_factory())
+
+
+class TestOfflineEpisode:
+    """train_episode_offline / train_episodes_parallel (requer TensorFlow)"""
+
+    def test_offline_metrics_match_train_episode(self, tmp_path):
+        """Mesma semente: recompensa, trades e win rate iguais ao episódio original"""
+        pytest.importorskip('tensorflow')
+        from ml.rl_agent import RLTradingAgent
+
+        df = make_ohlcv(n=220, seed=4)
+        online = RLTradingAgent(AGENT_CONFIG, data_dir=str(tmp_path / 'online'))
+        offline = RLTradingAgent(AGENT_CONFIG, data_dir=str(tmp_path / 'offline'))
+
+        expected = run_seeded(lambda: online.train_episode('XAUUSD', df))
+        result = run_seeded(lambda: offline.train_episode_offline('XAUUSD', df))
+
+        assert expected['trades'] > 0
+        assert result['trades'] == expected['trades']
+        assert result['win_rate'] == pytest.approx(expected['win_rate'])
+        assert result['total_reward'] == pytest.approx(expected['total_reward'], rel=1e-9, abs=1e-12)
+        assert result['sharpe'] == pytest.approx(expected['sharpe'], rel=1e-6)
+        assert len(offline.replay_buffer) == len(online.replay_buffer)
+
+    def test_parallel_returns_one_result_per_episode_in_order(self, tmp_path):
+        """Um resultado por símbolo, na ordem dos episódios, sem erros"""
+        pytest.importorskip('tensorflow')
+        from ml.rl_agent import RLTradingAgent
+
+        agent = RLTradingAgent(AGENT_CONFIG, data_dir=str(tmp_path))
+        episodes = {
+            'XAUUSD': make_ohlcv(n=150, seed=1),
+            'EURUSD': make_ohlcv(n=150, seed=2),
+            'GBPUSD': make_ohlcv(n=150, seed=3),
+        }
+
+        results = asyncio.run(agent.train_episodes_parallel(episodes, max_workers=2))
+
+        assert list(results) == list(episodes)
+        for metrics in results.values():
+            assert 'error' not in metrics
+            assert set(metrics) == {'total_reward', 'trades', 'win_rate', 'sharpe', 'epsilon'}
+            assert 0.0 <= metrics['win_rate'] <= 1.0
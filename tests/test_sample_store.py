@@ -0,0 +1,184 @@
+"""
+Testes para o SampleStore
+Colunas append-only em memória e segmentos compactados em disco
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.sample_store import SampleStore, PARQUET_AVAILABLE
+
+NAMES = ['rsi', 'atr', 'spread']
+
+
+def fill(store, n, offset=0):
+    base = datetime(2024, 1, 1)
+    for i in range(offset, offset + n):
+        store.append(np.array([i, i * 0.5, -i]), target=i % 2, profit_pips=i * 0.1,
+                     timestamp=base + timedelta(minutes=i))
+
+
+def segment_files(directory):
+    return sorted(p.name for p in directory.iterdir() if not p.name.startswith('.'))
+
+
+class TestSampleStore:
+    """Testes para SampleStore"""
+
+    def test_append_grows_columns(self, tmp_path):
+        """Capacidade dobra sem perder linhas; features em float32"""
+        store = SampleStore(tmp_path / 'store', NAMES, segment_size=1000, initial_capacity=4)
+        fill(store, 37)
+
+        assert len(store) == 37
+        assert store.features.dtype == np.float32
+        assert store.features.shape == (37, 3)
+        np.testing.assert_array_equal(store.features[:, 0], np.arange(37))
+        np.testing.assert_array_equal(store.targets, np.arange(37) % 2)
+        assert store.get_stats()['capacity'] == 64
+        assert store.pending == 37
+
+    def test_features_are_views(self, tmp_path):
+        """Matriz de treino sem cópia"""
+        store = SampleStore(tmp_path / 'store', NAMES)
+        fill(store, 10)
+
+        assert np.shares_memory(store.features, store._features)
+
+    def test_segments_compact_logarithmically(self, tmp_path):
+        """Segmentos seguem contador binário: O(log n) arquivos"""
+        directory = tmp_path / 'store'
+        store = SampleStore(directory, NAMES, segment_size=10, segment_format='npz')
+        fill(store, 70)
+
+        # 7 flushes de 10 -> segmentos de 40, 20 e 10
+        assert segment_files(directory) == [
+            '000000000000_000000000040.npz',
+            '000000000040_000000000060.npz',
+            '000000000060_000000000070.npz'
+        ]
+        assert store.stats['flushes'] == 7
+        assert store.stats['compactions'] == 4
+
+        fill(store, 10, offset=70)
+        assert segment_files(directory) == ['000000000000_000000000080.npz']
+
+    def test_reload_round_trip(self, tmp_path):
+        """Store reaberto tem as mesmas amostras (pendentes não gravadas ficam de fora)"""
+        directory = tmp_path / 'store'
+        store = SampleStore(directory, NAMES, segment_size=8, segment_format='npz')
+        fill(store, 53)
+
+        reloaded = SampleStore(directory, segment_size=8, segment_format='npz')
+
+        assert len(reloaded) == 48
+        assert reloaded.feature_names == NAMES
+        np.testing.assert_array_equal(reloaded.features, store.features[:48])
+        np.testing.assert_array_equal(reloaded.targets, store.targets[:48])
+        np.testing.assert_array_equal(reloaded.profit_pips, store.profit_pips[:48])
+        np.testing.assert_array_equal(reloaded.timestamps, store.timestamps[:48])
+
+        # Continua anexando após a carga
+        fill(reloaded, 8, offset=48)
+        assert len(SampleStore(directory, segment_format='npz')) == 56
+
+    def test_interrupted_compaction(self, tmp_path):
+        """Segmento unido e originais no disco: carga usa o unido e remove os originais"""
+        directory = tmp_path / 'store'
+        store = SampleStore(directory, NAMES, segment_size=10, segment_format='npz')
+        fill(store, 30)
+        store._write_segment(0, 10)
+        store._write_segment(10, 20)
+
+        reloaded = SampleStore(directory, segment_format='npz')
+
+        assert len(reloaded) == 30
+        assert segment_files(directory) == [
+            '000000000000_000000000020.npz',
+            '000000000020_000000000030.npz'
+        ]
+
+    def test_leftover_tmp_removed_on_load(self, tmp_path):
+        """Temporário de compactação interrompida antes do rename é apagado na carga"""
+        directory = tmp_path / 'store'
+        store = SampleStore(directory, NAMES, segment_size=10, segment_format='npz')
+        fill(store, 30)
+        leftover = directory / '.000000000000_000000000030.tmp'
+        leftover.write_bytes(b'parcial')
+
+        reloaded = SampleStore(directory, segment_format='npz')
+
+        assert len(reloaded) == 30
+        assert not leftover.exists()
+        assert sorted(p.name for p in directory.iterdir()) == segment_files(directory)
+
+    def test_wrong_feature_count(self, tmp_path):
+        """Amostra com número diferente de features é rejeitada"""
+        store = SampleStore(tmp_path / 'store', NAMES)
+
+        with pytest.raises(ValueError):
+            store.append(np.zeros(5), target=1)
+        assert len(store) == 0
+
+    def test_import_legacy_frame(self, tmp_path):
+        """DataFrame do parquet antigo vira segmento"""
+        frame = pd.DataFrame({
+            'rsi': [30.0, 70.0], 'atr': [1.0, 2.0],
+            'target': [0, 1], 'profit_pips': [-5.0, 12.5],
+            'timestamp': [datetime(2024, 1, 1), datetime(2024, 1, 2)]
+        })
+        directory = tmp_path / 'store'
+        store = SampleStore(directory, segment_format='npz')
+        store.import_frame(frame)
+
+        reloaded = SampleStore(directory, segment_format='npz')
+        assert reloaded.feature_names == ['rsi', 'atr']
+        np.testing.assert_array_equal(reloaded.features, [[30, 1], [70, 2]])
+        pd.testing.assert_frame_equal(reloaded.to_frame(), frame, check_dtype=False)
+
+    def test_parquet_segments(self, tmp_path):
+        """Segmentos parquet com o layout de colunas antigo"""
+        if not PARQUET_AVAILABLE:
+            pytest.skip("pyarrow/fastparquet não disponível")
+        directory = tmp_path / 'store'
+        store = SampleStore(directory, NAMES, segment_size=5, segment_format='parquet')
+        fill(store, 20)
+
+        frame = pd.read_parquet(directory / '000000000000_000000000020.parquet')
+        assert list(frame.columns) == NAMES + ['target', 'profit_pips', 'timestamp']
+        np.testing.assert_array_equal(SampleStore(directory).features, store.features)
+
+
+class TestPredictorSampleStore:
+    """XGBoostSignalPredictor sobre o SampleStore"""
+
+    def test_add_training_sample(self, tmp_path):
+        """Amostras anexadas ao store e segmentos gravados a cada training_segment_size"""
+        pytest.importorskip('xgboost')
+        from ml.xgboost_predictor import XGBoostSignalPredictor
+
+        predictor = XGBoostSignalPredictor(
+            {'training_segment_size': 5, 'min_training_samples': 1000}, data_dir=str(tmp_path)
+        )
+        for i in range(12):
+            asyncio.run(predictor.add_training_sample(
+                np.array([i, i + 1.0]), ['a', 'b'], 'EURUSD', 'trend', i % 3 == 0, i
+            ))
+
+        store = predictor._training_data['EURUSD_trend']
+        assert len(store) == 12
+        assert store.pending == 2
+
+        reloaded = XGBoostSignalPredictor(data_dir=str(tmp_path))
+        data = asyncio.run(reloaded._load_training_data('EURUSD_trend'))
+        assert len(data) == 10
+        np.testing.assert_array_equal(data.features, store.features[:10])
@@ -0,0 +1,152 @@
+"""
+Testes para o SequenceDataset
+Janelas deslizantes sem cópia vs lista de fatias materializada
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.sequence_dataset import SequenceDataset, save_feature_file
+
+
+def make_features(n=200, n_features=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, n_features)).astype(np.float32)
+
+
+def reference_windows(features, lookback, n_windows):
+    return np.array([features[i:i + lookback] for i in range(n_windows)])
+
+
+class TestSequenceDataset:
+    """Testes para SequenceDataset"""
+
+    def test_windows_match_slices(self):
+        """Janela i = features[i:i + lookback]"""
+        features = make_features()
+        dataset = SequenceDataset(features, lookback=20)
+
+        assert len(dataset) == 181
+        assert dataset.shape == (181, 20, 6)
+        np.testing.assert_array_equal(dataset.to_array(), reference_windows(features, 20, 181))
+
+    def test_windows_are_views(self):
+        """Nenhuma cópia até materializar o batch"""
+        features = make_features()
+        dataset = SequenceDataset(features, lookback=30)
+        train, val = dataset.split(0.2)
+
+        assert np.shares_memory(dataset.windows, features)
+        assert np.shares_memory(val.windows, features)
+        assert not np.shares_memory(dataset.batch(slice(0, 8)), features)
+
+    def test_split_and_targets(self):
+        """Split temporal preserva o alinhamento janela/alvo"""
+        features = make_features()
+        targets = {'direction': np.arange(200) % 2}
+        dataset = SequenceDataset(features, lookback=10, n_windows=150, targets=targets)
+        train, val = dataset.split(0.2)
+
+        assert (len(train), len(val)) == (120, 30)
+        np.testing.assert_array_equal(val.batch(slice(0, 1))[0], features[120:130])
+        np.testing.assert_array_equal(val.targets['direction'], targets['direction'][120:150])
+
+    def test_subset(self):
+        """subset(start, stop) = janelas start..stop-1"""
+        features = make_features()
+        dataset = SequenceDataset(features, lookback=5).subset(40, 60)
+
+        assert len(dataset) == 20
+        np.testing.assert_array_equal(dataset.to_array(), reference_windows(features[40:], 5, 20))
+
+    def test_normalization_per_batch(self):
+        """(janela - mean) / std aplicado no batch, features intactas"""
+        features = make_features()
+        original = features.copy()
+        mean, std = features.mean(axis=0), features.std(axis=0)
+        dataset = SequenceDataset(features, lookback=12, mean=mean, std=std)
+
+        expected = reference_windows((features - mean) / std, 12, len(dataset))
+        np.testing.assert_allclose(dataset.to_array(), expected, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(dataset.batch(np.array([3, 50])), expected[[3, 50]], rtol=1e-5, atol=1e-6)
+        np.testing.assert_array_equal(features, original)
+
+    def test_memmap_file(self, tmp_path):
+        """Dataset sobre .npy mapeado em memória"""
+        features = make_features(n=500)
+        path = tmp_path / 'features.npy'
+        mapped = save_feature_file(path, features)
+        dataset = SequenceDataset.from_file(path, lookback=60)
+
+        assert isinstance(mapped, np.memmap)
+        assert isinstance(dataset.features, np.memmap)
+        np.testing.assert_array_equal(dataset.batch(slice(100, 104)), reference_windows(features[100:], 60, 4))
+
+    def test_shuffled_batches_cover_all_windows(self):
+        """Batches embaralhados visitam cada janela exatamente uma vez"""
+        features = make_features()
+        targets = {'index': np.arange(200)}
+        dataset = SequenceDataset(features, lookback=8, targets=targets)
+
+        seen = []
+        for X, y in dataset.batches(32, shuffle=True, seed=3):
+            assert np.all(np.diff(y['index']) > 0)
+            np.testing.assert_array_equal(X[:, 0], features[y['index']])
+            seen.extend(y['index'])
+
+        assert sorted(seen) == list(range(len(dataset)))
+        assert seen != sorted(seen)
+
+    def test_drop_last(self):
+        """drop_last descarta o batch incompleto"""
+        dataset = SequenceDataset(make_features(n=107), lookback=8)
+
+        sizes = [len(X) for X, _ in dataset.batches(25)]
+        assert sizes == [25, 25, 25, 25]
+        sizes = [len(X) for X, _ in dataset.batches(30)]
+        assert sizes == [30, 30, 30, 10]
+        sizes = [len(X) for X, _ in dataset.batches(30, drop_last=True)]
+        assert sizes == [30, 30, 30]
+
+    def test_too_short(self):
+        """Série menor que o lookback: dataset vazio"""
+        dataset = SequenceDataset(make_features(n=5), lookback=10)
+
+        assert len(dataset) == 0
+        assert dataset.to_array().shape == (0, 10, 6)
+
+
+class TestTransformerPrepareData:
+    """Labels vetorizados do TransformerPricePredictor vs loop por janela"""
+
+    def test_labels_match_loop(self):
+        """direction / magnitude / volatility iguais ao cálculo por janela"""
+        from ml.transformer_predictor import TransformerConfig, TransformerPricePredictor
+
+        rng = np.random.default_rng(4)
+        close = 100 + np.cumsum(rng.standard_normal(300) * 0.3)
+        ohlcv = np.column_stack([close, close + 0.2, close - 0.2, close, rng.random(300) * 1000])
+        predictor = TransformerPricePredictor(TransformerConfig(seq_length=20, forecast_horizon=5))
+
+        dataset, y = predictor.prepare_data(ohlcv)
+
+        n_windows = 300 - 20 - 5 + 1
+        assert len(dataset) == n_windows
+        normalized = (ohlcv - ohlcv.mean(axis=0)) / ohlcv.std(axis=0)
+        np.testing.assert_allclose(dataset.to_array(), reference_windows(normalized, 20, n_windows),
+                                   rtol=1e-4, atol=1e-5)
+        for i in range(n_windows):
+            future = ohlcv[i + 20:i + 25, 3]
+            current = ohlcv[i + 19, 3]
+            total_change = (future[-1] - current) / current * 100
+            direction = 0 if total_change > 0.1 else 1 if total_change < -0.1 else 2
+            returns = np.diff(future, prepend=current) / current * 100
+
+            assert y['direction'][i] == direction
+            np.testing.assert_allclose(y['magnitude'][i], returns, rtol=1e-9)
+            np.testing.assert_allclose(y['volatility'][i], [np.std(returns)] * 5, rtol=1e-9)
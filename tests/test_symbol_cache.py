@@ -0,0 +1,122 @@
+"""
+Testes para o SymbolInfoCache
+Campos de contrato em cache longo, cotação em snapshot curto
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.symbol_cache import SymbolInfoCache
+from tests.fakes.fake_mt5 import FakeMT5
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake():
+    return FakeMT5(history_minutes=60 * 24)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(fake, clock):
+    return SymbolInfoCache(fake.symbol_info, fake.symbol_info_tick,
+                           static_ttl_seconds=3600, quote_ttl_seconds=0.25, clock=clock)
+
+
+class TestSymbolInfoCache:
+    """Testes para SymbolInfoCache"""
+
+    def test_matches_symbol_info(self, fake, cache):
+        """Formato e valores iguais ao get_symbol_info original"""
+        info = cache.get_symbol_info('XAUUSD')
+        raw = fake.symbol_info('XAUUSD')
+
+        assert info['point'] == raw.point
+        assert info['digits'] == raw.digits
+        assert info['volume_step'] == raw.volume_step
+        assert info['trade_contract_size'] == raw.trade_contract_size
+        assert info['bid'] == raw.bid
+        assert info['ask'] == raw.ask
+        assert info['spread'] == pytest.approx((raw.ask - raw.bid) / raw.point / 10)
+        assert info['spread_points'] == raw.spread
+
+    def test_pre_trade_check_uses_one_call(self, fake, cache):
+        """Verificação pré-trade (várias leituras) custa uma única consulta ao MT5"""
+        cache.get_symbol_info('XAUUSD')
+        fake.reset_calls()
+
+        for _ in range(5):
+            cache.get_symbol_info('XAUUSD', static_only=True)
+        cache.get_symbol_info('XAUUSD')
+
+        assert sum(fake.calls.values()) == 0
+
+        stats = cache.get_stats()
+        assert stats['static_hit_rate'] == pytest.approx(6 / 7)
+        # A cotação do symbol_info inicial serve as duas leituras com tick
+        assert stats['quote_hits'] == 2
+        assert stats['quote_misses'] == 0
+
+    def test_quote_expires_static_does_not(self, fake, cache, clock):
+        """Cotação vencida busca só o tick; contrato continua em cache"""
+        cache.get_symbol_info('XAUUSD')
+        fake.reset_calls()
+
+        fake.advance(60)
+        clock.now += 1.0
+        info = cache.get_symbol_info('XAUUSD')
+
+        assert fake.calls['symbol_info'] == 0
+        assert fake.calls['symbol_info_tick'] == 1
+        assert info['bid'] == fake.symbol_info_tick('XAUUSD').bid
+
+    def test_unchanged_tick_keeps_version(self, fake, cache, clock):
+        """Tick repetido (mesmo time_msc) não gera nova versão"""
+        first = cache.get_quote('EURUSD', max_age=0)
+        clock.now += 1.0
+        second = cache.get_quote('EURUSD', max_age=0)
+
+        assert second['version'] == first['version']
+        assert cache.get_stats()['quote_unchanged'] == 1
+
+        fake.advance(60)
+        clock.now += 1.0
+        assert cache.get_quote('EURUSD', max_age=0)['version'] == first['version'] + 1
+
+    def test_invalidate_static_reloads_contract(self, fake, cache):
+        """invalidate_static (reconexão) força novo symbol_info"""
+        cache.get_static('XAUUSD')
+        cache.invalidate_static()
+        fake.reset_calls()
+
+        cache.get_static('XAUUSD')
+        assert fake.calls['symbol_info'] == 1
+
+    def test_contract_change_detected(self, fake, cache, clock):
+        """Contrato renovado após o TTL com campo alterado é contado"""
+        cache.get_static('XAUUSD')
+        fake.symbols['XAUUSD']['contract'] = 50
+        clock.now += 3601
+
+        assert cache.get_static('XAUUSD')['trade_contract_size'] == 50
+        assert cache.get_stats()['static_changes'] == 1
+
+    def test_unknown_symbol(self, cache):
+        """Símbolo inexistente retorna None"""
+        assert cache.get_symbol_info('NOPE') is None
+        assert cache.get_stats()['errors'] == 1
@@ -0,0 +1,172 @@
+"""
+Testes para o backtester vetorizado (backtesting.vectorized)
+Simulação em blocos vs loop escalar barra a barra
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backtesting.backtest_engine import MarketRegime
+from backtesting.vectorized import VectorizedBacktester, atr_array, sma_crossover_signals
+from tests.fakes.market_data import make_bars
+
+
+# Barras M15 de ouro, índice de tempo e sem volume
+GOLD_BARS = dict(freq='15min', start_price=1900, step=1.5, spread=1.2,
+                 volume_column=None, time_column=None)
+
+
+def random_signals(n, width, seed=1, rate=0.02):
+    rng = np.random.default_rng(seed)
+    longs = rng.random((n, width)) < rate
+    shorts = rng.random((n, width)) < rate
+    exits = rng.random((n, width)) < rate
+    return longs, shorts, exits
+
+
+def reference(bt, data, longs, shorts, long_exits, short_exits, sl_atr, tp_atr, atr, symbol='XAUUSD'):
+    """Loop escalar com o mesmo modelo de execução (uma coluna)"""
+    high, low, close = (data[c].to_numpy() for c in ('high', 'low', 'close'))
+    regimes = bt.regime_detector.detect_regimes(data)
+    balance = bt.initial_capital
+    trades, equity, pos = [], [], None
+
+    for t in range(len(data)):
+        if pos is not None:
+            buy = pos['buy']
+            hit_sl = low[t] <= pos['sl'] if buy else high[t] >= pos['sl']
+            hit_tp = high[t] >= pos['tp'] if buy else low[t] <= pos['tp']
+            signal = long_exits[t] if buy else short_exits[t]
+            if hit_sl or hit_tp or signal:
+                price = pos['sl'] if hit_sl else pos['tp'] if hit_tp else close[t]
+                balance += close_trade(bt, pos, t, price, data, symbol, trades)
+                pos = None
+                equity.append(balance)
+                continue
+        if pos is None and (longs[t] or shorts[t]) and np.isfinite(atr[t]) and atr[t] > 0:
+            buy = bool(longs[t])
+            side = 1 if buy else -1
+            sl_distance = atr[t] * sl_atr
+            volume = min(max(balance * bt.risk_per_trade / (sl_distance * 10), 0.01), 1.0)
+            pos = {
+                'buy': buy, 'entry': t, 'price': close[t], 'volume': volume,
+                'sl': close[t] - side * sl_distance, 'tp': close[t] + side * atr[t] * tp_atr,
+                'volatile': regimes[t] == MarketRegime.HIGH_VOLATILITY,
+            }
+        if pos is None:
+            equity.append(balance)
+        else:
+            side = 1 if pos['buy'] else -1
+            equity.append(balance + side * (close[t] - pos['price']) * pos['volume'] * 100)
+
+    if pos is not None:
+        balance += close_trade(bt, pos, len(data) - 1, close[-1], data, symbol, trades)
+        equity[-1] = balance
+    return trades, np.array(equity)
+
+
+def close_trade(bt, pos, t, price, data, symbol, trades):
+    side = 1 if pos['buy'] else -1
+    gross = side * (price - pos['price']) * pos['volume'] * 100
+    minutes = int((data.index[t] - data.index[pos['entry']]).total_seconds() / 60)
+    costs = bt.cost_calculator.calculate_costs(
+        symbol, 'buy' if pos['buy'] else 'sell', pos['volume'], minutes / (60 * 24),
+        is_volatile_period=pos['volatile']
+    )
+    net = gross - costs.total
+    trades.append((pos['entry'], t, price, net))
+    return net
+
+
+class TestVectorizedBacktester:
+    """Resultado idêntico ao loop escalar"""
+
+    def test_batch_matches_reference_loop(self):
+        data = make_bars(3000, **GOLD_BARS)
+        longs, shorts, exits = random_signals(len(data), 6)
+        sl_atr = np.array([1.0, 1.5, 2.0, 2.5, 3.0, 0.5])
+        tp_atr = np.array([3.0, 2.0, 1.0, 4.0, 2.0, 1.0])
+        atr = atr_array(data)
+
+        bt = VectorizedBacktester()
+        result = bt.run(data, longs, shorts, exits, exits, sl_atr=sl_atr, tp_atr=tp_atr)
+
+        reasons = set()
+        for c in range(6):
+            trades, equity = reference(
+                bt, data, longs[:, c], shorts[:, c], exits[:, c], exits[:, c], sl_atr[c], tp_atr[c], atr
+            )
+            got = result.trades[result.trades['column'] == c]
+            assert list(got['entry_index']) == [t[0] for t in trades]
+            assert list(got['exit_index']) == [t[1] for t in trades]
+            np.testing.assert_allclose(got['exit_price'], [t[2] for t in trades])
+            np.testing.assert_allclose(got['net_profit'], [t[3] for t in trades])
+            np.testing.assert_allclose(result.equity[:, c], equity)
+            assert result.total_trades[c] == len(trades)
+            assert result.net_profit[c] == pytest.approx(sum(t[3] for t in trades))
+            reasons |= set(got['exit_reason'])
+
+        assert {'stop_loss', 'take_profit', 'signal'} <= reasons
+
+    def test_opposite_signal_exits_by_default(self):
+        data = make_bars(800, seed=4, **GOLD_BARS)
+        longs, shorts, _ = random_signals(len(data), 1, seed=5)
+        atr = atr_array(data)
+
+        bt = VectorizedBacktester()
+        result = bt.run(data, longs[:, 0], shorts[:, 0], sl_atr=50, tp_atr=50)
+        trades, _ = reference(bt, data, longs[:, 0], shorts[:, 0], shorts[:, 0], longs[:, 0], 50, 50, atr)
+
+        assert list(result.trades['exit_index']) == [t[1] for t in trades]
+        assert set(result.trades['exit_reason']) <= {'signal', 'end_of_data'}
+
+    def test_grid_columns_match_single_runs(self):
+        data = make_bars(2000, seed=2, **GOLD_BARS)
+
+        def signal_func(data, fast_period, slow_period):
+            signals = sma_crossover_signals(data, [fast_period], [slow_period])
+            return {k: v[:, 0] for k, v in signals.items() if k != 'params'}
+
+        bt = VectorizedBacktester()
+        grid = {'fast_period': [5, 10], 'slow_period': [20, 40], 'sl_atr': [1.5, 2.5]}
+        result = bt.run_grid(data, signal_func, grid, chunk_size=3)
+        frame = result.to_frame()
+
+        assert len(frame) == 8
+        assert result.equity is None
+        for c, params in enumerate(result.params):
+            signals = signal_func(data, params['fast_period'], params['slow_period'])
+            single = bt.run(data, **signals, sl_atr=params['sl_atr'])
+            assert single.total_trades[0] == frame['total_trades'][c]
+            assert single.net_profit[0] == pytest.approx(frame['net_profit'][c])
+            assert single.max_drawdown[0] == pytest.approx(frame['max_drawdown'][c])
+            got = result.trades[result.trades['column'] == c].reset_index(drop=True)
+            pd.testing.assert_frame_equal(got.drop(columns='column'), single.trades.drop(columns='column'))
+        assert result.best('net_profit')['net_profit'] == frame['net_profit'].max()
+
+    def test_sma_signals_follow_crossovers(self):
+        data = make_bars(500, seed=6, **GOLD_BARS)
+        signals = sma_crossover_signals(data, [5, 30], [20])
+
+        assert signals['params'] == [{'fast_period': 5, 'slow_period': 20}]
+        fast = data['close'].rolling(5).mean()
+        slow = data['close'].rolling(20).mean()
+        cross_up = (fast > slow) & (fast.shift() <= slow.shift())
+        cross_up.iloc[:21] = False
+        np.testing.assert_array_equal(signals['long_entries'][:, 0], cross_up.to_numpy())
+        np.testing.assert_array_equal(signals['long_exits'][:, 0], (fast < slow).to_numpy())
+
+    def test_no_signals(self):
+        data = make_bars(300, **GOLD_BARS)
+        empty = np.zeros((len(data), 3), dtype=bool)
+        result = VectorizedBacktester().run(data, empty, empty)
+
+        assert list(result.total_trades) == [0, 0, 0]
+        assert result.trades.empty
+        np.testing.assert_array_equal(result.equity, 10000)
@@ -0,0 +1,140 @@
+"""
+Testes para o walk-forward paralelo
+Janelas e combinações em processos com dados compartilhados via memmap
+"""
+
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backtesting.walk_forward import (
+    WalkForwardOptimizer, WalkForwardStatus, load_shared_frame, share_frame
+)
+
+
+PARAM_GRID = {'fast': [5, 10, 20], 'slow': [30, 60, 90]}
+
+
+def make_data(days=240, seed=0):
+    rng = np.random.default_rng(seed)
+    n = days * 24
+    close = 100 * np.exp(np.cumsum(rng.standard_normal(n) * 0.004))
+    return pd.DataFrame({
+        'close': close,
+        'volume': rng.integers(100, 1000, n)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='1h'))
+
+
+def ma_crossover(data, params):
+    """Estratégia de teste (função de módulo: picklável para os workers)"""
+    close = data['close']
+    fast = close.rolling(params['fast']).mean().to_numpy()
+    slow = close.rolling(params['slow']).mean().to_numpy()
+    above = fast > slow
+    crosses = np.flatnonzero(above[1:] != above[:-1]) + 1
+    prices = close.to_numpy()
+
+    trades = []
+    for entry, exit_ in zip(crosses[:-1], crosses[1:]):
+        side = 1 if above[entry] else -1
+        trades.append({'pnl_percent': side * (prices[exit_] / prices[entry] - 1)})
+    return trades
+
+
+def make_optimizer(tmp_path, **wf_config):
+    config = {'walk_forward': {'num_windows': 4, 'min_trades': 5, **wf_config}}
+    return WalkForwardOptimizer(config, data_dir=str(tmp_path))
+
+
+class TestSharedFrame:
+    """Dados gravados uma vez e reabertos como memmap"""
+
+    def test_round_trip(self, tmp_path):
+        data = make_data(days=5)
+        data.index = data.index.tz_localize('America/Sao_Paulo')
+        data.index.name = 'time'
+        data['symbol'] = 'XAUUSD'
+
+        share_frame(data, str(tmp_path))
+        loaded = load_shared_frame(str(tmp_path))
+
+        pd.testing.assert_frame_equal(loaded, data)
+
+        # Colunas numéricas apontam para o arquivo (sem cópia)
+        values = loaded['close'].to_numpy()
+        while values.base is not None and not isinstance(values, np.memmap):
+            values = values.base
+        assert isinstance(values, np.memmap)
+
+
+class TestParallelWalkForward:
+    """Resultado paralelo idêntico ao sequencial"""
+
+    def test_parallel_matches_sequential(self, tmp_path):
+        data = make_data()
+
+        sequential = make_optimizer(tmp_path).run_walk_forward(
+            'seq', data, ma_crossover, PARAM_GRID, n_jobs=1
+        )
+        parallel = make_optimizer(tmp_path).run_walk_forward(
+            'par', data, ma_crossover, PARAM_GRID, n_jobs=2
+        )
+
+        assert len(parallel.windows) == 4
+        assert [w.status for w in sequential.windows] == [WalkForwardStatus.COMPLETED] * 4
+        for seq_window, par_window in zip(sequential.windows, parallel.windows):
+            assert par_window.id == seq_window.id
+            assert par_window.status == seq_window.status
+            assert par_window.best_params == seq_window.best_params
+            assert par_window.in_sample_metrics == seq_window.in_sample_metrics
+            assert par_window.out_sample_metrics == seq_window.out_sample_metrics
+        assert parallel.recommended_params == sequential.recommended_params
+
+    def test_progress_and_eta(self, tmp_path):
+        data = make_data()
+        optimizer = make_optimizer(tmp_path, n_jobs=2)
+        snapshots = []
+
+        optimizer.run_walk_forward(
+            'progress', data, ma_crossover, PARAM_GRID,
+            progress_callback=lambda p: snapshots.append((p.completed_tasks, p.windows_completed, p.eta_s))
+        )
+
+        progress = optimizer.get_progress()
+        assert progress.n_jobs == 2
+        assert progress.total_tasks == 4 * (9 + 1)
+        assert progress.completed_tasks == progress.total_tasks
+        assert progress.windows_completed == 4
+        assert progress.percent == 100.0
+        assert progress.eta_s == 0
+
+        done = [s[0] for s in snapshots]
+        assert done == sorted(done)
+        assert all(eta is not None and eta >= 0 for _, _, eta in snapshots)
+
+    def test_insufficient_window_fails_in_both_modes(self, tmp_path):
+        data = make_data()
+        data = data[(data.index < '2024-03-01') | (data.index >= '2024-04-15')]
+
+        results = [
+            make_optimizer(tmp_path).run_walk_forward(
+                f'gap_{n_jobs}', data, ma_crossover, PARAM_GRID, n_jobs=n_jobs
+            )
+            for n_jobs in (1, 2)
+        ]
+
+        statuses = [[w.status for w in r.windows] for r in results]
+        assert statuses[0] == statuses[1]
+        assert WalkForwardStatus.FAILED in statuses[0]
+        assert WalkForwardStatus.COMPLETED in statuses[0]
+
+    def test_unpicklable_strategy_runs_sequentially(self, tmp_path):
+        optimizer = make_optimizer(tmp_path)
+
+        assert optimizer._resolve_n_jobs(4, lambda data, params: []) == 1
+        assert optimizer._resolve_n_jobs(4, ma_crossover) == 4
+        assert optimizer._resolve_n_jobs(-1, ma_crossover) == (os.cpu_count() or 1)